@@ -1,5 +1,5 @@
 """Configuration package"""
-from .database import Database, db
+from .database import Database, TransactionAborted, db
 from .settings import DatabaseConfig, AppConfig
 
-__all__ = ['Database', 'db', 'DatabaseConfig', 'AppConfig']
\ No newline at end of file
+__all__ = ['Database', 'TransactionAborted', 'db', 'DatabaseConfig', 'AppConfig']
\ No newline at end of file
@@ -0,0 +1,289 @@
+"""
+Connection Pool - Pool connection MySQL có chờ, vượt mức và kiểm tra sống
+
+Pool của mysql.connector báo lỗi ngay khi hết connection (get_connection trả về
+None, service trả về danh sách rỗng). Pool này:
+- Chờ tối đa timeout giây khi hết connection thay vì báo lỗi ngay
+- Cho mở thêm max_overflow connection tạm khi tải cao (đóng khi trả về)
+- Ping connection đã nằm yên lâu trước khi đưa ra (server có thể đã đóng)
+- Đếm số lần lấy, phải chờ, hết connection... (stats())
+- Giữ prepared statement (cursor prepared=True) theo từng connection để dùng lại
+"""
+import logging
+import threading
+import time
+from collections import OrderedDict
+from typing import Callable, Dict, List, Optional, Tuple
+
+from mysql.connector import Error
+
+logger = logging.getLogger(__name__)
+
+
+class PoolExhausted(Error):
+    """Hết connection sau khi chờ hết timeout"""
+
+
+class PooledConnection:
+    """
+    Connection mượn từ pool: dùng như MySQLConnection, close() là trả về pool
+    """
+
+    def __init__(self, pool: 'ConnectionPool', connection):
+        self._pool = pool
+        self._cnx = connection
+
+    def __getattr__(self, name):
+        cnx = self.__dict__.get('_cnx')
+        if cnx is None:
+            raise AttributeError(f"Connection đã trả về pool: {name}")
+        return getattr(cnx, name)
+
+    def close(self):
+        """Trả connection về pool (gọi nhiều lần không sao)"""
+        cnx, self._cnx = self._cnx, None
+        if cnx is not None:
+            self._pool._release(cnx)
+
+    def prepared_cursor(self, query: str):
+        """Cursor prepared (binary protocol) của câu lệnh, dùng lại giữa các lần mượn connection"""
+        return self._pool._prepared_cursor(self._cnx, query)
+
+    def discard_statement(self, query: str):
+        """Bỏ prepared statement của câu lệnh (sau khi chạy lỗi)"""
+        self._pool._discard_statement(self._cnx, query)
+
+
+class ConnectionPool:
+    """Pool connection dùng chung cho mọi luồng (thread-safe)"""
+
+    def __init__(
+            self,
+            config: dict,
+            size: int = 10,
+            max_overflow: int = 0,
+            timeout: float = 10,
+            ping_idle_seconds: float = 30,
+            reset_session: bool = True,
+            statement_cache_size: int = 64,
+            connect: Optional[Callable[..., object]] = None
+    ):
+        if connect is None:
+            import mysql.connector
+            connect = mysql.connector.connect
+
+        self._config = config
+        self._connect = connect
+        self.size = max(size, 1)
+        self.max_overflow = max(max_overflow, 0)
+        self.timeout = timeout
+        self.ping_idle_seconds = ping_idle_seconds
+        self.reset_session = reset_session
+        self.statement_cache_size = statement_cache_size
+
+        self._cond = threading.Condition()
+        self._idle: List[Tuple[object, float]] = []  # (connection, thời điểm trả về), LIFO
+        self._opened = 0
+        self._waiting = 0
+        self._closed = False
+        # id(connection) -> {câu lệnh: cursor prepared}, LRU; chỉ luồng đang mượn connection truy cập
+        self._statements: Dict[int, 'OrderedDict[str, object]'] = {}
+        self._counters = {
+            'checkouts': 0,       # Số lần lấy thành công
+            'waits': 0,           # Số lần phải chờ vì hết connection
+            'wait_ms': 0.0,       # Tổng thời gian chờ
+            'max_wait_ms': 0.0,
+            'exhausted': 0,       # Số lần chờ quá timeout
+            'created': 0,         # Số connection đã mở
+            'overflow': 0,        # Số lần mở connection vượt size
+            'reconnects': 0,      # Số connection chết được thay khi lấy ra
+            'prepared': 0,        # Số prepared statement đã tạo
+        }
+
+    # ========== CHECKOUT ==========
+
+    def get_connection(self, timeout: Optional[float] = None) -> PooledConnection:
+        """
+        Lấy 1 connection, chờ tối đa timeout giây (mặc định self.timeout)
+        Raises: PoolExhausted khi quá timeout, Error khi không mở được connection
+        """
+        timeout = self.timeout if timeout is None else timeout
+        started = time.monotonic()
+        waited = False
+
+        with self._cond:
+            while True:
+                if self._closed:
+                    raise Error("Connection pool đã đóng")
+
+                if self._idle:
+                    cnx, idle_since = self._idle.pop()
+                    break
+
+                if self._opened < self.size + self.max_overflow:
+                    cnx, idle_since = None, None
+                    self._opened += 1
+                    if self._opened > self.size:
+                        self._counters['overflow'] += 1
+                    break
+
+                remaining = timeout - (time.monotonic() - started)
+                if remaining <= 0:
+                    self._counters['exhausted'] += 1
+                    raise PoolExhausted(
+                        f"Database đang bận: hết connection ({self._opened} đang dùng) sau {timeout:g}s chờ"
+                    )
+                if not waited:
+                    waited = True
+                    self._counters['waits'] += 1
+                self._waiting += 1
+                try:
+                    self._cond.wait(remaining)
+                finally:
+                    self._waiting -= 1
+
+        # Mở/ping ngoài khóa để luồng khác không phải chờ network
+        try:
+            if cnx is None:
+                cnx = self._open()
+            elif time.monotonic() - idle_since >= self.ping_idle_seconds:
+                cnx = self._ensure_alive(cnx)
+        except Exception:
+            self._discard()
+            raise
+
+        wait_ms = (time.monotonic() - started) * 1000
+        with self._cond:
+            self._counters['checkouts'] += 1
+            if waited:
+                self._counters['wait_ms'] += wait_ms
+                self._counters['max_wait_ms'] = max(self._counters['max_wait_ms'], wait_ms)
+
+        return PooledConnection(self, cnx)
+
+    def _open(self):
+        cnx = self._connect(**self._config)
+        with self._cond:
+            self._counters['created'] += 1
+        return cnx
+
+    def _ensure_alive(self, cnx):
+        """Ping connection nằm yên lâu, chết thì mở connection mới thay thế"""
+        try:
+            cnx.ping(reconnect=False)
+            return cnx
+        except Error:
+            logger.warning("⚠️ Connection trong pool đã mất kết nối, mở connection mới")
+            self._close(cnx)
+            with self._cond:
+                self._counters['reconnects'] += 1
+            return self._open()
+
+    # ========== RELEASE ==========
+
+    def _release(self, cnx):
+        """Nhận lại connection: dọn trạng thái phiên rồi đưa vào hàng chờ (hoặc đóng nếu thừa)"""
+        try:
+            if getattr(cnx, 'unread_result', False):
+                cnx.consume_results()
+            # Chỉ dọn phiên khi còn giao dịch dở (vd: SELECT khi autocommit tắt):
+            # connection đã commit/rollback thì trả về luôn, không tốn thêm 1 round trip
+            if cnx.in_transaction:
+                if self.reset_session:
+                    # Reset phiên xóa luôn prepared statement phía server
+                    self._forget_statements(cnx)
+                    cnx.reset_session()
+                else:
+                    cnx.rollback()
+        except Exception as e:
+            logger.warning(f"⚠️ Bỏ connection lỗi khi trả về pool: {e}")
+            self._close(cnx)
+            self._discard()
+            return
+
+        with self._cond:
+            if self._closed or (self._opened > self.size and not self._waiting):
+                # Connection vượt mức không ai chờ: đóng luôn để pool co về size
+                self._opened -= 1
+                to_close = cnx
+            else:
+                self._idle.append((cnx, time.monotonic()))
+                to_close = None
+            self._cond.notify()
+
+        if to_close is not None:
+            self._close(to_close)
+
+    def _discard(self):
+        """1 connection đã mở bị bỏ: nhường chỗ cho luồng đang chờ"""
+        with self._cond:
+            self._opened -= 1
+            self._cond.notify()
+
+    def _close(self, cnx):
+        self._forget_statements(cnx)
+        self._close_quietly(cnx)
+
+    @staticmethod
+    def _close_quietly(obj):
+        try:
+            obj.close()
+        except Exception:
+            pass
+
+    # ========== PREPARED STATEMENTS ==========
+
+    def _prepared_cursor(self, cnx, query: str):
+        cache = self._statements.get(id(cnx))
+        if cache is None:
+            cache = self._statements[id(cnx)] = OrderedDict()
+
+        cursor = cache.get(query)
+        if cursor is not None:
+            cache.move_to_end(query)
+            return cursor
+
+        cursor = cnx.cursor(prepared=True)
+        cache[query] = cursor
+        with self._cond:
+            self._counters['prepared'] += 1
+        if len(cache) > self.statement_cache_size:
+            # Đóng cursor = giải phóng statement trên server (max_prepared_stmt_count)
+            _, oldest = cache.popitem(last=False)
+            self._close_quietly(oldest)
+        return cursor
+
+    def _discard_statement(self, cnx, query: str):
+        cursor = self._statements.get(id(cnx), {}).pop(query, None)
+        if cursor is not None:
+            self._close_quietly(cursor)
+
+    def _forget_statements(self, cnx):
+        for cursor in self._statements.pop(id(cnx), {}).values():
+            self._close_quietly(cursor)
+
+    # ========== QUẢN LÝ ==========
+
+    def stats(self) -> dict:
+        """Số liệu theo dõi pool (counters + đang dùng/rảnh)"""
+        with self._cond:
+            stats = dict(self._counters)
+            stats.update(
+                size=self.size,
+                max_overflow=self.max_overflow,
+                opened=self._opened,
+                idle=len(self._idle),
+                in_use=self._opened - len(self._idle),
+            )
+        return stats
+
+    def close(self):
+        """Đóng các connection rảnh; connection đang dùng sẽ đóng khi được trả về"""
+        with self._cond:
+            self._closed = True
+            idle, self._idle = self._idle, []
+            self._opened -= len(idle)
+            self._cond.notify_all()
+
+        for cnx, _ in idle:
+            self._close(cnx)
@@ -1,8 +1,15 @@
 import mysql.connector
-from mysql.connector import pooling, Error
-from typing import Optional, Any
+from mysql.connector import Error
+from contextlib import contextmanager
+from typing import Optional, Any, Iterator, List
 import logging
+import re
+import threading
+import time
 
+from config import query_profiler
+from config.connection_pool import ConnectionPool, PoolExhausted
+from config.rows import column_index, wrap_rows
 from config.settings import DatabaseConfig
 
 # Setup logging
@@ -10,11 +17,44 @@ logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 
+class TransactionAborted(Exception):
+    """Raise trong db.transaction() để hủy giao dịch vì lý do nghiệp vụ (thông báo cho người dùng)"""
+
+
+# Mã lỗi MySQL khi INSERT/UPDATE vi phạm index UNIQUE
+ER_DUP_ENTRY = 1062
+# Mã lỗi MySQL khi InnoDB hủy giao dịch để gỡ deadlock (chạy lại giao dịch là đủ)
+ER_LOCK_DEADLOCK = 1213
+
+
+def duplicate_key_name(error: Exception) -> Optional[str]:
+    """
+    Tên index bị vi phạm nếu error là lỗi Duplicate entry (1062), ngược lại None
+    MySQL 8 ghi "for key 'books.uq_books_isbn'", bản cũ chỉ ghi tên index
+    """
+    if getattr(error, 'errno', None) != ER_DUP_ENTRY:
+        return None
+    match = re.search(r"for key '([^']+)'", str(getattr(error, 'msg', None) or error))
+    return match.group(1).rsplit('.', 1)[-1] if match else ''
+
+
+def is_deadlock(error: Exception) -> bool:
+    """error là lỗi Deadlock (1213): giao dịch đã bị rollback, có thể chạy lại"""
+    return getattr(error, 'errno', None) == ER_LOCK_DEADLOCK
+
+
 class Database:
     """Singleton class quản lý MySQL database connection pool"""
 
     _instance: Optional['Database'] = None
-    _connection_pool: Optional[pooling.MySQLConnectionPool] = None
+    _connection_pool: Optional[ConnectionPool] = None
+    _pool_lock = threading.Lock()
+
+    # Connection đang được giữ bởi db.transaction() của từng luồng
+    _local = threading.local()
+
+    # Chế độ driver nhanh: prepared statement + dòng kết quả config.rows.Row thay vì dict
+    _fast = DatabaseConfig.FAST_DRIVER
 
     def __new__(cls):
         if cls._instance is None:
@@ -22,27 +62,35 @@ class Database:
         return cls._instance
 
     def __init__(self):
-        """Khởi tạo connection pool"""
-        if self._connection_pool is None:
-            self._create_connection_pool()
+        """
+        Connection pool được tạo ở lần lấy connection đầu tiên (import không mở kết nối):
+        sai cấu hình thì MainWindow báo lỗi kết nối khi khởi động
+        """
 
     def _create_connection_pool(self):
         """Tạo MySQL connection pool"""
         try:
-            self._connection_pool = pooling.MySQLConnectionPool(
-                **DatabaseConfig.get_pool_config()
+            config = DatabaseConfig.get_config()
+            if not config['use_pure'] and not getattr(mysql.connector, 'HAVE_CEXT', False):
+                logger.warning("⚠️ Chưa có C extension của mysql-connector, dùng driver pure Python")
+                config['use_pure'] = True
+
+            self._connection_pool = ConnectionPool(config, **DatabaseConfig.get_pool_config())
+            logger.info(
+                f"✅ Đã tạo connection pool: {DatabaseConfig.DATABASE} "
+                f"({DatabaseConfig.POOL_SIZE} + {DatabaseConfig.POOL_MAX_OVERFLOW} connection, "
+                f"driver {'pure Python' if config['use_pure'] else 'C extension'}"
+                f"{', prepared statements' if self._fast else ''})"
             )
-            logger.info(f"✅ Đã tạo connection pool: {DatabaseConfig.DATABASE}")
 
-            # Test connection
-            conn = self.get_connection()
-            if conn:
-                cursor = conn.cursor()
-                cursor.execute("SELECT VERSION()")
-                version = cursor.fetchone()
-                logger.info(f"✅ MySQL Version: {version[0]}")
-                cursor.close()
-                conn.close()
+            # Test connection (sai cấu hình thì báo lỗi ngay lần đầu dùng)
+            conn = self._connection_pool.get_connection()
+            cursor = conn.cursor()
+            cursor.execute("SELECT VERSION()")
+            version = cursor.fetchone()
+            logger.info(f"✅ MySQL Version: {version[0]}")
+            cursor.close()
+            conn.close()
 
         except Error as e:
             logger.error(f"❌ Lỗi tạo connection pool: {e}")
@@ -51,25 +99,39 @@ class Database:
     def get_connection(self) -> Optional[mysql.connector.MySQLConnection]:
         """
         Lấy connection từ pool
+        Hết connection thì chờ tối đa DatabaseConfig.POOL_TIMEOUT giây, quá hạn raise PoolExhausted
+        (không trả về None: nơi gọi báo "database đang bận" thay vì hiện danh sách rỗng)
         QUAN TRỌNG: Phải close() connection sau khi sử dụng
         """
         try:
             if self._connection_pool is None:
-                self._create_connection_pool()
+                with self._pool_lock:
+                    if self._connection_pool is None:
+                        self._create_connection_pool()
 
+            started = time.perf_counter()
             connection = self._connection_pool.get_connection()
+            query_profiler.record_pool_wait((time.perf_counter() - started) * 1000)
             return connection
 
+        except PoolExhausted as e:
+            logger.error(f"❌ Lỗi lấy connection: {e} - {self.get_pool_stats()}")
+            raise
         except Error as e:
             logger.error(f"❌ Lỗi lấy connection: {e}")
             return None
 
+    def get_pool_stats(self) -> dict:
+        """Số liệu pool: checkouts, waits, exhausted, in_use, idle..."""
+        return self._connection_pool.stats() if self._connection_pool else {}
+
     def execute_query(
             self,
             query: str,
             params: tuple = None,
             fetch: bool = False,
-            commit: bool = False
+            commit: bool = False,
+            rowcount: bool = False
     ) -> Any:
         """
         Helper method để execute query
@@ -79,21 +141,41 @@ class Database:
             params: Parameters cho prepared statement
             fetch: True nếu cần fetch kết quả (SELECT)
             commit: True nếu cần commit (INSERT/UPDATE/DELETE)
+            rowcount: True để luôn trả về rowcount (kể cả khi có lastrowid)
 
         Returns:
             - Nếu fetch=True: trả về list of tuples
             - Nếu commit=True: trả về lastrowid hoặc rowcount
             - Nếu lỗi: trả về None
+
+        Trong db.transaction(): chạy trên connection của giao dịch, không commit
+        riêng từng câu, lỗi được raise để cả giao dịch rollback.
         """
+        transaction_connection = self._get_transaction_connection()
         connection = None
         cursor = None
+        prepared = False
+        # Số liệu cho query_profiler
+        started = None
+        wait_ms = 0.0
+        rows = 0
 
         try:
-            connection = self.get_connection()
+            connection = transaction_connection
+            if connection is None:
+                wait_started = time.perf_counter()
+                connection = self.get_connection()
+                wait_ms = (time.perf_counter() - wait_started) * 1000
             if not connection:
                 return None
 
-            cursor = connection.cursor(dictionary=True)  # Trả về dict
+            started = time.perf_counter()
+            if self._fast and params and (fetch or commit):
+                # Prepared statement của connection (không close, dùng lại lần sau)
+                prepared = True
+                cursor = connection.prepared_cursor(query)
+            else:
+                cursor = connection.cursor(dictionary=not self._fast)  # Trả về dict
 
             if params:
                 cursor.execute(query, params)
@@ -102,28 +184,201 @@ class Database:
 
             if fetch:
                 result = cursor.fetchall()
+                if self._fast:
+                    result = wrap_rows(column_index(cursor.column_names), result)
+                rows = len(result)
                 return result
 
+            rows = cursor.rowcount
             if commit:
-                connection.commit()
+                if transaction_connection is None:
+                    connection.commit()
+                if rowcount:
+                    return cursor.rowcount
                 return cursor.lastrowid if cursor.lastrowid else cursor.rowcount
 
             return True
 
+        except PoolExhausted:
+            raise
         except Error as e:
-            if connection:
-                connection.rollback()
+            rows = None
+            if prepared:
+                connection.discard_statement(query)
+                prepared = False
             logger.error(f"❌ Lỗi execute query: {e}")
             logger.error(f"Query: {query}")
             logger.error(f"Params: {params}")
+            if transaction_connection is not None:
+                raise
+            if connection:
+                connection.rollback()
             return None
 
         finally:
-            if cursor:
+            if started is not None:
+                query_profiler.record(
+                    query, (time.perf_counter() - started) * 1000, rows or 0, wait_ms, error=rows is None
+                )
+            if cursor and not prepared:
                 cursor.close()
+            if connection and transaction_connection is None:
+                connection.close()
+
+    def executemany(self, query: str, seq_params: list, lastrowid: bool = False) -> Optional[int]:
+        """
+        Chạy 1 câu lệnh với nhiều bộ tham số (INSERT nhiều dòng 1 lần gửi)
+        Returns: rowcount (lastrowid=True: id của dòng đầu tiên được INSERT),
+                 None nếu lỗi (trong giao dịch: raise)
+        """
+        transaction_connection = self._get_transaction_connection()
+        connection = None
+        cursor = None
+        started = None
+        wait_ms = 0.0
+        rows = 0
+
+        try:
+            connection = transaction_connection
+            if connection is None:
+                wait_started = time.perf_counter()
+                connection = self.get_connection()
+                wait_ms = (time.perf_counter() - wait_started) * 1000
+            if not connection:
+                return None
+
+            started = time.perf_counter()
+            cursor = connection.cursor()
+            cursor.executemany(query, seq_params)
+            rows = cursor.rowcount
+
+            if transaction_connection is None:
+                connection.commit()
+            return cursor.lastrowid if lastrowid else cursor.rowcount
+
+        except PoolExhausted:
+            raise
+        except Error as e:
+            rows = None
+            logger.error(f"❌ Lỗi executemany: {e}")
+            logger.error(f"Query: {query}")
+            if transaction_connection is not None:
+                raise
             if connection:
+                connection.rollback()
+            return None
+
+        finally:
+            if started is not None:
+                query_profiler.record(
+                    query, (time.perf_counter() - started) * 1000, rows or 0, wait_ms, error=rows is None
+                )
+            if cursor:
+                cursor.close()
+            if connection and transaction_connection is None:
                 connection.close()
 
+    def iter_query(self, query: str, params: tuple = None, chunk_size: int = 1000) -> Iterator[List[dict]]:
+        """
+        Đọc kết quả SELECT theo lô bằng cursor không đệm (unbuffered)
+
+        Server gửi dần từng lô nên bộ nhớ chỉ giữ chunk_size dòng (xuất file lớn).
+        Dùng riêng 1 connection (không tham gia db.transaction()) tới khi đọc hết
+        hoặc generator bị đóng. Lỗi được raise cho nơi gọi xử lý.
+        """
+        wait_started = time.perf_counter()
+        connection = self.get_connection()
+        if not connection:
+            raise Error("Không lấy được connection từ pool")
+
+        started = time.perf_counter()
+        wait_ms = (started - wait_started) * 1000
+        cursor = None
+        finished = False
+        count = 0
+        # Chỉ cộng thời gian execute/fetchmany, không tính lúc nơi gọi xử lý từng lô
+        db_ms = 0.0
+        try:
+            cursor = connection.cursor(dictionary=not self._fast, buffered=False)
+            if params:
+                cursor.execute(query, params)
+            else:
+                cursor.execute(query)
+
+            index = column_index(cursor.column_names) if self._fast else None
+            db_ms = (time.perf_counter() - started) * 1000
+            while True:
+                fetch_started = time.perf_counter()
+                rows = cursor.fetchmany(chunk_size)
+                db_ms += (time.perf_counter() - fetch_started) * 1000
+                if not rows:
+                    break
+                count += len(rows)
+                yield wrap_rows(index, rows) if index is not None else rows
+            finished = True
+
+        finally:
+            if cursor is not None and not db_ms:
+                db_ms = (time.perf_counter() - started) * 1000  # Lỗi ngay khi execute
+            query_profiler.record(query, db_ms, count, wait_ms, error=not finished)
+            if not finished:
+                # Dừng giữa chừng: đọc bỏ phần còn lại để trả connection sạch về pool
+                try:
+                    connection.consume_results()
+                except Error as e:
+                    logger.error(f"❌ Lỗi hủy kết quả đang đọc: {e}")
+            if cursor:
+                cursor.close()
+            connection.close()
+
+    # =========================
+    # TRANSACTION (UNIT OF WORK)
+    # =========================
+
+    def _get_transaction_connection(self) -> Optional[mysql.connector.MySQLConnection]:
+        """Connection của giao dịch đang mở trong luồng hiện tại (nếu có)"""
+        return getattr(self._local, 'connection', None)
+
+    def in_transaction(self) -> bool:
+        """Luồng hiện tại có đang trong db.transaction() không"""
+        return self._get_transaction_connection() is not None
+
+    @contextmanager
+    def transaction(self) -> Iterator[mysql.connector.MySQLConnection]:
+        """
+        Gom nhiều câu lệnh vào 1 giao dịch trên 1 connection, commit 1 lần
+
+            with db.transaction():
+                slip_id = db.execute_insert(...)
+                db.execute(...)
+
+        - Mọi db.* gọi trong khối dùng chung connection, không commit riêng
+        - Có exception (kể cả TransactionAborted): rollback rồi raise lại
+        - Lồng nhau: khối trong tham gia giao dịch của khối ngoài
+        """
+        connection = self._get_transaction_connection()
+        if connection is not None:
+            yield connection
+            return
+
+        connection = self.get_connection()
+        if not connection:
+            raise Error("Không lấy được connection từ pool")
+
+        self._local.connection = connection
+        try:
+            yield connection
+            connection.commit()
+        except BaseException:
+            try:
+                connection.rollback()
+            except Error as e:
+                logger.error(f"❌ Lỗi rollback: {e}")
+            raise
+        finally:
+            self._local.connection = None
+            connection.close()
+
     def test_connection(self) -> bool:
         """Test kết nối database"""
         try:
@@ -140,8 +395,8 @@ class Database:
     def close_pool(self):
         """Đóng toàn bộ connection pool"""
         if self._connection_pool:
-            # MySQL connector không có close pool method
-            # Chỉ cần set None, Python garbage collector sẽ xử lý
+            # Connection đang được dùng sẽ tự đóng khi close()
+            self._connection_pool.close()
             self._connection_pool = None
             logger.info("✅ Đã đóng connection pool")
 
@@ -176,6 +431,15 @@ class Database:
         )
         return result is not None
 
+    def execute_rowcount(self, query: str, params: tuple = None) -> Optional[int]:
+        """UPDATE / DELETE và trả về số dòng bị ảnh hưởng (None nếu lỗi)"""
+        return self.execute_query(
+            query=query,
+            params=params,
+            commit=True,
+            rowcount=True
+        )
+
     def execute_insert(self, query: str, params: tuple = None) -> Optional[int]:
         """INSERT và trả về lastrowid"""
         return self.execute_query(
@@ -0,0 +1,215 @@
+"""
+Query Profiler - Thống kê thời gian truy vấn theo "dấu vân tay" câu lệnh
+
+Database ghi lại mọi câu lệnh đi qua execute_query/executemany/iter_query:
+- Fingerprint: câu SQL đã chuẩn hóa (bỏ khoảng trắng thừa, giá trị -> ?, IN (...))
+- Histogram độ trễ, số dòng trả về/ảnh hưởng, thời gian chờ lấy connection từ pool
+- Nơi gọi (hàm đầu tiên ngoài config.database, thường là 1 service method)
+Câu lệnh chậm hơn AppConfig.SLOW_QUERY_MS được ghi log cảnh báo.
+
+Xem báo cáo: report() trong tiến trình, hoặc dump() ra JSON rồi
+    python -m tools.query_report logs/query_profile.json
+"""
+import json
+import logging
+import re
+import sys
+import threading
+import time
+from functools import lru_cache
+from pathlib import Path
+from typing import Dict, List, Optional
+
+from config.settings import AppConfig
+
+logger = logging.getLogger(__name__)
+
+# Cận trên (ms) của các ô histogram, ô cuối nhận mọi giá trị lớn hơn
+BUCKETS_MS = (1, 2, 5, 10, 20, 50, 100, 200, 500, 1000, 2000, 5000)
+
+# Số nơi gọi giữ lại cho mỗi fingerprint
+MAX_CALL_SITES = 10
+
+# Module bị bỏ qua khi tìm nơi gọi (wrapper của Database, with db.transaction())
+_SKIP_MODULES = {'config.database', __name__, 'contextlib'}
+
+SORT_KEYS = ('total_ms', 'avg_ms', 'p95_ms', 'max_ms', 'calls', 'rows', 'wait_ms')
+
+_STRING_RE = re.compile(r"'(?:[^'\\]|\\.)*'|\"(?:[^\"\\]|\\.)*\"")
+_NUMBER_RE = re.compile(r"\b\d+(?:\.\d+)?\b")
+_PLACEHOLDER_RE = re.compile(r"%s|%\(\w+\)s")
+_LIST_RE = re.compile(r"\(\s*\?(?:\s*,\s*\?)*\s*\)")
+_VALUES_RE = re.compile(r"\(\.\.\.\)(?:\s*,\s*\(\.\.\.\))+")
+_SPACE_RE = re.compile(r"\s+")
+
+_lock = threading.Lock()
+_stats: Dict[str, dict] = {}
+_pool = {'checkouts': 0, 'wait_ms': 0.0, 'max_wait_ms': 0.0}
+_started_at = time.time()
+
+enabled = AppConfig.QUERY_PROFILING
+
+
+@lru_cache(maxsize=2048)
+def fingerprint(query: str) -> str:
+    """Chuẩn hóa câu SQL để gom các lần chạy cùng dạng (khác tham số, khác số phần tử IN)"""
+    text = _STRING_RE.sub('?', query)
+    text = _PLACEHOLDER_RE.sub('?', text)
+    text = _NUMBER_RE.sub('?', text)
+    text = _LIST_RE.sub('(...)', text)
+    text = _VALUES_RE.sub('(...)', text)
+    return _SPACE_RE.sub(' ', text).strip()
+
+
+def _call_site() -> str:
+    """Hàm đầu tiên ngoài lớp Database trong call stack (vd: services.book_service.BookService.get_all_books)"""
+    frame = sys._getframe(2)
+    while frame is not None:
+        module = frame.f_globals.get('__name__', '')
+        if module not in _SKIP_MODULES:
+            code = frame.f_code
+            return f"{module}.{getattr(code, 'co_qualname', code.co_name)}"
+        frame = frame.f_back
+    return '?'
+
+
+def _new_entry() -> dict:
+    return {
+        'calls': 0, 'errors': 0, 'total_ms': 0.0, 'max_ms': 0.0,
+        'rows': 0, 'wait_ms': 0.0,
+        'histogram': [0] * (len(BUCKETS_MS) + 1),
+        'call_sites': {},
+    }
+
+
+def record_pool_wait(wait_ms: float):
+    """Ghi nhận 1 lần lấy connection từ pool"""
+    if not enabled:
+        return
+    with _lock:
+        _pool['checkouts'] += 1
+        _pool['wait_ms'] += wait_ms
+        _pool['max_wait_ms'] = max(_pool['max_wait_ms'], wait_ms)
+
+
+def record(query: str, elapsed_ms: float, rows: int = 0, wait_ms: float = 0.0, error: bool = False):
+    """Ghi nhận 1 câu lệnh đã chạy (thời gian không gồm thời gian chờ pool)"""
+    if not enabled:
+        return
+
+    key = fingerprint(query)
+    site = _call_site()
+    bucket = next((i for i, bound in enumerate(BUCKETS_MS) if elapsed_ms <= bound), len(BUCKETS_MS))
+
+    with _lock:
+        entry = _stats.get(key)
+        if entry is None:
+            entry = _stats[key] = _new_entry()
+        entry['calls'] += 1
+        entry['errors'] += int(error)
+        entry['total_ms'] += elapsed_ms
+        entry['max_ms'] = max(entry['max_ms'], elapsed_ms)
+        entry['rows'] += max(rows or 0, 0)
+        entry['wait_ms'] += wait_ms
+        entry['histogram'][bucket] += 1
+        sites = entry['call_sites']
+        if site in sites or len(sites) < MAX_CALL_SITES:
+            sites[site] = sites.get(site, 0) + 1
+
+    if elapsed_ms >= AppConfig.SLOW_QUERY_MS:
+        logger.warning(f"🐢 Truy vấn chậm {elapsed_ms:.0f} ms ({rows} dòng) tại {site}: {key[:300]}")
+
+
+def _percentile(histogram: List[int], fraction: float) -> float:
+    """Ước lượng phân vị từ histogram (cận trên của ô chứa phân vị)"""
+    total = sum(histogram)
+    if not total:
+        return 0.0
+    target = total * fraction
+    seen = 0
+    for i, count in enumerate(histogram):
+        seen += count
+        if seen >= target:
+            return float(BUCKETS_MS[i]) if i < len(BUCKETS_MS) else float('inf')
+    return float('inf')
+
+
+def snapshot() -> dict:
+    """Bản sao số liệu hiện tại (kèm avg_ms, p50_ms, p95_ms cho mỗi fingerprint)"""
+    with _lock:
+        queries = {
+            key: dict(entry, histogram=list(entry['histogram']), call_sites=dict(entry['call_sites']))
+            for key, entry in _stats.items()
+        }
+        pool = dict(_pool)
+
+    for entry in queries.values():
+        entry['avg_ms'] = entry['total_ms'] / entry['calls'] if entry['calls'] else 0.0
+        entry['p50_ms'] = _percentile(entry['histogram'], 0.5)
+        entry['p95_ms'] = _percentile(entry['histogram'], 0.95)
+
+    return {
+        'started_at': _started_at,
+        'dumped_at': time.time(),
+        'buckets_ms': list(BUCKETS_MS),
+        'pool': pool,
+        'queries': queries,
+    }
+
+
+def reset():
+    """Xóa toàn bộ số liệu"""
+    global _started_at
+    with _lock:
+        _stats.clear()
+        _pool.update(checkouts=0, wait_ms=0.0, max_wait_ms=0.0)
+        _started_at = time.time()
+
+
+def dump(path=None) -> Optional[Path]:
+    """Ghi snapshot ra file JSON (mặc định AppConfig.QUERY_PROFILE_FILE)"""
+    path = Path(path or AppConfig.QUERY_PROFILE_FILE)
+    data = snapshot()
+    if not data['queries']:
+        return None
+
+    try:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(data, f, ensure_ascii=False, indent=2)
+        logger.info(f"✅ Đã ghi thống kê truy vấn: {path}")
+        return path
+    except OSError as e:
+        logger.error(f"❌ Lỗi ghi thống kê truy vấn: {e}")
+        return None
+
+
+def report(data: Optional[dict] = None, top: int = 20, sort_by: str = 'total_ms') -> str:
+    """Bảng các fingerprint tốn thời gian nhất (data: snapshot() hoặc nội dung file dump)"""
+    data = data or snapshot()
+    queries = data['queries']
+    total_ms = sum(entry['total_ms'] for entry in queries.values()) or 1.0
+    ranked = sorted(queries.items(), key=lambda item: item[1][sort_by], reverse=True)[:top]
+
+    pool = data['pool']
+    lines = [
+        f"{len(queries)} loại truy vấn, {sum(e['calls'] for e in queries.values())} lần chạy, "
+        f"tổng {total_ms:.0f} ms",
+        f"Pool: {pool['checkouts']} lần lấy connection, chờ tổng {pool['wait_ms']:.0f} ms "
+        f"(tối đa {pool['max_wait_ms']:.1f} ms)",
+        "",
+        f"{'calls':>7} {'total_ms':>10} {'%':>5} {'avg_ms':>8} {'p95_ms':>8} {'max_ms':>8} "
+        f"{'rows':>9} {'wait_ms':>8}  query",
+    ]
+    for key, entry in ranked:
+        lines.append(
+            f"{entry['calls']:>7} {entry['total_ms']:>10.1f} {entry['total_ms'] * 100 / total_ms:>5.1f} "
+            f"{entry['avg_ms']:>8.2f} {entry['p95_ms']:>8.0f} {entry['max_ms']:>8.1f} "
+            f"{entry['rows']:>9} {entry['wait_ms']:>8.1f}  {key[:120]}"
+        )
+        sites = sorted(entry['call_sites'].items(), key=lambda item: item[1], reverse=True)
+        for site, count in sites[:3]:
+            lines.append(f"{'':>60}  ↳ {site} ({count})")
+        if entry['errors']:
+            lines.append(f"{'':>60}  ⚠ {entry['errors']} lần lỗi")
+    return "\n".join(lines)
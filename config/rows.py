@@ -0,0 +1,48 @@
+"""
+Rows - Dòng kết quả gọn cho chế độ driver nhanh (DatabaseConfig.FAST_DRIVER)
+
+cursor(dictionary=True) dựng 1 dict mới cho mỗi dòng. Ở chế độ nhanh cursor trả
+tuple; Row chỉ giữ tuple đó cùng bảng chỉ số cột dùng chung cho cả kết quả, tra
+theo tên cột khi được đọc. Service vẫn dùng row['col'] / row.get('col') như dict.
+"""
+from collections.abc import Mapping
+from typing import Dict, Iterable, List, Sequence
+
+
+class Row(Mapping):
+    """1 dòng kết quả (chỉ đọc): tuple giá trị + {tên cột: vị trí}"""
+
+    __slots__ = ('_index', '_values')
+
+    def __init__(self, index: Dict[str, int], values: Sequence):
+        self._index = index
+        self._values = values
+
+    def __getitem__(self, key):
+        return self._values[self._index[key]]
+
+    def get(self, key, default=None):
+        position = self._index.get(key)
+        return default if position is None else self._values[position]
+
+    def __contains__(self, key) -> bool:
+        return key in self._index
+
+    def __iter__(self):
+        return iter(self._index)
+
+    def __len__(self) -> int:
+        return len(self._index)
+
+    def __repr__(self) -> str:
+        return f"Row({dict(self)!r})"
+
+
+def column_index(column_names: Iterable[str]) -> Dict[str, int]:
+    """{tên cột: vị trí}, cột trùng tên lấy cột sau cùng (giống cursor dictionary)"""
+    return {name: position for position, name in enumerate(column_names)}
+
+
+def wrap_rows(index: Dict[str, int], rows: Iterable[Sequence]) -> List[Row]:
+    """Bọc các tuple của 1 kết quả, dùng chung 1 bảng chỉ số"""
+    return [Row(index, values) for values in rows]
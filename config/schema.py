@@ -0,0 +1,298 @@
+"""
+Schema helper - Các bảng phụ và index mà ứng dụng cần
+
+- Khởi động ứng dụng chỉ kiểm tra (check_tables/check_indexes, đọc information_schema)
+  để chọn truy vấn dự phòng khi thiếu; không chạy DDL
+- Tạo phần còn thiếu (ensure_tables/ensure_indexes, CREATE TABLE/ALTER TABLE) bằng
+  lệnh migrate riêng: python -m tools.migrate
+"""
+import logging
+from typing import Dict, List, Set
+
+from config.database import db
+
+logger = logging.getLogger(__name__)
+
+# Các index ứng dụng tự quản lý
+# type: 'FULLTEXT' | 'INDEX' | 'UNIQUE'
+REQUIRED_INDEXES: List[Dict] = [
+    # Tìm kiếm toàn văn sách (BookService.search_books)
+    {'name': 'ft_books_title', 'table': 'books', 'columns': ('title',), 'type': 'FULLTEXT'},
+    {'name': 'ft_authors_name', 'table': 'authors', 'columns': ('author_name',), 'type': 'FULLTEXT'},
+    {'name': 'ft_categories_name', 'table': 'categories', 'columns': ('category_name',), 'type': 'FULLTEXT'},
+    # ISBN / mã vạch không trùng: database kiểm tra khi INSERT/UPDATE (BookService, lỗi 1062)
+    # Cũng dùng cho tìm theo tiền tố ISBN / mã vạch
+    {'name': 'uq_books_isbn', 'table': 'books', 'columns': ('isbn',), 'type': 'UNIQUE'},
+    {'name': 'uq_books_barcode', 'table': 'books', 'columns': ('barcode',), 'type': 'UNIQUE'},
+    # Lịch sử mượn/trả: keyset (borrow_date, slip_id), lọc theo trạng thái/bạn đọc
+    {'name': 'idx_slips_date', 'table': 'borrow_slips', 'columns': ('borrow_date', 'slip_id'), 'type': 'INDEX'},
+    {'name': 'idx_slips_status_date', 'table': 'borrow_slips',
+     'columns': ('status', 'borrow_date', 'slip_id'), 'type': 'INDEX'},
+    {'name': 'idx_slips_reader_date', 'table': 'borrow_slips',
+     'columns': ('reader_id', 'borrow_date', 'slip_id'), 'type': 'INDEX'},
+    {'name': 'idx_details_book_slip', 'table': 'borrow_details', 'columns': ('book_id', 'slip_id'), 'type': 'INDEX'},
+    # Index phủ cho thống kê bạn đọc (ReaderService.get_statistics): quét index thay vì cả bảng
+    {'name': 'idx_readers_stats', 'table': 'readers',
+     'columns': ('status', 'reputation_score', 'card_end'), 'type': 'INDEX'},
+]
+
+# Index thường do phiên bản cũ tạo, trùng với index UNIQUE cùng cột: migrate xóa
+# (chỉ khi index thay thế đã có) để INSERT/UPDATE không phải cập nhật 2 index
+OBSOLETE_INDEXES: Dict[str, str] = {
+    'idx_books_isbn': 'uq_books_isbn',
+    'idx_books_barcode': 'uq_books_barcode',
+}
+
+# Các bảng phụ ứng dụng tự tạo (bảng nghiệp vụ chính do script SQL tạo)
+REQUIRED_TABLES: Dict[str, str] = {
+    # Nhật ký thay đổi để các máy trạm chỉ tải phần dữ liệu đã đổi (services.change_log)
+    'entity_changes': """
+        CREATE TABLE IF NOT EXISTS entity_changes (
+            change_id BIGINT UNSIGNED NOT NULL AUTO_INCREMENT PRIMARY KEY,
+            entity VARCHAR(32) NOT NULL,
+            entity_id INT NOT NULL,
+            action VARCHAR(10) NOT NULL,
+            changed_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
+            KEY idx_entity_changes_entity (entity, change_id)
+        ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4
+    """,
+}
+
+_available: Set[str] = set()
+_checked = False
+_tables: Set[str] = set()
+_tables_checked = False
+
+
+MIGRATE_HINT = "chạy 'python -m tools.migrate' để tạo"
+
+
+def _load_existing_tables() -> Set[str]:
+    """Đọc tên các bảng hiện có của database đang dùng (viết thường)"""
+    query = """
+        SELECT TABLE_NAME AS table_name
+        FROM information_schema.TABLES
+        WHERE TABLE_SCHEMA = DATABASE()
+    """
+    rows = db.execute_query(query, fetch=True)
+    if rows is None:
+        raise RuntimeError("Không đọc được danh sách bảng")
+    return {row['table_name'].lower() for row in rows}
+
+
+def _load_existing_indexes() -> List[Dict]:
+    """Đọc danh sách index hiện có của database đang dùng"""
+    query = """
+        SELECT TABLE_NAME AS table_name,
+               INDEX_NAME AS index_name,
+               INDEX_TYPE AS index_type,
+               MIN(NON_UNIQUE) AS non_unique,
+               GROUP_CONCAT(COLUMN_NAME ORDER BY SEQ_IN_INDEX) AS columns
+        FROM information_schema.STATISTICS
+        WHERE TABLE_SCHEMA = DATABASE()
+        GROUP BY TABLE_NAME, INDEX_NAME, INDEX_TYPE
+    """
+    rows = db.execute_query(query, fetch=True)
+    if rows is None:
+        raise RuntimeError("Không đọc được danh sách index")
+    return rows
+
+
+def _is_satisfied(spec: Dict, existing: List[Dict]) -> bool:
+    """Kiểm tra spec đã có index tương đương chưa (cùng tên hoặc cùng cột đầu)"""
+    wanted = ','.join(spec['columns']).lower()
+
+    for index in existing:
+        if index['table_name'].lower() != spec['table']:
+            continue
+
+        if index['index_name'] == spec['name']:
+            return True
+
+        columns = (index['columns'] or '').lower()
+        is_fulltext = index['index_type'] == 'FULLTEXT'
+
+        if spec['type'] == 'FULLTEXT':
+            if is_fulltext and columns == wanted:
+                return True
+        elif not is_fulltext and (columns == wanted or columns.startswith(wanted + ',')):
+            if spec['type'] == 'INDEX' or (columns == wanted and int(index['non_unique']) == 0):
+                return True
+
+    return False
+
+
+def _create_index(spec: Dict) -> bool:
+    """Tạo index theo spec"""
+    keyword = {'FULLTEXT': 'FULLTEXT INDEX', 'UNIQUE': 'UNIQUE INDEX'}.get(spec['type'], 'INDEX')
+    columns = ', '.join(spec['columns'])
+    ddl = f"ALTER TABLE {spec['table']} ADD {keyword} {spec['name']} ({columns})"
+
+    logger.info(f"🔧 Đang tạo index {spec['name']} trên {spec['table']}...")
+    return db.execute_query(ddl, commit=True) is not None
+
+
+# ========== KIỂM TRA (khi khởi động) ==========
+
+def check_tables() -> Set[str]:
+    """
+    Kiểm tra các bảng phụ đã có chưa, không chạy DDL
+    Lỗi database: chưa ghi nhận kết quả, lần gọi has_table sau kiểm tra lại
+    Returns: tập tên bảng đang sẵn sàng sử dụng
+    """
+    global _tables_checked
+
+    try:
+        existing = _load_existing_tables()
+    except Exception as e:
+        logger.error(f"❌ Lỗi kiểm tra bảng phụ: {e}")
+        return set(_tables)
+
+    _tables.clear()
+    _tables.update(name for name in REQUIRED_TABLES if name in existing)
+    missing = [name for name in REQUIRED_TABLES if name not in _tables]
+    if missing:
+        logger.warning(f"⚠️ Thiếu bảng phụ {', '.join(missing)} ({MIGRATE_HINT})")
+
+    logger.info(f"✅ Schema: {len(_tables)}/{len(REQUIRED_TABLES)} bảng phụ sẵn sàng")
+    _tables_checked = True
+    return set(_tables)
+
+
+def check_indexes() -> Set[str]:
+    """
+    Kiểm tra các index đã có chưa, không chạy DDL; thiếu thì service dùng truy vấn dự phòng
+    Lỗi database: chưa ghi nhận kết quả, lần gọi has_index sau kiểm tra lại
+    Returns: tập tên index đang sẵn sàng sử dụng
+    """
+    global _checked
+
+    try:
+        existing = _load_existing_indexes()
+    except Exception as e:
+        logger.error(f"❌ Lỗi kiểm tra index: {e}")
+        return set(_available)
+
+    _available.clear()
+    _available.update(spec['name'] for spec in REQUIRED_INDEXES if _is_satisfied(spec, existing))
+    missing = [spec['name'] for spec in REQUIRED_INDEXES if spec['name'] not in _available]
+    if missing:
+        logger.warning(f"⚠️ Thiếu index {', '.join(missing)}, dùng truy vấn dự phòng ({MIGRATE_HINT})")
+
+    logger.info(f"✅ Schema: {len(_available)}/{len(REQUIRED_INDEXES)} index sẵn sàng")
+    _checked = True
+    return set(_available)
+
+
+def has_table(name: str) -> bool:
+    """Bảng phụ do ứng dụng quản lý đã sẵn sàng chưa"""
+    if not _tables_checked:
+        check_tables()
+    return name in _tables
+
+
+def has_index(name: str) -> bool:
+    """Index do ứng dụng quản lý đã sẵn sàng chưa"""
+    if not _checked:
+        check_indexes()
+    return name in _available
+
+
+# ========== MIGRATION (python -m tools.migrate) ==========
+
+def ensure_tables() -> Set[str]:
+    """
+    Tạo các bảng phụ còn thiếu (idempotent)
+    Returns: tập tên bảng đang sẵn sàng sử dụng
+    """
+    global _tables_checked
+
+    for name, ddl in REQUIRED_TABLES.items():
+        if db.execute_query(ddl, commit=True) is not None:
+            _tables.add(name)
+        else:
+            _tables.discard(name)
+            logger.warning(f"⚠️ Không thể tạo bảng {name}")
+
+    logger.info(f"✅ Schema: {len(_tables)}/{len(REQUIRED_TABLES)} bảng phụ sẵn sàng")
+    _tables_checked = True
+    return set(_tables)
+
+
+def ensure_indexes() -> Set[str]:
+    """
+    Tạo các index còn thiếu (idempotent)
+    Returns: tập tên index đang sẵn sàng sử dụng
+    """
+    global _checked
+
+    try:
+        existing = _load_existing_indexes()
+        missing = [spec for spec in REQUIRED_INDEXES if not _is_satisfied(spec, existing)]
+
+        for spec in missing:
+            if _is_satisfied(spec, existing):
+                continue  # Index vừa tạo cho spec trước đã đáp ứng (vd: UNIQUE cho INDEX cùng cột)
+            if _create_index(spec):
+                existing.append({
+                    'table_name': spec['table'],
+                    'index_name': spec['name'],
+                    'index_type': 'FULLTEXT' if spec['type'] == 'FULLTEXT' else 'BTREE',
+                    'non_unique': 0 if spec['type'] == 'UNIQUE' else 1,
+                    'columns': ','.join(spec['columns']),
+                })
+            else:
+                # UNIQUE không tạo được khi dữ liệu cũ đã có giá trị trùng
+                logger.warning(f"⚠️ Không thể tạo index {spec['name']}, dùng truy vấn dự phòng")
+
+        if missing:
+            existing = _load_existing_indexes()
+
+        _available.clear()
+        _available.update(
+            spec['name'] for spec in REQUIRED_INDEXES if _is_satisfied(spec, existing)
+        )
+        logger.info(f"✅ Schema: {len(_available)}/{len(REQUIRED_INDEXES)} index sẵn sàng")
+
+    except Exception as e:
+        logger.error(f"❌ Lỗi kiểm tra schema: {e}")
+
+    _checked = True
+    return set(_available)
+
+
+def drop_obsolete_indexes() -> List[str]:
+    """
+    Xóa các index trong OBSOLETE_INDEXES nếu index thay thế đã có (idempotent)
+    Returns: tên các index đã xóa
+    """
+    dropped = []
+
+    try:
+        existing = _load_existing_indexes()
+        specs = {spec['name']: spec for spec in REQUIRED_INDEXES}
+
+        for name, replacement in OBSOLETE_INDEXES.items():
+            spec = specs[replacement]
+            present = [
+                index for index in existing
+                if index['table_name'].lower() == spec['table'] and index['index_name'] == name
+            ]
+            if not present:
+                continue
+            # Chỉ xét index khác index sắp xóa, tránh xóa mất index duy nhất của cột
+            others = [index for index in existing if index['index_name'] != name]
+            if not _is_satisfied(spec, others):
+                logger.warning(f"⚠️ Giữ index {name}: chưa có {replacement}")
+                continue
+
+            logger.info(f"🔧 Đang xóa index trùng {name} trên {spec['table']}...")
+            if db.execute_query(f"ALTER TABLE {spec['table']} DROP INDEX {name}", commit=True) is not None:
+                dropped.append(name)
+            else:
+                logger.warning(f"⚠️ Không thể xóa index {name}")
+
+    except Exception as e:
+        logger.error(f"❌ Lỗi xóa index trùng: {e}")
+
+    return dropped
@@ -17,11 +17,23 @@ class DatabaseConfig:
     PASSWORD = os.getenv('DB_PASSWORD', '05042004')
     DATABASE = os.getenv('DB_NAME', 'library_management')
 
-    # Connection pool settings
-    POOL_NAME = 'library_pool'
-    POOL_SIZE = 10
+    # Connection pool settings (config.connection_pool)
+    POOL_SIZE = int(os.getenv('DB_POOL_SIZE', 10))
+    # Connection mở thêm khi tải cao (đóng lại khi trả về)
+    POOL_MAX_OVERFLOW = int(os.getenv('DB_POOL_MAX_OVERFLOW', 5))
+    # Số giây chờ tối đa khi hết connection
+    POOL_TIMEOUT = float(os.getenv('DB_POOL_TIMEOUT', 10))
+    # Connection nằm yên quá số giây này được ping trước khi dùng
+    POOL_PING_IDLE_SECONDS = float(os.getenv('DB_POOL_PING_IDLE_SECONDS', 30))
     POOL_RESET_SESSION = True
 
+    # Chế độ driver nhanh (tùy chọn): C extension của mysql-connector, prepared statement
+    # phía server (binary protocol) dùng lại theo connection, dòng kết quả dạng tuple (config.rows)
+    # Không reset phiên khi trả connection (reset sẽ xóa prepared statement), chỉ rollback
+    FAST_DRIVER = os.getenv('DB_FAST_DRIVER', 'False').lower() in ('true', '1')
+    # Số prepared statement giữ lại trên mỗi connection
+    STATEMENT_CACHE_SIZE = int(os.getenv('DB_STATEMENT_CACHE_SIZE', 64))
+
     @classmethod
     def get_config(cls) -> Dict[str, any]:
         """Trả về dict config cho MySQL connector"""
@@ -35,19 +47,20 @@ class DatabaseConfig:
             'collation': 'utf8mb4_unicode_ci',
             'autocommit': False,
             'raise_on_warnings': False,
-            'use_pure': True
+            'use_pure': not cls.FAST_DRIVER
         }
 
     @classmethod
     def get_pool_config(cls) -> Dict[str, any]:
-        """Config cho connection pool"""
-        config = cls.get_config()
-        config.update({
-            'pool_name': cls.POOL_NAME,
-            'pool_size': cls.POOL_SIZE,
-            'pool_reset_session': cls.POOL_RESET_SESSION
-        })
-        return config
+        """Tham số cho ConnectionPool (config kết nối lấy từ get_config)"""
+        return {
+            'size': cls.POOL_SIZE,
+            'max_overflow': cls.POOL_MAX_OVERFLOW,
+            'timeout': cls.POOL_TIMEOUT,
+            'ping_idle_seconds': cls.POOL_PING_IDLE_SECONDS,
+            'reset_session': cls.POOL_RESET_SESSION and not cls.FAST_DRIVER,
+            'statement_cache_size': cls.STATEMENT_CACHE_SIZE
+        }
 
 
 class AppConfig:
@@ -70,8 +83,26 @@ class AppConfig:
     # Settings
     MAX_SEARCH_RESULTS = 1000
     ITEMS_PER_PAGE = 50
+
+    # Số dòng mỗi lô khi xuất file trực tiếp từ database
+    EXPORT_CHUNK_SIZE = int(os.getenv('EXPORT_CHUNK_SIZE', 2000))
+    # Số dòng mỗi lô (1 câu INSERT nhiều dòng) khi nhập file
+    IMPORT_BATCH_SIZE = int(os.getenv('IMPORT_BATCH_SIZE', 1000))
     DEFAULT_CARD_VALIDITY_DAYS = 365
 
+    # Thời gian giữ kết quả thống kê (giây), 0 = không cache
+    STATS_CACHE_SECONDS = int(os.getenv('STATS_CACHE_SECONDS', 15))
+
+    # Cache sách/độc giả theo id (số phần tử tối đa, thời gian sống), 0 = không cache
+    ENTITY_CACHE_SIZE = int(os.getenv('ENTITY_CACHE_SIZE', 5000))
+    ENTITY_CACHE_SECONDS = int(os.getenv('ENTITY_CACHE_SECONDS', 60))
+
+    # Thống kê truy vấn (config.query_profiler): bật/tắt, ngưỡng log truy vấn chậm (ms),
+    # file ghi số liệu khi thoát ứng dụng
+    QUERY_PROFILING = os.getenv('QUERY_PROFILING', 'True').lower() == 'true'
+    SLOW_QUERY_MS = float(os.getenv('SLOW_QUERY_MS', 200))
+    QUERY_PROFILE_FILE = Path(os.getenv('QUERY_PROFILE_FILE', BASE_DIR / 'logs' / 'query_profile.json'))
+
     # Colors
     COLOR_PRIMARY = '#2196F3'
     COLOR_SUCCESS = '#4CAF50'
@@ -1,10 +1,15 @@
-from typing import List, Optional
+from itertools import chain
+from typing import List, Optional, Tuple
 import logging
 
 from models.book import Book, Author, Category, Publisher
+from models.columnar import ColumnarResult
 from services.book_service import BookService
 from utils.messagebox_helper import MessageBoxHelper
+from utils.import_helper import ImportHelper, ImportReport
+from utils.process_task import ProcessTask
 from utils.export_helper import ExportHelper
+from utils.timing import get_timing
 
 logger = logging.getLogger(__name__)
 
@@ -70,10 +75,18 @@ class BookController:
 
     # ========== QUERY OPERATIONS ==========
 
-    def get_all_books(self) -> List[Book]:
-        """Lấy danh sách tất cả sách"""
+    def get_all_books(self) -> ColumnarResult:
+        """Lấy danh sách tất cả sách (dạng cột, duyệt for nhận Book)"""
         return self.service.get_all_books()
 
+    def get_books_page(self, after_id: Optional[int] = None, limit: Optional[int] = None) -> List[Book]:
+        """Lấy 1 trang sách (keyset theo book_id)"""
+        return self.service.get_books_page(after_id, limit)
+
+    def count_books(self) -> int:
+        """Đếm tổng số đầu sách"""
+        return self.service.count_books()
+
     def get_book_by_id(self, book_id: int) -> Optional[Book]:
         """Lấy thông tin sách theo ID"""
         return self.service.get_book_by_id(book_id)
@@ -84,10 +97,26 @@ class BookController:
             return self.get_all_books()
         return self.service.search_books(keyword, search_by)
 
+    def get_data_version(self) -> Optional[int]:
+        """Version nhật ký thay đổi, dùng làm con trỏ cho get_changes_since"""
+        return self.service.get_data_version()
+
+    def get_changes_since(self, version: Optional[int]) -> Optional[dict]:
+        """Các thay đổi sau version (None = cần tải lại toàn bộ)"""
+        return self.service.get_changes_since(version)
+
     def get_statistics(self) -> dict:
         """Lấy thống kê"""
         return self.service.get_statistics()
 
+    def get_statistics_timing(self) -> dict:
+        """Số liệu thời gian truy vấn thống kê (count, last_ms, avg_ms, max_ms)"""
+        return get_timing(BookService.STATS_TIMING_NAME)
+
+    def get_cache_stats(self) -> dict:
+        """Số liệu cache sách theo id (hits, misses, hit_rate, size)"""
+        return BookService.get_cache_stats()
+
     # ========== INVENTORY OPERATIONS ==========
 
     def update_inventory(self, book_id: int, total_qty: int, available_qty: int, parent=None) -> bool:
@@ -158,8 +187,77 @@ class BookController:
             self.msg_helper.show_error("Lỗi thêm nhà xuất bản", error, parent=parent)
             return None
 
+    # ========== IMPORT OPERATIONS ==========
+
+    def import_file(self, filename: str, progress=None) -> dict:
+        """
+        Nhập sách từ file CSV/Excel (cùng tiêu đề cột với file xuất)
+        Gọi ở luồng nền; progress(số dòng đã xử lý) được gọi từ luồng đó
+        """
+        records = ImportHelper.read_records(filename, ImportHelper.BOOK_COLUMNS)
+        return self.service.import_books(records, progress)
+
+    def show_import_result(self, result: dict, parent=None) -> bool:
+        """Thông báo kết quả import_file (gọi trên luồng giao diện)"""
+        message = ImportReport.summarize(result, 'sách')
+
+        if result['error']:
+            self.msg_helper.show_error("Lỗi nhập file", message, parent=parent)
+        elif result['failed']:
+            self.msg_helper.show_warning("Nhập file có dòng lỗi", message, parent=parent)
+        else:
+            self.msg_helper.show_success(message, parent=parent)
+        return result['imported'] > 0
+
     # ========== EXPORT OPERATIONS ==========
 
+    # Định dạng xuất trực tiếp từ database (không cần danh sách đã tải)
+    STREAM_EXPORT_FORMATS = {'json': 'JSON', 'csv': 'CSV', 'excel': 'Excel', 'pdf': 'PDF'}
+
+    def export_all(self, fmt: str, progress=None) -> Tuple[bool, str, int]:
+        """
+        Xuất toàn bộ sách đọc theo lô từ database (bộ nhớ không tăng theo số dòng)
+        Gọi ở luồng nền; progress(số dòng đã ghi) được gọi từ luồng đó
+        Returns: (success, message, số dòng đã ghi)
+        """
+        exporters = {
+            'json': self.export_helper.export_books_to_json,
+            'csv': self.export_helper.export_books_to_csv,
+            'excel': self.export_helper.export_books_to_excel,
+            'pdf': lambda records, progress: self.export_helper.export_books_to_pdf(
+                records, progress=progress, total=self.service.count_books()
+            ),
+        }
+        written = [0]
+
+        def on_progress(count: int):
+            written[0] = count
+            if progress:
+                progress(count)
+
+        records = chain.from_iterable(self.service.iter_books())
+        success, message = exporters[fmt](records, progress=on_progress)
+        return success, message, written[0]
+
+    def start_export_process(self, fmt: str) -> ProcessTask:
+        """Chạy export_all trong tiến trình con (dùng cho PDF: dàn trang nặng CPU)"""
+        return ProcessTask(export_all_in_process, (fmt,)).start()
+
+    def show_export_result(self, fmt: str, result: Tuple[bool, str, int], parent=None) -> bool:
+        """Thông báo kết quả export_all (gọi trên luồng giao diện)"""
+        success, message, count = result
+        label = self.STREAM_EXPORT_FORMATS[fmt]
+
+        if success:
+            self.msg_helper.show_success(
+                f"Đã xuất {count} sách ra {label}\n{message}",
+                parent=parent
+            )
+            return True
+        else:
+            self.msg_helper.show_error(f"Lỗi xuất {label}", message, parent=parent)
+            return False
+
     def export_json(self, books: List[Book], parent=None) -> bool:
         """Xuất ra JSON"""
         if not books:
@@ -230,4 +328,9 @@ class BookController:
             return True
         else:
             self.msg_helper.show_error("Lỗi xuất PDF", message, parent=parent)
-            return False
\ No newline at end of file
+            return False
+
+
+def export_all_in_process(fmt: str, progress=None) -> Tuple[bool, str, int]:
+    """Điểm vào của tiến trình con: tự tạo controller và đọc database"""
+    return BookController().export_all(fmt, progress)
@@ -7,11 +7,20 @@ class BorrowController:
     def create_borrow_by_name(self, reader_name, book_name):
         return self.service.create_borrow(reader_name, book_name)
 
+    def create_borrow_batch(self, reader_name, book_refs):
+        return self.service.create_borrow_batch(reader_name, book_refs)
+
     def update_borrow(self, slip_id, borrow_date, return_date, status):
         return self.service.update_borrow(slip_id, borrow_date, return_date, status)
 
     def return_books(self, slip_id):
         return self.service.return_books(slip_id)
 
+    def return_books_batch(self, slip_ids):
+        return self.service.return_books_batch(slip_ids)
+
     def get_all_borrows(self):
         return self.service.get_all_borrows()
+
+    def get_borrows_page(self, after=None, **filters):
+        return self.service.get_borrows_page(after=after, **filters)
@@ -1,10 +1,14 @@
-from typing import List, Optional
+from itertools import chain
+from typing import List, Optional, Tuple
 import logging
 
+from models.columnar import ColumnarResult
 from models.reader import Reader
 from services.reader_service import ReaderService
 from utils.messagebox_helper import MessageBoxHelper
-from utils. export_helper import ExportHelper
+from utils.import_helper import ImportHelper, ImportReport
+from utils.process_task import ProcessTask
+from utils.export_helper import ExportHelper
 
 logger = logging.getLogger(__name__)
 
@@ -70,8 +74,8 @@ class ReaderController:
 
     # ========== QUERY OPERATIONS ==========
 
-    def get_all_readers(self) -> List[Reader]:
-        """Lấy danh sách tất cả bạn đọc"""
+    def get_all_readers(self) -> ColumnarResult:
+        """Lấy danh sách tất cả bạn đọc (dạng cột, duyệt for nhận Reader)"""
         return self.service.get_all_readers()
 
     def get_reader_by_id(self, reader_id: int) -> Optional[Reader]:
@@ -94,6 +98,18 @@ class ReaderController:
         """Lọc bạn đọc"""
         return self.service.filter_readers(status, min_reputation, max_reputation, expiring_soon)
 
+    def get_cache_stats(self) -> dict:
+        """Số liệu cache bạn đọc theo id (hits, misses, hit_rate, size)"""
+        return self.service.get_cache_stats()
+
+    def get_data_version(self) -> Optional[int]:
+        """Version nhật ký thay đổi, dùng làm con trỏ cho get_changes_since"""
+        return self.service.get_data_version()
+
+    def get_changes_since(self, version: Optional[int]) -> Optional[dict]:
+        """Các thay đổi sau version (None = cần tải lại toàn bộ)"""
+        return self.service.get_changes_since(version)
+
     def get_statistics(self) -> dict:
         """Lấy thống kê"""
         return self.service.get_statistics()
@@ -146,8 +162,77 @@ class ReaderController:
             self.msg_helper.show_info("Không có gì thay đổi", message, parent=parent)
             return False
 
+    # ========== IMPORT OPERATIONS ==========
+
+    def import_file(self, filename: str, progress=None) -> dict:
+        """
+        Nhập bạn đọc từ file CSV/Excel (cùng tiêu đề cột với file xuất)
+        Gọi ở luồng nền; progress(số dòng đã xử lý) được gọi từ luồng đó
+        """
+        records = ImportHelper.read_records(filename, ImportHelper.READER_COLUMNS)
+        return self.service.import_readers(records, progress)
+
+    def show_import_result(self, result: dict, parent=None) -> bool:
+        """Thông báo kết quả import_file (gọi trên luồng giao diện)"""
+        message = ImportReport.summarize(result, 'bạn đọc')
+
+        if result['error']:
+            self.msg_helper.show_error("Lỗi nhập file", message, parent=parent)
+        elif result['failed']:
+            self.msg_helper.show_warning("Nhập file có dòng lỗi", message, parent=parent)
+        else:
+            self.msg_helper.show_success(message, parent=parent)
+        return result['imported'] > 0
+
     # ========== EXPORT OPERATIONS ==========
 
+    # Định dạng xuất trực tiếp từ database (không cần danh sách đã tải)
+    STREAM_EXPORT_FORMATS = {'json': 'JSON', 'csv': 'CSV', 'excel': 'Excel', 'pdf': 'PDF'}
+
+    def export_all(self, fmt: str, progress=None) -> Tuple[bool, str, int]:
+        """
+        Xuất toàn bộ bạn đọc đọc theo lô từ database (bộ nhớ không tăng theo số dòng)
+        Gọi ở luồng nền; progress(số dòng đã ghi) được gọi từ luồng đó
+        Returns: (success, message, số dòng đã ghi)
+        """
+        exporters = {
+            'json': self.export_helper.export_to_json,
+            'csv': self.export_helper.export_to_csv,
+            'excel': self.export_helper.export_to_excel,
+            'pdf': lambda records, progress: self.export_helper.export_to_pdf(
+                records, progress=progress, total=self.service.get_statistics().get('total')
+            ),
+        }
+        written = [0]
+
+        def on_progress(count: int):
+            written[0] = count
+            if progress:
+                progress(count)
+
+        records = chain.from_iterable(self.service.iter_readers())
+        success, message = exporters[fmt](records, progress=on_progress)
+        return success, message, written[0]
+
+    def start_export_process(self, fmt: str) -> ProcessTask:
+        """Chạy export_all trong tiến trình con (dùng cho PDF: dàn trang nặng CPU)"""
+        return ProcessTask(export_all_in_process, (fmt,)).start()
+
+    def show_export_result(self, fmt: str, result: Tuple[bool, str, int], parent=None) -> bool:
+        """Thông báo kết quả export_all (gọi trên luồng giao diện)"""
+        success, message, count = result
+        label = self.STREAM_EXPORT_FORMATS[fmt]
+
+        if success:
+            self.msg_helper.show_success(
+                f"Đã xuất {count} bạn đọc ra {label}\n{message}",
+                parent=parent
+            )
+            return True
+        else:
+            self.msg_helper.show_error(f"Lỗi xuất {label}", message, parent=parent)
+            return False
+
     def export_json(self, readers: List[Reader], parent=None) -> bool:
         """Xuất ra JSON"""
         if not readers:
@@ -218,4 +303,9 @@ class ReaderController:
             return True
         else:
             self.msg_helper.show_error("Lỗi xuất PDF", message, parent=parent)
-            return False
\ No newline at end of file
+            return False
+
+
+def export_all_in_process(fmt: str, progress=None) -> Tuple[bool, str, int]:
+    """Điểm vào của tiến trình con: tự tạo controller và đọc database"""
+    return ReaderController().export_all(fmt, progress)
@@ -12,6 +12,7 @@ Year: 2025
 
 import tkinter as tk
 from tkinter import messagebox
+import multiprocessing
 import sys
 import logging
 from pathlib import Path
@@ -88,6 +89,12 @@ def main():
         # Start main loop
         app.mainloop()
 
+        # Ghi thống kê truy vấn để xem bằng: python -m tools.query_report
+        from config import db, query_profiler
+        if query_profiler.enabled:
+            query_profiler.dump()
+        logger.info(f"📊 Connection pool: {db.get_pool_stats()}")
+
     except KeyboardInterrupt:
         logger.info("Application interrupted by user (Ctrl+C)")
         sys.exit(0)
@@ -120,4 +127,6 @@ def main():
 
 
 if __name__ == "__main__":
+    # Bản đóng gói (PyInstaller) cần dòng này cho tiến trình con xuất PDF
+    multiprocessing.freeze_support()
     main()
\ No newline at end of file
@@ -1,4 +1,6 @@
 class BorrowDetail:
+    __slots__ = ('detail_id', 'slip_id', 'book_id', 'quantity', 'fine_amount')
+
     def __init__(
         self,
         slip_id,
@@ -4,6 +4,8 @@ class BorrowSlip:
     STATUS_LATE = "LATE"
     STATUS_LOST = "LOST"
 
+    __slots__ = ('slip_id', 'reader_id', 'staff_id', 'borrow_date', 'return_due', 'return_date', 'status')
+
     def __init__(
         self,
         reader_id,
@@ -3,6 +3,8 @@ class Penalty:
     TYPE_LOST = "LOST"
     TYPE_DAMAGED = "DAMAGED"
 
+    __slots__ = ('penalty_id', 'reader_id', 'slip_id', 'book_id', 'penalty_type', 'amount', 'created_at')
+
     def __init__(
         self,
         reader_id,
@@ -8,6 +8,25 @@ class Book:
     Mapping với bảng 'books' trong MySQL database
     """
 
+    # Cột của BOOK_SELECT_QUERY khi tải dạng cột (ColumnarResult), cột số -> dtype numpy
+    # (tên tác giả/thể loại/NXB được service điền từ cache tra cứu)
+    COLUMNS = (
+        'book_id', 'title', 'author_id', 'category_id', 'publisher_id', 'publish_year',
+        'isbn', 'barcode', 'price', 'description', 'total_quantity', 'available_quantity'
+    )
+    NUMERIC_COLUMNS = {
+        'book_id': 'int64', 'publish_year': 'int64', 'price': 'float64',
+        'total_quantity': 'int64', 'available_quantity': 'int64'
+    }
+
+    # Không dùng __dict__: danh sách sách lớn tốn ít bộ nhớ hơn
+    __slots__ = (
+        'book_id', 'title', 'author_id', 'category_id', 'publisher_id',
+        'publish_year', 'isbn', 'barcode', 'price', 'description',
+        'author_name', 'category_name', 'publisher_name',
+        'total_quantity', 'available_quantity'
+    )
+
     def __init__(
             self,
             title: str,
@@ -102,9 +121,14 @@ class Book:
 
     def get_stock_status(self) -> str:
         """Lấy trạng thái tồn kho"""
-        if self.available_quantity == 0:
+        return Book.stock_status(self.available_quantity)
+
+    @staticmethod
+    def stock_status(available_quantity: int) -> str:
+        """Trạng thái tồn kho theo số lượng còn (dùng được khi không có object Book)"""
+        if available_quantity == 0:
             return '❌ Hết hàng'
-        elif self.available_quantity < 5:
+        elif available_quantity < 5:
             return '⚠️ Sắp hết'
         else:
             return '✅ Còn hàng'
@@ -161,6 +185,8 @@ class Book:
 class Author:
     """Model cho Tác giả"""
 
+    __slots__ = ('author_id', 'author_name')
+
     def __init__(self, author_id: Optional[int] = None, author_name: str = ''):
         self.author_id = author_id
         self.author_name = author_name
@@ -182,6 +208,8 @@ class Author:
 class Category:
     """Model cho Thể loại"""
 
+    __slots__ = ('category_id', 'category_name')
+
     def __init__(self, category_id: Optional[int] = None, category_name: str = ''):
         self.category_id = category_id
         self.category_name = category_name
@@ -203,6 +231,8 @@ class Category:
 class Publisher:
     """Model cho Nhà xuất bản"""
 
+    __slots__ = ('publisher_id', 'publisher_name', 'address', 'phone')
+
     def __init__(
             self,
             publisher_id: Optional[int] = None,
@@ -0,0 +1,214 @@
+"""
+Columnar - Kết quả truy vấn dạng cột cho danh sách lớn (get_all_books, get_all_readers)
+
+Mỗi cột là 1 list; cột số (giá, số lượng, điểm uy tín...) là numpy array nếu đã
+cài numpy (không bắt buộc). Sắp xếp, lọc, thống kê, dựng dòng Treeview/xuất file
+đọc thẳng trên cột, không dựng model cho từng dòng. Duyệt for / [i] vẫn trả về
+model (dựng khi cần) nên nơi gọi cũ dùng như List[model] được.
+"""
+from collections import Counter
+from operator import itemgetter
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
+
+try:
+    import numpy
+except ImportError:  # numpy không bắt buộc: cột số giữ dạng list
+    numpy = None
+
+
+def _to_array(values: list, dtype: str):
+    """
+    list -> numpy array; cột số thực: None -> nan
+    Không có numpy, hoặc cột số nguyên có None (vd: năm XB) thì giữ list
+    """
+    if numpy is None:
+        return values
+    if None in values:
+        if dtype != 'float64':
+            return values
+        return numpy.array([numpy.nan if value is None else value for value in values], dtype=dtype)
+    return numpy.array(values, dtype=dtype)
+
+
+class ColumnarResult:
+    """
+    Kết quả dạng cột: {tên cột: giá trị} cùng độ dài, kèm hàm dựng model từ dict 1 dòng
+    Các thao tác trả về ColumnarResult mới, không sửa kết quả cũ
+    """
+
+    __slots__ = ('columns', 'factory', '_length', '_python')
+
+    def __init__(self, columns: Dict[str, Sequence], factory: Callable[[dict], Any]):
+        self.columns = columns
+        self.factory = factory
+        self._length = len(next(iter(columns.values()))) if columns else 0
+        self._python: Dict[str, list] = {}
+
+    @classmethod
+    def from_rows(
+            cls,
+            rows: Sequence,
+            names: Iterable[str],
+            factory: Callable[[dict], Any],
+            numeric: Optional[Dict[str, str]] = None
+    ) -> 'ColumnarResult':
+        """
+        Chuyển các dòng database (dict/Row) thành cột, mỗi cột 1 lượt
+        numeric: {tên cột: dtype numpy} các cột chuyển sang numpy array
+        Cột không có trong kết quả (vd: bảng cũ chưa có created_at) nhận None
+        """
+        numeric = numeric or {}
+        columns = {}
+        for name in names:
+            if rows and name not in rows[0]:
+                values = [None] * len(rows)
+            else:
+                values = list(map(itemgetter(name), rows))
+            columns[name] = _to_array(values, numeric[name]) if name in numeric else values
+        return cls(columns, factory)
+
+    @classmethod
+    def from_models(
+            cls,
+            models: Iterable,
+            names: Iterable[str],
+            factory: Callable[[dict], Any],
+            numeric: Optional[Dict[str, str]] = None
+    ) -> 'ColumnarResult':
+        """Chuyển danh sách model (vd: kết quả tìm kiếm) thành cột"""
+        models = list(models)
+        numeric = numeric or {}
+        columns = {}
+        for name in names:
+            values = [getattr(model, name) for model in models]
+            columns[name] = _to_array(values, numeric[name]) if name in numeric else values
+        return cls(columns, factory)
+
+    # ========== TRUY CẬP ==========
+
+    def __len__(self) -> int:
+        return self._length
+
+    @property
+    def names(self) -> List[str]:
+        return list(self.columns)
+
+    def column(self, name: str) -> Sequence:
+        """Cột theo tên (numpy array hoặc list)"""
+        return self.columns[name]
+
+    def add_column(self, name: str, values: Sequence):
+        """Thêm/thay 1 cột (cùng độ dài), dùng khi dựng kết quả"""
+        if len(values) != self._length:
+            raise ValueError(f"Cột '{name}' có {len(values)} giá trị, cần {self._length}")
+        self.columns[name] = values
+        self._python.pop(name, None)
+
+    def values(self, name: str) -> list:
+        """Cột dạng list giá trị Python (numpy -> int/float, nan -> None), giữ lại cho lần sau"""
+        values = self._python.get(name)
+        if values is None:
+            column = self.columns[name]
+            if numpy is not None and isinstance(column, numpy.ndarray):
+                values = column.tolist()
+                if column.dtype.kind == 'f':
+                    values = [None if value != value else value for value in values]
+            else:
+                values = column
+            self._python[name] = values
+        return values
+
+    def records(self, names: Sequence[str]) -> Iterator[tuple]:
+        """Các dòng dạng tuple theo thứ tự names (dựng Treeview/xuất file không cần model)"""
+        return zip(*(self.values(name) for name in names))
+
+    def row(self, position: int) -> dict:
+        """Dòng thứ position dạng dict {tên cột: giá trị}"""
+        return {name: self.values(name)[position] for name in self.columns}
+
+    def __getitem__(self, position: int):
+        return self.factory(self.row(position))
+
+    def __iter__(self):
+        names = list(self.columns)
+        factory = self.factory
+        for values in self.records(names):
+            yield factory(dict(zip(names, values)))
+
+    # ========== SẮP XẾP / LỌC ==========
+
+    def take(self, positions: Sequence[int]) -> 'ColumnarResult':
+        """Kết quả mới gồm các dòng ở positions (theo đúng thứ tự đó)"""
+        columns = {}
+        for name, column in self.columns.items():
+            if numpy is not None and isinstance(column, numpy.ndarray):
+                columns[name] = column[numpy.asarray(positions, dtype='intp')]
+            else:
+                columns[name] = [column[i] for i in positions]
+        return ColumnarResult(columns, self.factory)
+
+    def sort_by(self, name: str, reverse: bool = False, key: Optional[Callable] = None) -> 'ColumnarResult':
+        """
+        Sắp xếp theo 1 cột (ổn định), giá trị rỗng (None/nan) luôn ở cuối
+        key: chuẩn hóa giá trị trước khi so sánh (vd: to_date_str khi cột lẫn date và chuỗi)
+        """
+        column = self.columns[name]
+        if key is None and numpy is not None and isinstance(column, numpy.ndarray):
+            # argsort đưa nan về cuối; đảo dấu để giảm dần mà nan vẫn ở cuối
+            order = numpy.argsort(-column if reverse else column, kind='stable')
+            return self.take(order)
+
+        column = self.values(name)
+        if key is not None:
+            column = [None if value is None else key(value) for value in column]
+        present = [i for i, value in enumerate(column) if value is not None]
+        missing = [i for i, value in enumerate(column) if value is None]
+        present.sort(key=column.__getitem__, reverse=reverse)
+        return self.take(present + missing)
+
+    def concat(self, other: 'ColumnarResult') -> 'ColumnarResult':
+        """Kết quả mới gồm các dòng của self rồi tới các dòng của other (cùng tên cột)"""
+        columns = {}
+        for name, column in self.columns.items():
+            theirs = other.columns[name]
+            if (numpy is not None and isinstance(column, numpy.ndarray)
+                    and isinstance(theirs, numpy.ndarray) and column.dtype == theirs.dtype):
+                columns[name] = numpy.concatenate((column, theirs))
+            else:
+                columns[name] = list(self.values(name)) + list(other.values(name))
+        return ColumnarResult(columns, self.factory)
+
+    def filter(self, mask: Sequence[bool]) -> 'ColumnarResult':
+        """Giữ các dòng có mask đúng (list bool hoặc numpy array bool)"""
+        return self.take([i for i, keep in enumerate(mask) if keep])
+
+    def where(self, name: str, predicate: Callable[[Any], bool]) -> 'ColumnarResult':
+        """Giữ các dòng có predicate(giá trị cột name) đúng (bỏ qua giá trị rỗng)"""
+        return self.filter([value is not None and predicate(value) for value in self.values(name)])
+
+    # ========== THỐNG KÊ ==========
+
+    def sum(self, name: str) -> float:
+        """Tổng cột số (bỏ qua giá trị rỗng)"""
+        column = self.columns[name]
+        if numpy is not None and isinstance(column, numpy.ndarray):
+            return numpy.nansum(column).item()
+        return sum(value for value in column if value is not None)
+
+    def mean(self, name: str) -> Optional[float]:
+        """Trung bình cột số (bỏ qua giá trị rỗng), None nếu cột rỗng"""
+        values = [value for value in self.values(name) if value is not None]
+        if not values:
+            return None
+        return self.sum(name) / len(values)
+
+    def count_by(self, name: str) -> Dict[Any, int]:
+        """Số dòng theo từng giá trị của cột (vd: trạng thái)"""
+        return dict(Counter(self.values(name)))
+
+    def min_max(self, name: str) -> Tuple[Optional[Any], Optional[Any]]:
+        """(nhỏ nhất, lớn nhất) của cột, bỏ qua giá trị rỗng"""
+        values = [value for value in self.values(name) if value is not None]
+        if not values:
+            return None, None
+        return min(values), max(values)
@@ -0,0 +1,48 @@
+"""
+Fields - Thuộc tính dùng chung cho các model
+"""
+from datetime import date, datetime
+from typing import Any, Optional
+
+
+def to_date_str(value: Any) -> Optional[str]:
+    """date/datetime (MySQL trả về) -> 'YYYY-MM-DD', chuỗi giữ nguyên, rỗng -> None"""
+    if not value:
+        return None
+    if isinstance(value, str):
+        return value
+    # isoformat() nhanh hơn strftime nhiều lần, cùng kết quả
+    if isinstance(value, datetime):
+        return value.date().isoformat()
+    if isinstance(value, date):
+        return value.isoformat()
+    if hasattr(value, 'strftime'):
+        return value.strftime('%Y-%m-%d')
+    return str(value)
+
+
+class LazyDate:
+    """
+    Descriptor cho cột ngày: lưu nguyên giá trị database trả về (date/datetime),
+    chỉ đổi sang chuỗi 'YYYY-MM-DD' ở lần đọc đầu tiên rồi giữ lại kết quả.
+    Tải danh sách lớn không phải gọi strftime cho những ngày không được hiển thị.
+
+    Class dùng __slots__ phải khai báo slot '_<tên thuộc tính>'.
+    """
+
+    __slots__ = ('slot',)
+
+    def __set_name__(self, owner, name):
+        self.slot = '_' + name
+
+    def __get__(self, obj, owner=None):
+        if obj is None:
+            return self
+        value = getattr(obj, self.slot)
+        if value is not None and not isinstance(value, str):
+            value = to_date_str(value)
+            setattr(obj, self.slot, value)
+        return value
+
+    def __set__(self, obj, value):
+        setattr(obj, self.slot, value)
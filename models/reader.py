@@ -1,6 +1,8 @@
 from datetime import datetime, timedelta
 from typing import Optional
 
+from models.fields import LazyDate, to_date_str
+
 
 class Reader:
     """
@@ -29,6 +31,26 @@ class Reader:
     # List tất cả status hợp lệ
     VALID_STATUSES = [STATUS_ACTIVE, STATUS_EXPIRED, STATUS_LOCKED]
 
+    # Cột của bảng readers khi tải dạng cột (ColumnarResult), cột số -> dtype numpy
+    COLUMNS = (
+        'reader_id', 'full_name', 'address', 'phone', 'email', 'card_start', 'card_end',
+        'status', 'reputation_score', 'created_at', 'updated_at'
+    )
+    NUMERIC_COLUMNS = {'reader_id': 'int64', 'reputation_score': 'int64'}
+
+    # Không dùng __dict__: tải hàng trăm nghìn bạn đọc tốn ít bộ nhớ hơn
+    __slots__ = (
+        'reader_id', 'full_name', 'address', 'phone', 'email',
+        '_card_start', '_card_end', 'status', 'reputation_score',
+        '_created_at', '_updated_at'
+    )
+
+    # Cột ngày: giữ date của MySQL, đổi sang 'YYYY-MM-DD' khi được đọc lần đầu
+    card_start = LazyDate()
+    card_end = LazyDate()
+    created_at = LazyDate()
+    updated_at = LazyDate()
+
     def __init__(
             self,
             full_name: str,
@@ -122,32 +144,19 @@ class Reader:
         Returns:
             Reader: Object Reader mới
         """
-
-        # Xử lý date nếu là datetime object (MySQL trả về)
-        def convert_date(date_value):
-            if date_value and hasattr(date_value, 'strftime'):
-                return date_value.strftime('%Y-%m-%d')
-            elif date_value:
-                return str(date_value)
-            return None
-
-        card_start = convert_date(data.get('card_start'))
-        card_end = convert_date(data.get('card_end'))
-        created_at = convert_date(data.get('created_at'))
-        updated_at = convert_date(data.get('updated_at'))
-
+        # Ngày (date/datetime MySQL trả về) được đổi sang chuỗi khi đọc lần đầu (LazyDate)
         return Reader(
             reader_id=data.get('reader_id'),
             full_name=data.get('full_name', ''),
             address=data.get('address'),
             phone=data.get('phone'),
             email=data.get('email'),
-            card_start=card_start,
-            card_end=card_end,
+            card_start=data.get('card_start'),
+            card_end=data.get('card_end'),
             status=data.get('status', Reader.STATUS_ACTIVE),
             reputation_score=data.get('reputation_score', 100),
-            created_at=created_at,
-            updated_at=updated_at
+            created_at=data.get('created_at'),
+            updated_at=data.get('updated_at')
         )
 
     @staticmethod
@@ -207,11 +216,16 @@ class Reader:
             int: Số ngày còn lại (âm nếu đã hết hạn)
             None: Nếu không có card_end
         """
-        if not self.card_end:
+        return Reader.days_until(self.card_end)
+
+    @staticmethod
+    def days_until(card_end) -> Optional[int]:
+        """Số ngày từ hiện tại tới card_end (date hoặc 'YYYY-MM-DD'), None nếu không có/không hợp lệ"""
+        if not card_end:
             return None
 
         try:
-            end_date = datetime.strptime(self.card_end, '%Y-%m-%d')
+            end_date = datetime.strptime(to_date_str(card_end), '%Y-%m-%d')
             delta = end_date - datetime.now()
             return delta.days
         except (ValueError, TypeError):
@@ -1,15 +1,79 @@
-from typing import List, Optional, Tuple
+from typing import Any, Callable, Iterable, Iterator, List, Optional, Tuple
 import logging
+import re
 
-from config.database import db
+from config import schema
+from config.database import PoolExhausted, TransactionAborted, db, duplicate_key_name
+from config.settings import AppConfig
 from models.book import Book, Author, Category, Publisher
+from models.columnar import ColumnarResult
+from services.change_log import ChangeLog
+from utils.cache import EntityCache, LookupCache
+from utils.import_helper import ImportHelper, ImportReport
+from utils.timing import timed
 
 logger = logging.getLogger(__name__)
 
+# Độ dài token tối thiểu của InnoDB FULLTEXT (innodb_ft_min_token_size)
+FULLTEXT_MIN_TOKEN_SIZE = 3
+
+# Câu SELECT dùng chung cho danh sách / chi tiết / tìm kiếm sách
+# Tên tác giả/thể loại/NXB không JOIN mà tra trong cache bộ nhớ (_to_books)
+BOOK_SELECT_COLUMNS = """
+    SELECT b.*,
+           COALESCE(bi.total_quantity, 0) as total_quantity,
+           COALESCE(bi.available_quantity, 0) as available_quantity
+"""
+
+BOOK_JOINS = """
+    LEFT JOIN book_inventory bi ON b.book_id = bi.book_id
+"""
+
+# Chỉ dùng khi cần lọc theo tên (tìm kiếm LIKE dự phòng)
+BOOK_NAME_JOINS = """
+    LEFT JOIN authors a ON b.author_id = a.author_id
+    LEFT JOIN categories c ON b.category_id = c.category_id
+"""
+
+BOOK_SELECT_QUERY = BOOK_SELECT_COLUMNS + " FROM books b" + BOOK_JOINS
+
+BOOK_INSERT_QUERY = """
+    INSERT INTO books (title, author_id, category_id, publisher_id,
+                       publish_year, isbn, barcode, price, description)
+    VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s)
+"""
+INVENTORY_INSERT_QUERY = """
+    INSERT INTO book_inventory (book_id, total_quantity, available_quantity)
+    VALUES (%s, %s, %s)
+"""
+
 
 class BookService:
     """Service layer xử lý business logic cho Book"""
 
+    # Tên số liệu thời gian của get_statistics trong utils.timing
+    STATS_TIMING_NAME = 'book_service.get_statistics'
+
+    # Cache tác giả/thể loại/NXB dùng chung cho mọi instance (BookDialog, danh sách sách)
+    _authors = LookupCache(
+        loader=lambda: BookService._load_lookup("SELECT * FROM authors", Author),
+        key=lambda author: author.author_id,
+        sort_key=lambda author: (author.author_name or '').lower()
+    )
+    _categories = LookupCache(
+        loader=lambda: BookService._load_lookup("SELECT * FROM categories", Category),
+        key=lambda category: category.category_id,
+        sort_key=lambda category: (category.category_name or '').lower()
+    )
+    _publishers = LookupCache(
+        loader=lambda: BookService._load_lookup("SELECT * FROM publishers", Publisher),
+        key=lambda publisher: publisher.publisher_id,
+        sort_key=lambda publisher: (publisher.publisher_name or '').lower()
+    )
+
+    # Identity map sách theo book_id (nạp từ danh sách/tìm kiếm, xóa khi sửa/xóa/đổi tồn kho)
+    _cache = EntityCache(AppConfig.ENTITY_CACHE_SIZE, AppConfig.ENTITY_CACHE_SECONDS)
+
     def __init__(self):
         pass
 
@@ -26,48 +90,29 @@ class BookService:
             return False, error, None
 
         try:
-            # Check ISBN duplicate
-            if book.isbn:
-                existing = db.execute_query(
-                    "SELECT book_id FROM books WHERE isbn = %s",
-                    (book.isbn,),
-                    fetch=True
-                )
-                if existing:
-                    return False, f"ISBN '{book.isbn}' đã tồn tại", None
-
-            # Check Barcode duplicate
-            if book.barcode:
-                existing = db.execute_query(
-                    "SELECT book_id FROM books WHERE barcode = %s",
-                    (book.barcode,),
-                    fetch=True
-                )
-                if existing:
-                    return False, f"Mã vạch '{book.barcode}' đã tồn tại", None
+            # Thêm sách + tồn kho trong 1 giao dịch
+            # ISBN/mã vạch trùng: index UNIQUE báo lỗi 1062 ngay khi INSERT
+            with db.transaction():
+                self._check_duplicate_codes(book, "đã tồn tại")
 
-            # Insert book
-            query = """
-                INSERT INTO books (title, author_id, category_id, publisher_id,
-                                   publish_year, isbn, barcode, price, description)
-                VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s)
-            """
-            book_id = db.execute_query(query, book.to_tuple(), commit=True)
+                # Insert book
+                book_id = db.execute_query(BOOK_INSERT_QUERY, book.to_tuple(), commit=True)
+                if not book_id:
+                    raise TransactionAborted("Không thể thêm sách vào database")
 
-            if book_id:
                 # Tạo bản ghi tồn kho
-                inventory_query = """
-                    INSERT INTO book_inventory (book_id, total_quantity, available_quantity)
-                    VALUES (%s, 0, 0)
-                """
-                db.execute_query(inventory_query, (book_id,), commit=True)
+                db.execute_query(INVENTORY_INSERT_QUERY, (book_id, 0, 0), commit=True)
+                ChangeLog.record(ChangeLog.BOOK, [book_id], ChangeLog.INSERT)
 
-                logger.info(f"✅ Đã thêm sách: {book.title} (ID: {book_id})")
-                return True, None, book_id
-            else:
-                return False, "Không thể thêm sách vào database", None
+            logger.info(f"✅ Đã thêm sách: {book.title} (ID: {book_id})")
+            return True, None, book_id
 
+        except TransactionAborted as e:
+            return False, str(e), None
         except Exception as e:
+            duplicate = self._duplicate_message(e, book, "đã tồn tại")
+            if duplicate:
+                return False, duplicate, None
             logger.error(f"❌ Lỗi thêm sách: {e}")
             return False, f"Lỗi database: {str(e)}", None
 
@@ -81,189 +126,720 @@ class BookService:
             return False, error
 
         try:
-            # Check ISBN duplicate (trừ sách hiện tại)
-            if book.isbn:
-                existing = db.execute_query(
-                    "SELECT book_id FROM books WHERE isbn = %s AND book_id != %s",
-                    (book.isbn, book.book_id),
-                    fetch=True
-                )
-                if existing:
-                    return False, f"ISBN '{book.isbn}' đã được sử dụng bởi sách khác"
-
-            # Check Barcode duplicate
-            if book.barcode:
-                existing = db.execute_query(
-                    "SELECT book_id FROM books WHERE barcode = %s AND book_id != %s",
-                    (book.barcode, book.book_id),
-                    fetch=True
+            with db.transaction():
+                # ISBN/mã vạch trùng với sách khác: index UNIQUE báo lỗi 1062 khi UPDATE
+                self._check_duplicate_codes(book, "đã được sử dụng bởi sách khác", exclude_id=book.book_id)
+
+                query = """
+                    UPDATE books
+                    SET title = %s, author_id = %s, category_id = %s, publisher_id = %s,
+                        publish_year = %s, isbn = %s, barcode = %s, price = %s, description = %s
+                    WHERE book_id = %s
+                """
+                params = (
+                    book.title, book.author_id, book.category_id, book.publisher_id,
+                    book.publish_year, book.isbn, book.barcode, book.price,
+                    book.description, book.book_id
                 )
-                if existing:
-                    return False, f"Mã vạch '{book.barcode}' đã được sử dụng bởi sách khác"
-
-            query = """
-                UPDATE books
-                SET title = %s, author_id = %s, category_id = %s, publisher_id = %s,
-                    publish_year = %s, isbn = %s, barcode = %s, price = %s, description = %s
-                WHERE book_id = %s
-            """
-            params = (
-                book.title, book.author_id, book.category_id, book.publisher_id,
-                book.publish_year, book.isbn, book.barcode, book.price,
-                book.description, book.book_id
-            )
 
-            result = db.execute_query(query, params, commit=True)
+                result = db.execute_query(query, params, commit=True)
+                if result:
+                    ChangeLog.record(ChangeLog.BOOK, [book.book_id], ChangeLog.UPDATE)
 
+            self._cache.invalidate([book.book_id])
             if result and result > 0:
                 logger.info(f"✅ Đã cập nhật sách ID: {book.book_id}")
                 return True, None
             else:
                 return False, "Không tìm thấy sách để cập nhật"
 
+        except TransactionAborted as e:
+            return False, str(e)
         except Exception as e:
+            duplicate = self._duplicate_message(e, book, "đã được sử dụng bởi sách khác")
+            if duplicate:
+                return False, duplicate
             logger.error(f"❌ Lỗi cập nhật sách: {e}")
             return False, f"Lỗi database: {str(e)}"
 
+    @staticmethod
+    def _check_duplicate_codes(book: Book, suffix: str, exclude_id: Optional[int] = None):
+        """
+        Dự phòng khi database chưa có index UNIQUE (vd: dữ liệu cũ đang trùng):
+        kiểm tra trùng ISBN/mã vạch bằng SELECT, trùng thì raise TransactionAborted
+        """
+        for column, label in (('isbn', 'ISBN'), ('barcode', 'Mã vạch')):
+            value = getattr(book, column)
+            if not value or schema.has_index(f'uq_books_{column}'):
+                continue
+
+            existing = db.execute_query(
+                f"SELECT book_id FROM books WHERE {column} = %s AND book_id != %s",
+                (value, exclude_id or 0),
+                fetch=True
+            )
+            if existing:
+                raise TransactionAborted(f"{label} '{value}' {suffix}")
+
+    @staticmethod
+    def _duplicate_message(error: Exception, book: Book, suffix: str) -> Optional[str]:
+        """Thông báo cho lỗi 1062 trên index ISBN/mã vạch, None nếu là lỗi khác"""
+        key = duplicate_key_name(error)
+        if key is None:
+            return None
+        if 'barcode' in key:
+            return f"Mã vạch '{book.barcode}' {suffix}"
+        if 'isbn' in key:
+            return f"ISBN '{book.isbn}' {suffix}"
+        return None
+
     def delete_book(self, book_id: int) -> Tuple[bool, Optional[str]]:
         """Xóa sách"""
         try:
-            # Kiểm tra sách có đang được mượn không
-            check_query = """
-                SELECT COUNT(*) as count
-                FROM borrow_details bd
-                JOIN borrow_slips bs ON bd.slip_id = bs.slip_id
-                WHERE bd.book_id = %s AND bs.status = 'BORROWING'
-            """
-            result = db.execute_query(check_query, (book_id,), fetch=True)
+            with db.transaction():
+                # Kiểm tra sách có đang được mượn không
+                check_query = """
+                    SELECT COUNT(*) as count
+                    FROM borrow_details bd
+                    JOIN borrow_slips bs ON bd.slip_id = bs.slip_id
+                    WHERE bd.book_id = %s AND bs.status = 'BORROWING'
+                """
+                result = db.execute_query(check_query, (book_id,), fetch=True)
 
-            if result and result[0]['count'] > 0:
-                return False, "Không thể xóa sách đang được mượn"
+                if result and result[0]['count'] > 0:
+                    raise TransactionAborted("Không thể xóa sách đang được mượn")
 
-            # Xóa inventory trước
-            db.execute_query("DELETE FROM book_inventory WHERE book_id = %s", (book_id,), commit=True)
+                # Xóa inventory trước
+                db.execute_query("DELETE FROM book_inventory WHERE book_id = %s", (book_id,), commit=True)
 
-            # Xóa sách
-            result = db.execute_query("DELETE FROM books WHERE book_id = %s", (book_id,), commit=True)
+                # Xóa sách (không có sách thì hủy luôn phần xóa inventory)
+                result = db.execute_query("DELETE FROM books WHERE book_id = %s", (book_id,), commit=True)
+                if not result:
+                    raise TransactionAborted("Không tìm thấy sách để xóa")
+                ChangeLog.record(ChangeLog.BOOK, [book_id], ChangeLog.DELETE)
 
-            if result and result > 0:
-                logger.info(f"✅ Đã xóa sách ID: {book_id}")
-                return True, None
-            else:
-                return False, "Không tìm thấy sách để xóa"
+            self._cache.invalidate([book_id])
+            logger.info(f"✅ Đã xóa sách ID: {book_id}")
+            return True, None
 
+        except TransactionAborted as e:
+            return False, str(e)
         except Exception as e:
             logger.error(f"❌ Lỗi xóa sách: {e}")
             return False, f"Lỗi database: {str(e)}"
 
-    def get_all_books(self) -> List[Book]:
-        """Lấy danh sách tất cả sách với thông tin JOIN"""
+    def get_all_books(self) -> ColumnarResult:
+        """
+        Lấy danh sách tất cả sách dạng cột, kèm tên tác giả/thể loại/NXB
+        Duyệt for vẫn nhận Book; không nạp vào cache theo id
+        """
         try:
-            query = """
-                SELECT b.*, a.author_name, c.category_name, p.publisher_name,
-                       COALESCE(bi.total_quantity, 0) as total_quantity,
-                       COALESCE(bi.available_quantity, 0) as available_quantity
-                FROM books b
-                LEFT JOIN authors a ON b.author_id = a.author_id
-                LEFT JOIN categories c ON b.category_id = c.category_id
-                LEFT JOIN publishers p ON b.publisher_id = p.publisher_id
-                LEFT JOIN book_inventory bi ON b.book_id = bi.book_id
-                ORDER BY b.book_id DESC
-            """
+            query = BOOK_SELECT_QUERY + " ORDER BY b.book_id DESC"
             rows = db.execute_query(query, fetch=True)
 
             if rows is None:
-                return []
+                return self._to_columns([])
 
-            books = [Book.from_dict(row) for row in rows]
+            books = self._to_columns(rows)
             logger.info(f"✅ Đã tải {len(books)} sách")
             return books
 
+        except PoolExhausted:
+            raise  # Database đang bận: để view báo lỗi thay vì hiện danh sách rỗng
         except Exception as e:
             logger.error(f"❌ Lỗi lấy danh sách sách: {e}")
+            return self._to_columns([])
+
+    def get_books_page(self, after_id: Optional[int] = None, limit: Optional[int] = None) -> List[Book]:
+        """
+        Lấy 1 trang sách (keyset pagination theo book_id giảm dần)
+        after_id: book_id cuối cùng của trang trước (None = trang đầu)
+        limit: số dòng mỗi trang (mặc định AppConfig.ITEMS_PER_PAGE)
+        """
+        limit = limit or AppConfig.ITEMS_PER_PAGE
+
+        try:
+            generation = self._cache.generation()
+            if after_id is None:
+                query = BOOK_SELECT_QUERY + " ORDER BY b.book_id DESC LIMIT %s"
+                params = (limit,)
+            else:
+                query = BOOK_SELECT_QUERY + " WHERE b.book_id < %s ORDER BY b.book_id DESC LIMIT %s"
+                params = (after_id, limit)
+
+            rows = db.execute_query(query, params, fetch=True)
+
+            if rows is None:
+                return []
+
+            return self._to_books(rows, generation)
+
+        except PoolExhausted:
+            raise
+        except Exception as e:
+            logger.error(f"❌ Lỗi lấy trang sách: {e}")
             return []
 
+    def iter_books(self, chunk_size: Optional[int] = None) -> Iterator[List[Book]]:
+        """
+        Duyệt toàn bộ sách theo lô (cursor không đệm), dùng cho xuất file lớn
+        Không đi qua cache sách theo id; lỗi database được raise
+        """
+        chunk_size = chunk_size or AppConfig.EXPORT_CHUNK_SIZE
+        query = BOOK_SELECT_QUERY + " ORDER BY b.book_id DESC"
+        for rows in db.iter_query(query, chunk_size=chunk_size):
+            yield self._to_books(rows, None)
+
+    def count_books(self) -> int:
+        """Đếm tổng số đầu sách"""
+        try:
+            result = db.execute_query("SELECT COUNT(*) as count FROM books", fetch=True)
+            return result[0]['count'] if result else 0
+        except PoolExhausted:
+            raise
+        except Exception as e:
+            logger.error(f"❌ Lỗi đếm sách: {e}")
+            return 0
+
     def get_book_by_id(self, book_id: int) -> Optional[Book]:
-        """Lấy thông tin sách theo ID"""
+        """Lấy thông tin sách theo ID (ưu tiên cache)"""
+        book = self._cache.get(book_id)
+        if book is not None:
+            return book
+
         try:
-            query = """
-                SELECT b.*, a.author_name, c.category_name, p.publisher_name,
-                       COALESCE(bi.total_quantity, 0) as total_quantity,
-                       COALESCE(bi.available_quantity, 0) as available_quantity
-                FROM books b
-                LEFT JOIN authors a ON b.author_id = a.author_id
-                LEFT JOIN categories c ON b.category_id = c.category_id
-                LEFT JOIN publishers p ON b.publisher_id = p.publisher_id
-                LEFT JOIN book_inventory bi ON b.book_id = bi.book_id
-                WHERE b.book_id = %s
-            """
+            generation = self._cache.generation()
+            query = BOOK_SELECT_QUERY + " WHERE b.book_id = %s"
             rows = db.execute_query(query, (book_id,), fetch=True)
 
             if rows and len(rows) > 0:
-                return Book.from_dict(rows[0])
+                return self._to_books(rows, generation)[0]
             return None
 
+        except PoolExhausted:
+            raise
         except Exception as e:
             logger.error(f"❌ Lỗi lấy thông tin sách: {e}")
             return None
 
+    def _get_books_by_ids(self, book_ids: List[int]) -> List[Book]:
+        """Lấy sách theo danh sách ID (1 truy vấn)"""
+        if not book_ids:
+            return []
+
+        generation = self._cache.generation()
+        placeholders = ', '.join(['%s'] * len(book_ids))
+        query = BOOK_SELECT_QUERY + f" WHERE b.book_id IN ({placeholders})"
+        rows = db.execute_query(query, tuple(book_ids), fetch=True) or []
+        return self._to_books(rows, generation)
+
+    def _to_books(self, rows: List[dict], generation: Optional[int]) -> List[Book]:
+        """
+        Tạo Book từ các dòng, điền tên tác giả/thể loại/NXB từ cache
+        và lưu vào identity map (generation lấy trước khi truy vấn, None = không lưu)
+        """
+        books = []
+        for row in rows:
+            book = Book.from_dict(row)
+            author = self._authors.get(book.author_id)
+            category = self._categories.get(book.category_id)
+            publisher = self._publishers.get(book.publisher_id)
+            book.author_name = author.author_name if author else None
+            book.category_name = category.category_name if category else None
+            book.publisher_name = publisher.publisher_name if publisher else None
+            books.append(book)
+
+        if generation is not None:
+            self._cache.put_many(((book.book_id, book) for book in books), generation)
+        return books
+
+    def _to_columns(self, rows: List[dict]) -> ColumnarResult:
+        """Kết quả dạng cột từ các dòng, tên tác giả/thể loại/NXB tra 1 lần cho mỗi id khác nhau"""
+        books = ColumnarResult.from_rows(rows, Book.COLUMNS, Book.from_dict, Book.NUMERIC_COLUMNS)
+        lookups = (
+            ('author_name', 'author_id', self._authors),
+            ('category_name', 'category_id', self._categories),
+            ('publisher_name', 'publisher_id', self._publishers),
+        )
+        for name_column, id_column, lookup in lookups:
+            ids = books.values(id_column)
+            names = {}
+            for item_id in set(ids):
+                item = lookup.get(item_id)
+                names[item_id] = getattr(item, name_column) if item else None
+            books.add_column(name_column, [names[item_id] for item_id in ids])
+        return books
+
+    @classmethod
+    def invalidate_cached(cls, book_ids: Optional[List[int]] = None):
+        """Xóa sách khỏi cache theo id (None = toàn bộ), dùng khi service khác đổi tồn kho"""
+        cls._cache.invalidate(book_ids)
+
+    @classmethod
+    def get_cache_stats(cls) -> dict:
+        """Số liệu hit/miss của cache sách theo id"""
+        return cls._cache.stats()
+
+    @staticmethod
+    def _load_lookup(query: str, model) -> Optional[list]:
+        """Nạp 1 bảng tra cứu cho LookupCache (None nếu lỗi)"""
+        try:
+            rows = db.execute_query(query, fetch=True)
+            if rows is None:
+                return None
+            return [model.from_dict(row) for row in rows]
+        except PoolExhausted:
+            raise
+        except Exception as e:
+            logger.error(f"❌ Lỗi nạp bảng tra cứu: {e}")
+            return None
+
+    # ========== THEO DÕI THAY ĐỔI ==========
+
+    @classmethod
+    def _lookup_caches(cls) -> dict:
+        """{thực thể ChangeLog: LookupCache} của tác giả/thể loại/NXB"""
+        return {
+            ChangeLog.AUTHOR: cls._authors,
+            ChangeLog.CATEGORY: cls._categories,
+            ChangeLog.PUBLISHER: cls._publishers,
+        }
+
+    def get_data_version(self) -> Optional[int]:
+        """Version hiện tại của nhật ký thay đổi (None nếu không dùng được)"""
+        return ChangeLog.latest_version()
+
+    def get_changes_since(self, version: Optional[int]) -> Optional[dict]:
+        """
+        Sách đã thay đổi sau version
+        Returns: {'version', 'changed': [Book], 'deleted': [book_id]}
+                 None nếu client nên tải lại toàn bộ
+        """
+        try:
+            lookups = self._lookup_caches()
+            result = ChangeLog.changes_since(version, [ChangeLog.BOOK, *lookups])
+            if result is None:
+                for cache in lookups.values():
+                    cache.invalidate()
+                return None
+
+            new_version, changes = result
+            # Máy trạm khác vừa thêm tác giả/thể loại/NXB: nạp lại bảng tra cứu ở lần đọc sau
+            for entity, cache in lookups.items():
+                if changes[entity]:
+                    cache.invalidate()
+
+            book_changes = changes[ChangeLog.BOOK]
+            # Máy trạm khác đã sửa: bỏ bản cũ trong cache trước khi đọc lại
+            self._cache.invalidate(book_changes)
+            books = self._get_books_by_ids(
+                [book_id for book_id, action in book_changes.items() if action != ChangeLog.DELETE]
+            )
+            found = {book.book_id for book in books}
+            deleted = [book_id for book_id in book_changes if book_id not in found]
+            return {'version': new_version, 'changed': books, 'deleted': deleted}
+
+        except PoolExhausted:
+            raise
+        except Exception as e:
+            logger.error(f"❌ Lỗi lấy thay đổi sách: {e}")
+            return None
+
     def search_books(self, keyword: str, search_by: str = "all") -> List[Book]:
         """
-        Tìm kiếm sách
+        Tìm kiếm sách (FULLTEXT có xếp hạng + khớp tiền tố)
         search_by: 'all', 'title', 'author', 'isbn', 'barcode', 'category'
+        Tự động dùng LIKE nếu index FULLTEXT chưa sẵn sàng hoặc từ khóa quá ngắn
         """
         try:
-            keyword_pattern = f"%{keyword}%"
-
-            base_query = """
-                SELECT b.*, a.author_name, c.category_name, p.publisher_name,
-                       COALESCE(bi.total_quantity, 0) as total_quantity,
-                       COALESCE(bi.available_quantity, 0) as available_quantity
-                FROM books b
-                LEFT JOIN authors a ON b.author_id = a.author_id
-                LEFT JOIN categories c ON b.category_id = c.category_id
-                LEFT JOIN publishers p ON b.publisher_id = p.publisher_id
-                LEFT JOIN book_inventory bi ON b.book_id = bi.book_id
-            """
-
-            if search_by == "title":
-                query = base_query + " WHERE b.title LIKE %s ORDER BY b.book_id DESC"
-                params = (keyword_pattern,)
-            elif search_by == "author":
-                query = base_query + " WHERE a.author_name LIKE %s ORDER BY b.book_id DESC"
-                params = (keyword_pattern,)
-            elif search_by == "isbn":
-                query = base_query + " WHERE b.isbn LIKE %s ORDER BY b.book_id DESC"
-                params = (keyword_pattern,)
-            elif search_by == "barcode":
-                query = base_query + " WHERE b.barcode LIKE %s ORDER BY b.book_id DESC"
-                params = (keyword_pattern,)
-            elif search_by == "category":
-                query = base_query + " WHERE c.category_name LIKE %s ORDER BY b.book_id DESC"
-                params = (keyword_pattern,)
-            else:  # all
-                query = base_query + """
-                    WHERE b.title LIKE %s OR a.author_name LIKE %s 
-                       OR b.isbn LIKE %s OR b.barcode LIKE %s 
-                       OR c.category_name LIKE %s
-                    ORDER BY b.book_id DESC
-                """
-                params = (keyword_pattern, keyword_pattern, keyword_pattern,
-                         keyword_pattern, keyword_pattern)
+            generation = self._cache.generation()
+            search = self._build_fulltext_search(keyword, search_by)
+            if search is None:
+                search = self._build_like_search(keyword, search_by)
 
+            query, params = search
             rows = db.execute_query(query, params, fetch=True)
 
             if rows is None:
                 return []
 
-            books = [Book.from_dict(row) for row in rows]
+            books = self._to_books(rows, generation)
             logger.info(f"🔍 Tìm thấy {len(books)} sách cho '{keyword}'")
             return books
 
+        except PoolExhausted:
+            raise
         except Exception as e:
             logger.error(f"❌ Lỗi tìm kiếm sách: {e}")
             return []
 
+    def _build_fulltext_search(self, keyword: str, search_by: str) -> Optional[Tuple[str, tuple]]:
+        """
+        Tạo truy vấn dùng index FULLTEXT (title/author/category) và
+        index B-tree (tiền tố isbn/barcode), gộp điểm theo book_id
+        Bảng tác giả/thể loại nhỏ: thiếu index FULLTEXT (hoặc từ khóa quá ngắn) thì
+        chỉ nguồn đó dùng LIKE, tên sách vẫn dùng FULLTEXT
+        Returns: (query, params) hoặc None nếu tên sách phải dùng LIKE
+        """
+        terms = self._to_boolean_terms(keyword)
+        prefix = self._escape_like(keyword.strip()) + '%'
+        contains = '%' + self._escape_like(keyword.strip()) + '%'
+        sources = []
+
+        fulltext_sources = {
+            'title': ('ft_books_title', """
+                SELECT book_id, MATCH(title) AGAINST (%s IN BOOLEAN MODE) * 3 AS score
+                FROM books
+                WHERE MATCH(title) AGAINST (%s IN BOOLEAN MODE)
+            """),
+            'author': ('ft_authors_name', """
+                SELECT bk.book_id, MATCH(au.author_name) AGAINST (%s IN BOOLEAN MODE) * 2 AS score
+                FROM authors au
+                JOIN books bk ON bk.author_id = au.author_id
+                WHERE MATCH(au.author_name) AGAINST (%s IN BOOLEAN MODE)
+            """),
+            'category': ('ft_categories_name', """
+                SELECT bk.book_id, MATCH(ca.category_name) AGAINST (%s IN BOOLEAN MODE) AS score
+                FROM categories ca
+                JOIN books bk ON bk.category_id = ca.category_id
+                WHERE MATCH(ca.category_name) AGAINST (%s IN BOOLEAN MODE)
+            """),
+        }
+        like_sources = {
+            'author': """
+                SELECT bk.book_id, 2 AS score
+                FROM authors au
+                JOIN books bk ON bk.author_id = au.author_id
+                WHERE au.author_name LIKE %s
+            """,
+            'category': """
+                SELECT bk.book_id, 1 AS score
+                FROM categories ca
+                JOIN books bk ON bk.category_id = ca.category_id
+                WHERE ca.category_name LIKE %s
+            """,
+        }
+        prefix_sources = {
+            'isbn': "SELECT book_id, 10 AS score FROM books WHERE isbn LIKE %s",
+            'barcode': "SELECT book_id, 10 AS score FROM books WHERE barcode LIKE %s",
+        }
+
+        fields = list(fulltext_sources) + list(prefix_sources) if search_by == "all" else [search_by]
+
+        for field in fields:
+            if field in fulltext_sources:
+                index_name, sql = fulltext_sources[field]
+                if terms and schema.has_index(index_name):
+                    sources.append((sql, (terms, terms)))
+                elif field in like_sources:
+                    sources.append((like_sources[field], (contains,)))
+                else:
+                    return None
+            elif field in prefix_sources:
+                sources.append((prefix_sources[field], (prefix,)))
+            else:
+                return None
+
+        hits = " UNION ALL ".join(sql for sql, _ in sources)
+        params = tuple(param for _, source_params in sources for param in source_params)
+
+        query = BOOK_SELECT_COLUMNS + f"""
+            FROM (
+                SELECT book_id, SUM(score) AS score
+                FROM ({hits}) hits
+                GROUP BY book_id
+                ORDER BY score DESC, book_id DESC
+                LIMIT %s
+            ) m
+            JOIN books b ON b.book_id = m.book_id
+        """ + BOOK_JOINS + " ORDER BY m.score DESC, b.book_id DESC"
+
+        return query, params + (AppConfig.MAX_SEARCH_RESULTS,)
+
+    def _build_like_search(self, keyword: str, search_by: str) -> Tuple[str, tuple]:
+        """Truy vấn dự phòng bằng LIKE '%kw%' (quét toàn bảng)"""
+        keyword_pattern = f"%{keyword}%"
+        base_query = BOOK_SELECT_QUERY + BOOK_NAME_JOINS
+
+        if search_by == "title":
+            query = base_query + " WHERE b.title LIKE %s ORDER BY b.book_id DESC"
+            params = (keyword_pattern,)
+        elif search_by == "author":
+            query = base_query + " WHERE a.author_name LIKE %s ORDER BY b.book_id DESC"
+            params = (keyword_pattern,)
+        elif search_by == "isbn":
+            query = base_query + " WHERE b.isbn LIKE %s ORDER BY b.book_id DESC"
+            params = (keyword_pattern,)
+        elif search_by == "barcode":
+            query = base_query + " WHERE b.barcode LIKE %s ORDER BY b.book_id DESC"
+            params = (keyword_pattern,)
+        elif search_by == "category":
+            query = base_query + " WHERE c.category_name LIKE %s ORDER BY b.book_id DESC"
+            params = (keyword_pattern,)
+        else:  # all
+            query = base_query + """
+                WHERE b.title LIKE %s OR a.author_name LIKE %s 
+                   OR b.isbn LIKE %s OR b.barcode LIKE %s 
+                   OR c.category_name LIKE %s
+                ORDER BY b.book_id DESC
+            """
+            params = (keyword_pattern, keyword_pattern, keyword_pattern,
+                      keyword_pattern, keyword_pattern)
+
+        # Giới hạn số kết quả trả về
+        return query + " LIMIT %s", params + (AppConfig.MAX_SEARCH_RESULTS,)
+
+    @staticmethod
+    def _to_boolean_terms(keyword: str) -> str:
+        """Chuyển từ khóa thành chuỗi BOOLEAN MODE: mỗi từ bắt buộc và khớp tiền tố"""
+        words = re.sub(r'[^\w]+', ' ', keyword).split()
+        words = [w for w in words if len(w) >= FULLTEXT_MIN_TOKEN_SIZE]
+        return ' '.join(f'+{w}*' for w in words)
+
+    @staticmethod
+    def _escape_like(value: str) -> str:
+        """Escape ký tự đặc biệt của LIKE"""
+        return value.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_')
+
+    # ========== BULK IMPORT ==========
+
+    def import_books(
+            self,
+            records: Iterable[Tuple[int, dict]],
+            progress: Optional[Callable[[int], None]] = None
+    ) -> dict:
+        """
+        Nhập sách hàng loạt từ bản ghi (số dòng, {trường: giá trị}) của ImportHelper
+
+        Mỗi lô IMPORT_BATCH_SIZE dòng: validate, kiểm tra trùng ISBN/mã vạch bằng
+        1 truy vấn, tạo tác giả/thể loại/NXB còn thiếu, rồi INSERT nhiều dòng
+        trong 1 giao dịch. Dòng lỗi được bỏ qua và ghi lại, không dừng cả file.
+        Returns: ImportReport.to_dict() + 'error' (lỗi đọc file/database làm dừng giữa chừng)
+        """
+        report = ImportReport(progress)
+        error = None
+
+        try:
+            for batch in ImportHelper.batched(records, AppConfig.IMPORT_BATCH_SIZE):
+                books = self._drop_existing_codes(self._parse_import_batch(batch, report), report)
+                imported = self._insert_import_batch(books, report) if books else 0
+                report.batch_done(len(batch), imported)
+
+        except Exception as e:
+            logger.error(f"❌ Lỗi nhập sách: {e}")
+            error = str(e)
+
+        result = report.to_dict()
+        result['error'] = error
+        logger.info(
+            f"✅ Đã nhập {result['imported']}/{result['total']} sách "
+            f"({result['rows_per_sec']:.0f} dòng/giây, {result['failed']} dòng lỗi)"
+        )
+        return result
+
+    @staticmethod
+    def _parse_import_batch(batch: List[Tuple[int, dict]], report: ImportReport) -> List[Tuple[int, Book]]:
+        """Bản ghi -> Book đã validate, dòng lỗi ghi vào report"""
+        text = ImportHelper.to_text
+        books = []
+
+        for line_no, record in batch:
+            try:
+                book = Book(
+                    title=text(record.get('title')),
+                    publish_year=ImportHelper.to_int(record.get('publish_year'), "Năm xuất bản"),
+                    isbn=text(record.get('isbn')),
+                    barcode=text(record.get('barcode')),
+                    price=ImportHelper.to_float(record.get('price'), "Giá"),
+                    description=text(record.get('description')),
+                    author_name=text(record.get('author_name')),
+                    category_name=text(record.get('category_name')),
+                    publisher_name=text(record.get('publisher_name')),
+                    total_quantity=ImportHelper.to_int(record.get('total_quantity'), "Tổng số lượng") or 0
+                )
+                available = ImportHelper.to_int(record.get('available_quantity'), "Số lượng còn")
+                book.available_quantity = book.total_quantity if available is None else available
+            except ValueError as e:
+                report.add_error(line_no, str(e))
+                continue
+
+            is_valid, error = book.validate()
+            if is_valid and (book.total_quantity < 0 or book.available_quantity < 0):
+                is_valid, error = False, "Số lượng không được âm"
+            if is_valid and book.available_quantity > book.total_quantity:
+                is_valid, error = False, "Số lượng còn không được lớn hơn tổng số"
+
+            if is_valid:
+                books.append((line_no, book))
+            else:
+                report.add_error(line_no, error)
+
+        return books
+
+    @staticmethod
+    def _drop_existing_codes(books: List[Tuple[int, Book]], report: ImportReport) -> List[Tuple[int, Book]]:
+        """Loại sách trùng ISBN/mã vạch (với database hoặc dòng trước trong lô) bằng 1 truy vấn"""
+        isbns = [book.isbn for _, book in books if book.isbn]
+        barcodes = [book.barcode for _, book in books if book.barcode]
+        existing_isbns, existing_barcodes = set(), set()
+
+        conditions, params = [], []
+        if isbns:
+            conditions.append(f"isbn IN ({', '.join(['%s'] * len(isbns))})")
+            params.extend(isbns)
+        if barcodes:
+            conditions.append(f"barcode IN ({', '.join(['%s'] * len(barcodes))})")
+            params.extend(barcodes)
+
+        if conditions:
+            rows = db.execute_query(
+                f"SELECT isbn, barcode FROM books WHERE {' OR '.join(conditions)}",
+                tuple(params),
+                fetch=True
+            )
+            if rows is None:
+                raise RuntimeError("Không kiểm tra được trùng ISBN/mã vạch")
+            existing_isbns = {row['isbn'] for row in rows if row['isbn']}
+            existing_barcodes = {row['barcode'] for row in rows if row['barcode']}
+
+        kept = []
+        for line_no, book in books:
+            if book.isbn and book.isbn in existing_isbns:
+                report.add_error(line_no, f"ISBN '{book.isbn}' đã tồn tại")
+            elif book.barcode and book.barcode in existing_barcodes:
+                report.add_error(line_no, f"Mã vạch '{book.barcode}' đã tồn tại")
+            else:
+                existing_isbns.add(book.isbn)
+                existing_barcodes.add(book.barcode)
+                kept.append((line_no, book))
+        return kept
+
+    def _resolve_import_names(self, books: List[Book]) -> List[Tuple[LookupCache, Any]]:
+        """
+        Gán author_id/category_id/publisher_id theo tên, tạo hàng loạt các tên chưa có
+        Chạy trong giao dịch của lô: lô rollback thì không để lại tên thừa
+        Returns: [(cache, mục mới)] để put() vào cache sau khi giao dịch commit
+        """
+        lookups = (
+            (ChangeLog.AUTHOR, self._authors, 'authors', 'author_id', 'author_name', Author),
+            (ChangeLog.CATEGORY, self._categories, 'categories', 'category_id', 'category_name', Category),
+            (ChangeLog.PUBLISHER, self._publishers, 'publishers', 'publisher_id', 'publisher_name', Publisher),
+        )
+        created = []
+        for entity, cache, table, id_column, name_column, model in lookups:
+            names = {getattr(book, name_column) for book in books if getattr(book, name_column)}
+            if not names:
+                continue
+
+            ids, items = self._resolve_names(cache, table, id_column, name_column, model, names)
+            if items:
+                ChangeLog.record(entity, [getattr(item, id_column) for item in items], ChangeLog.INSERT)
+            created.extend((cache, item) for item in items)
+            for book in books:
+                name = getattr(book, name_column)
+                if name:
+                    setattr(book, id_column, ids[name.lower()])
+        return created
+
+    @staticmethod
+    def _resolve_names(
+            cache: LookupCache, table: str, id_column: str, name_column: str, model, names
+    ) -> Tuple[dict, list]:
+        """
+        Tên (viết thường) -> id; tên chưa có được thêm bằng 1 câu INSERT nhiều dòng
+        Returns: (ids, các mục vừa thêm); không thêm được thì raise để lô rollback
+        """
+        ids = {
+            getattr(item, name_column).lower(): getattr(item, id_column)
+            for item in cache.get_all()
+            if getattr(item, name_column)
+        }
+        missing = {}
+        for name in names:
+            missing.setdefault(name.lower(), name)
+        missing = [name for key, name in missing.items() if key not in ids]
+        if not missing:
+            return ids, []
+
+        if db.executemany(f"INSERT INTO {table} ({name_column}) VALUES (%s)", [(name,) for name in missing]) is None:
+            raise TransactionAborted(f"Không thêm được mục mới vào bảng {table}")
+        rows = db.fetchall(
+            f"SELECT {id_column}, {name_column} FROM {table} "
+            f"WHERE {name_column} IN ({', '.join(['%s'] * len(missing))})",
+            tuple(missing)
+        )
+        items = []
+        for row in rows:
+            items.append(model(row[id_column], row[name_column]))
+            ids[row[name_column].lower()] = row[id_column]
+
+        unresolved = [name for name in missing if name.lower() not in ids]
+        if unresolved:
+            raise TransactionAborted(f"Không tìm thấy id trong bảng {table} cho: {', '.join(unresolved)}")
+
+        logger.info(f"✅ Đã thêm {len(missing)} mục vào bảng {table} khi nhập sách")
+        return ids, items
+
+    def _insert_import_batch(self, books: List[Tuple[int, Book]], report: ImportReport) -> int:
+        """INSERT 1 lô trong 1 giao dịch, lỗi thì thêm lại từng dòng để biết dòng nào hỏng"""
+        try:
+            with db.transaction():
+                created = self._resolve_import_names([book for _, book in books])
+                self._insert_books_bulk([book for _, book in books])
+            self._put_created(created)
+            return len(books)
+        except PoolExhausted:
+            raise
+        except Exception as e:
+            logger.warning(f"⚠️ Không nhập được cả lô ({e}), thử từng dòng")
+
+        imported = 0
+        for line_no, book in books:
+            try:
+                with db.transaction():
+                    created = self._resolve_import_names([book])
+                    book_id = db.execute_insert(BOOK_INSERT_QUERY, book.to_tuple())
+                    db.execute(INVENTORY_INSERT_QUERY, (book_id, book.total_quantity, book.available_quantity))
+                    ChangeLog.record(ChangeLog.BOOK, [book_id], ChangeLog.INSERT)
+                self._put_created(created)
+                imported += 1
+            except PoolExhausted:
+                raise
+            except Exception as e:
+                report.add_error(line_no, self._duplicate_message(e, book, "đã tồn tại") or f"Lỗi database: {str(e)}")
+        return imported
+
+    @staticmethod
+    def _put_created(created: List[Tuple[LookupCache, Any]]):
+        """Ghi xuyên cache các tác giả/thể loại/NXB vừa thêm (sau khi giao dịch đã commit)"""
+        for cache, item in created:
+            cache.put(item)
+
+    @staticmethod
+    def _insert_books_bulk(books: List[Book]):
+        """
+        1 câu INSERT nhiều dòng cho sách và 1 câu cho tồn kho (trong giao dịch đang mở)
+        id tự tăng của 1 câu INSERT nhiều dòng thường liên tiếp nhưng không được đảm bảo
+        (innodb_autoinc_lock_mode=2) nên đối chiếu lại trước khi thêm tồn kho
+        """
+        first_id = db.executemany(BOOK_INSERT_QUERY, [book.to_tuple() for book in books], lastrowid=True)
+        rows = db.fetchall(
+            "SELECT book_id, title, isbn, barcode FROM books WHERE book_id >= %s ORDER BY book_id LIMIT %s",
+            (first_id, len(books))
+        )
+        if [(row['title'], row['isbn'], row['barcode']) for row in rows] != \
+                [(book.title, book.isbn, book.barcode) for book in books]:
+            raise TransactionAborted("id sách vừa thêm không liên tiếp")
+
+        db.executemany(
+            INVENTORY_INSERT_QUERY,
+            [
+                (row['book_id'], book.total_quantity, book.available_quantity)
+                for row, book in zip(rows, books)
+            ]
+        )
+        ChangeLog.record_bulk(ChangeLog.BOOK)
+
     # ========== INVENTORY MANAGEMENT ==========
 
     def update_inventory(self, book_id: int, total_qty: int, available_qty: int) -> Tuple[bool, Optional[str]]:
@@ -280,8 +856,12 @@ class BookService:
                 SET total_quantity = %s, available_quantity = %s
                 WHERE book_id = %s
             """
-            result = db.execute_query(query, (total_qty, available_qty, book_id), commit=True)
+            with db.transaction():
+                result = db.execute_query(query, (total_qty, available_qty, book_id), commit=True)
+                if result:
+                    ChangeLog.record(ChangeLog.BOOK, [book_id], ChangeLog.UPDATE)
 
+            self._cache.invalidate([book_id])
             if result:
                 logger.info(f"✅ Đã cập nhật tồn kho sách ID {book_id}: {available_qty}/{total_qty}")
                 return True, None
@@ -295,13 +875,8 @@ class BookService:
     # ========== AUTHORS ==========
 
     def get_all_authors(self) -> List[Author]:
-        """Lấy danh sách tác giả"""
-        try:
-            rows = db.execute_query("SELECT * FROM authors ORDER BY author_name", fetch=True)
-            return [Author.from_dict(row) for row in rows] if rows else []
-        except Exception as e:
-            logger.error(f"❌ Lỗi lấy danh sách tác giả: {e}")
-            return []
+        """Lấy danh sách tác giả (từ cache, sắp theo tên)"""
+        return self._authors.get_all()
 
     def create_author(self, name: str) -> Tuple[bool, Optional[str], Optional[int]]:
         """Thêm tác giả mới"""
@@ -309,11 +884,14 @@ class BookService:
             return False, "Tên tác giả không được để trống", None
 
         try:
-            author_id = db.execute_query(
-                "INSERT INTO authors (author_name) VALUES (%s)",
-                (name.strip(),),
-                commit=True
-            )
+            with db.transaction():
+                author_id = db.execute_query(
+                    "INSERT INTO authors (author_name) VALUES (%s)",
+                    (name.strip(),),
+                    commit=True
+                )
+                ChangeLog.record(ChangeLog.AUTHOR, [author_id], ChangeLog.INSERT)
+            self._authors.put(Author(author_id, name.strip()))
             return True, None, author_id
         except Exception as e:
             return False, f"Lỗi: {str(e)}", None
@@ -321,13 +899,8 @@ class BookService:
     # ========== CATEGORIES ==========
 
     def get_all_categories(self) -> List[Category]:
-        """Lấy danh sách thể loại"""
-        try:
-            rows = db.execute_query("SELECT * FROM categories ORDER BY category_name", fetch=True)
-            return [Category.from_dict(row) for row in rows] if rows else []
-        except Exception as e:
-            logger.error(f"❌ Lỗi lấy danh sách thể loại: {e}")
-            return []
+        """Lấy danh sách thể loại (từ cache, sắp theo tên)"""
+        return self._categories.get_all()
 
     def create_category(self, name: str) -> Tuple[bool, Optional[str], Optional[int]]:
         """Thêm thể loại mới"""
@@ -335,11 +908,14 @@ class BookService:
             return False, "Tên thể loại không được để trống", None
 
         try:
-            category_id = db.execute_query(
-                "INSERT INTO categories (category_name) VALUES (%s)",
-                (name.strip(),),
-                commit=True
-            )
+            with db.transaction():
+                category_id = db.execute_query(
+                    "INSERT INTO categories (category_name) VALUES (%s)",
+                    (name.strip(),),
+                    commit=True
+                )
+                ChangeLog.record(ChangeLog.CATEGORY, [category_id], ChangeLog.INSERT)
+            self._categories.put(Category(category_id, name.strip()))
             return True, None, category_id
         except Exception as e:
             return False, f"Lỗi: {str(e)}", None
@@ -347,13 +923,8 @@ class BookService:
     # ========== PUBLISHERS ==========
 
     def get_all_publishers(self) -> List[Publisher]:
-        """Lấy danh sách nhà xuất bản"""
-        try:
-            rows = db.execute_query("SELECT * FROM publishers ORDER BY publisher_name", fetch=True)
-            return [Publisher.from_dict(row) for row in rows] if rows else []
-        except Exception as e:
-            logger.error(f"❌ Lỗi lấy danh sách NXB: {e}")
-            return []
+        """Lấy danh sách NXB (từ cache, sắp theo tên)"""
+        return self._publishers.get_all()
 
     def create_publisher(self, publisher: Publisher) -> Tuple[bool, Optional[str], Optional[int]]:
         """Thêm nhà xuất bản mới"""
@@ -362,11 +933,15 @@ class BookService:
 
         try:
             query = "INSERT INTO publishers (publisher_name, address, phone) VALUES (%s, %s, %s)"
-            publisher_id = db.execute_query(
-                query,
-                (publisher.publisher_name, publisher.address, publisher.phone),
-                commit=True
-            )
+            with db.transaction():
+                publisher_id = db.execute_query(
+                    query,
+                    (publisher.publisher_name, publisher.address, publisher.phone),
+                    commit=True
+                )
+                ChangeLog.record(ChangeLog.PUBLISHER, [publisher_id], ChangeLog.INSERT)
+            publisher.publisher_id = publisher_id
+            self._publishers.put(publisher)
             return True, None, publisher_id
         except Exception as e:
             return False, f"Lỗi: {str(e)}", None
@@ -374,68 +949,50 @@ class BookService:
     # ========== STATISTICS ==========
 
     def get_statistics(self) -> dict:
-        """Lấy thống kê sách"""
-        try:
-            stats = {
-                'total_books': 0,
-                'total_quantity': 0,
-                'available_quantity': 0,
-                'borrowed_quantity': 0,
-                'out_of_stock': 0,
-                'low_stock': 0,
-                'total_authors': 0,
-                'total_categories': 0,
-                'total_publishers': 0
-            }
-
-            # Tổng số đầu sách
-            result = db.execute_query("SELECT COUNT(*) as count FROM books", fetch=True)
-            if result:
-                stats['total_books'] = result[0]['count']
-
-            # Tổng số lượng sách
-            result = db.execute_query(
-                "SELECT SUM(total_quantity) as total, SUM(available_quantity) as available FROM book_inventory",
-                fetch=True
-            )
-            if result and result[0]['total']:
-                stats['total_quantity'] = int(result[0]['total'])
-                stats['available_quantity'] = int(result[0]['available'])
-                stats['borrowed_quantity'] = stats['total_quantity'] - stats['available_quantity']
-
-            # Số sách hết hàng
-            result = db.execute_query(
-                "SELECT COUNT(*) as count FROM book_inventory WHERE available_quantity = 0",
-                fetch=True
-            )
-            if result:
-                stats['out_of_stock'] = result[0]['count']
-
-            # Số sách sắp hết (< 5)
-            result = db.execute_query(
-                "SELECT COUNT(*) as count FROM book_inventory WHERE available_quantity > 0 AND available_quantity < 5",
-                fetch=True
-            )
-            if result:
-                stats['low_stock'] = result[0]['count']
+        """
+        Lấy thống kê sách bằng 1 truy vấn tổng hợp duy nhất
+        Thời gian thực thi được ghi vào utils.timing dưới tên STATS_TIMING_NAME
+        """
+        stats = {
+            'total_books': 0,
+            'total_quantity': 0,
+            'available_quantity': 0,
+            'borrowed_quantity': 0,
+            'out_of_stock': 0,
+            'low_stock': 0,
+            'total_authors': 0,
+            'total_categories': 0,
+            'total_publishers': 0
+        }
 
-            # Số tác giả
-            result = db.execute_query("SELECT COUNT(*) as count FROM authors", fetch=True)
-            if result:
-                stats['total_authors'] = result[0]['count']
+        try:
+            query = """
+                SELECT
+                    (SELECT COUNT(*) FROM books) AS total_books,
+                    COALESCE(SUM(bi.total_quantity), 0) AS total_quantity,
+                    COALESCE(SUM(bi.available_quantity), 0) AS available_quantity,
+                    COALESCE(SUM(bi.available_quantity = 0), 0) AS out_of_stock,
+                    COALESCE(SUM(bi.available_quantity > 0 AND bi.available_quantity < 5), 0) AS low_stock,
+                    (SELECT COUNT(*) FROM authors) AS total_authors,
+                    (SELECT COUNT(*) FROM categories) AS total_categories,
+                    (SELECT COUNT(*) FROM publishers) AS total_publishers
+                FROM book_inventory bi
+            """
+            with timed(self.STATS_TIMING_NAME):
+                row = db.fetchone(query)
 
-            # Số thể loại
-            result = db.execute_query("SELECT COUNT(*) as count FROM categories", fetch=True)
-            if result:
-                stats['total_categories'] = result[0]['count']
+            if not row:
+                return stats
 
-            # Số NXB
-            result = db.execute_query("SELECT COUNT(*) as count FROM publishers", fetch=True)
-            if result:
-                stats['total_publishers'] = result[0]['count']
+            for key in stats:
+                if key in row:
+                    stats[key] = int(row[key] or 0)
+            stats['borrowed_quantity'] = stats['total_quantity'] - stats['available_quantity']
 
             return stats
 
+        except PoolExhausted:
+            raise
         except Exception as e:
             logger.error(f"❌ Lỗi thống kê: {e}")
-            return {}
\ No newline at end of file
+            return {}
@@ -1,64 +1,156 @@
-from config.database import db
+from config.database import TransactionAborted, db, is_deadlock
+from config.settings import AppConfig
 from models.BorrowSlip import BorrowSlip
 from models.BorrowDetail import BorrowDetail
 from models.reader import Reader
 from models.book import Book
+from services.book_service import BookService
+from services.change_log import ChangeLog
+from collections import Counter
 from datetime import datetime, timedelta
+from typing import List, Optional, Tuple, Union
 
 
 class BorrowService:
 
     BORROW_DAYS = 14
 
+    # Số phiếu tối đa mỗi giao dịch khi trả hàng loạt
+    RETURN_BATCH_SIZE = 1000
+    # Số lần chạy lại 1 lô trả sách bị InnoDB hủy vì deadlock
+    DEADLOCK_RETRIES = 3
+
     # -----------------------
     # Tạo phiếu mượn theo tên reader và sách
     # -----------------------
     def create_borrow(self, reader_name: str, book_name: str):
-        # Lấy reader theo tên
-        sql_reader = "SELECT * FROM readers WHERE full_name=%s"
-        reader_data = db.fetchone(sql_reader, (reader_name,))
-        if not reader_data:
-            return False, "Bạn đọc không tồn tại"
-        reader = Reader.from_dict(reader_data)
-        if not reader.is_active():
-            return False, "Thẻ bạn đọc không hợp lệ"
-
-        # Lấy book theo tên
-        sql_book = "SELECT * FROM books WHERE title=%s"
-        book_data = db.fetchone(sql_book, (book_name,))
-        if not book_data:
-            return False, f"Sách '{book_name}' không tồn tại"
-        book = Book.from_dict(book_data)
-
-        # Kiểm tra số lượng từ book_inventory
-        sql_qty = "SELECT available_quantity FROM book_inventory WHERE book_id=%s"
-        inv_data = db.fetchone(sql_qty, (book.book_id,))
-        if not inv_data or inv_data["available_quantity"] < 1:
-            return False, f"Sách '{book_name}' không đủ số lượng"
-
-        # Tạo borrow slip
-        borrow_date = datetime.now().date()
-        return_due = borrow_date + timedelta(days=self.BORROW_DAYS)
-        slip = BorrowSlip(
-            reader_id=reader.reader_id,
-            staff_id=1,  # demo
-            borrow_date=borrow_date,
-            return_due=return_due
-        )
-        slip_id = self._insert_borrow_slip(slip)
+        try:
+            # Kiểm tra + tạo phiếu + giảm tồn kho trong 1 giao dịch, commit 1 lần
+            with db.transaction():
+                # Lấy reader theo tên
+                sql_reader = "SELECT * FROM readers WHERE full_name=%s"
+                reader_data = db.fetchone(sql_reader, (reader_name,))
+                if not reader_data:
+                    raise TransactionAborted("Bạn đọc không tồn tại")
+                reader = Reader.from_dict(reader_data)
+                if not reader.is_active():
+                    raise TransactionAborted("Thẻ bạn đọc không hợp lệ")
 
-        # Tạo borrow detail
-        detail = BorrowDetail(
-            slip_id=slip_id,
-            book_id=book.book_id,
-            quantity=1
-        )
-        self._insert_borrow_detail(detail)
+                # Lấy book theo tên
+                sql_book = "SELECT * FROM books WHERE title=%s"
+                book_data = db.fetchone(sql_book, (book_name,))
+                if not book_data:
+                    raise TransactionAborted(f"Sách '{book_name}' không tồn tại")
+                book = Book.from_dict(book_data)
+
+                # Giữ chỗ 1 cuốn trong book_inventory (khóa dòng tới khi commit)
+                if not self._reserve_stock(book.book_id, 1):
+                    raise TransactionAborted(f"Sách '{book_name}' không đủ số lượng")
+
+                # Tạo borrow slip
+                borrow_date = datetime.now().date()
+                return_due = borrow_date + timedelta(days=self.BORROW_DAYS)
+                slip = BorrowSlip(
+                    reader_id=reader.reader_id,
+                    staff_id=1,  # demo
+                    borrow_date=borrow_date,
+                    return_due=return_due
+                )
+                slip_id = self._insert_borrow_slip(slip)
 
-        # Giảm số lượng sách trong inventory
-        self._decrease_stock(book.book_id, 1)
+                # Tạo borrow detail
+                detail = BorrowDetail(
+                    slip_id=slip_id,
+                    book_id=book.book_id,
+                    quantity=1
+                )
+                self._insert_borrow_detail(detail)
 
-        return True, "Tạo phiếu mượn thành công"
+                ChangeLog.record(ChangeLog.BOOK, [book.book_id], ChangeLog.UPDATE)
+                ChangeLog.record(ChangeLog.BORROW, [slip_id], ChangeLog.INSERT)
+
+            BookService.invalidate_cached([book.book_id])
+            return True, "Tạo phiếu mượn thành công"
+
+        except TransactionAborted as e:
+            return False, str(e)
+        except Exception as e:
+            return False, f"Lỗi database: {str(e)}"
+
+    # -----------------------
+    # Tạo 1 phiếu mượn nhiều sách (theo ID hoặc mã vạch)
+    # -----------------------
+    def create_borrow_batch(self, reader_name: str, book_refs: List[Union[int, str]]):
+        """
+        Mượn nhiều sách trên 1 phiếu
+        book_refs: int = book_id, str = mã vạch; lặp lại 1 sách = mượn nhiều cuốn
+        Kiểm tra tất cả sách bằng 1 truy vấn, trừ kho bằng 1 câu UPDATE,
+        thêm chi tiết bằng 1 executemany, tất cả trong 1 giao dịch
+        """
+        if not book_refs:
+            return False, "Chưa chọn sách để mượn"
+
+        try:
+            with db.transaction():
+                sql_reader = "SELECT * FROM readers WHERE full_name=%s"
+                reader_data = db.fetchone(sql_reader, (reader_name,))
+                if not reader_data:
+                    raise TransactionAborted("Bạn đọc không tồn tại")
+                reader = Reader.from_dict(reader_data)
+                if not reader.is_active():
+                    raise TransactionAborted("Thẻ bạn đọc không hợp lệ")
+
+                refs = [ref if isinstance(ref, int) else str(ref).strip() for ref in book_refs]
+                books = self._find_books_by_refs(refs)
+                quantities = Counter()
+                missing = []
+                for ref in refs:
+                    book = books.get(ref)
+                    if book is None:
+                        missing.append(str(ref))
+                    else:
+                        quantities[book["book_id"]] += 1
+                if missing:
+                    raise TransactionAborted(f"Không tìm thấy sách: {', '.join(missing)}")
+
+                by_id = {book["book_id"]: book for book in books.values()}
+                short = [
+                    by_id[book_id]["title"] for book_id, qty in quantities.items()
+                    if by_id[book_id]["available_quantity"] < qty
+                ]
+                if short:
+                    raise TransactionAborted(f"Không đủ số lượng: {', '.join(short)}")
+
+                # Trừ kho tất cả sách, lỗi nếu có sách vừa bị quầy khác mượn hết
+                if not self._reserve_stock_batch(quantities):
+                    raise TransactionAborted("Sách vừa được mượn hết, vui lòng thử lại")
+
+                borrow_date = datetime.now().date()
+                slip = BorrowSlip(
+                    reader_id=reader.reader_id,
+                    staff_id=1,  # demo
+                    borrow_date=borrow_date,
+                    return_due=borrow_date + timedelta(days=self.BORROW_DAYS)
+                )
+                slip_id = self._insert_borrow_slip(slip)
+
+                details = [
+                    BorrowDetail(slip_id=slip_id, book_id=book_id, quantity=qty)
+                    for book_id, qty in quantities.items()
+                ]
+                self._insert_borrow_details(details)
+
+                ChangeLog.record(ChangeLog.BOOK, list(quantities), ChangeLog.UPDATE)
+                ChangeLog.record(ChangeLog.BORROW, [slip_id], ChangeLog.INSERT)
+
+            BookService.invalidate_cached(list(quantities))
+            total = sum(quantities.values())
+            return True, f"Tạo phiếu mượn #{slip_id} thành công ({total} cuốn)"
+
+        except TransactionAborted as e:
+            return False, str(e)
+        except Exception as e:
+            return False, f"Lỗi database: {str(e)}"
 
     # -----------------------
     # Cập nhật phiếu mượn
@@ -69,29 +161,62 @@ class BorrowService:
         SET borrow_date=%s, return_date=%s, status=%s
         WHERE slip_id=%s
         """
-        db.execute_query(sql, (borrow_date, return_date, status, slip_id), commit=True)
-        return True, "Cập nhật phiếu thành công"
+        try:
+            with db.transaction():
+                db.execute_query(sql, (borrow_date, return_date, status, slip_id), commit=True)
+                ChangeLog.record(ChangeLog.BORROW, [slip_id], ChangeLog.UPDATE)
+            return True, "Cập nhật phiếu thành công"
+        except Exception as e:
+            return False, f"Lỗi database: {str(e)}"
 
     # -----------------------
     # Trả sách
     # -----------------------
     def return_books(self, slip_id):
-        sql_slip = "SELECT * FROM borrow_slips WHERE slip_id=%s"
-        slip = db.fetchone(sql_slip, (slip_id,))
-        if not slip:
-            return False, "Phiếu mượn không tồn tại"
+        try:
+            with db.transaction():
+                returned, book_ids = self._return_slips([slip_id])
+                if not returned:
+                    slip = db.fetchone("SELECT status FROM borrow_slips WHERE slip_id=%s", (slip_id,))
+                    if not slip:
+                        raise TransactionAborted("Phiếu mượn không tồn tại")
+                    raise TransactionAborted("Phiếu mượn đã được trả trước đó")
+
+            BookService.invalidate_cached(book_ids)
+            return True, "Trả sách thành công"
+
+        except TransactionAborted as e:
+            return False, str(e)
+        except Exception as e:
+            return False, f"Lỗi database: {str(e)}"
+
+    # -----------------------
+    # Trả nhiều phiếu 1 lần (xử lý hộp trả sách cuối ngày)
+    # -----------------------
+    def return_books_batch(self, slip_ids):
+        """
+        Trả nhiều phiếu, mỗi RETURN_BATCH_SIZE phiếu là 1 giao dịch
+        Phiếu không tồn tại hoặc đã trả được bỏ qua
+        """
+        slip_ids = list(dict.fromkeys(slip_ids))
+        if not slip_ids:
+            return False, "Chưa chọn phiếu để trả"
 
-        # Tăng lại số lượng sách trong inventory
-        sql_details = "SELECT * FROM borrow_details WHERE slip_id=%s"
-        details = db.fetchall(sql_details, (slip_id,))
-        for d in details:
-            sql_inc = "UPDATE book_inventory SET available_quantity = available_quantity + %s WHERE book_id=%s"
-            db.execute_query(sql_inc, (d["quantity"], d["book_id"]), commit=True)
+        returned = 0
+        try:
+            for start in range(0, len(slip_ids), self.RETURN_BATCH_SIZE):
+                count, book_ids = self._return_chunk(slip_ids[start:start + self.RETURN_BATCH_SIZE])
+                returned += count
+                BookService.invalidate_cached(book_ids)
 
-        # Cập nhật trạng thái phiếu
-        sql_update = "UPDATE borrow_slips SET status='RETURNED', return_date=CURDATE() WHERE slip_id=%s"
-        db.execute_query(sql_update, (slip_id,), commit=True)
-        return True, "Trả sách thành công"
+        except Exception as e:
+            return False, f"Lỗi database sau khi đã trả {returned} phiếu: {str(e)}"
+
+        skipped = len(slip_ids) - returned
+        message = f"Đã trả {returned} phiếu"
+        if skipped:
+            message += f", bỏ qua {skipped} phiếu không tồn tại hoặc đã trả"
+        return True, message
 
     # -----------------------
     # Lấy tất cả phiếu mượn/trả
@@ -108,6 +233,84 @@ class BorrowService:
         """
         return db.execute_query(sql, fetch=True)
 
+    # -----------------------
+    # Lịch sử mượn/trả: lọc + phân trang keyset theo (borrow_date, slip_id)
+    # -----------------------
+    def get_borrows_page(
+            self,
+            status: Optional[str] = None,
+            date_from=None,
+            date_to=None,
+            reader: Optional[Union[int, str]] = None,
+            book: Optional[Union[int, str]] = None,
+            after: Optional[Tuple] = None,
+            limit: Optional[int] = None
+    ):
+        """
+        Lấy 1 trang phiếu mượn (mới nhất trước), mỗi dòng là 1 sách của phiếu
+        reader/book: int = ID, str = tìm theo tên/tựa sách
+        after: con trỏ (borrow_date, slip_id) trả về từ trang trước
+        Returns: (rows, con trỏ trang sau hoặc None nếu hết)
+        """
+        limit = limit or AppConfig.ITEMS_PER_PAGE
+        conditions = []
+        params = []
+
+        if status:
+            conditions.append("bs.status = %s")
+            params.append(status)
+        if date_from:
+            conditions.append("bs.borrow_date >= %s")
+            params.append(date_from)
+        if date_to:
+            conditions.append("bs.borrow_date <= %s")
+            params.append(date_to)
+        if isinstance(reader, int):
+            conditions.append("bs.reader_id = %s")
+            params.append(reader)
+        elif reader:
+            conditions.append("bs.reader_id IN (SELECT reader_id FROM readers WHERE full_name LIKE %s)")
+            params.append(f"%{reader}%")
+        if isinstance(book, int):
+            conditions.append("EXISTS (SELECT 1 FROM borrow_details d WHERE d.slip_id = bs.slip_id AND d.book_id = %s)")
+            params.append(book)
+        elif book:
+            conditions.append("""EXISTS (
+                SELECT 1 FROM borrow_details d JOIN books k ON d.book_id = k.book_id
+                WHERE d.slip_id = bs.slip_id AND k.title LIKE %s
+            )""")
+            params.append(f"%{book}%")
+        if after:
+            conditions.append("(bs.borrow_date < %s OR (bs.borrow_date = %s AND bs.slip_id < %s))")
+            params.extend([after[0], after[0], after[1]])
+
+        where = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+
+        # Phân trang trên phiếu trước, sau đó mới JOIN chi tiết/sách của trang đó
+        sql = f"""
+        SELECT b.slip_id, r.full_name, bk.title AS book_name,
+               b.borrow_date, b.return_due, b.return_date, b.status
+        FROM (
+            SELECT bs.slip_id, bs.reader_id, bs.borrow_date, bs.return_due, bs.return_date, bs.status
+            FROM borrow_slips bs
+            {where}
+            ORDER BY bs.borrow_date DESC, bs.slip_id DESC
+            LIMIT %s
+        ) b
+        JOIN readers r ON b.reader_id=r.reader_id
+        LEFT JOIN borrow_details bd ON b.slip_id=bd.slip_id
+        LEFT JOIN books bk ON bd.book_id=bk.book_id
+        ORDER BY b.borrow_date DESC, b.slip_id DESC, bd.book_id
+        """
+        params.append(limit)
+        rows = db.fetchall(sql, tuple(params))
+
+        slip_count = len({row["slip_id"] for row in rows})
+        next_cursor = None
+        if rows and slip_count >= limit:
+            next_cursor = (rows[-1]["borrow_date"], rows[-1]["slip_id"])
+        return rows, next_cursor
+
     # -----------------------
     # Hàm nội bộ: insert slip/detail, giảm stock
     # -----------------------
@@ -125,6 +328,165 @@ class BorrowService:
         """
         db.execute_query(sql, detail.to_tuple(), commit=True)
 
-    def _decrease_stock(self, book_id, qty):
-        sql = "UPDATE book_inventory SET available_quantity = available_quantity - %s WHERE book_id=%s"
-        db.execute_query(sql, (qty, book_id), commit=True)
+    def _insert_borrow_details(self, details: List[BorrowDetail]):
+        sql = """
+        INSERT INTO borrow_details (slip_id, book_id, quantity, fine_amount)
+        VALUES (%s, %s, %s, %s)
+        """
+        db.executemany(sql, [detail.to_tuple() for detail in details])
+
+    def _find_books_by_refs(self, book_refs) -> dict:
+        """
+        1 truy vấn lấy sách + tồn kho theo ID/mã vạch: {ref: row}
+        Mã vạch được so khớp trong SQL (theo collation của cột barcode),
+        mỗi dòng trả kèm ref đầu vào để tra ngược
+        """
+        book_ids = list({ref for ref in book_refs if isinstance(ref, int)})
+        barcodes = list(dict.fromkeys(ref for ref in book_refs if not isinstance(ref, int)))
+
+        columns = "b.book_id, b.title, COALESCE(bi.available_quantity, 0) AS available_quantity"
+        parts = []
+        params = []
+        if barcodes:
+            refs = " UNION ALL ".join(["SELECT %s AS ref"] * len(barcodes))
+            parts.append(f"""
+            SELECT r.ref, {columns}
+            FROM ({refs}) r
+            JOIN books b ON b.barcode = r.ref
+            LEFT JOIN book_inventory bi ON bi.book_id = b.book_id
+            """)
+            params.extend(barcodes)
+        if book_ids:
+            parts.append(f"""
+            SELECT NULL AS ref, {columns}
+            FROM books b
+            LEFT JOIN book_inventory bi ON bi.book_id = b.book_id
+            WHERE b.book_id IN ({', '.join(['%s'] * len(book_ids))})
+            """)
+            params.extend(book_ids)
+
+        rows = db.fetchall(" UNION ALL ".join(parts), tuple(params))
+
+        by_ref = {}
+        for row in rows:
+            ref = row.pop("ref")
+            by_ref[row["book_id"] if ref is None else ref] = row
+        return by_ref
+
+    def _reserve_stock_batch(self, quantities: dict) -> bool:
+        """
+        Trừ tồn kho nhiều sách bằng 1 câu UPDATE nguyên tử
+        Chỉ thành công khi mọi sách đều còn đủ (rowcount == số đầu sách)
+        """
+        cases = " ".join(["WHEN %s THEN %s"] * len(quantities))
+        placeholders = ", ".join(["%s"] * len(quantities))
+        case_params = [value for item in quantities.items() for value in item]
+
+        sql = f"""
+        UPDATE book_inventory
+        SET available_quantity = available_quantity - (CASE book_id {cases} END)
+        WHERE book_id IN ({placeholders})
+          AND available_quantity >= (CASE book_id {cases} END)
+        """
+        params = tuple(case_params + list(quantities) + case_params)
+        return db.execute_rowcount(sql, params) == len(quantities)
+
+    def _return_chunk(self, slip_ids) -> Tuple[int, List[int]]:
+        """1 lô trả sách trong 1 giao dịch, chạy lại khi bị hủy vì deadlock"""
+        for attempt in range(self.DEADLOCK_RETRIES + 1):
+            try:
+                with db.transaction():
+                    return self._return_slips(slip_ids)
+            except Exception as e:
+                if not is_deadlock(e) or attempt == self.DEADLOCK_RETRIES:
+                    raise
+
+    def _return_slips(self, slip_ids) -> Tuple[int, List[int]]:
+        """
+        Trả các phiếu đang mượn theo tập hợp (phải gọi trong db.transaction())
+        Khóa theo cùng thứ tự với lúc mượn (kho trước, phiếu sau) để không deadlock:
+        đọc phiếu/chi tiết không khóa, khóa dòng kho theo book_id tăng dần, rồi khóa
+        và kiểm tra lại phiếu; cộng kho bằng 1 UPDATE JOIN, đánh dấu đã trả bằng 1 UPDATE
+        Returns: (số phiếu đã trả, book_id có tồn kho thay đổi)
+        """
+        placeholders = ", ".join(["%s"] * len(slip_ids))
+        open_ids = tuple(
+            row["slip_id"] for row in db.fetchall(
+                f"SELECT slip_id FROM borrow_slips WHERE slip_id IN ({placeholders}) AND status <> 'RETURNED'",
+                tuple(slip_ids)
+            )
+        )
+        if not open_ids:
+            return 0, []
+
+        placeholders = ", ".join(["%s"] * len(open_ids))
+        book_ids = [
+            row["book_id"] for row in db.fetchall(
+                f"SELECT DISTINCT book_id FROM borrow_details WHERE slip_id IN ({placeholders}) ORDER BY book_id",
+                open_ids
+            )
+        ]
+        if book_ids:
+            db.fetchall(
+                f"""
+                SELECT book_id FROM book_inventory
+                WHERE book_id IN ({', '.join(['%s'] * len(book_ids))})
+                ORDER BY book_id
+                FOR UPDATE
+                """,
+                tuple(book_ids)
+            )
+
+        # Quầy khác có thể vừa trả 1 phần các phiếu: chỉ trả phiếu còn mở sau khi khóa
+        open_ids = tuple(
+            row["slip_id"] for row in db.fetchall(
+                f"""
+                SELECT slip_id FROM borrow_slips
+                WHERE slip_id IN ({placeholders}) AND status <> 'RETURNED'
+                ORDER BY slip_id
+                FOR UPDATE
+                """,
+                open_ids
+            )
+        )
+        if not open_ids:
+            return 0, []
+
+        placeholders = ", ".join(["%s"] * len(open_ids))
+        # Cộng dồn theo sách trước khi JOIN: 1 dòng kho chỉ được UPDATE 1 lần
+        db.execute_query(
+            f"""
+            UPDATE book_inventory bi
+            JOIN (
+                SELECT book_id, SUM(quantity) AS qty
+                FROM borrow_details
+                WHERE slip_id IN ({placeholders})
+                GROUP BY book_id
+            ) d ON d.book_id = bi.book_id
+            SET bi.available_quantity = bi.available_quantity + d.qty
+            """,
+            open_ids,
+            commit=True
+        )
+        db.execute_query(
+            f"UPDATE borrow_slips SET status='RETURNED', return_date=CURDATE() WHERE slip_id IN ({placeholders})",
+            open_ids,
+            commit=True
+        )
+
+        ChangeLog.record(ChangeLog.BOOK, book_ids, ChangeLog.UPDATE)
+        ChangeLog.record(ChangeLog.BORROW, open_ids, ChangeLog.UPDATE)
+        return len(open_ids), book_ids
+
+    def _reserve_stock(self, book_id, qty) -> bool:
+        """
+        Trừ tồn kho nguyên tử: chỉ trừ khi còn đủ qty cuốn
+        Kiểm tra và trừ nằm trong 1 câu UPDATE nên 2 quầy mượn cùng lúc
+        cuốn cuối cùng thì chỉ 1 quầy thành công, không bao giờ bị âm
+        """
+        sql = """
+        UPDATE book_inventory
+        SET available_quantity = available_quantity - %s
+        WHERE book_id=%s AND available_quantity >= %s
+        """
+        return db.execute_rowcount(sql, (qty, book_id, qty)) == 1
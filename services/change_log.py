@@ -0,0 +1,196 @@
+"""
+Change Log - Nhật ký thay đổi dữ liệu (bảng entity_changes)
+
+Service ghi 1 dòng cho mỗi thực thể thêm/sửa/xóa, trong cùng giao dịch
+với thay đổi. Máy trạm giữ con trỏ "version" (change_id lớn nhất đã thấy)
+và chỉ hỏi các thay đổi sau con trỏ đó thay vì tải lại toàn bộ.
+
+AUTO_INCREMENT cấp id lúc INSERT nhưng dòng chỉ hiện ra lúc COMMIT: giao dịch
+lấy id N có thể commit sau giao dịch lấy N+1. Không khóa chung để xếp hàng các
+giao dịch ghi; thay vào đó con trỏ chỉ tiến tới trước "lỗ" đầu tiên (id chưa
+thấy, có thể của giao dịch chưa commit), lần sau đọc lại từ đó. Thay đổi đọc
+lại được áp lại (tải lại theo id nên không sao). Lỗ cũ hơn GAP_SECONDS coi như
+id của giao dịch đã rollback và được bỏ qua.
+"""
+from itertools import takewhile
+from typing import Dict, Iterable, List, Optional, Tuple
+import logging
+
+from config import schema
+from config.database import db
+
+logger = logging.getLogger(__name__)
+
+
+class ChangeLog:
+    """Ghi và đọc nhật ký thay đổi theo con trỏ version"""
+
+    TABLE = 'entity_changes'
+
+    # Thực thể
+    BOOK = 'book'
+    READER = 'reader'
+    BORROW = 'borrow'
+    # Bảng tra cứu (máy trạm khác nạp lại LookupCache)
+    AUTHOR = 'author'
+    CATEGORY = 'category'
+    PUBLISHER = 'publisher'
+
+    # Hành động (BULK: thay đổi hàng loạt không rõ id, máy trạm nên tải lại toàn bộ)
+    INSERT = 'insert'
+    UPDATE = 'update'
+    DELETE = 'delete'
+    BULK = 'bulk'
+
+    # Quá nhiều thay đổi thì tải lại toàn bộ rẻ hơn
+    MAX_CHANGES = 1000
+    RETENTION_DAYS = 7
+    PRUNE_BATCH_SIZE = 5000
+    # id thiếu lâu hơn số giây này (tính từ dòng ngay sau nó) là id của giao dịch đã rollback
+    GAP_SECONDS = 60
+
+    @classmethod
+    def record(cls, entity: str, entity_ids: Iterable[int], action: str):
+        """Ghi thay đổi (tham gia giao dịch đang mở nếu có)"""
+        entity_ids = list(entity_ids)
+        if not entity_ids or not schema.has_table(cls.TABLE):
+            return
+
+        db.executemany(
+            f"INSERT INTO {cls.TABLE} (entity, entity_id, action) VALUES (%s, %s, %s)",
+            [(entity, entity_id, action) for entity_id in entity_ids]
+        )
+
+    @classmethod
+    def record_bulk(cls, entity: str):
+        """Ghi 1 thay đổi hàng loạt (vd: cập nhật trạng thái theo điều kiện, nhập file)"""
+        cls.record(entity, [0], cls.BULK)
+
+    @classmethod
+    def latest_version(cls) -> Optional[int]:
+        """
+        Con trỏ hiện tại (change_id lớn nhất mà mọi id trước nó đã commit),
+        None nếu nhật ký không dùng được
+        """
+        if not schema.has_table(cls.TABLE):
+            return None
+
+        rows = db.execute_query(
+            f"""
+            SELECT change_id, TIMESTAMPDIFF(SECOND, changed_at, NOW()) AS age
+            FROM {cls.TABLE}
+            ORDER BY change_id DESC
+            LIMIT %s
+            """,
+            (cls.MAX_CHANGES,),
+            fetch=True
+        )
+        if rows is None:
+            return None
+        if not rows:
+            return 0
+
+        rows = rows[::-1]
+        return cls._committed_version(int(rows[0]['change_id']), rows[1:])
+
+    @classmethod
+    def changes_since(
+            cls,
+            version: int,
+            entities: List[str]
+    ) -> Optional[Tuple[int, Dict[str, Dict[int, str]]]]:
+        """
+        Các thay đổi sau version của các thực thể cho trước
+        Returns: (version mới, {entity: {entity_id: hành động cuối}})
+                 None nếu cần tải lại toàn bộ (nhật ký không dùng được,
+                 con trỏ đã bị dọn, thay đổi hàng loạt hoặc quá nhiều thay đổi)
+        """
+        if version is None or not schema.has_table(cls.TABLE):
+            return None
+
+        # Đọc mọi thực thể: cần đủ dãy id để nhận ra lỗ
+        rows = db.execute_query(
+            f"""
+            SELECT change_id, entity, entity_id, action,
+                   TIMESTAMPDIFF(SECOND, changed_at, NOW()) AS age
+            FROM {cls.TABLE}
+            WHERE change_id > %s
+            ORDER BY change_id
+            LIMIT %s
+            """,
+            (version, cls.MAX_CHANGES + 1),
+            fetch=True
+        )
+        if rows is None or len(rows) > cls.MAX_CHANGES:
+            return None
+
+        # Con trỏ cũ hơn phần nhật ký còn giữ thì không biết đã mất gì
+        oldest = db.fetchone(f"SELECT MIN(change_id) AS oldest FROM {cls.TABLE}")
+        if oldest and oldest['oldest'] and version < int(oldest['oldest']) - 1:
+            return None
+
+        changes: Dict[str, Dict[int, str]] = {entity: {} for entity in entities}
+        for row in rows:
+            if row['entity'] not in changes:
+                continue
+            if row['action'] == cls.BULK:
+                return None
+            changes[row['entity']][row['entity_id']] = row['action']
+
+        return cls._committed_version(version, rows), changes
+
+    @classmethod
+    def _committed_version(cls, version: int, rows: List[dict]) -> int:
+        """
+        Tiến con trỏ qua các dòng (tăng dần theo change_id) tới trước lỗ đầu tiên còn mới:
+        id thiếu có thể của giao dịch chưa commit, lần đọc sau phải thấy nó
+        """
+        for row in rows:
+            change_id = int(row['change_id'])
+            if change_id != version + 1 and row['age'] < cls.GAP_SECONDS:
+                break
+            version = change_id
+        return version
+
+    @classmethod
+    def prune(cls, keep_days: Optional[int] = None, batch_size: Optional[int] = None) -> int:
+        """
+        Xóa nhật ký cũ hơn keep_days ngày theo từng lô khóa chính (python -m tools.migrate)
+        change_id tăng theo thời gian nên quét từ id nhỏ nhất, dừng ở dòng đầu tiên còn mới;
+        mỗi lô là 1 câu DELETE theo khoảng change_id, không quét cả bảng theo changed_at
+        Returns: số dòng đã xóa
+        """
+        if not schema.has_table(cls.TABLE):
+            return 0
+
+        keep_days = keep_days or cls.RETENTION_DAYS
+        batch_size = batch_size or cls.PRUNE_BATCH_SIZE
+        total = 0
+        while True:
+            rows = db.execute_query(
+                f"""
+                SELECT change_id, changed_at < NOW() - INTERVAL %s DAY AS expired
+                FROM {cls.TABLE}
+                ORDER BY change_id
+                LIMIT %s
+                """,
+                (keep_days, batch_size),
+                fetch=True
+            )
+            expired = list(takewhile(lambda row: row['expired'], rows or []))
+            if not expired:
+                break
+
+            deleted = db.execute_rowcount(
+                f"DELETE FROM {cls.TABLE} WHERE change_id <= %s",
+                (expired[-1]['change_id'],)
+            )
+            if deleted is None:
+                break
+            total += deleted
+            if len(expired) < len(rows):
+                break
+
+        if total:
+            logger.info(f"🧹 Đã dọn {total} dòng nhật ký thay đổi")
+        return total
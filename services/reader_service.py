@@ -1,17 +1,52 @@
-from typing import List, Optional, Tuple
+from typing import Callable, Iterable, Iterator, List, Optional, Tuple
 from datetime import datetime, timedelta
 import logging
+import threading
+import time
 
-from config.database import db
+from config.database import PoolExhausted, TransactionAborted, db
+from config.settings import AppConfig
+from models.columnar import ColumnarResult
 from models.reader import Reader
+from services.change_log import ChangeLog
+from utils.cache import EntityCache, TTLCache
+from utils.import_helper import ImportHelper, ImportReport
+from utils.text_search import NameIndex
 from utils.validators import Validator
 
 logger = logging.getLogger(__name__)
 
+READER_INSERT_QUERY = """
+    INSERT INTO readers (full_name, address, phone, email,
+                         card_start, card_end, status, reputation_score)
+    VALUES (%s, %s, %s, %s, %s, %s, %s, %s)
+"""
+
 
 class ReaderService:
     """Service layer xử lý business logic cho Reader"""
 
+    # Index tên không dấu dùng chung cho mọi instance (ReaderView, Dashboard...)
+    _name_index: Optional[NameIndex] = None
+    _name_index_lock = threading.Lock()
+    _name_index_built_at = 0.0
+    _name_index_synced_at = 0.0
+    _name_index_version: Optional[int] = None
+
+    # Đồng bộ thay đổi (máy khác thêm/sửa/xóa) sau mỗi chu kỳ, dựng lại toàn bộ định kỳ
+    NAME_INDEX_SYNC_SECONDS = 60
+    NAME_INDEX_REBUILD_SECONDS = 600
+
+    # Cache thống kê dùng chung (Dashboard, ReaderView)
+    _stats_cache = TTLCache(AppConfig.STATS_CACHE_SECONDS)
+    STATS_KEYS = (
+        'total', 'active', 'expired', 'locked', 'avg_reputation',
+        'expiring_soon', 'high_reputation', 'low_reputation'
+    )
+
+    # Identity map bạn đọc theo reader_id (nạp từ danh sách/tìm kiếm, xóa khi sửa/xóa)
+    _cache = EntityCache(AppConfig.ENTITY_CACHE_SIZE, AppConfig.ENTITY_CACHE_SECONDS)
+
     def __init__(self):
         self.validator = Validator()
 
@@ -80,16 +115,15 @@ class ReaderService:
             return False, error, None
 
         try:
-            query = """
-                INSERT INTO readers (full_name, address, phone, email,
-                                     card_start, card_end, status, reputation_score)
-                VALUES (%s, %s, %s, %s, %s, %s, %s, %s)
-            """
-
             params = reader.to_tuple()
-            reader_id = db.execute_query(query, params, commit=True)
+            with db.transaction():
+                reader_id = db.execute_query(READER_INSERT_QUERY, params, commit=True)
+                if reader_id:
+                    ChangeLog.record(ChangeLog.READER, [reader_id], ChangeLog.INSERT)
 
             if reader_id:
+                self._index_name(reader_id, reader.full_name)
+                self._invalidate_statistics()
                 logger.info(f"✅ Đã thêm bạn đọc: {reader.full_name} (ID: {reader_id})")
                 return True, None, reader_id
             else:
@@ -135,9 +169,15 @@ class ReaderService:
                 reader.reader_id
             )
 
-            result = db.execute_query(query, params, commit=True)
+            with db.transaction():
+                result = db.execute_query(query, params, commit=True)
+                if result:
+                    ChangeLog.record(ChangeLog.READER, [reader.reader_id], ChangeLog.UPDATE)
 
             if result and result > 0:
+                self._index_name(reader.reader_id, reader.full_name)
+                self._cache.invalidate([reader.reader_id])
+                self._invalidate_statistics()
                 logger.info(f"✅ Đã cập nhật bạn đọc ID: {reader.reader_id}")
                 return True, None
             else:
@@ -150,105 +190,320 @@ class ReaderService:
     def delete_reader(self, reader_id: int) -> Tuple[bool, Optional[str]]:
         """Xóa bạn đọc"""
         try:
-            # Kiểm tra xem bạn đọc có đang mượn sách không
-            check_query = """
-                SELECT COUNT(*) as count
-                FROM borrow_slips
-                WHERE reader_id = %s AND status = 'BORROWING'
-            """
-            # Lấy kết quả đầu tiên
-            result = db.execute_query(check_query, (reader_id,), fetch=True)
+            # Kiểm tra + xóa trong 1 giao dịch
+            with db.transaction():
+                # Kiểm tra xem bạn đọc có đang mượn sách không
+                check_query = """
+                    SELECT COUNT(*) as count
+                    FROM borrow_slips
+                    WHERE reader_id = %s AND status = 'BORROWING'
+                """
+                # Lấy kết quả đầu tiên
+                result = db.execute_query(check_query, (reader_id,), fetch=True)
 
-            if result and len(result) > 0 and result[0].get('count', 0) > 0:
-                return False, "Không thể xóa bạn đọc đang mượn sách"
+                if result and len(result) > 0 and result[0].get('count', 0) > 0:
+                    raise TransactionAborted("Không thể xóa bạn đọc đang mượn sách")
 
-            # Xóa bạn đọc
-            query = "DELETE FROM readers WHERE reader_id = %s"
-            result = db.execute_query(query, (reader_id,), commit=True)
+                # Xóa bạn đọc
+                query = "DELETE FROM readers WHERE reader_id = %s"
+                result = db.execute_query(query, (reader_id,), commit=True)
+                if result:
+                    ChangeLog.record(ChangeLog.READER, [reader_id], ChangeLog.DELETE)
 
             if result and result > 0:
+                if ReaderService._name_index is not None:
+                    ReaderService._name_index.remove(reader_id)
+                self._cache.invalidate([reader_id])
+                self._invalidate_statistics()
                 logger.info(f"✅ Đã xóa bạn đọc ID: {reader_id}")
                 return True, None
             else:
                 return False, "Không tìm thấy bạn đọc để xóa"
 
+        except TransactionAborted as e:
+            return False, str(e)
         except Exception as e:
             logger.error(f"❌ Lỗi xóa bạn đọc: {e}")
             return False, f"Lỗi database: {str(e)}"
 
-    def get_all_readers(self) -> List[Reader]:
-        """Lấy danh sách tất cả bạn đọc"""
+    def get_all_readers(self) -> ColumnarResult:
+        """
+        Lấy danh sách tất cả bạn đọc dạng cột (không dựng Reader cho từng dòng)
+        Duyệt for vẫn nhận Reader; không nạp vào cache theo id
+        """
         try:
             query = "SELECT * FROM readers ORDER BY reader_id DESC"
             rows = db.execute_query(query, fetch=True)
 
             if rows is None:
-                return []
+                return self._empty_result()
 
-            readers = [Reader.from_dict(row) for row in rows]
+            readers = ColumnarResult.from_rows(rows, Reader.COLUMNS, Reader.from_dict, Reader.NUMERIC_COLUMNS)
             logger.info(f"✅ Đã tải {len(readers)} bạn đọc")
             return readers
 
+        except PoolExhausted:
+            raise  # Database đang bận: để view báo lỗi thay vì hiện danh sách rỗng
         except Exception as e:
             logger.error(f"❌ Lỗi lấy danh sách: {e}")
-            return []
+            return self._empty_result()
+
+    @staticmethod
+    def _empty_result() -> ColumnarResult:
+        return ColumnarResult.from_rows([], Reader.COLUMNS, Reader.from_dict, Reader.NUMERIC_COLUMNS)
+
+    def iter_readers(self, chunk_size: Optional[int] = None) -> Iterator[List[Reader]]:
+        """
+        Duyệt toàn bộ bạn đọc theo lô (cursor không đệm), dùng cho xuất file lớn
+        Không đi qua cache bạn đọc theo id; lỗi database được raise
+        """
+        chunk_size = chunk_size or AppConfig.EXPORT_CHUNK_SIZE
+        query = "SELECT * FROM readers ORDER BY reader_id DESC"
+        for rows in db.iter_query(query, chunk_size=chunk_size):
+            yield [Reader.from_dict(row) for row in rows]
 
     def get_reader_by_id(self, reader_id: int) -> Optional[Reader]:
-        """Lấy thông tin bạn đọc theo ID"""
+        """Lấy thông tin bạn đọc theo ID (ưu tiên cache)"""
+        reader = self._cache.get(reader_id)
+        if reader is not None:
+            return reader
+        return self._load_reader_by_id(reader_id)
+
+    def _load_reader_by_id(self, reader_id: int) -> Optional[Reader]:
+        """Đọc bạn đọc từ database (bỏ qua cache) và lưu lại vào cache"""
         try:
+            generation = self._cache.generation()
             query = "SELECT * FROM readers WHERE reader_id = %s"
             rows = db.execute_query(query, (reader_id,), fetch=True)
 
             if rows and len(rows) > 0:
-                return Reader.from_dict(rows[0])
+                return self._to_readers(rows, generation)[0]
             return None
 
+        except PoolExhausted:
+            raise
         except Exception as e:
             logger.error(f"❌ Lỗi lấy thông tin: {e}")
             return None
 
     def search_readers(self, keyword: str, search_by: str = "all") -> List[Reader]:
-        """Tìm kiếm bạn đọc"""
+        """
+        Tìm kiếm bạn đọc
+        - name: tìm gần đúng trên index tên không dấu ("nguyen van a" khớp "Nguyễn Văn A")
+        - phone/email/address: LIKE
+        - all: kết quả theo tên (xếp theo điểm) trước, rồi LIKE trên tên/SĐT/email/địa chỉ
+          (giữ khớp chuỗi con như trước, vd: địa chỉ, 1 phần tên)
+        """
         try:
-            keyword_pattern = f"%{keyword}%"
-
-            if search_by == "name":
-                query = "SELECT * FROM readers WHERE full_name LIKE %s ORDER BY reader_id DESC"
-                params = (keyword_pattern,)
-            elif search_by == "phone":
-                query = "SELECT * FROM readers WHERE phone LIKE %s ORDER BY reader_id DESC"
-                params = (keyword_pattern,)
-            elif search_by == "email":
-                query = "SELECT * FROM readers WHERE email LIKE %s ORDER BY reader_id DESC"
-                params = (keyword_pattern,)
-            elif search_by == "address":
-                query = "SELECT * FROM readers WHERE address LIKE %s ORDER BY reader_id DESC"
-                params = (keyword_pattern,)
-            else:  # search all
-                query = """
-                    SELECT *
-                    FROM readers
-                    WHERE full_name LIKE %s
-                       OR phone LIKE %s
-                       OR email LIKE %s
-                       OR address LIKE %s
-                    ORDER BY reader_id DESC
-                """
-                params = (keyword_pattern, keyword_pattern, keyword_pattern, keyword_pattern)
+            limit = AppConfig.MAX_SEARCH_RESULTS
+            readers: List[Reader] = []
 
-            rows = db.execute_query(query, params, fetch=True)
+            if search_by in ("all", "name"):
+                readers = self._search_by_name(keyword, limit)
 
-            if rows is None:
-                return []
+            if search_by == "all" and len(readers) < limit:
+                found_ids = {r.reader_id for r in readers}
+                for reader in self._search_by_like(keyword, "all", limit):
+                    if reader.reader_id not in found_ids:
+                        readers.append(reader)
+                readers = readers[:limit]
+            elif search_by not in ("all", "name"):
+                readers = self._search_by_like(keyword, search_by, limit)
 
-            readers = [Reader.from_dict(row) for row in rows]
             logger.info(f"🔍 Tìm thấy {len(readers)} kết quả cho '{keyword}'")
             return readers
 
+        except PoolExhausted:
+            raise
         except Exception as e:
             logger.error(f"❌ Lỗi tìm kiếm: {e}")
             return []
 
+    def _search_by_like(self, keyword: str, search_by: str, limit: int) -> List[Reader]:
+        """Tìm bằng LIKE trên phone/email/address ('all' = tên, SĐT, email hoặc địa chỉ)"""
+        keyword_pattern = f"%{keyword}%"
+
+        if search_by == "phone":
+            query = "SELECT * FROM readers WHERE phone LIKE %s ORDER BY reader_id DESC LIMIT %s"
+            params = (keyword_pattern, limit)
+        elif search_by == "email":
+            query = "SELECT * FROM readers WHERE email LIKE %s ORDER BY reader_id DESC LIMIT %s"
+            params = (keyword_pattern, limit)
+        elif search_by == "address":
+            query = "SELECT * FROM readers WHERE address LIKE %s ORDER BY reader_id DESC LIMIT %s"
+            params = (keyword_pattern, limit)
+        else:  # all
+            query = """
+                SELECT *
+                FROM readers
+                WHERE full_name LIKE %s
+                   OR phone LIKE %s
+                   OR email LIKE %s
+                   OR address LIKE %s
+                ORDER BY reader_id DESC
+                LIMIT %s
+            """
+            params = (keyword_pattern, keyword_pattern, keyword_pattern, keyword_pattern, limit)
+
+        generation = self._cache.generation()
+        rows = db.execute_query(query, params, fetch=True)
+        return self._to_readers(rows, generation) if rows else []
+
+    def _search_by_name(self, keyword: str, limit: int) -> List[Reader]:
+        """Tìm gần đúng theo tên trên index trigram, trả về theo thứ tự điểm"""
+        index = self._get_name_index()
+        if index is None:
+            return []
+
+        ranked_ids = [reader_id for reader_id, _ in index.search(keyword, limit)]
+        return self._get_readers_by_ids(ranked_ids)
+
+    def _get_readers_by_ids(self, reader_ids: List[int]) -> List[Reader]:
+        """Lấy bạn đọc theo danh sách ID, giữ nguyên thứ tự truyền vào"""
+        if not reader_ids:
+            return []
+
+        generation = self._cache.generation()
+        placeholders = ', '.join(['%s'] * len(reader_ids))
+        query = f"SELECT * FROM readers WHERE reader_id IN ({placeholders})"
+        rows = db.execute_query(query, tuple(reader_ids), fetch=True) or []
+
+        by_id = {reader.reader_id: reader for reader in self._to_readers(rows, generation)}
+        return [by_id[rid] for rid in reader_ids if rid in by_id]
+
+    def _to_readers(self, rows: List[dict], generation: int) -> List[Reader]:
+        """Tạo Reader từ các dòng và lưu vào identity map (generation lấy trước khi truy vấn)"""
+        readers = [Reader.from_dict(row) for row in rows]
+        self._cache.put_many(((reader.reader_id, reader) for reader in readers), generation)
+        return readers
+
+    @classmethod
+    def get_cache_stats(cls) -> dict:
+        """Số liệu hit/miss của cache bạn đọc theo id"""
+        return cls._cache.stats()
+
+    # ========== THEO DÕI THAY ĐỔI ==========
+
+    def get_data_version(self) -> Optional[int]:
+        """Version hiện tại của nhật ký thay đổi (None nếu không dùng được)"""
+        return ChangeLog.latest_version()
+
+    def get_changes_since(self, version: Optional[int]) -> Optional[dict]:
+        """
+        Bạn đọc đã thay đổi sau version
+        Returns: {'version', 'changed': [Reader], 'deleted': [reader_id]}
+                 None nếu client nên tải lại toàn bộ
+        """
+        try:
+            result = ChangeLog.changes_since(version, [ChangeLog.READER])
+            if result is None:
+                return None
+
+            new_version, changes = result
+            reader_changes = changes[ChangeLog.READER]
+            # Máy trạm khác đã sửa: bỏ bản cũ trong cache trước khi đọc lại
+            self._cache.invalidate(reader_changes)
+            readers = self._get_readers_by_ids(
+                [reader_id for reader_id, action in reader_changes.items() if action != ChangeLog.DELETE]
+            )
+            found = {reader.reader_id for reader in readers}
+            deleted = [reader_id for reader_id in reader_changes if reader_id not in found]
+            return {'version': new_version, 'changed': readers, 'deleted': deleted}
+
+        except PoolExhausted:
+            raise
+        except Exception as e:
+            logger.error(f"❌ Lỗi lấy thay đổi bạn đọc: {e}")
+            return None
+
+    def _get_name_index(self) -> Optional[NameIndex]:
+        """Lấy index tên, dựng lần đầu / định kỳ, giữa các lần dựng đồng bộ theo nhật ký thay đổi"""
+        cls = ReaderService
+        now = time.monotonic()
+
+        with cls._name_index_lock:
+            if cls._name_index is None or now - cls._name_index_built_at > cls.NAME_INDEX_REBUILD_SECONDS:
+                cls._rebuild_name_index(now)
+
+            elif now - cls._name_index_synced_at > cls.NAME_INDEX_SYNC_SECONDS:
+                if cls._sync_name_index():
+                    cls._name_index_synced_at = now
+                else:
+                    cls._rebuild_name_index(now)
+
+            return cls._name_index
+
+    @classmethod
+    def _rebuild_name_index(cls, now: float):
+        """Dựng lại index tên từ toàn bộ bảng readers (lỗi database: giữ index cũ)"""
+        # Lấy version trước khi đọc: thay đổi trong lúc đọc được áp lại ở lần đồng bộ sau
+        version = ChangeLog.latest_version()
+        rows = db.execute_query("SELECT reader_id, full_name FROM readers", fetch=True)
+        if rows is None:
+            return
+
+        index = NameIndex()
+        for row in rows:
+            index.add(row['reader_id'], row['full_name'])
+
+        cls._name_index = index
+        cls._name_index_version = version
+        cls._name_index_built_at = cls._name_index_synced_at = now
+        logger.info(f"✅ Đã dựng index tên cho {len(index)} bạn đọc")
+
+    @classmethod
+    def _sync_name_index(cls) -> bool:
+        """
+        Áp thay đổi bạn đọc (thêm/sửa/xóa, kể cả từ máy khác) từ nhật ký vào index tên
+        Returns: False nếu cần dựng lại toàn bộ (thay đổi hàng loạt, nhật ký đã dọn...)
+        """
+        index = cls._name_index
+        if cls._name_index_version is None:
+            # Không có nhật ký thay đổi: chỉ lấy được bạn đọc mới thêm
+            rows = db.execute_query(
+                "SELECT reader_id, full_name FROM readers WHERE reader_id > %s",
+                (index.max_id,),
+                fetch=True
+            )
+            for row in rows or []:
+                index.add(row['reader_id'], row['full_name'])
+            return True
+
+        result = ChangeLog.changes_since(cls._name_index_version, [ChangeLog.READER])
+        if result is None:
+            return False
+
+        version, changes = result
+        reader_changes = changes[ChangeLog.READER]
+        changed_ids = [reader_id for reader_id, action in reader_changes.items() if action != ChangeLog.DELETE]
+        if changed_ids:
+            rows = db.execute_query(
+                f"SELECT reader_id, full_name FROM readers "
+                f"WHERE reader_id IN ({', '.join(['%s'] * len(changed_ids))})",
+                tuple(changed_ids),
+                fetch=True
+            )
+            if rows is None:
+                return True  # Lỗi database: giữ version cũ, lần sau đồng bộ lại
+            for row in rows:
+                index.add(row['reader_id'], row['full_name'])
+            found = {row['reader_id'] for row in rows}
+        else:
+            found = set()
+
+        for reader_id in reader_changes:
+            if reader_id not in found:
+                index.remove(reader_id)
+
+        cls._name_index_version = version
+        return True
+
+    @staticmethod
+    def _index_name(reader_id: int, full_name: str):
+        """Cập nhật index tên sau khi thêm/sửa (nếu index đã được dựng)"""
+        if ReaderService._name_index is not None:
+            ReaderService._name_index.add(reader_id, full_name)
+
     def filter_readers(
             self,
             status: Optional[str] = None,
@@ -283,98 +538,66 @@ class ReaderService:
 
             query += " ORDER BY reader_id DESC"
 
+            generation = self._cache.generation()
             rows = db.execute_query(query, tuple(params) if params else None, fetch=True)
 
             if rows is None:
                 return []
 
-            readers = [Reader.from_dict(row) for row in rows]
+            readers = self._to_readers(rows, generation)
             logger.info(f"🔎 Lọc được {len(readers)} bạn đọc")
             return readers
 
+        except PoolExhausted:
+            raise
         except Exception as e:
             logger.error(f"❌ Lỗi lọc dữ liệu: {e}")
             return []
 
     def get_statistics(self) -> dict:
-        """Lấy thống kê bạn đọc"""
+        """
+        Lấy thống kê bạn đọc
+        1 truy vấn tổng hợp có điều kiện (quét index idx_readers_stats),
+        kết quả được cache STATS_CACHE_SECONDS giây cho mọi màn hình dùng chung
+        """
+        stats = ReaderService._stats_cache.get_or_load('statistics', self._query_statistics)
+        if stats is None:
+            return dict.fromkeys(self.STATS_KEYS, 0)
+        return dict(stats)
+
+    def _query_statistics(self) -> Optional[dict]:
+        """Tính thống kê bằng 1 truy vấn, None nếu lỗi"""
         try:
-            stats = {
-                'total': 0,
-                'active': 0,
-                'expired': 0,
-                'locked': 0,
-                'avg_reputation': 0,
-                'expiring_soon': 0,
-                'high_reputation': 0,
-                'low_reputation': 0
-            }
-
-            # Tổng số bạn đọc
-            result = db.execute_query("SELECT COUNT(*) as total FROM readers", fetch=True)
-            if result and len(result) > 0:
-                stats['total'] = result[0]['total']
-
-            # Số bạn đọc theo trạng thái
-            query = "SELECT status, COUNT(*) as count FROM readers GROUP BY status"
-            rows = db.execute_query(query, fetch=True)
-
-            if rows:
-                for row in rows:
-                    status = row['status']
-                    if status == 'ACTIVE':
-                        stats['active'] = row['count']
-                    elif status == 'EXPIRED':
-                        stats['expired'] = row['count']
-                    elif status == 'LOCKED':
-                        stats['locked'] = row['count']
-
-            # Điểm uy tín trung bình
-            result = db.execute_query("SELECT AVG(reputation_score) as avg_rep FROM readers", fetch=True)
-            if result and len(result) > 0 and result[0]['avg_rep']:
-                stats['avg_reputation'] = round(result[0]['avg_rep'], 2)
-
-            # Số thẻ sắp hết hạn (trong 30 ngày)
             date_30_days = (datetime.now() + timedelta(days=30)).strftime('%Y-%m-%d')
             query = """
-                SELECT COUNT(*) as count
+                SELECT COUNT(*) AS total,
+                       SUM(CASE WHEN status = 'ACTIVE' THEN 1 ELSE 0 END) AS active,
+                       SUM(CASE WHEN status = 'EXPIRED' THEN 1 ELSE 0 END) AS expired,
+                       SUM(CASE WHEN status = 'LOCKED' THEN 1 ELSE 0 END) AS locked,
+                       AVG(reputation_score) AS avg_reputation,
+                       SUM(CASE WHEN card_end <= %s AND card_end >= CURDATE() THEN 1 ELSE 0 END) AS expiring_soon,
+                       SUM(CASE WHEN reputation_score >= 90 THEN 1 ELSE 0 END) AS high_reputation,
+                       SUM(CASE WHEN reputation_score < 50 THEN 1 ELSE 0 END) AS low_reputation
                 FROM readers
-                WHERE card_end <= %s AND card_end >= CURDATE()
             """
-            result = db.execute_query(query, (date_30_days,), fetch=True)
-            if result and len(result) > 0:
-                stats['expiring_soon'] = result[0]['count']
-
-            # Số bạn đọc có điểm uy tín cao (>= 90)
-            result = db.execute_query(
-                "SELECT COUNT(*) as count FROM readers WHERE reputation_score >= 90",
-                fetch=True
-            )
-            if result and len(result) > 0:
-                stats['high_reputation'] = result[0]['count']
-
-            # Số bạn đọc có điểm uy tín thấp (< 50)
-            result = db.execute_query(
-                "SELECT COUNT(*) as count FROM readers WHERE reputation_score < 50",
-                fetch=True
-            )
-            if result and len(result) > 0:
-                stats['low_reputation'] = result[0]['count']
+            row = db.fetchone(query, (date_30_days,))
+            if not row:
+                return None
 
+            stats = {key: int(row[key] or 0) for key in self.STATS_KEYS if key != 'avg_reputation'}
+            stats['avg_reputation'] = round(float(row['avg_reputation']), 2) if row['avg_reputation'] else 0
             return stats
 
+        except PoolExhausted:
+            raise
         except Exception as e:
             logger.error(f"❌ Lỗi thống kê: {e}")
-            return {
-                'total': 0,
-                'active': 0,
-                'expired': 0,
-                'locked': 0,
-                'avg_reputation': 0,
-                'expiring_soon': 0,
-                'high_reputation': 0,
-                'low_reputation': 0
-            }
+            return None
+
+    @staticmethod
+    def _invalidate_statistics():
+        """Xóa cache thống kê sau khi dữ liệu bạn đọc thay đổi"""
+        ReaderService._stats_cache.invalidate()
 
     def update_reader_status(self, reader_id: int, new_status: str) -> Tuple[bool, Optional[str]]:
         """Cập nhật trạng thái bạn đọc"""
@@ -383,9 +606,14 @@ class ReaderService:
 
         try:
             query = "UPDATE readers SET status = %s WHERE reader_id = %s"
-            result = db.execute_query(query, (new_status, reader_id), commit=True)
+            with db.transaction():
+                result = db.execute_query(query, (new_status, reader_id), commit=True)
+                if result:
+                    ChangeLog.record(ChangeLog.READER, [reader_id], ChangeLog.UPDATE)
 
             if result and result > 0:
+                self._cache.invalidate([reader_id])
+                self._invalidate_statistics()
                 logger.info(f"✅ Đã cập nhật trạng thái bạn đọc ID {reader_id} thành {new_status}")
                 return True, None
             else:
@@ -402,9 +630,14 @@ class ReaderService:
 
         try:
             query = "UPDATE readers SET reputation_score = %s WHERE reader_id = %s"
-            result = db.execute_query(query, (score, reader_id), commit=True)
+            with db.transaction():
+                result = db.execute_query(query, (score, reader_id), commit=True)
+                if result:
+                    ChangeLog.record(ChangeLog.READER, [reader_id], ChangeLog.UPDATE)
 
             if result and result > 0:
+                self._cache.invalidate([reader_id])
+                self._invalidate_statistics()
                 logger.info(f"✅ Đã cập nhật điểm uy tín bạn đọc ID {reader_id} thành {score}")
                 return True, None
             else:
@@ -417,7 +650,8 @@ class ReaderService:
     def extend_card_validity(self, reader_id: int, days: int = 365) -> Tuple[bool, Optional[str]]:
         """Gia hạn thẻ bạn đọc"""
         try:
-            reader = self.get_reader_by_id(reader_id)
+            # Đọc mới từ database: ngày hết hạn trong cache có thể đã cũ
+            reader = self._load_reader_by_id(reader_id)
             if not reader:
                 return False, "Không tìm thấy bạn đọc"
 
@@ -434,9 +668,14 @@ class ReaderService:
             new_end_str = new_end.strftime('%Y-%m-%d')
 
             query = "UPDATE readers SET card_end = %s, status = 'ACTIVE' WHERE reader_id = %s"
-            result = db.execute_query(query, (new_end_str, reader_id), commit=True)
+            with db.transaction():
+                result = db.execute_query(query, (new_end_str, reader_id), commit=True)
+                if result:
+                    ChangeLog.record(ChangeLog.READER, [reader_id], ChangeLog.UPDATE)
 
             if result and result > 0:
+                self._cache.invalidate([reader_id])
+                self._invalidate_statistics()
                 logger.info(f"✅ Đã gia hạn thẻ bạn đọc ID {reader_id} đến {new_end_str}")
                 return True, None
             else:
@@ -446,6 +685,105 @@ class ReaderService:
             logger.error(f"❌ Lỗi gia hạn thẻ: {e}")
             return False, f"Lỗi: {str(e)}"
 
+    def import_readers(
+            self,
+            records: Iterable[Tuple[int, dict]],
+            progress: Optional[Callable[[int], None]] = None
+    ) -> dict:
+        """
+        Nhập bạn đọc hàng loạt từ bản ghi (số dòng, {trường: giá trị}) của ImportHelper
+        Mỗi lô IMPORT_BATCH_SIZE dòng được validate rồi INSERT nhiều dòng trong 1 giao dịch;
+        lô lỗi được thêm lại từng dòng để ghi lỗi theo dòng, không dừng cả file
+        Returns: ImportReport.to_dict() + 'error' (lỗi đọc file/database làm dừng giữa chừng)
+        """
+        report = ImportReport(progress)
+        error = None
+
+        try:
+            for batch in ImportHelper.batched(records, AppConfig.IMPORT_BATCH_SIZE):
+                readers = self._parse_import_batch(batch, report)
+                imported = self._insert_import_batch(readers, report) if readers else 0
+                report.batch_done(len(batch), imported)
+
+        except Exception as e:
+            logger.error(f"❌ Lỗi nhập bạn đọc: {e}")
+            error = str(e)
+
+        if report.imported:
+            # Index tên lấy bạn đọc mới ở lần tìm kiếm sau
+            ReaderService._name_index_synced_at = 0.0
+            self._invalidate_statistics()
+
+        result = report.to_dict()
+        result['error'] = error
+        logger.info(
+            f"✅ Đã nhập {result['imported']}/{result['total']} bạn đọc "
+            f"({result['rows_per_sec']:.0f} dòng/giây, {result['failed']} dòng lỗi)"
+        )
+        return result
+
+    def _parse_import_batch(self, batch: List[Tuple[int, dict]], report: ImportReport) -> List[Tuple[int, Reader]]:
+        """Bản ghi -> Reader đã validate (mặc định như thêm mới), dòng lỗi ghi vào report"""
+        text = ImportHelper.to_text
+        readers = []
+
+        for line_no, record in batch:
+            try:
+                card_start = text(record.get('card_start')) or datetime.now().strftime("%Y-%m-%d")
+                card_end = text(record.get('card_end'))
+                if not card_end and self.validator.validate_date(card_start)[0]:
+                    start = datetime.strptime(card_start, "%Y-%m-%d")
+                    card_end = (start + timedelta(days=AppConfig.DEFAULT_CARD_VALIDITY_DAYS)).strftime("%Y-%m-%d")
+
+                score = ImportHelper.to_int(record.get('reputation_score'), "Điểm uy tín")
+                reader = Reader(
+                    full_name=text(record.get('full_name')),
+                    address=text(record.get('address')),
+                    phone=text(record.get('phone')),
+                    email=text(record.get('email')),
+                    card_start=card_start,
+                    card_end=card_end,
+                    status=(text(record.get('status')) or Reader.STATUS_ACTIVE).upper(),
+                    reputation_score=100 if score is None else score
+                )
+            except ValueError as e:
+                report.add_error(line_no, str(e))
+                continue
+
+            is_valid, error = self.validate_reader(reader)
+            if is_valid:
+                readers.append((line_no, reader))
+            else:
+                report.add_error(line_no, error)
+
+        return readers
+
+    @staticmethod
+    def _insert_import_batch(readers: List[Tuple[int, Reader]], report: ImportReport) -> int:
+        """INSERT 1 lô trong 1 giao dịch, lỗi thì thêm lại từng dòng để biết dòng nào hỏng"""
+        try:
+            with db.transaction():
+                db.executemany(READER_INSERT_QUERY, [reader.to_tuple() for _, reader in readers])
+                ChangeLog.record_bulk(ChangeLog.READER)
+            return len(readers)
+        except PoolExhausted:
+            raise
+        except Exception as e:
+            logger.warning(f"⚠️ Không nhập được cả lô ({e}), thử từng dòng")
+
+        imported = 0
+        for line_no, reader in readers:
+            try:
+                with db.transaction():
+                    reader_id = db.execute_insert(READER_INSERT_QUERY, reader.to_tuple())
+                    ChangeLog.record(ChangeLog.READER, [reader_id], ChangeLog.INSERT)
+                imported += 1
+            except PoolExhausted:
+                raise
+            except Exception as e:
+                report.add_error(line_no, f"Lỗi database: {str(e)}")
+        return imported
+
     def check_expired_cards(self) -> List[Reader]:
         """Kiểm tra và trả về danh sách thẻ đã hết hạn"""
         try:
@@ -456,15 +794,18 @@ class ReaderService:
                   AND status = 'ACTIVE'
                 ORDER BY card_end ASC
             """
+            generation = self._cache.generation()
             rows = db.execute_query(query, fetch=True)
 
             if rows is None:
                 return []
 
-            readers = [Reader.from_dict(row) for row in rows]
+            readers = self._to_readers(rows, generation)
             logger.info(f"🔍 Tìm thấy {len(readers)} thẻ đã hết hạn")
             return readers
 
+        except PoolExhausted:
+            raise
         except Exception as e:
             logger.error(f"❌ Lỗi kiểm tra thẻ hết hạn: {e}")
             return []
@@ -478,9 +819,14 @@ class ReaderService:
                 WHERE card_end < CURDATE()
                   AND status = 'ACTIVE'
             """
-            result = db.execute_query(query, commit=True)
+            with db.transaction():
+                result = db.execute_query(query, commit=True)
+                if result:
+                    ChangeLog.record_bulk(ChangeLog.READER)
 
             if result:
+                self._cache.invalidate()
+                self._invalidate_statistics()
                 logger.info(f"✅ Đã cập nhật {result} thẻ thành EXPIRED")
                 return result, f"Đã cập nhật {result} thẻ thành trạng thái hết hạn"
             else:
@@ -0,0 +1 @@
+"""Unit tests (chạy: python -m pytest -q)"""
@@ -0,0 +1,58 @@
+"""BookService: ghi nhật ký bảng tra cứu, nạp lại cache khi máy khác thay đổi"""
+import contextlib
+
+import pytest
+
+pytest.importorskip('mysql.connector')
+pytest.importorskip('dotenv')
+
+from config.database import db  # noqa: E402
+from services.book_service import BookService  # noqa: E402
+from services.change_log import ChangeLog  # noqa: E402
+
+
+@pytest.fixture
+def service(monkeypatch):
+    monkeypatch.setattr(db, 'transaction', contextlib.nullcontext)
+    return BookService()
+
+
+def test_create_author_records_change(service, monkeypatch):
+    recorded = []
+    monkeypatch.setattr(db, 'execute_query', lambda query, params=None, **kwargs: 42)
+    monkeypatch.setattr(ChangeLog, 'record', lambda entity, ids, action: recorded.append((entity, ids, action)))
+
+    assert service.create_author(' Tô Hoài ') == (True, None, 42)
+    assert recorded == [(ChangeLog.AUTHOR, [42], ChangeLog.INSERT)]
+
+
+def test_change_poll_invalidates_changed_lookups(service, monkeypatch):
+    invalidated = []
+    for entity, cache in service._lookup_caches().items():
+        monkeypatch.setattr(cache, 'invalidate', lambda entity=entity: invalidated.append(entity))
+
+    changes = {ChangeLog.BOOK: {}, ChangeLog.AUTHOR: {7: ChangeLog.INSERT},
+               ChangeLog.CATEGORY: {}, ChangeLog.PUBLISHER: {}}
+    monkeypatch.setattr(ChangeLog, 'changes_since', lambda version, entities: (12, changes))
+    assert service.get_changes_since(10) == {'version': 12, 'changed': [], 'deleted': []}
+    assert invalidated == [ChangeLog.AUTHOR]
+
+    # Phải tải lại toàn bộ: nạp lại mọi bảng tra cứu
+    invalidated.clear()
+    monkeypatch.setattr(ChangeLog, 'changes_since', lambda version, entities: None)
+    assert service.get_changes_since(10) is None
+    assert sorted(invalidated) == sorted([ChangeLog.AUTHOR, ChangeLog.CATEGORY, ChangeLog.PUBLISHER])
+
+
+def test_search_falls_back_to_like_per_source(service, monkeypatch):
+    from config import schema
+    monkeypatch.setattr(schema, 'has_index', lambda name: name == 'ft_books_title')
+
+    query, params = service._build_fulltext_search('nam cao', 'all')
+    assert 'MATCH(title)' in query
+    assert 'au.author_name LIKE %s' in query and 'ca.category_name LIKE %s' in query
+    assert params[:4] == ('+nam* +cao*', '+nam* +cao*', '%nam cao%', '%nam cao%')
+
+    # Thiếu FULLTEXT trên tên sách: cả truy vấn dùng LIKE
+    monkeypatch.setattr(schema, 'has_index', lambda name: False)
+    assert service._build_fulltext_search('nam cao', 'title') is None
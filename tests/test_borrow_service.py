@@ -0,0 +1,139 @@
+"""BorrowService: trừ kho nguyên tử theo rowcount, tra sách theo ID/mã vạch, trả phiếu"""
+import contextlib
+
+import pytest
+
+pytest.importorskip('mysql.connector')
+pytest.importorskip('dotenv')
+
+from config.database import db  # noqa: E402
+from services.borrow_service import BorrowService  # noqa: E402
+from services.change_log import ChangeLog  # noqa: E402
+
+
+@pytest.fixture
+def updates(monkeypatch):
+    """db.execute_rowcount giả: ghi lại (sql, params), trả về state['rowcount']"""
+    state = {'rowcount': 1, 'calls': []}
+
+    def execute_rowcount(query, params=None):
+        state['calls'].append((query, params))
+        return state['rowcount']
+
+    monkeypatch.setattr(db, 'execute_rowcount', execute_rowcount)
+    return state
+
+
+def test_reserve_stock_checks_and_updates_in_one_statement(updates):
+    assert BorrowService()._reserve_stock(7, 2)
+
+    query, params = updates['calls'][0]
+    assert 'available_quantity >= %s' in query
+    assert params == (2, 7, 2)
+
+
+@pytest.mark.parametrize('rowcount', [0, None])
+def test_reserve_stock_fails_without_updated_row(updates, rowcount):
+    # 0: quầy khác vừa mượn hết; None: lỗi database
+    updates['rowcount'] = rowcount
+    assert not BorrowService()._reserve_stock(7, 1)
+
+
+def test_reserve_stock_batch_needs_every_book(updates):
+    quantities = {3: 2, 8: 1}
+    updates['rowcount'] = 2
+    assert BorrowService()._reserve_stock_batch(quantities)
+
+    query, params = updates['calls'][0]
+    assert params == (3, 2, 8, 1, 3, 8, 3, 2, 8, 1)
+
+    # 1 sách không còn đủ: cả giao dịch phải hủy
+    updates['rowcount'] = 1
+    assert not BorrowService()._reserve_stock_batch(quantities)
+
+
+def test_find_books_maps_rows_back_to_input_refs(monkeypatch):
+    calls = []
+
+    def fetchall(query, params=None):
+        calls.append((query, params))
+        # Database so khớp mã vạch theo collation, trả kèm ref đầu vào
+        return [
+            {'ref': 'bc-01', 'book_id': 3, 'title': 'A', 'available_quantity': 2},
+            {'ref': 'BC-01', 'book_id': 3, 'title': 'A', 'available_quantity': 2},
+            {'ref': None, 'book_id': 8, 'title': 'B', 'available_quantity': 0},
+        ]
+
+    monkeypatch.setattr(db, 'fetchall', fetchall)
+    books = BorrowService()._find_books_by_refs(['bc-01', 8, 'BC-01', 'bc-01'])
+
+    assert set(books) == {'bc-01', 'BC-01', 8}
+    assert books['BC-01']['book_id'] == books['bc-01']['book_id'] == 3
+    query, params = calls[0]
+    assert 'JOIN books b ON b.barcode = r.ref' in query
+    assert params == ('bc-01', 'BC-01', 8)
+
+
+@pytest.fixture
+def slips(monkeypatch):
+    """Bảng phiếu giả: state['status'] {slip_id: trạng thái}, state['queries'] theo thứ tự chạy"""
+    state = {'status': {}, 'books': {1: [9, 4], 2: [4]}, 'queries': []}
+
+    def fetchall(query, params=None):
+        state['queries'].append(query)
+        if 'FROM borrow_details' in query:
+            return [{'book_id': book_id} for book_id in sorted({b for s in params for b in state['books'][s]})]
+        if 'FROM book_inventory' in query:
+            return [{'book_id': book_id} for book_id in params]
+        return [{'slip_id': s} for s in params if state['status'].get(s, 'RETURNED') != 'RETURNED']
+
+    def execute_query(query, params=None, **kwargs):
+        state['queries'].append(query)
+        if query.startswith('UPDATE borrow_slips'):
+            state['status'].update(dict.fromkeys(params, 'RETURNED'))
+        return len(params)
+
+    monkeypatch.setattr(db, 'fetchall', fetchall)
+    monkeypatch.setattr(db, 'execute_query', execute_query)
+    monkeypatch.setattr(db, 'fetchone', lambda query, params: {'status': state['status'][params[0]]})
+    monkeypatch.setattr(db, 'transaction', contextlib.nullcontext)
+    monkeypatch.setattr(ChangeLog, 'record', lambda entity, ids, action: None)
+    return state
+
+
+def test_return_slips_skips_returned_slips(slips):
+    slips['status'] = {1: 'BORROWING', 2: 'RETURNED'}
+
+    assert BorrowService()._return_slips([1, 2]) == (1, [4, 9])
+    assert slips['status'][1] == 'RETURNED'
+    # Phiếu đã trả: không khóa, không cộng kho lần nữa
+    assert BorrowService()._return_slips([1, 2]) == (0, [])
+    assert BorrowService().return_books(2) == (False, "Phiếu mượn đã được trả trước đó")
+
+
+def test_return_slips_locks_inventory_before_slips(slips):
+    slips['status'] = {1: 'BORROWING', 2: 'BORROWING'}
+    BorrowService()._return_slips([2, 1])
+
+    locks = [query for query in slips['queries'] if 'FOR UPDATE' in query]
+    assert len(locks) == 2
+    assert 'FROM book_inventory' in locks[0] and 'ORDER BY book_id' in locks[0]
+    assert 'FROM borrow_slips' in locks[1]
+
+
+def test_return_chunk_retries_deadlock(slips, monkeypatch):
+    class Deadlock(Exception):
+        errno = 1213
+
+    attempts = []
+
+    def return_slips(slip_ids):
+        attempts.append(slip_ids)
+        if len(attempts) == 1:
+            raise Deadlock()
+        return len(slip_ids), [4]
+
+    service = BorrowService()
+    monkeypatch.setattr(service, '_return_slips', return_slips)
+    assert service._return_chunk([1, 2]) == (2, [4])
+    assert len(attempts) == 2
@@ -0,0 +1,193 @@
+"""TTLCache / LookupCache / EntityCache"""
+import threading
+import time
+
+import pytest
+
+pytest.importorskip('mysql.connector')
+pytest.importorskip('dotenv')
+
+from utils.cache import EntityCache, LookupCache, TTLCache  # noqa: E402
+
+
+def test_caches_until_expired(monkeypatch):
+    now = [100.0]
+    monkeypatch.setattr(time, 'monotonic', lambda: now[0])
+    cache = TTLCache(10)
+    calls = []
+
+    def loader():
+        calls.append(1)
+        return len(calls)
+
+    assert cache.get_or_load('k', loader) == 1
+    assert cache.get_or_load('k', loader) == 1
+    now[0] += 11
+    assert cache.get('k') is None
+    assert cache.get_or_load('k', loader) == 2
+
+
+def test_none_is_not_cached():
+    cache = TTLCache(10)
+    calls = []
+    cache.get_or_load('k', lambda: calls.append(1))
+    cache.get_or_load('k', lambda: calls.append(1))
+    assert len(calls) == 2
+
+
+def test_disabled_always_loads():
+    cache = TTLCache(0)
+    values = iter([1, 2])
+    assert cache.get_or_load('k', lambda: next(values)) == 1
+    assert cache.get_or_load('k', lambda: next(values)) == 2
+
+
+def test_invalidate_key_and_all():
+    cache = TTLCache(10)
+    cache.get_or_load('a', lambda: 1)
+    cache.get_or_load('b', lambda: 2)
+    cache.invalidate('a')
+    assert cache.get('a') is None and cache.get('b') == 2
+    cache.invalidate()
+    assert cache.get('b') is None
+
+
+def test_invalidate_during_load_discards_result():
+    cache = TTLCache(10)
+
+    def loader():
+        cache.invalidate()
+        return 'stale'
+
+    assert cache.get_or_load('k', loader) == 'stale'
+    assert cache.get('k') is None
+
+
+def test_concurrent_callers_share_one_load():
+    cache = TTLCache(10)
+    calls = []
+    started = threading.Event()
+
+    def loader():
+        calls.append(1)
+        started.set()
+        time.sleep(0.05)
+        return 'value'
+
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(cache.get_or_load('k', loader))) for _ in range(5)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join(2)
+
+    assert results == ['value'] * 5
+    assert len(calls) == 1
+
+
+# ========== LookupCache ==========
+
+class Author:
+    def __init__(self, author_id, author_name):
+        self.author_id = author_id
+        self.author_name = author_name
+
+
+def make_lookup(rows, **kwargs):
+    loads = []
+
+    def loader():
+        loads.append(1)
+        return None if rows is None else [Author(*row) for row in rows]
+
+    cache = LookupCache(loader, key=lambda a: a.author_id, sort_key=lambda a: a.author_name, **kwargs)
+    return cache, loads
+
+
+def test_lookup_loads_once_and_sorts():
+    cache, loads = make_lookup([(2, 'B'), (1, 'A')])
+    assert [a.author_name for a in cache.get_all()] == ['A', 'B']
+    assert cache.get(2).author_name == 'B'
+    assert len(loads) == 1
+
+
+def test_lookup_write_through_put():
+    cache, loads = make_lookup([(1, 'A')])
+    cache.get_all()
+    version = cache.version
+    cache.put(Author(3, 'C'))
+    assert cache.get(3).author_name == 'C'
+    assert [a.author_id for a in cache.get_all()] == [1, 3]
+    assert cache.version == version + 1
+    assert len(loads) == 1
+
+
+def test_lookup_put_before_load_is_ignored():
+    cache, loads = make_lookup([(1, 'A')])
+    cache.put(Author(3, 'C'))
+    assert [a.author_id for a in cache.get_all()] == [1]
+
+
+def test_lookup_reloads_on_unknown_id(monkeypatch):
+    now = [100.0]
+    monkeypatch.setattr(time, 'monotonic', lambda: now[0])
+    rows = [(1, 'A')]
+    cache, loads = make_lookup(rows, min_reload_seconds=5)
+    cache.get_all()
+
+    rows.append((2, 'B'))  # Máy khác vừa thêm
+    assert cache.get(2) is None  # Chưa tới min_reload_seconds
+    now[0] += 6
+    assert cache.get(2).author_name == 'B'
+    assert len(loads) == 2
+
+
+def test_lookup_keeps_old_items_on_database_error():
+    rows = [(1, 'A')]
+    cache, _ = make_lookup(rows)
+    cache.get_all()
+    cache._loader = lambda: None
+    cache.invalidate()
+    assert [a.author_id for a in cache.get_all()] == [1]
+
+
+# ========== EntityCache ==========
+
+def test_entity_cache_lru_and_stats():
+    cache = EntityCache(max_size=2, ttl_seconds=60)
+    cache.put(1, 'a')
+    cache.put(2, 'b')
+    assert cache.get(1) == 'a'  # 1 mới dùng: 2 bị đẩy ra khi thêm 3
+    cache.put(3, 'c')
+    assert cache.get(2) is None
+    assert cache.get(3) == 'c'
+    stats = cache.stats()
+    assert (stats['hits'], stats['misses'], stats['size']) == (2, 1, 2)
+
+
+def test_entity_cache_expires(monkeypatch):
+    now = [100.0]
+    monkeypatch.setattr(time, 'monotonic', lambda: now[0])
+    cache = EntityCache(max_size=10, ttl_seconds=5)
+    cache.put(1, 'a')
+    now[0] += 6
+    assert cache.get(1) is None
+
+
+def test_entity_cache_skips_reads_started_before_invalidate():
+    cache = EntityCache(max_size=10, ttl_seconds=60)
+    generation = cache.generation()
+    cache.invalidate([1])  # Sửa trong lúc đang truy vấn
+    cache.put_many([(1, 'stale'), (2, 'stale')], generation)
+    assert cache.get(1) is None and cache.get(2) is None
+
+    cache.put_many([(1, 'fresh')], cache.generation())
+    assert cache.get(1) == 'fresh'
+    cache.invalidate()
+    assert cache.get(1) is None
+
+
+def test_entity_cache_disabled():
+    cache = EntityCache(max_size=0, ttl_seconds=60)
+    cache.put(1, 'a')
+    assert cache.get(1) is None
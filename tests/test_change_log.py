@@ -0,0 +1,127 @@
+"""ChangeLog: con trỏ version, tải lại toàn bộ khi cần, lỗ change_id chưa commit"""
+import pytest
+
+pytest.importorskip('mysql.connector')
+pytest.importorskip('dotenv')
+
+from config import schema  # noqa: E402
+from config.database import db  # noqa: E402
+from services.change_log import ChangeLog  # noqa: E402
+
+
+def change(change_id, entity=ChangeLog.BOOK, entity_id=1, action=ChangeLog.UPDATE, age=0):
+    return {'change_id': change_id, 'entity': entity, 'entity_id': entity_id, 'action': action, 'age': age}
+
+
+@pytest.fixture
+def log(monkeypatch):
+    """Bảng entity_changes giả: state['rows'] (tăng dần), state['oldest']"""
+    state = {'rows': [], 'oldest': 1}
+
+    def execute_query(query, params=None, fetch=False, **kwargs):
+        rows = state['rows']
+        if 'DESC' in query:
+            return list(reversed(rows))[:params[0]]
+        version, limit = params
+        return [row for row in rows if row['change_id'] > version][:limit]
+
+    monkeypatch.setattr(schema, 'has_table', lambda name: True)
+    monkeypatch.setattr(db, 'execute_query', execute_query)
+    monkeypatch.setattr(db, 'fetchone', lambda query, params=None: {'oldest': state['oldest']})
+    return state
+
+
+def test_changes_grouped_by_entity_last_action_wins(log):
+    log['rows'] = [
+        change(11, entity_id=5, action=ChangeLog.INSERT),
+        change(12, entity=ChangeLog.READER, entity_id=7),
+        change(13, entity_id=5, action=ChangeLog.DELETE),
+    ]
+    version, changes = ChangeLog.changes_since(10, [ChangeLog.BOOK])
+    assert version == 13
+    assert changes == {ChangeLog.BOOK: {5: ChangeLog.DELETE}}
+
+
+def test_no_changes_keeps_version(log):
+    assert ChangeLog.changes_since(10, [ChangeLog.BOOK]) == (10, {ChangeLog.BOOK: {}})
+
+
+def test_bulk_change_requires_full_reload(log):
+    log['rows'] = [change(11), change(12, entity_id=0, action=ChangeLog.BULK)]
+    assert ChangeLog.changes_since(10, [ChangeLog.BOOK]) is None
+
+
+def test_bulk_change_of_other_entity_is_ignored(log):
+    log['rows'] = [change(11, entity=ChangeLog.READER, entity_id=0, action=ChangeLog.BULK)]
+    assert ChangeLog.changes_since(10, [ChangeLog.BOOK]) == (11, {ChangeLog.BOOK: {}})
+
+
+def test_too_many_changes_requires_full_reload(log, monkeypatch):
+    monkeypatch.setattr(ChangeLog, 'MAX_CHANGES', 3)
+    log['rows'] = [change(i) for i in range(11, 15)]
+    assert ChangeLog.changes_since(10, [ChangeLog.BOOK]) is None
+    log['rows'] = log['rows'][:3]
+    assert ChangeLog.changes_since(10, [ChangeLog.BOOK])[0] == 13
+
+
+def test_pruned_cursor_requires_full_reload(log):
+    log['oldest'] = 50
+    log['rows'] = [change(50)]
+    assert ChangeLog.changes_since(10, [ChangeLog.BOOK]) is None
+    assert ChangeLog.changes_since(49, [ChangeLog.BOOK])[0] == 50
+
+
+def test_missing_table_or_version(log, monkeypatch):
+    assert ChangeLog.changes_since(None, [ChangeLog.BOOK]) is None
+    monkeypatch.setattr(schema, 'has_table', lambda name: False)
+    assert ChangeLog.changes_since(10, [ChangeLog.BOOK]) is None
+    assert ChangeLog.latest_version() is None
+
+
+def test_recent_gap_holds_cursor_until_committed(log):
+    # 12 chưa commit, 13 đã commit: áp 13 nhưng con trỏ dừng ở 11 để lần sau thấy 12
+    log['rows'] = [change(11, entity_id=1), change(13, entity_id=3)]
+    version, changes = ChangeLog.changes_since(10, [ChangeLog.BOOK])
+    assert version == 11
+    assert set(changes[ChangeLog.BOOK]) == {1, 3}
+
+    log['rows'] = [change(11, entity_id=1), change(12, entity_id=2), change(13, entity_id=3)]
+    version, changes = ChangeLog.changes_since(version, [ChangeLog.BOOK])
+    assert version == 13
+    assert set(changes[ChangeLog.BOOK]) == {2, 3}
+
+
+def test_old_gap_is_skipped_as_rolled_back(log):
+    log['rows'] = [change(11), change(13, age=ChangeLog.GAP_SECONDS), change(14)]
+    assert ChangeLog.changes_since(10, [ChangeLog.BOOK])[0] == 14
+
+
+def test_latest_version_stops_before_recent_gap(log):
+    assert ChangeLog.latest_version() == 0
+    log['rows'] = [change(20, age=500), change(21), change(23), change(24)]
+    assert ChangeLog.latest_version() == 21
+    log['rows'].insert(2, change(22))
+    assert ChangeLog.latest_version() == 24
+
+
+def test_prune_deletes_expired_prefix_by_primary_key(monkeypatch):
+    # change_id 1..7 đã quá hạn, 8..9 còn mới
+    table = [{'change_id': i, 'expired': i <= 7} for i in range(1, 10)]
+    deletes = []
+
+    def execute_query(query, params=None, fetch=False, **kwargs):
+        return table[:params[1]]
+
+    def execute_rowcount(query, params=None):
+        deletes.append(params[0])
+        before = len(table)
+        table[:] = [row for row in table if row['change_id'] > params[0]]
+        return before - len(table)
+
+    monkeypatch.setattr(schema, 'has_table', lambda name: True)
+    monkeypatch.setattr(db, 'execute_query', execute_query)
+    monkeypatch.setattr(db, 'execute_rowcount', execute_rowcount)
+
+    assert ChangeLog.prune(batch_size=3) == 7
+    assert deletes == [3, 6, 7]
+    assert [row['change_id'] for row in table] == [8, 9]
@@ -0,0 +1,98 @@
+"""ColumnarResult (có và không có numpy)"""
+import math
+
+import pytest
+
+from models import columnar
+from models.columnar import ColumnarResult
+
+ROWS = [
+    {'book_id': 1, 'title': 'C', 'price': 30.0, 'status': 'A'},
+    {'book_id': 2, 'title': 'A', 'price': None, 'status': 'B'},
+    {'book_id': 3, 'title': 'B', 'price': 10.0, 'status': 'A'},
+]
+NAMES = ('book_id', 'title', 'price', 'status')
+
+
+@pytest.fixture(params=['numpy', 'list'])
+def result(request, monkeypatch):
+    if request.param == 'numpy':
+        pytest.importorskip('numpy')
+    else:
+        monkeypatch.setattr(columnar, 'numpy', None)
+    return ColumnarResult.from_rows(ROWS, NAMES, dict, numeric={'price': 'float64', 'book_id': 'int64'})
+
+
+def test_values_and_models(result):
+    assert len(result) == 3
+    assert result.values('price') == [30.0, None, 10.0]
+    assert result.values('book_id') == [1, 2, 3]
+    assert result[1] == ROWS[1]
+    assert list(result) == ROWS
+    assert list(result.records(('title', 'status'))) == [('C', 'A'), ('A', 'B'), ('B', 'A')]
+
+
+def test_sort_puts_missing_last(result):
+    assert result.sort_by('price').values('book_id') == [3, 1, 2]
+    assert result.sort_by('price', reverse=True).values('book_id') == [1, 3, 2]
+    assert result.sort_by('title').values('title') == ['A', 'B', 'C']
+
+
+def test_sort_with_key():
+    result = ColumnarResult.from_rows(ROWS, NAMES, dict)
+    assert result.sort_by('title', key=str.lower, reverse=True).values('title') == ['C', 'B', 'A']
+
+
+def test_filter_where_take(result):
+    assert result.filter([True, False, True]).values('title') == ['C', 'B']
+    assert result.where('price', lambda price: price > 15).values('book_id') == [1]
+    assert result.take([2, 0]).values('book_id') == [3, 1]
+    # Kết quả cũ không đổi
+    assert result.values('book_id') == [1, 2, 3]
+
+
+def test_statistics(result):
+    assert result.sum('price') == 40.0
+    assert result.mean('price') == 20.0
+    assert result.count_by('status') == {'A': 2, 'B': 1}
+    assert result.min_max('price') == (10.0, 30.0)
+
+
+def test_concat(result):
+    combined = result.concat(result.take([0]))
+    assert len(combined) == 4
+    assert combined.values('book_id') == [1, 2, 3, 1]
+    assert combined.values('price') == [30.0, None, 10.0, 30.0]
+
+
+def test_missing_column_and_empty():
+    result = ColumnarResult.from_rows(ROWS, ('book_id', 'created_at'), dict)
+    assert result.values('created_at') == [None, None, None]
+
+    empty = ColumnarResult.from_rows([], NAMES, dict)
+    assert len(empty) == 0
+    assert empty.mean('price') is None
+    assert empty.min_max('price') == (None, None)
+
+
+def test_add_column_checks_length():
+    result = ColumnarResult.from_rows(ROWS, NAMES, dict)
+    result.add_column('rank', [1, 2, 3])
+    assert result.values('rank') == [1, 2, 3]
+    with pytest.raises(ValueError):
+        result.add_column('rank', [1])
+
+
+def test_integer_column_with_none_stays_list():
+    pytest.importorskip('numpy')
+    rows = [{'publish_year': 2020}, {'publish_year': None}]
+    result = ColumnarResult.from_rows(rows, ('publish_year',), dict, numeric={'publish_year': 'int64'})
+    assert result.column('publish_year') == [2020, None]
+
+
+def test_float_nan_becomes_none():
+    numpy = pytest.importorskip('numpy')
+    result = ColumnarResult.from_rows(ROWS, NAMES, dict, numeric={'price': 'float64'})
+    assert isinstance(result.column('price'), numpy.ndarray)
+    assert math.isnan(result.column('price')[1])
+    assert result.values('price')[1] is None
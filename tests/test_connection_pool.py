@@ -0,0 +1,201 @@
+"""ConnectionPool: chờ / hết connection, vượt mức rồi co lại, ping connection nằm yên"""
+import threading
+import time
+
+import pytest
+
+pytest.importorskip('mysql.connector')
+pytest.importorskip('dotenv')
+
+from mysql.connector import Error  # noqa: E402
+
+from config.connection_pool import ConnectionPool, PoolExhausted  # noqa: E402
+
+
+class FakeConnection:
+    """Connection giả: đếm ping/reset/close, ping lỗi khi alive=False"""
+
+    def __init__(self):
+        self.alive = True
+        self.closed = False
+        self.pings = 0
+        self.resets = 0
+        self.rollbacks = 0
+        self.unread_result = False
+        self.in_transaction = False
+
+    def ping(self, reconnect=False):
+        self.pings += 1
+        if not self.alive:
+            raise Error("Lost connection")
+
+    def reset_session(self):
+        self.resets += 1
+        self.in_transaction = False
+
+    def rollback(self):
+        self.rollbacks += 1
+        self.in_transaction = False
+
+    def close(self):
+        self.closed = True
+
+
+def make_pool(size=2, max_overflow=0, timeout=0.05, **kwargs):
+    opened = []
+
+    def connect(**config):
+        cnx = FakeConnection()
+        opened.append(cnx)
+        return cnx
+
+    return ConnectionPool({}, size=size, max_overflow=max_overflow, timeout=timeout,
+                          connect=connect, **kwargs), opened
+
+
+def test_reuses_released_connection():
+    pool, opened = make_pool()
+    first = pool.get_connection()
+    cnx = first._cnx
+    first.close()
+    second = pool.get_connection()
+    assert second._cnx is cnx
+    assert len(opened) == 1
+    # Không còn giao dịch dở: trả về không cần reset
+    assert cnx.resets == 0
+
+
+@pytest.mark.parametrize('reset_session, resets, rollbacks', [(True, 1, 0), (False, 0, 1)])
+def test_open_transaction_cleaned_on_release(reset_session, resets, rollbacks):
+    pool, opened = make_pool(reset_session=reset_session)
+    conn = pool.get_connection()
+    opened[0].in_transaction = True
+    conn.close()
+    assert (opened[0].resets, opened[0].rollbacks) == (resets, rollbacks)
+    assert not opened[0].in_transaction
+
+
+def test_close_twice_releases_once():
+    pool, _ = make_pool(size=1)
+    conn = pool.get_connection()
+    conn.close()
+    conn.close()
+    assert pool.stats()['idle'] == 1
+    with pytest.raises(AttributeError):
+        conn.cursor()
+
+
+def test_exhausted_after_timeout():
+    pool, _ = make_pool(size=1, timeout=0.05)
+    held = pool.get_connection()
+
+    started = time.monotonic()
+    with pytest.raises(PoolExhausted) as excinfo:
+        pool.get_connection()
+    assert time.monotonic() - started >= 0.05
+    assert "Database đang bận" in str(excinfo.value)
+    assert isinstance(excinfo.value, Error)
+
+    stats = pool.stats()
+    assert stats['exhausted'] == 1
+    assert stats['waits'] == 1
+    assert stats['in_use'] == 1
+    held.close()
+
+
+def test_waiter_gets_released_connection():
+    pool, opened = make_pool(size=1, timeout=2)
+    held = pool.get_connection()
+    result = {}
+
+    def waiter():
+        result['conn'] = pool.get_connection()
+
+    thread = threading.Thread(target=waiter)
+    thread.start()
+    while pool.stats()['waits'] == 0:
+        time.sleep(0.001)
+    held.close()
+    thread.join(2)
+
+    assert result['conn']._cnx is opened[0]
+    assert pool.stats()['max_wait_ms'] > 0
+    result['conn'].close()
+
+
+def test_overflow_opens_extra_then_shrinks():
+    pool, opened = make_pool(size=1, max_overflow=1)
+    first = pool.get_connection()
+    second = pool.get_connection()
+    assert pool.stats()['opened'] == 2
+    assert pool.stats()['overflow'] == 1
+
+    with pytest.raises(PoolExhausted):
+        pool.get_connection()
+
+    # Không ai chờ: connection vượt mức bị đóng, pool co về size
+    second.close()
+    first.close()
+    stats = pool.stats()
+    assert stats['opened'] == 1
+    assert stats['idle'] == 1
+    assert sum(cnx.closed for cnx in opened) == 1
+
+
+def test_overflow_kept_while_threads_wait():
+    pool, opened = make_pool(size=1, max_overflow=1, timeout=2)
+    first = pool.get_connection()
+    second = pool.get_connection()
+    result = {}
+
+    thread = threading.Thread(target=lambda: result.setdefault('conn', pool.get_connection()))
+    thread.start()
+    while pool.stats()['waits'] == 0:
+        time.sleep(0.001)
+    second.close()
+    thread.join(2)
+
+    # Có luồng đang chờ: connection vượt mức được giao lại thay vì đóng
+    assert result['conn']._cnx is opened[1]
+    assert not opened[1].closed
+    result['conn'].close()
+    first.close()
+    assert pool.stats()['opened'] == 1
+
+
+def test_idle_connection_pinged_and_replaced_when_dead():
+    pool, opened = make_pool(size=1, ping_idle_seconds=0)
+    pool.get_connection().close()
+    opened[0].alive = False
+
+    conn = pool.get_connection()
+    assert opened[0].pings == 1
+    assert opened[0].closed
+    assert conn._cnx is opened[1]
+    assert pool.stats()['reconnects'] == 1
+    conn.close()
+
+
+def test_failed_open_frees_slot():
+    calls = []
+
+    def connect(**config):
+        calls.append(config)
+        if len(calls) == 1:
+            raise Error("Can't connect")
+        return FakeConnection()
+
+    pool = ConnectionPool({}, size=1, timeout=0.05, connect=connect)
+    with pytest.raises(Error):
+        pool.get_connection()
+    assert pool.stats()['opened'] == 0
+    pool.get_connection().close()
+
+
+def test_closed_pool_refuses_checkout():
+    pool, opened = make_pool()
+    pool.get_connection().close()
+    pool.close()
+    assert opened[0].closed
+    with pytest.raises(Error):
+        pool.get_connection()
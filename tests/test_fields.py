@@ -0,0 +1,38 @@
+"""LazyDate / to_date_str"""
+from datetime import date, datetime
+
+from models.fields import LazyDate, to_date_str
+
+
+class Slip:
+    __slots__ = ('_borrow_date',)
+    borrow_date = LazyDate()
+
+    def __init__(self, borrow_date):
+        self.borrow_date = borrow_date
+
+
+def test_to_date_str():
+    assert to_date_str(date(2025, 1, 2)) == '2025-01-02'
+    assert to_date_str(datetime(2025, 1, 2, 13, 45)) == '2025-01-02'
+    assert to_date_str('2025-01-02') == '2025-01-02'
+    assert to_date_str(None) is None
+    assert to_date_str('') is None
+
+
+def test_lazy_date_keeps_raw_value_until_read():
+    slip = Slip(date(2025, 3, 4))
+    assert slip._borrow_date == date(2025, 3, 4)
+    assert slip.borrow_date == '2025-03-04'
+    # Đọc lần đầu thì giữ lại chuỗi
+    assert slip._borrow_date == '2025-03-04'
+
+
+def test_lazy_date_passes_strings_and_none():
+    assert Slip('2025-03-04').borrow_date == '2025-03-04'
+    assert Slip(None).borrow_date is None
+
+
+def test_lazy_date_on_class_returns_descriptor():
+    assert isinstance(Slip.borrow_date, LazyDate)
+    assert Slip.borrow_date.slot == '_borrow_date'
@@ -0,0 +1,59 @@
+"""ImportHelper: đọc CSV, chia lô, chuyển kiểu"""
+import pytest
+
+pytest.importorskip('mysql.connector')
+pytest.importorskip('dotenv')
+
+from utils.import_helper import ImportHelper, ImportReport  # noqa: E402
+
+
+def test_read_csv_maps_columns_and_skips_blank(tmp_path):
+    path = tmp_path / 'books.csv'
+    path.write_text(
+        "ID,Tựa sách,Tác giả,Năm XB\n"
+        "1, Dế Mèn ,Tô Hoài,1941\n"
+        ",,,\n"
+        "3,Số Đỏ,,\n",
+        encoding='utf-8-sig'
+    )
+    records = list(ImportHelper.read_records(path, ImportHelper.BOOK_COLUMNS))
+    assert records == [
+        (2, {'title': 'Dế Mèn', 'author_name': 'Tô Hoài', 'publish_year': '1941'}),
+        (4, {'title': 'Số Đỏ', 'author_name': None, 'publish_year': None}),
+    ]
+
+
+def test_read_rejects_unknown_format_and_header(tmp_path):
+    with pytest.raises(ValueError):
+        list(ImportHelper.read_records(tmp_path / 'books.txt', ImportHelper.BOOK_COLUMNS))
+
+    path = tmp_path / 'books.csv'
+    path.write_text("foo,bar\n1,2\n", encoding='utf-8')
+    with pytest.raises(ValueError):
+        list(ImportHelper.read_records(path, ImportHelper.BOOK_COLUMNS))
+
+
+def test_batched():
+    assert list(ImportHelper.batched(range(5), 2)) == [[0, 1], [2, 3], [4]]
+    assert list(ImportHelper.batched([], 2)) == []
+
+
+def test_conversions():
+    assert ImportHelper.to_text(9786041234567.0) == '9786041234567'
+    assert ImportHelper.to_text(None) is None
+    assert ImportHelper.to_int('2,020', 'Năm') == 2020
+    assert ImportHelper.to_int(2020.0, 'Năm') == 2020
+    assert ImportHelper.to_float('1,500.5', 'Giá') == 1500.5
+    with pytest.raises(ValueError, match='Năm'):
+        ImportHelper.to_int('abc', 'Năm')
+    with pytest.raises(ValueError):
+        ImportHelper.to_int('1.5', 'Năm')
+
+
+def test_report_counts():
+    report = ImportReport()
+    report.add_error(3, 'lỗi')
+    report.batch_done(4, 3)
+    result = report.to_dict()
+    assert (result['total'], result['imported'], result['failed']) == (4, 3, 1)
+    assert result['errors'] == [(3, 'lỗi')]
@@ -0,0 +1,41 @@
+"""query_profiler: fingerprint, ghi nhận thống kê"""
+import pytest
+
+pytest.importorskip('mysql.connector')
+pytest.importorskip('dotenv')
+
+from config import query_profiler  # noqa: E402
+from config.query_profiler import fingerprint  # noqa: E402
+
+
+@pytest.mark.parametrize('query, expected', [
+    ("SELECT * FROM books WHERE book_id = %s", "SELECT * FROM books WHERE book_id = ?"),
+    ("SELECT *\n  FROM books\n  WHERE title = 'abc'  LIMIT 10",
+     "SELECT * FROM books WHERE title = ? LIMIT ?"),
+    ("SELECT * FROM books WHERE book_id IN (%s, %s, %s)", "SELECT * FROM books WHERE book_id IN (...)"),
+    ("INSERT INTO t (a, b) VALUES (%s, %s), (%s, %s)", "INSERT INTO t (a, b) VALUES (...)"),
+    ("SELECT * FROM t WHERE name = %(name)s", "SELECT * FROM t WHERE name = ?"),
+    ("SELECT * FROM t WHERE note = 'it\\'s'", "SELECT * FROM t WHERE note = ?"),
+])
+def test_fingerprint(query, expected):
+    assert fingerprint(query) == expected
+
+
+def test_fingerprint_groups_in_lists_of_any_size():
+    assert fingerprint("DELETE FROM t WHERE id IN (%s)") == fingerprint("DELETE FROM t WHERE id IN (%s, %s)")
+
+
+def test_record_aggregates_by_fingerprint(monkeypatch):
+    monkeypatch.setattr(query_profiler, 'enabled', True)
+    query_profiler.reset()
+    try:
+        query_profiler.record("SELECT * FROM t WHERE id = 1", 4.0, rows=1)
+        query_profiler.record("SELECT * FROM t WHERE id = 2", 6.0, rows=1, error=True)
+        entry = query_profiler.snapshot()['queries']["SELECT * FROM t WHERE id = ?"]
+        assert entry['calls'] == 2
+        assert entry['rows'] == 2
+        assert entry['total_ms'] == pytest.approx(10.0)
+        assert entry['max_ms'] == pytest.approx(6.0)
+        assert entry['errors'] == 1
+    finally:
+        query_profiler.reset()
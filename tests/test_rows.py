@@ -0,0 +1,30 @@
+"""Row: dòng tuple đọc như dict"""
+import pytest
+
+pytest.importorskip('mysql.connector')
+pytest.importorskip('dotenv')
+
+from config.rows import Row, column_index, wrap_rows  # noqa: E402
+
+
+def test_row_reads_like_dict():
+    index = column_index(('book_id', 'title'))
+    row = Row(index, (7, 'Dế Mèn'))
+    assert row['title'] == 'Dế Mèn'
+    assert row.get('book_id') == 7
+    assert row.get('missing', 'x') == 'x'
+    assert 'title' in row and 'missing' not in row
+    assert dict(row) == {'book_id': 7, 'title': 'Dế Mèn'}
+    assert len(row) == 2
+    with pytest.raises(KeyError):
+        row['missing']
+
+
+def test_duplicate_column_uses_last():
+    assert column_index(('id', 'name', 'id')) == {'id': 2, 'name': 1}
+
+
+def test_wrap_rows_shares_index():
+    rows = wrap_rows(column_index(('a',)), [(1,), (2,)])
+    assert [row['a'] for row in rows] == [1, 2]
+    assert rows[0]._index is rows[1]._index
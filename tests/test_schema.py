@@ -0,0 +1,37 @@
+"""schema.drop_obsolete_indexes: chỉ xóa index trùng khi đã có index UNIQUE thay thế"""
+import pytest
+
+pytest.importorskip('mysql.connector')
+pytest.importorskip('dotenv')
+
+from config import schema  # noqa: E402
+from config.database import db  # noqa: E402
+
+
+def _index(name, column, non_unique):
+    return {'table_name': 'books', 'index_name': name, 'index_type': 'BTREE',
+            'non_unique': non_unique, 'columns': column}
+
+
+@pytest.fixture
+def executed(monkeypatch):
+    statements = []
+    monkeypatch.setattr(db, 'execute_query', lambda query, params=None, **kwargs: statements.append(query) or 0)
+    return statements
+
+
+def test_drops_duplicate_when_unique_exists(monkeypatch, executed):
+    monkeypatch.setattr(schema, '_load_existing_indexes', lambda: [
+        _index('idx_books_isbn', 'isbn', 1), _index('uq_books_isbn', 'isbn', 0),
+        _index('idx_books_barcode', 'barcode', 1),
+    ])
+
+    assert schema.drop_obsolete_indexes() == ['idx_books_isbn']
+    assert executed == ["ALTER TABLE books DROP INDEX idx_books_isbn"]
+
+
+def test_keeps_only_index_of_column(monkeypatch, executed):
+    monkeypatch.setattr(schema, '_load_existing_indexes', lambda: [_index('idx_books_barcode', 'barcode', 1)])
+
+    assert schema.drop_obsolete_indexes() == []
+    assert executed == []
@@ -0,0 +1,59 @@
+"""fold_text / NameIndex: tìm tên không dấu, gõ dở, gõ sai"""
+import pytest
+
+pytest.importorskip('mysql.connector')
+pytest.importorskip('dotenv')
+
+from utils.text_search import NameIndex, fold_text, tokenize  # noqa: E402
+
+
+@pytest.fixture
+def index():
+    index = NameIndex()
+    index.add(1, 'Nguyễn Văn An')
+    index.add(2, 'Trần Thị Bình')
+    index.add(3, 'Nguyễn Thị Đức')
+    return index
+
+
+def test_fold_text():
+    assert fold_text('  Nguyễn   Văn Đức ') == 'nguyen van duc'
+    assert fold_text('') == ''
+    assert tokenize('Lê-Văn, Tám') == ['le', 'van', 'tam']
+
+
+def test_accent_insensitive_exact(index):
+    assert index.search('nguyen van an') == [(1, 1.0)]
+
+
+def test_last_word_is_prefix(index):
+    ids = [doc_id for doc_id, _ in index.search('nguyen th')]
+    assert ids == [3]
+
+
+def test_typo_matches_fuzzily(index):
+    results = index.search('nguyn thi duc')
+    assert results and results[0][0] == 3
+    assert results[0][1] < 1.0
+
+
+def test_ranked_by_score_then_newest(index):
+    results = index.search('nguyen')
+    assert [doc_id for doc_id, _ in results] == [3, 1]
+
+
+def test_update_and_remove(index):
+    index.add(2, 'Phạm Văn Cường')
+    assert index.search('tran') == []
+    assert [doc_id for doc_id, _ in index.search('pham')] == [2]
+
+    index.remove(2)
+    assert index.search('pham') == []
+    assert len(index) == 2
+    assert index.max_id == 3
+
+
+def test_limit_and_empty_query(index):
+    assert len(index.search('nguyen', limit=1)) == 1
+    assert index.search('') == []
+    assert index.search('zzz') == []
@@ -0,0 +1,121 @@
+"""db.transaction(): 1 connection cho cả khối, lồng nhau, commit 1 lần / rollback khi lỗi"""
+import pytest
+
+pytest.importorskip('mysql.connector')
+pytest.importorskip('dotenv')
+
+from mysql.connector import Error  # noqa: E402
+
+from config.database import TransactionAborted, db  # noqa: E402
+
+
+class FakeCursor:
+    """Cursor giả: ghi lại câu lệnh, lỗi khi câu lệnh có chữ FAIL"""
+
+    def __init__(self, cnx):
+        self.cnx = cnx
+        self.rowcount = 0
+        self.lastrowid = None
+
+    def execute(self, query, params=None):
+        if 'FAIL' in query:
+            raise Error("Syntax error")
+        self.cnx.statements.append(query)
+        self.rowcount = 1
+
+    def fetchall(self):
+        return []
+
+    def close(self):
+        pass
+
+
+class FakeConnection:
+    """Connection giả: đếm commit/rollback/close"""
+
+    def __init__(self):
+        self.statements = []
+        self.commits = 0
+        self.rollbacks = 0
+        self.closed = False
+
+    def cursor(self, dictionary=False):
+        return FakeCursor(self)
+
+    def commit(self):
+        self.commits += 1
+
+    def rollback(self):
+        self.rollbacks += 1
+
+    def close(self):
+        self.closed = True
+
+
+@pytest.fixture
+def connections(monkeypatch):
+    """Mỗi lần db.get_connection() trả về 1 FakeConnection mới"""
+    opened = []
+
+    def get_connection():
+        cnx = FakeConnection()
+        opened.append(cnx)
+        return cnx
+
+    monkeypatch.setattr(db, 'get_connection', get_connection)
+    monkeypatch.setattr(db, '_fast', False)
+    return opened
+
+
+def test_commits_once_on_one_connection(connections):
+    with db.transaction():
+        db.execute("UPDATE a")
+        db.execute("UPDATE b")
+        assert db.in_transaction()
+
+    assert len(connections) == 1
+    cnx = connections[0]
+    assert cnx.statements == ["UPDATE a", "UPDATE b"]
+    assert (cnx.commits, cnx.rollbacks, cnx.closed) == (1, 0, True)
+    assert not db.in_transaction()
+
+
+def test_nested_block_joins_outer_transaction(connections):
+    with db.transaction() as outer:
+        db.execute("UPDATE a")
+        with db.transaction() as inner:
+            assert inner is outer
+            db.execute("UPDATE b")
+        # Khối trong kết thúc: chưa commit, connection chưa trả về pool
+        assert (outer.commits, outer.closed) == (0, False)
+
+    assert len(connections) == 1
+    assert connections[0].statements == ["UPDATE a", "UPDATE b"]
+    assert connections[0].commits == 1
+
+
+def test_error_in_nested_block_rolls_back_everything(connections):
+    with pytest.raises(TransactionAborted):
+        with db.transaction():
+            db.execute("UPDATE a")
+            with db.transaction():
+                raise TransactionAborted("Không đủ số lượng")
+
+    cnx = connections[0]
+    assert (cnx.commits, cnx.rollbacks, cnx.closed) == (0, 1, True)
+    assert not db.in_transaction()
+
+
+def test_query_error_raises_inside_transaction(connections):
+    # Ngoài giao dịch: lỗi trả về None
+    assert db.execute_query("UPDATE FAIL", commit=True) is None
+
+    with pytest.raises(Error):
+        with db.transaction():
+            db.execute("UPDATE a")
+            db.execute("UPDATE FAIL")
+            db.execute("UPDATE b")
+
+    cnx = connections[-1]
+    assert cnx.statements == ["UPDATE a"]
+    assert (cnx.commits, cnx.rollbacks) == (0, 1)
@@ -0,0 +1 @@
+"""Công cụ dòng lệnh cho nhà phát triển (benchmark, kiểm thử tải)"""
@@ -0,0 +1,551 @@
+"""
+Benchmark - Đo hiệu năng và kiểm thử tải trên database thật (MySQL/MariaDB)
+
+Chạy từ thư mục gốc dự án, nên trỏ .env tới 1 database thử nghiệm:
+
+    python -m tools.benchmark stock-race --copies 50 --attempts 400 --threads 8
+    python -m tools.benchmark bulk-return --slips 10000
+    python -m tools.benchmark excel-export --rows 100000 1000000
+    python -m tools.benchmark driver-decode --repeat 5
+    python -m tools.benchmark model-build --rows 100000
+    python -m tools.benchmark book-stats --repeat 50
+
+Mỗi lệnh tự tạo dữ liệu mẫu (tên bắt đầu bằng BENCH_) và dọn dẹp khi xong.
+excel-export, model-build dùng dữ liệu giả trong bộ nhớ, không ghi vào database.
+driver-decode, book-stats đọc dữ liệu sẵn có (nên dùng database đã có nhiều sách/bạn đọc).
+"""
+import argparse
+import multiprocessing
+import os
+import sys
+import threading
+import time
+import tracemalloc
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, datetime, timedelta
+from decimal import Decimal
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from config.database import db  # noqa: E402
+from config.settings import AppConfig  # noqa: E402
+from models.book import Book  # noqa: E402
+from models.columnar import ColumnarResult  # noqa: E402
+from models.reader import Reader  # noqa: E402
+from services.book_service import BookService  # noqa: E402
+from services.borrow_service import BorrowService  # noqa: E402
+from utils.export_helper import ExportHelper  # noqa: E402
+
+BENCH_PREFIX = 'BENCH_'
+
+
+# ========== DỮ LIỆU MẪU ==========
+
+def _create_reader(name: str) -> int:
+    """Tạo bạn đọc ACTIVE còn hạn thẻ"""
+    today = date.today()
+    return db.execute_insert(
+        """
+        INSERT INTO readers (full_name, address, phone, email,
+                             card_start, card_end, status, reputation_score)
+        VALUES (%s, NULL, NULL, NULL, %s, %s, 'ACTIVE', 100)
+        """,
+        (name, today, today + timedelta(days=365))
+    )
+
+
+def _create_book(title: str, copies: int) -> int:
+    """Tạo sách với `copies` cuốn trong kho"""
+    with db.transaction():
+        book_id = db.execute_insert("INSERT INTO books (title) VALUES (%s)", (title,))
+        db.execute_insert(
+            """
+            INSERT INTO book_inventory (book_id, total_quantity, available_quantity)
+            VALUES (%s, %s, %s)
+            """,
+            (book_id, copies, copies)
+        )
+    return book_id
+
+
+def _cleanup(reader_ids, book_ids):
+    """Xóa phiếu mượn, sách, bạn đọc đã tạo cho benchmark"""
+    with db.transaction():
+        for reader_id in reader_ids:
+            db.execute(
+                """
+                DELETE bd FROM borrow_details bd
+                JOIN borrow_slips bs ON bd.slip_id = bs.slip_id
+                WHERE bs.reader_id = %s
+                """,
+                (reader_id,)
+            )
+            db.execute("DELETE FROM borrow_slips WHERE reader_id = %s", (reader_id,))
+            db.execute("DELETE FROM readers WHERE reader_id = %s", (reader_id,))
+        for book_id in book_ids:
+            db.execute("DELETE FROM borrow_details WHERE book_id = %s", (book_id,))
+            db.execute("DELETE FROM book_inventory WHERE book_id = %s", (book_id,))
+            db.execute("DELETE FROM books WHERE book_id = %s", (book_id,))
+
+
+def _create_open_slips(reader_id: int, book_ids, count: int, books_per_slip: int):
+    """Tạo `count` phiếu đang mượn (chèn hàng loạt), trừ kho tương ứng"""
+    borrow_date = date.today()
+    return_due = borrow_date + timedelta(days=14)
+
+    with db.transaction():
+        db.executemany(
+            """
+            INSERT INTO borrow_slips (reader_id, staff_id, borrow_date, return_due, status)
+            VALUES (%s, 1, %s, %s, 'BORROWING')
+            """,
+            [(reader_id, borrow_date, return_due)] * count
+        )
+        slip_ids = [
+            row['slip_id'] for row in db.fetchall(
+                "SELECT slip_id FROM borrow_slips WHERE reader_id = %s ORDER BY slip_id", (reader_id,)
+            )
+        ]
+        db.executemany(
+            "INSERT INTO borrow_details (slip_id, book_id, quantity, fine_amount) VALUES (%s, %s, 1, 0)",
+            [
+                (slip_id, book_ids[(i + j) % len(book_ids)], )
+                for i, slip_id in enumerate(slip_ids)
+                for j in range(books_per_slip)
+            ]
+        )
+        db.execute(
+            f"""
+            UPDATE book_inventory bi
+            JOIN (
+                SELECT book_id, SUM(quantity) AS qty FROM borrow_details
+                WHERE book_id IN ({', '.join(['%s'] * len(book_ids))})
+                GROUP BY book_id
+            ) d ON d.book_id = bi.book_id
+            SET bi.available_quantity = bi.available_quantity - d.qty
+            """,
+            tuple(book_ids)
+        )
+    return slip_ids
+
+
+def _run_parallel(task, attempts: int, threads: int):
+    """Chạy task(i) `attempts` lần trên `threads` luồng, trả về (kết quả, giây)"""
+    start_barrier = threading.Barrier(threads)
+
+    def warm_up(_):
+        start_barrier.wait()
+
+    with ThreadPoolExecutor(max_workers=threads) as executor:
+        list(executor.map(warm_up, range(threads)))
+        started = time.perf_counter()
+        results = list(executor.map(task, range(attempts)))
+        elapsed = time.perf_counter() - started
+
+    return results, elapsed
+
+
+def _peak_rss_mb():
+    """RSS cao nhất của tiến trình hiện tại (MB), None nếu hệ điều hành không hỗ trợ"""
+    try:
+        import resource
+    except ImportError:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux trả về KB, macOS trả về byte
+    return peak / (1024 * 1024) if sys.platform == 'darwin' else peak / 1024
+
+
+def _fake_readers(count: int):
+    """Sinh dần `count` bạn đọc giả (không giữ cả danh sách trong bộ nhớ)"""
+    card_start = date.today().isoformat()
+    card_end = (date.today() + timedelta(days=365)).isoformat()
+    for i in range(count):
+        yield Reader(
+            reader_id=i + 1,
+            full_name=f"Nguyễn Văn {BENCH_PREFIX}{i}",
+            address=f"{i % 500} Đường Số {i % 50}, Quận {i % 12 + 1}, TP.HCM",
+            phone=f"09{i:08d}",
+            email=f"reader{i}@example.com",
+            card_start=card_start,
+            card_end=card_end,
+            status=Reader.VALID_STATUSES[i % 3],
+            reputation_score=i % 101
+        )
+
+
+def _fake_rows(count: int):
+    """Dòng database giả (dict như cursor trả về) cho bạn đọc và sách"""
+    today = date.today()
+    created = datetime.now()
+    readers = [
+        {
+            'reader_id': i + 1, 'full_name': f"Nguyễn Văn {BENCH_PREFIX}{i}",
+            'address': f"{i % 500} Đường Số {i % 50}", 'phone': f"09{i:08d}",
+            'email': f"reader{i}@example.com", 'card_start': today,
+            'card_end': today + timedelta(days=365), 'status': Reader.VALID_STATUSES[i % 3],
+            'reputation_score': i % 101, 'created_at': created, 'updated_at': created,
+        }
+        for i in range(count)
+    ]
+    books = [
+        {
+            'book_id': i + 1, 'title': f"{BENCH_PREFIX}Sách {i}", 'author_id': i % 300,
+            'category_id': i % 20, 'publisher_id': i % 40, 'publish_year': 2000 + i % 25,
+            'isbn': f"978{i:010d}", 'barcode': f"BC{i:08d}", 'price': Decimal('125000.00'),
+            'description': None, 'total_quantity': 5, 'available_quantity': 3,
+        }
+        for i in range(count)
+    ]
+    return readers, books
+
+
+def _measure_build(build, rows) -> tuple:
+    """(giây, byte/đối tượng) khi dựng đối tượng từ rows, bộ nhớ đo bằng tracemalloc"""
+    tracemalloc.start()
+    started = time.perf_counter()
+    objects = build(rows)
+    elapsed = time.perf_counter() - started
+    size = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    del objects
+    return elapsed, size / len(rows)
+
+
+def _excel_export_worker(rows: int, filename: str, results):
+    """Chạy trong tiến trình con để đo RSS cao nhất riêng cho từng lần xuất"""
+    rss_before = _peak_rss_mb()
+    started = time.perf_counter()
+    ok, message = ExportHelper.export_to_excel(_fake_readers(rows), filename)
+    results.put((ok, message, time.perf_counter() - started, rss_before, _peak_rss_mb()))
+
+
+def _driver_worker(repeat: int, lookups: int, results):
+    """
+    Chạy trong tiến trình con (spawn): Database đọc DB_FAST_DRIVER từ môi trường khi import,
+    mỗi chế độ driver cần 1 tiến trình riêng
+    """
+    try:
+        from services.book_service import BOOK_SELECT_QUERY, BookService
+        from services.reader_service import ReaderService
+
+        book_ids = [row['book_id'] for row in db.fetchall("SELECT book_id FROM books LIMIT %s", (lookups,))]
+        cases = [
+            ('SELECT sách (fetchall)', lambda: db.fetchall(BOOK_SELECT_QUERY)),
+            ('SELECT bạn đọc (fetchall)', lambda: db.fetchall("SELECT * FROM readers")),
+            ('get_all_books', BookService().get_all_books),
+            ('get_all_readers', ReaderService().get_all_readers),
+            (f'{len(book_ids)} truy vấn theo id', lambda: [
+                db.fetchone(BOOK_SELECT_QUERY + " WHERE b.book_id = %s", (book_id,)) for book_id in book_ids
+            ]),
+        ]
+
+        report = []
+        for name, run in cases:
+            run()  # Làm nóng: cache tác giả/thể loại, prepared statement
+            best = None
+            for _ in range(repeat):
+                started = time.perf_counter()
+                rows = len(run())
+                elapsed = time.perf_counter() - started
+                best = elapsed if best is None else min(best, elapsed)
+            report.append((name, rows, best))
+        results.put(('done', report))
+    except Exception as e:
+        results.put(('error', str(e)))
+
+
+def _legacy_book_statistics() -> dict:
+    """Thống kê sách theo cách cũ (7 truy vấn, mỗi truy vấn mượn 1 kết nối) để so sánh"""
+    stats = dict.fromkeys((
+        'total_books', 'total_quantity', 'available_quantity', 'borrowed_quantity',
+        'out_of_stock', 'low_stock', 'total_authors', 'total_categories', 'total_publishers'
+    ), 0)
+
+    stats['total_books'] = db.fetchone("SELECT COUNT(*) as count FROM books")['count']
+    row = db.fetchone(
+        "SELECT SUM(total_quantity) as total, SUM(available_quantity) as available FROM book_inventory"
+    )
+    if row['total']:
+        stats['total_quantity'] = int(row['total'])
+        stats['available_quantity'] = int(row['available'])
+        stats['borrowed_quantity'] = stats['total_quantity'] - stats['available_quantity']
+    stats['out_of_stock'] = db.fetchone(
+        "SELECT COUNT(*) as count FROM book_inventory WHERE available_quantity = 0"
+    )['count']
+    stats['low_stock'] = db.fetchone(
+        "SELECT COUNT(*) as count FROM book_inventory WHERE available_quantity > 0 AND available_quantity < 5"
+    )['count']
+    stats['total_authors'] = db.fetchone("SELECT COUNT(*) as count FROM authors")['count']
+    stats['total_categories'] = db.fetchone("SELECT COUNT(*) as count FROM categories")['count']
+    stats['total_publishers'] = db.fetchone("SELECT COUNT(*) as count FROM publishers")['count']
+    return stats
+
+
+# ========== KỊCH BẢN ==========
+
+def bench_stock_race(args) -> bool:
+    """
+    Nhiều quầy cùng mượn 1 đầu sách có ít bản:
+    số lần mượn thành công phải đúng bằng số bản, tồn kho không âm
+    """
+    suffix = f"{int(time.time() * 1000)}"
+    reader_name = f"{BENCH_PREFIX}reader_{suffix}"
+    book_title = f"{BENCH_PREFIX}book_{suffix}"
+
+    reader_id = _create_reader(reader_name)
+    book_id = _create_book(book_title, args.copies)
+    service = BorrowService()
+
+    try:
+        results, elapsed = _run_parallel(
+            lambda _: service.create_borrow(reader_name, book_title),
+            args.attempts,
+            args.threads
+        )
+
+        succeeded = sum(1 for ok, _ in results if ok)
+        errors = [message for ok, message in results if not ok and 'không đủ' not in message]
+        inventory = db.fetchone(
+            "SELECT available_quantity FROM book_inventory WHERE book_id = %s", (book_id,)
+        )
+        details = db.fetchone(
+            "SELECT COALESCE(SUM(quantity), 0) AS qty FROM borrow_details WHERE book_id = %s",
+            (book_id,)
+        )
+        available = inventory['available_quantity']
+        borrowed = int(details['qty'])
+
+        print(f"Số bản:            {args.copies}")
+        print(f"Lượt mượn:         {args.attempts} ({args.threads} luồng)")
+        print(f"Thành công:        {succeeded}")
+        print(f"Lỗi khác:          {len(errors)}" + (f" (vd: {errors[0]})" if errors else ""))
+        print(f"Tồn kho còn lại:   {available}")
+        print(f"Thời gian:         {elapsed:.2f}s ({args.attempts / elapsed:.0f} lượt/giây)")
+
+        # Không âm kho, số phiếu khớp số cuốn đã trừ; không có lỗi khác thì phải bán hết
+        passed = (
+            available >= 0
+            and succeeded == borrowed == args.copies - available
+            and (bool(errors) or succeeded == min(args.copies, args.attempts))
+        )
+        print("✅ Không bán vượt tồn kho" if passed else "❌ Sai lệch tồn kho!")
+        return passed
+
+    finally:
+        _cleanup([reader_id], [book_id])
+
+
+def bench_bulk_return(args) -> bool:
+    """
+    Trả hàng loạt `--slips` phiếu bằng return_books_batch,
+    so sánh với trả từng phiếu (return_books) trên `--compare` phiếu đầu
+    """
+    suffix = f"{int(time.time() * 1000)}"
+    reader_id = _create_reader(f"{BENCH_PREFIX}reader_{suffix}")
+    stock = args.slips * args.books_per_slip
+    book_ids = [_create_book(f"{BENCH_PREFIX}book_{suffix}_{i}", stock) for i in range(args.books)]
+    service = BorrowService()
+
+    try:
+        started = time.perf_counter()
+        slip_ids = _create_open_slips(reader_id, book_ids, args.slips, args.books_per_slip)
+        print(f"Tạo {len(slip_ids)} phiếu ({args.books_per_slip} sách/phiếu): {time.perf_counter() - started:.2f}s")
+
+        compare_ids = slip_ids[:args.compare]
+        if compare_ids:
+            started = time.perf_counter()
+            for slip_id in compare_ids:
+                service.return_books(slip_id)
+            single = time.perf_counter() - started
+            print(f"Trả từng phiếu:    {len(compare_ids)} phiếu trong {single:.2f}s "
+                  f"({len(compare_ids) / single:.0f} phiếu/giây)")
+
+        batch_ids = slip_ids[len(compare_ids):]
+        started = time.perf_counter()
+        ok, message = service.return_books_batch(batch_ids)
+        batch = time.perf_counter() - started
+        print(f"Trả hàng loạt:     {len(batch_ids)} phiếu trong {batch:.2f}s "
+              f"({len(batch_ids) / batch:.0f} phiếu/giây) - {message}")
+
+        rows = db.fetchall(
+            f"SELECT available_quantity FROM book_inventory WHERE book_id IN ({', '.join(['%s'] * len(book_ids))})",
+            tuple(book_ids)
+        )
+        open_slips = db.fetchone(
+            "SELECT COUNT(*) AS count FROM borrow_slips WHERE reader_id = %s AND status <> 'RETURNED'",
+            (reader_id,)
+        )
+        passed = ok and open_slips['count'] == 0 and all(row['available_quantity'] == stock for row in rows)
+        print("✅ Tồn kho khôi phục đúng" if passed else "❌ Sai lệch tồn kho sau khi trả!")
+        return passed
+
+    finally:
+        _cleanup([reader_id], book_ids)
+
+
+def bench_excel_export(args) -> bool:
+    """
+    Xuất Excel (workbook write-only) với số dòng cho trước,
+    đo dòng/giây và RSS cao nhất của tiến trình con
+    """
+    passed = True
+    for rows in args.rows:
+        filename = str(AppConfig.TEMP_DIR / f"{BENCH_PREFIX}readers_{rows}.xlsx")
+        results = multiprocessing.Queue()
+        worker = multiprocessing.Process(target=_excel_export_worker, args=(rows, filename, results))
+        worker.start()
+        ok, message, elapsed, rss_before, rss_peak = results.get()
+        worker.join()
+
+        if not ok:
+            print(f"❌ {rows} dòng: {message}")
+            passed = False
+            continue
+
+        size_mb = Path(filename).stat().st_size / (1024 * 1024)
+        rss = "N/A" if rss_peak is None else f"{rss_peak:.0f} MB (tăng {rss_peak - rss_before:.0f} MB)"
+        print(f"{rows:>9} dòng: {elapsed:6.1f}s, {rows / elapsed:8.0f} dòng/giây, "
+              f"RSS cao nhất {rss}, file {size_mb:.1f} MB")
+
+        if not args.keep:
+            Path(filename).unlink(missing_ok=True)
+
+    return passed
+
+
+def bench_driver_decode(args) -> bool:
+    """
+    So sánh dòng/giây khi đọc sách/bạn đọc giữa driver pure Python (mặc định)
+    và chế độ nhanh (DB_FAST_DRIVER: C extension + prepared statement + dòng tuple)
+    """
+    context = multiprocessing.get_context('spawn')
+    previous = os.environ.get('DB_FAST_DRIVER')
+    reports = {}
+
+    try:
+        for mode, fast in (('pure', 'False'), ('fast', 'True')):
+            os.environ['DB_FAST_DRIVER'] = fast
+            results = context.Queue()
+            worker = context.Process(target=_driver_worker, args=(args.repeat, args.lookups, results))
+            worker.start()
+            status, value = results.get()
+            worker.join()
+            if status != 'done':
+                print(f"❌ Chế độ {mode}: {value}")
+                return False
+            reports[mode] = value
+    finally:
+        if previous is None:
+            os.environ.pop('DB_FAST_DRIVER', None)
+        else:
+            os.environ['DB_FAST_DRIVER'] = previous
+
+    print(f"{'':28} {'dòng':>8} {'pure dòng/s':>13} {'fast dòng/s':>13} {'nhanh hơn':>10}")
+    for (name, rows, pure), (_, _, fast) in zip(reports['pure'], reports['fast']):
+        print(f"{name:28} {rows:>8} {rows / pure:>13.0f} {rows / fast:>13.0f} {pure / fast:>9.2f}x")
+    return True
+
+
+def bench_model_build(args) -> bool:
+    """
+    Thời gian và bộ nhớ khi dựng Reader/Book (model __slots__, ngày đổi chuỗi khi đọc)
+    từ `--rows` dòng giả, kèm chi phí đọc hết các cột ngày và kết quả dạng cột
+    """
+    readers, books = _fake_rows(args.rows)
+    dates = ('card_start', 'card_end', 'created_at', 'updated_at')
+
+    def build_and_read_dates(rows):
+        built = [Reader.from_dict(row) for row in rows]
+        for reader in built:
+            for name in dates:
+                getattr(reader, name)
+        return built
+
+    cases = [
+        ('dict(row) (tham chiếu)', lambda rows: [dict(row) for row in rows], readers),
+        ('Reader.from_dict', lambda rows: [Reader.from_dict(row) for row in rows], readers),
+        ('Reader + đọc 4 cột ngày', build_and_read_dates, readers),
+        ('Book.from_dict', lambda rows: [Book.from_dict(row) for row in rows], books),
+        ('ColumnarResult bạn đọc', lambda rows: ColumnarResult.from_rows(
+            rows, Reader.COLUMNS, Reader.from_dict, Reader.NUMERIC_COLUMNS), readers),
+        ('ColumnarResult sách', lambda rows: ColumnarResult.from_rows(
+            rows, Book.COLUMNS, Book.from_dict, Book.NUMERIC_COLUMNS), books),
+    ]
+
+    print(f"{args.rows} dòng mỗi lần đo (tracemalloc bật nên thời gian cao hơn thực tế)")
+    for name, build, rows in cases:
+        elapsed, per_object = _measure_build(build, rows)
+        print(f"{name:26} {elapsed:6.2f}s  {len(rows) / elapsed:9.0f} dòng/giây  {per_object:6.0f} byte/dòng")
+    return True
+
+
+def bench_book_stats(args) -> bool:
+    """
+    So sánh thống kê sách trước/sau khi gộp: 7 truy vấn riêng (cách cũ)
+    với 1 truy vấn tổng hợp của BookService.get_statistics, kết quả phải giống nhau
+    """
+    service = BookService()
+    cases = [('7 truy vấn (cũ)', _legacy_book_statistics), ('1 truy vấn (get_statistics)', service.get_statistics)]
+
+    results = {}
+    print(f"{'':28} {'nhanh nhất':>11} {'trung bình':>11}")
+    for name, run in cases:
+        results[name] = run()  # Làm nóng
+        timings = []
+        for _ in range(args.repeat):
+            started = time.perf_counter()
+            run()
+            timings.append(time.perf_counter() - started)
+        print(f"{name:28} {min(timings) * 1000:>9.2f}ms {sum(timings) / len(timings) * 1000:>9.2f}ms")
+
+    legacy, single = results.values()
+    passed = legacy == single
+    print("✅ Kết quả hai cách giống nhau" if passed else f"❌ Kết quả khác nhau: {legacy} / {single}")
+    return passed
+
+
+# ========== CLI ==========
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Benchmark Library Management trên database thật")
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    stock_race = subparsers.add_parser('stock-race', help="Mượn đồng thời, kiểm tra không âm kho")
+    stock_race.add_argument('--copies', type=int, default=50, help="Số bản trong kho")
+    stock_race.add_argument('--attempts', type=int, default=400, help="Tổng số lượt mượn")
+    stock_race.add_argument('--threads', type=int, default=8, help="Số luồng (<= pool size)")
+    stock_race.set_defaults(func=bench_stock_race)
+
+    bulk_return = subparsers.add_parser('bulk-return', help="Đo tốc độ trả hàng loạt")
+    bulk_return.add_argument('--slips', type=int, default=10000, help="Số phiếu đang mượn")
+    bulk_return.add_argument('--books', type=int, default=50, help="Số đầu sách dùng chung")
+    bulk_return.add_argument('--books-per-slip', type=int, default=2, help="Số sách mỗi phiếu")
+    bulk_return.add_argument('--compare', type=int, default=200, help="Số phiếu trả từng cái để so sánh")
+    bulk_return.set_defaults(func=bench_bulk_return)
+
+    excel_export = subparsers.add_parser('excel-export', help="Đo tốc độ và bộ nhớ khi xuất Excel")
+    excel_export.add_argument('--rows', type=int, nargs='+', default=[100000, 1000000], help="Số dòng mỗi lần đo")
+    excel_export.add_argument('--keep', action='store_true', help="Giữ lại file đã xuất trong thư mục temp")
+    excel_export.set_defaults(func=bench_excel_export)
+
+    driver_decode = subparsers.add_parser('driver-decode', help="So sánh driver pure Python và chế độ nhanh")
+    driver_decode.add_argument('--repeat', type=int, default=5, help="Số lần đo mỗi truy vấn (lấy lần nhanh nhất)")
+    driver_decode.add_argument('--lookups', type=int, default=500, help="Số truy vấn theo id (prepared statement)")
+    driver_decode.set_defaults(func=bench_driver_decode)
+
+    model_build = subparsers.add_parser('model-build', help="Đo thời gian và bộ nhớ dựng model từ dòng database")
+    model_build.add_argument('--rows', type=int, default=100000, help="Số dòng giả")
+    model_build.set_defaults(func=bench_model_build)
+
+    book_stats = subparsers.add_parser('book-stats', help="So sánh thống kê sách 7 truy vấn và 1 truy vấn")
+    book_stats.add_argument('--repeat', type=int, default=50, help="Số lần đo mỗi cách")
+    book_stats.set_defaults(func=bench_book_stats)
+
+    args = parser.parse_args(argv)
+    return 0 if args.func(args) else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,62 @@
+"""
+Migrate - Tạo các bảng phụ và index mà ứng dụng cần (config.schema)
+
+Ứng dụng không chạy DDL khi khởi động, chỉ kiểm tra và dùng truy vấn dự phòng khi thiếu.
+Chạy lệnh này sau khi tạo database hoặc cập nhật phiên bản (nên lúc ít người dùng:
+ALTER TABLE trên bảng lớn có thể mất vài phút):
+
+    python -m tools.migrate
+    python -m tools.migrate --check     # chỉ liệt kê phần còn thiếu, không tạo
+    python -m tools.migrate --prune     # chỉ dọn nhật ký thay đổi cũ (đặt lịch chạy hằng ngày)
+
+Lệnh đầy đủ cũng xóa index trùng của phiên bản cũ (schema.OBSOLETE_INDEXES) và
+dọn nhật ký thay đổi (services.change_log) cũ hơn RETENTION_DAYS ngày.
+"""
+import argparse
+import logging
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from config import schema  # noqa: E402
+from config.database import db  # noqa: E402
+from services.change_log import ChangeLog  # noqa: E402
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Tạo bảng phụ / index còn thiếu cho database")
+    parser.add_argument('--check', action='store_true', help="Chỉ kiểm tra, không chạy DDL")
+    parser.add_argument('--prune', action='store_true', help="Chỉ dọn nhật ký thay đổi cũ")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO, format='%(message)s')
+
+    if not db.test_connection():
+        print("❌ Không kết nối được database (kiểm tra file .env)", file=sys.stderr)
+        return 1
+
+    if args.prune:
+        print(f"🧹 Đã dọn {ChangeLog.prune()} dòng nhật ký thay đổi")
+        return 0
+
+    if args.check:
+        tables, indexes = schema.check_tables(), schema.check_indexes()
+    else:
+        tables, indexes = schema.ensure_tables(), schema.ensure_indexes()
+        for name in schema.drop_obsolete_indexes():
+            print(f"🗑️ Đã xóa index trùng {name}")
+        ChangeLog.prune()
+
+    missing = [name for name in schema.REQUIRED_TABLES if name not in tables]
+    missing += [spec['name'] for spec in schema.REQUIRED_INDEXES if spec['name'] not in indexes]
+    if missing:
+        print(f"⚠️ Còn thiếu: {', '.join(missing)}", file=sys.stderr)
+        return 1
+
+    print("✅ Schema đầy đủ")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
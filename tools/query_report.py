@@ -0,0 +1,39 @@
+"""
+Query Report - Xem thống kê truy vấn do config.query_profiler ghi lại
+
+Ứng dụng ghi file khi thoát (AppConfig.QUERY_PROFILE_FILE, mặc định logs/query_profile.json):
+
+    python -m tools.query_report
+    python -m tools.query_report logs/query_profile.json --sort avg_ms --top 10
+"""
+import argparse
+import json
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from config import query_profiler  # noqa: E402
+from config.settings import AppConfig  # noqa: E402
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Báo cáo thời gian truy vấn theo fingerprint")
+    parser.add_argument('file', nargs='?', default=str(AppConfig.QUERY_PROFILE_FILE), help="File JSON đã dump")
+    parser.add_argument('--top', type=int, default=20, help="Số loại truy vấn hiển thị")
+    parser.add_argument('--sort', choices=query_profiler.SORT_KEYS, default='total_ms', help="Sắp xếp theo")
+    args = parser.parse_args(argv)
+
+    try:
+        with open(args.file, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+    except (OSError, ValueError) as e:
+        print(f"❌ Không đọc được {args.file}: {e}", file=sys.stderr)
+        return 1
+
+    print(query_profiler.report(data, top=args.top, sort_by=args.sort))
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -2,5 +2,6 @@
 from .validators import Validator
 from .messagebox_helper import MessageBoxHelper
 from .export_helper import ExportHelper
+from .import_helper import ImportHelper
 
-__all__ = ['Validator', 'MessageBoxHelper', 'ExportHelper']
\ No newline at end of file
+__all__ = ['Validator', 'MessageBoxHelper', 'ExportHelper', 'ImportHelper']
\ No newline at end of file
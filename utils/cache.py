@@ -0,0 +1,239 @@
+"""
+Cache - Bộ nhớ đệm dùng chung trong tiến trình cho các truy vấn tốn kém
+"""
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable, Iterable, Optional, Tuple
+
+
+class TTLCache:
+    """
+    Cache có thời hạn (giây)
+
+    Nhiều luồng cùng hỏi 1 key đã hết hạn thì chỉ 1 luồng gọi loader,
+    các luồng còn lại chờ và dùng chung kết quả.
+    ttl_seconds <= 0: tắt cache, luôn gọi loader.
+    """
+
+    def __init__(self, ttl_seconds: float):
+        self.ttl_seconds = ttl_seconds
+        self._lock = threading.Lock()
+        self._entries: Dict[Hashable, Tuple[float, Any]] = {}
+        self._key_locks: Dict[Hashable, threading.Lock] = {}
+        self._generation = 0
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        """Lấy giá trị còn hạn, None nếu không có"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry and entry[0] > time.monotonic():
+                return entry[1]
+            return None
+
+    def get_or_load(self, key: Hashable, loader: Callable[[], Any]) -> Any:
+        """Lấy giá trị còn hạn hoặc gọi loader (kết quả None không được lưu)"""
+        if self.ttl_seconds <= 0:
+            return loader()
+
+        value = self.get(key)
+        if value is not None:
+            return value
+
+        with self._lock:
+            key_lock = self._key_locks.setdefault(key, threading.Lock())
+
+        with key_lock:
+            # Luồng khác có thể vừa tính xong trong lúc chờ
+            value = self.get(key)
+            if value is not None:
+                return value
+
+            with self._lock:
+                generation = self._generation
+
+            value = loader()
+
+            with self._lock:
+                # Bị invalidate trong lúc đang tính thì không lưu kết quả cũ
+                if value is not None and generation == self._generation:
+                    self._entries[key] = (time.monotonic() + self.ttl_seconds, value)
+
+            return value
+
+    def invalidate(self, key: Optional[Hashable] = None):
+        """Xóa 1 key hoặc toàn bộ cache"""
+        with self._lock:
+            self._generation += 1
+            if key is None:
+                self._entries.clear()
+            else:
+                self._entries.pop(key, None)
+
+
+class LookupCache:
+    """
+    Bảng tra cứu nhỏ (tác giả, thể loại, NXB...) giữ toàn bộ trong bộ nhớ
+
+    - Ghi xuyên: service gọi put() ngay sau khi INSERT thành công
+    - version tăng mỗi lần nội dung đổi (nạp lại hoặc put)
+    - Tự nạp lại sau ttl_seconds, hoặc khi gặp id chưa biết (máy khác vừa thêm),
+      tối đa 1 lần mỗi min_reload_seconds
+    """
+
+    def __init__(
+            self,
+            loader: Callable[[], Optional[list]],
+            key: Callable[[Any], Hashable],
+            sort_key: Callable[[Any], Any],
+            ttl_seconds: float = 300,
+            min_reload_seconds: float = 5
+    ):
+        self._loader = loader
+        self._key = key
+        self._sort_key = sort_key
+        self.ttl_seconds = ttl_seconds
+        self.min_reload_seconds = min_reload_seconds
+        self._lock = threading.RLock()
+        self._items: Dict[Hashable, Any] = {}
+        self._sorted: Optional[list] = None
+        self._loaded_at: Optional[float] = None
+        self.version = 0
+
+    def get_all(self) -> list:
+        """Danh sách đã sắp xếp (bản sao)"""
+        with self._lock:
+            self._ensure_loaded()
+            if self._sorted is None:
+                self._sorted = sorted(self._items.values(), key=self._sort_key)
+            return list(self._sorted)
+
+    def get(self, item_id: Hashable) -> Optional[Any]:
+        """Lấy theo id, nạp lại nếu chưa biết id này"""
+        if item_id is None:
+            return None
+
+        with self._lock:
+            self._ensure_loaded()
+            item = self._items.get(item_id)
+            if item is None and time.monotonic() - self._loaded_at >= self.min_reload_seconds:
+                self._reload()
+                item = self._items.get(item_id)
+            return item
+
+    def put(self, item: Any):
+        """Thêm/cập nhật 1 phần tử sau khi ghi database thành công"""
+        item_id = self._key(item)
+        with self._lock:
+            # Chưa nạp thì lần đọc sau sẽ lấy từ database; INSERT lỗi thì không có id
+            if self._loaded_at is None or item_id is None:
+                return
+            self._items[item_id] = item
+            self._sorted = None
+            self.version += 1
+
+    def invalidate(self):
+        """Buộc nạp lại ở lần đọc sau"""
+        with self._lock:
+            self._loaded_at = None
+
+    def _ensure_loaded(self):
+        if self._loaded_at is None or time.monotonic() - self._loaded_at > self.ttl_seconds:
+            self._reload()
+
+    def _reload(self):
+        items = self._loader()
+        self._loaded_at = time.monotonic()
+        if items is None:
+            # Lỗi database: giữ dữ liệu cũ, thử lại sau min_reload_seconds
+            self._loaded_at -= max(self.ttl_seconds - self.min_reload_seconds, 0)
+            return
+
+        self._items = {self._key(item): item for item in items}
+        self._sorted = None
+        self.version += 1
+
+
+class EntityCache:
+    """
+    Identity map LRU cho thực thể theo id (Book, Reader...)
+
+    - Danh sách/tìm kiếm gọi put_many() nên bấm chọn 1 dòng vừa tải không cần truy vấn
+    - Service gọi invalidate() sau khi sửa/xóa thành công
+    - Mỗi phần tử sống tối đa ttl_seconds (thay đổi từ máy trạm khác)
+    - Kết quả đọc bắt đầu trước 1 lần invalidate thì không được lưu
+      (lấy generation() trước khi truy vấn, truyền vào put/put_many)
+    """
+
+    def __init__(self, max_size: int, ttl_seconds: float):
+        self.max_size = max_size
+        self.ttl_seconds = ttl_seconds
+        self._lock = threading.Lock()
+        self._items: 'OrderedDict[Hashable, Tuple[float, Any]]' = OrderedDict()
+        self._generation = 0
+        self.hits = 0
+        self.misses = 0
+
+    def generation(self) -> int:
+        """Mốc để phát hiện invalidate xảy ra trong lúc đang truy vấn"""
+        with self._lock:
+            return self._generation
+
+    def get(self, item_id: Hashable) -> Optional[Any]:
+        """Lấy theo id (None nếu không có hoặc hết hạn)"""
+        with self._lock:
+            entry = self._items.get(item_id)
+            if entry is None or entry[0] <= time.monotonic():
+                if entry is not None:
+                    del self._items[item_id]
+                self.misses += 1
+                return None
+
+            self._items.move_to_end(item_id)
+            self.hits += 1
+            return entry[1]
+
+    def put(self, item_id: Hashable, item: Any, generation: Optional[int] = None):
+        """Lưu 1 thực thể"""
+        self.put_many([(item_id, item)], generation)
+
+    def put_many(self, items: Iterable[Tuple[Hashable, Any]], generation: Optional[int] = None):
+        """Lưu nhiều thực thể (id, item), bỏ qua nếu đã bị invalidate sau generation"""
+        if self.max_size <= 0:
+            return
+
+        expires = time.monotonic() + self.ttl_seconds
+        with self._lock:
+            if generation is not None and generation != self._generation:
+                return
+
+            for item_id, item in items:
+                if item_id is None:
+                    continue
+                self._items[item_id] = (expires, item)
+                self._items.move_to_end(item_id)
+
+            while len(self._items) > self.max_size:
+                self._items.popitem(last=False)
+
+    def invalidate(self, item_ids: Optional[Iterable[Hashable]] = None):
+        """Xóa các id cho trước hoặc toàn bộ cache"""
+        with self._lock:
+            self._generation += 1
+            if item_ids is None:
+                self._items.clear()
+            else:
+                for item_id in item_ids:
+                    self._items.pop(item_id, None)
+
+    def stats(self) -> dict:
+        """Số liệu theo dõi: hits, misses, hit_rate, size"""
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': self.hits / total if total else 0.0,
+                'size': len(self._items),
+                'max_size': self.max_size,
+            }
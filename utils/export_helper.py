@@ -1,15 +1,24 @@
 """
 Export Helper - Xuất dữ liệu ra các định dạng khác nhau
 Hỗ trợ: JSON, CSV, Excel, PDF
+
+JSON/CSV/Excel/PDF nhận list hoặc iterator bất kỳ và ghi dần từng dòng, nên có thể
+xuất trực tiếp từ cursor database theo lô mà không giữ cả bảng trong bộ nhớ.
+progress(số dòng đã ghi) được gọi sau mỗi PROGRESS_EVERY dòng và khi xong.
 """
 import json
 import csv
+import textwrap
 from datetime import datetime
+from itertools import chain, islice
+from operator import attrgetter
 from pathlib import Path
-from typing import List, Tuple
+from typing import Callable, Iterable, List, Optional, Tuple
 import logging
 
 from config.settings import AppConfig
+from models.book import Book
+from models.fields import to_date_str
 
 logger = logging.getLogger(__name__)
 
@@ -17,24 +26,251 @@ logger = logging.getLogger(__name__)
 class ExportHelper:
     """Helper class cho các chức năng xuất dữ liệu"""
 
+    PROGRESS_EVERY = 1000
+
+    # Excel: số dòng đầu dùng để ước lượng độ rộng cột, độ rộng tối đa
+    EXCEL_SAMPLE_ROWS = 1000
+    EXCEL_MAX_WIDTH = 50
+
+    # PDF: số dòng mỗi bảng (khoảng 1 trang A4 ngang) và tối đa mỗi file
+    PDF_ROWS_PER_TABLE = 30
+    PDF_ROWS_PER_FILE = 50000
+
+    # Các trường bạn đọc/sách ghi ra CSV, Excel, PDF (theo thứ tự cột)
+    READER_FIELDS = (
+        'reader_id', 'full_name', 'address', 'phone', 'email',
+        'card_start', 'card_end', 'status', 'reputation_score'
+    )
+    BOOK_FIELDS = (
+        'book_id', 'title', 'author_name', 'category_name', 'publisher_name', 'publish_year',
+        'isbn', 'barcode', 'price', 'total_quantity', 'available_quantity', 'description'
+    )
+
+    @staticmethod
+    def _report(progress: Optional[Callable[[int], None]], count: int, done: bool = False):
+        """Gọi progress mỗi PROGRESS_EVERY dòng và khi ghi xong"""
+        if progress and (done or count % ExportHelper.PROGRESS_EVERY == 0):
+            progress(count)
+
+    @staticmethod
+    def _field_rows(items, fields: Tuple[str, ...]) -> Iterable[tuple]:
+        """
+        Giá trị các trường của từng phần tử dạng tuple
+        Kết quả dạng cột (ColumnarResult) đọc thẳng từ cột, không dựng model
+        """
+        records = getattr(items, 'records', None)
+        if records is not None:
+            return records(fields)
+        getter = attrgetter(*fields)
+        return (getter(item) for item in items)
+
+    @staticmethod
+    def _write_json_stream(f, key: str, records: Iterable, progress=None) -> int:
+        """
+        Ghi {'export_date', key: [...], 'total_records'} từng bản ghi một
+        (total_records đặt cuối vì chỉ biết sau khi ghi xong)
+        """
+        export_date = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        f.write('{\n')
+        f.write(f'  "export_date": {json.dumps(export_date)},\n')
+        f.write(f'  "{key}": [')
+
+        count = 0
+        for record in records:
+            f.write(',\n' if count else '\n')
+            f.write(textwrap.indent(json.dumps(record.to_dict(), ensure_ascii=False, indent=2), '    '))
+            count += 1
+            ExportHelper._report(progress, count)
+
+        f.write('\n  ]' if count else ']')
+        f.write(f',\n  "total_records": {count}\n}}\n')
+        ExportHelper._report(progress, count, done=True)
+        return count
+
+    @staticmethod
+    def _write_excel_stream(filename, sheet_title: str, headers: List[str], rows: Iterable, progress=None) -> int:
+        """
+        Ghi Excel bằng workbook write-only: mỗi dòng được ghi thẳng ra file tạm,
+        bộ nhớ không tăng theo số dòng. Độ rộng cột tính từ EXCEL_SAMPLE_ROWS dòng đầu
+        (chế độ write-only phải đặt độ rộng trước khi ghi dòng đầu tiên).
+        """
+        from openpyxl import Workbook
+        from openpyxl.cell import WriteOnlyCell
+        from openpyxl.styles import Font, Alignment, PatternFill
+        from openpyxl.utils import get_column_letter
+
+        rows = iter(rows)
+        sample = list(islice(rows, ExportHelper.EXCEL_SAMPLE_ROWS))
+
+        wb = Workbook(write_only=True)
+        ws = wb.create_sheet(title=sheet_title)
+
+        # Auto-adjust column widths (theo mẫu)
+        for col, header in enumerate(headers):
+            max_length = max([len(str(header))] + [len(str(row[col])) for row in sample])
+            ws.column_dimensions[get_column_letter(col + 1)].width = min(max_length + 2, ExportHelper.EXCEL_MAX_WIDTH)
+
+        # Header style
+        header_font = Font(bold=True, color="FFFFFF")
+        header_fill = PatternFill(start_color="4472C4", end_color="4472C4", fill_type="solid")
+        header_alignment = Alignment(horizontal="center", vertical="center")
+
+        header_cells = []
+        for header in headers:
+            cell = WriteOnlyCell(ws, value=header)
+            cell.font = header_font
+            cell.fill = header_fill
+            cell.alignment = header_alignment
+            header_cells.append(cell)
+        ws.append(header_cells)
+
+        # Data
+        count = 0
+        for row in chain(sample, rows):
+            ws.append(row)
+            count += 1
+            ExportHelper._report(progress, count)
+
+        wb.save(filename)
+        ExportHelper._report(progress, count, done=True)
+        return count
+
+    @staticmethod
+    def _write_pdf_stream(
+            filename,
+            title: str,
+            unit: str,
+            headers: List[str],
+            col_widths: List[float],
+            rows: Iterable,
+            font_size: int,
+            total: Optional[int] = None,
+            progress=None
+    ) -> List[str]:
+        """
+        Ghi PDF thành nhiều bảng nhỏ PDF_ROWS_PER_TABLE dòng (độ rộng cột cố định)
+        thay vì 1 bảng khổng lồ: reportlab dàn trang từng bảng nên thời gian tăng tuyến tính.
+        Quá PDF_ROWS_PER_FILE dòng thì tách sang file tiếp theo (<tên>_part2.pdf, ...).
+        progress(số dòng đã dàn trang) được gọi trong lúc build.
+        Returns: danh sách file đã ghi
+        """
+        from reportlab.lib import colors
+        from reportlab.lib.pagesizes import A4, landscape
+        from reportlab.platypus import SimpleDocTemplate, Table, TableStyle, Paragraph, Spacer
+        from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
+        from reportlab.lib.units import inch
+
+        styles = getSampleStyleSheet()
+        title_style = ParagraphStyle(
+            'CustomTitle',
+            parent=styles['Heading1'],
+            fontSize=16,
+            textColor=colors.HexColor('#1976D2'),
+            spaceAfter=30,
+            alignment=1
+        )
+        table_style = TableStyle([
+            ('BACKGROUND', (0, 0), (-1, 0), colors.HexColor('#1976D2')),
+            ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
+            ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
+            ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
+            ('FONTSIZE', (0, 0), (-1, 0), font_size + 2),
+            ('BOTTOMPADDING', (0, 0), (-1, 0), 12),
+            ('BACKGROUND', (0, 1), (-1, -1), colors.beige),
+            ('TEXTCOLOR', (0, 1), (-1, -1), colors.black),
+            ('FONTNAME', (0, 1), (-1, -1), 'Helvetica'),
+            ('FONTSIZE', (0, 1), (-1, -1), font_size),
+            ('GRID', (0, 0), (-1, -1), 1, colors.black),
+            ('VALIGN', (0, 0), (-1, -1), 'MIDDLE'),
+        ])
+        export_time = datetime.now().strftime('%d/%m/%Y %H:%M:%S')
+        base = Path(filename)
+        files: List[str] = []
+
+        def part_header(part: int) -> list:
+            info_text = f"Ngày xuất: {export_time}"
+            if total is not None:
+                info_text += f" | Tổng số: {total} {unit}"
+            if part > 1:
+                info_text += f" | Phần {part}"
+            return [
+                Paragraph(title, title_style),
+                Spacer(1, 0.2 * inch),
+                Paragraph(info_text, styles['Normal']),
+                Spacer(1, 0.3 * inch),
+            ]
+
+        def build(elements: list, header_count: int, rows_before: int, part_rows: int):
+            part = len(files) + 1
+            path = base if part == 1 else base.with_name(f"{base.stem}_part{part}{base.suffix}")
+            doc = SimpleDocTemplate(
+                str(path),
+                pagesize=landscape(A4),
+                rightMargin=30,
+                leftMargin=30,
+                topMargin=30,
+                bottomMargin=18
+            )
+
+            if progress:
+                # Số flowable đã dàn trang -> số dòng (mỗi bảng PDF_ROWS_PER_TABLE dòng)
+                def on_build_progress(kind, value):
+                    if kind == 'PROGRESS':
+                        tables_done = max(value - header_count, 0)
+                        progress(rows_before + min(tables_done * ExportHelper.PDF_ROWS_PER_TABLE, part_rows))
+                doc.setProgressCallBack(on_build_progress)
+
+            doc.build(elements)
+            files.append(str(path))
+
+        rows = iter(rows)
+        count = 0
+        while True:
+            elements = part_header(len(files) + 1)
+            header_count = len(elements)
+            part_rows = 0
+            finished = False
+
+            while part_rows < ExportHelper.PDF_ROWS_PER_FILE:
+                chunk = list(islice(rows, ExportHelper.PDF_ROWS_PER_TABLE))
+                if chunk:
+                    table = Table([headers] + chunk, colWidths=col_widths, repeatRows=1)
+                    table.setStyle(table_style)
+                    elements.append(table)
+                    part_rows += len(chunk)
+                if len(chunk) < ExportHelper.PDF_ROWS_PER_TABLE:
+                    finished = True
+                    break
+
+            # Số dòng chia hết cho PDF_ROWS_PER_FILE: không tạo file rỗng ở cuối
+            if part_rows or not files:
+                build(elements, header_count, count, part_rows)
+            count += part_rows
+            if finished:
+                break
+
+        ExportHelper._report(progress, count, done=True)
+        return files
+
+    @staticmethod
+    def _describe_files(files: List[str]) -> str:
+        """Đường dẫn file đã xuất (nhiều phần thì liệt kê tất cả)"""
+        if len(files) == 1:
+            return files[0]
+        return f"{len(files)} file:\n" + "\n".join(files)
+
     # ========== EXPORT READERS ==========
 
     @staticmethod
-    def export_to_json(readers, filename: str = None) -> Tuple[bool, str]:
-        """Xuất danh sách bạn đọc ra file JSON"""
+    def export_to_json(readers, filename: str = None, progress=None) -> Tuple[bool, str]:
+        """Xuất danh sách bạn đọc ra file JSON (readers: list hoặc iterator)"""
         try:
             if filename is None:
                 timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
                 filename = AppConfig.EXPORT_DIR / f"readers_{timestamp}.json"
 
-            data = {
-                'export_date': datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
-                'total_records': len(readers),
-                'readers': [reader.to_dict() for reader in readers]
-            }
-
             with open(filename, 'w', encoding='utf-8') as f:
-                json.dump(data, f, ensure_ascii=False, indent=2)
+                ExportHelper._write_json_stream(f, 'readers', readers, progress)
 
             return True, str(filename)
 
@@ -43,8 +279,8 @@ class ExportHelper:
             return False, f"Lỗi: {str(e)}"
 
     @staticmethod
-    def export_to_csv(readers, filename: str = None) -> Tuple[bool, str]:
-        """Xuất danh sách bạn đọc ra file CSV"""
+    def export_to_csv(readers, filename: str = None, progress=None) -> Tuple[bool, str]:
+        """Xuất danh sách bạn đọc ra file CSV (readers: list hoặc iterator)"""
         try:
             if filename is None:
                 timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
@@ -60,18 +296,23 @@ class ExportHelper:
                 ])
 
                 # Data
-                for reader in readers:
+                count = 0
+                rows = ExportHelper._field_rows(readers, ExportHelper.READER_FIELDS)
+                for reader_id, full_name, address, phone, email, card_start, card_end, status, score in rows:
                     writer.writerow([
-                        reader.reader_id or '',
-                        reader.full_name or '',
-                        reader.address or '',
-                        reader.phone or '',
-                        reader.email or '',
-                        reader.card_start or '',
-                        reader.card_end or '',
-                        reader.status or '',
-                        reader.reputation_score or 0
+                        reader_id or '',
+                        full_name or '',
+                        address or '',
+                        phone or '',
+                        email or '',
+                        to_date_str(card_start) or '',
+                        to_date_str(card_end) or '',
+                        status or '',
+                        score or 0
                     ])
+                    count += 1
+                    ExportHelper._report(progress, count)
+                ExportHelper._report(progress, count, done=True)
 
             return True, str(filename)
 
@@ -80,63 +321,34 @@ class ExportHelper:
             return False, f"Lỗi: {str(e)}"
 
     @staticmethod
-    def export_to_excel(readers, filename: str = None) -> Tuple[bool, str]:
-        """Xuất danh sách bạn đọc ra file Excel"""
+    def export_to_excel(readers, filename: str = None, progress=None) -> Tuple[bool, str]:
+        """Xuất danh sách bạn đọc ra file Excel (readers: list hoặc iterator)"""
         try:
-            from openpyxl import Workbook
-            from openpyxl.styles import Font, Alignment, PatternFill
-
             if filename is None:
                 timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
                 filename = AppConfig.EXPORT_DIR / f"readers_{timestamp}.xlsx"
 
-            wb = Workbook()
-            ws = wb.active
-            ws.title = "Danh sách Bạn đọc"
-
-            # Header style
-            header_font = Font(bold=True, color="FFFFFF")
-            header_fill = PatternFill(start_color="4472C4", end_color="4472C4", fill_type="solid")
-            header_alignment = Alignment(horizontal="center", vertical="center")
-
-            # Headers
             headers = [
                 'ID', 'Họ tên', 'Địa chỉ', 'Điện thoại', 'Email',
                 'Ngày cấp thẻ', 'Ngày hết hạn', 'Trạng thái', 'Điểm uy tín'
             ]
+            rows = (
+                [
+                    reader_id or '',
+                    full_name or '',
+                    address or '',
+                    phone or '',
+                    email or '',
+                    to_date_str(card_start) or '',
+                    to_date_str(card_end) or '',
+                    status or '',
+                    score or 0
+                ]
+                for reader_id, full_name, address, phone, email, card_start, card_end, status, score
+                in ExportHelper._field_rows(readers, ExportHelper.READER_FIELDS)
+            )
 
-            for col, header in enumerate(headers, start=1):
-                cell = ws.cell(row=1, column=col, value=header)
-                cell.font = header_font
-                cell.fill = header_fill
-                cell.alignment = header_alignment
-
-            # Data
-            for row, reader in enumerate(readers, start=2):
-                ws.cell(row=row, column=1, value=reader.reader_id or '')
-                ws.cell(row=row, column=2, value=reader.full_name or '')
-                ws.cell(row=row, column=3, value=reader.address or '')
-                ws.cell(row=row, column=4, value=reader.phone or '')
-                ws.cell(row=row, column=5, value=reader.email or '')
-                ws.cell(row=row, column=6, value=reader.card_start or '')
-                ws.cell(row=row, column=7, value=reader.card_end or '')
-                ws.cell(row=row, column=8, value=reader.status or '')
-                ws.cell(row=row, column=9, value=reader.reputation_score or 0)
-
-            # Auto-adjust column widths
-            for column in ws.columns:
-                max_length = 0
-                column_letter = column[0].column_letter
-                for cell in column:
-                    try:
-                        if len(str(cell.value)) > max_length:
-                            max_length = len(cell.value)
-                    except:
-                        pass
-                adjusted_width = min(max_length + 2, 50)
-                ws.column_dimensions[column_letter].width = adjusted_width
-
-            wb.save(filename)
+            ExportHelper._write_excel_stream(filename, "Danh sách Bạn đọc", headers, rows, progress)
             return True, str(filename)
 
         except ImportError:
@@ -146,88 +358,38 @@ class ExportHelper:
             return False, f"Lỗi: {str(e)}"
 
     @staticmethod
-    def export_to_pdf(readers, filename: str = None) -> Tuple[bool, str]:
-        """Xuất danh sách bạn đọc ra file PDF"""
+    def export_to_pdf(readers, filename: str = None, progress=None, total: int = None) -> Tuple[bool, str]:
+        """Xuất danh sách bạn đọc ra file PDF (readers: list hoặc iterator)"""
         try:
-            from reportlab.lib import colors
-            from reportlab.lib.pagesizes import A4, landscape
-            from reportlab.platypus import SimpleDocTemplate, Table, TableStyle, Paragraph, Spacer
-            from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
-            from reportlab.lib.units import inch
-
             if filename is None:
                 timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
                 filename = AppConfig.EXPORT_DIR / f"readers_{timestamp}.pdf"
 
-            # Create PDF
-            doc = SimpleDocTemplate(
-                str(filename),
-                pagesize=landscape(A4),
-                rightMargin=30,
-                leftMargin=30,
-                topMargin=30,
-                bottomMargin=18
+            if total is None and hasattr(readers, '__len__'):
+                total = len(readers)
+
+            headers = ['ID', 'Họ tên', 'Điện thoại', 'Email', 'Ngày cấp', 'Ngày HH', 'Trạng thái', 'Điểm']
+            col_widths = [40, 170, 90, 170, 80, 80, 80, 50]
+            rows = (
+                [
+                    str(reader_id or ''),
+                    (full_name or '')[:30],
+                    phone or 'N/A',
+                    (email or 'N/A')[:25],
+                    to_date_str(card_start) or 'N/A',
+                    to_date_str(card_end) or 'N/A',
+                    status or 'N/A',
+                    str(score or 0)
+                ]
+                for reader_id, full_name, _, phone, email, card_start, card_end, status, score
+                in ExportHelper._field_rows(readers, ExportHelper.READER_FIELDS)
             )
 
-            elements = []
-            styles = getSampleStyleSheet()
-
-            title_style = ParagraphStyle(
-                'CustomTitle',
-                parent=styles['Heading1'],
-                fontSize=16,
-                textColor=colors.HexColor('#1976D2'),
-                spaceAfter=30,
-                alignment=1
+            files = ExportHelper._write_pdf_stream(
+                filename, "DANH SÁCH BẠN ĐỌC", "bạn đọc", headers, col_widths, rows,
+                font_size=8, total=total, progress=progress
             )
-
-            # Title
-            title = Paragraph("DANH SÁCH BẠN ĐỌC", title_style)
-            elements.append(title)
-            elements.append(Spacer(1, 0.2 * inch))
-
-            # Info
-            info_text = f"Ngày xuất: {datetime.now().strftime('%d/%m/%Y %H:%M:%S')} | Tổng số: {len(readers)} bạn đọc"
-            info = Paragraph(info_text, styles['Normal'])
-            elements.append(info)
-            elements.append(Spacer(1, 0.3 * inch))
-
-            # Table data
-            data = [['ID', 'Họ tên', 'Điện thoại', 'Email', 'Ngày cấp', 'Ngày HH', 'Trạng thái', 'Điểm']]
-
-            for reader in readers:
-                data.append([
-                    str(reader.reader_id or ''),
-                    (reader.full_name or '')[:30],
-                    reader.phone or 'N/A',
-                    (reader.email or 'N/A')[:25],
-                    reader.card_start or 'N/A',
-                    reader.card_end or 'N/A',
-                    reader.status or 'N/A',
-                    str(reader.reputation_score or 0)
-                ])
-
-            # Create table
-            table = Table(data)
-            table.setStyle(TableStyle([
-                ('BACKGROUND', (0, 0), (-1, 0), colors.HexColor('#1976D2')),
-                ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
-                ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
-                ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
-                ('FONTSIZE', (0, 0), (-1, 0), 10),
-                ('BOTTOMPADDING', (0, 0), (-1, 0), 12),
-                ('BACKGROUND', (0, 1), (-1, -1), colors.beige),
-                ('TEXTCOLOR', (0, 1), (-1, -1), colors.black),
-                ('FONTNAME', (0, 1), (-1, -1), 'Helvetica'),
-                ('FONTSIZE', (0, 1), (-1, -1), 8),
-                ('GRID', (0, 0), (-1, -1), 1, colors.black),
-                ('VALIGN', (0, 0), (-1, -1), 'MIDDLE'),
-            ]))
-
-            elements.append(table)
-            doc.build(elements)
-
-            return True, str(filename)
+            return True, ExportHelper._describe_files(files)
 
         except ImportError:
             return False, "Chưa cài đặt thư viện reportlab. Chạy: pip install reportlab"
@@ -238,21 +400,15 @@ class ExportHelper:
     # ========== EXPORT BOOKS ==========
 
     @staticmethod
-    def export_books_to_json(books, filename: str = None) -> Tuple[bool, str]:
-        """Xuất danh sách sách ra file JSON"""
+    def export_books_to_json(books, filename: str = None, progress=None) -> Tuple[bool, str]:
+        """Xuất danh sách sách ra file JSON (books: list hoặc iterator)"""
         try:
             if filename is None:
                 timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
                 filename = AppConfig.EXPORT_DIR / f"books_{timestamp}.json"
 
-            data = {
-                'export_date': datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
-                'total_records': len(books),
-                'books': [book.to_dict() for book in books]
-            }
-
             with open(filename, 'w', encoding='utf-8') as f:
-                json.dump(data, f, ensure_ascii=False, indent=2)
+                ExportHelper._write_json_stream(f, 'books', books, progress)
 
             return True, str(filename)
 
@@ -260,8 +416,8 @@ class ExportHelper:
             return False, f"Lỗi: {str(e)}"
 
     @staticmethod
-    def export_books_to_csv(books, filename: str = None) -> Tuple[bool, str]:
-        """Xuất danh sách sách ra file CSV"""
+    def export_books_to_csv(books, filename: str = None, progress=None) -> Tuple[bool, str]:
+        """Xuất danh sách sách ra file CSV (books: list hoặc iterator)"""
         try:
             if filename is None:
                 timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
@@ -278,21 +434,27 @@ class ExportHelper:
                 ])
 
                 # Data
-                for book in books:
+                count = 0
+                for (book_id, title, author_name, category_name, publisher_name, publish_year,
+                     isbn, barcode, price, total, available, description) in ExportHelper._field_rows(
+                        books, ExportHelper.BOOK_FIELDS):
                     writer.writerow([
-                        book.book_id or '',
-                        book.title or '',
-                        book.author_name or '',
-                        book.category_name or '',
-                        book.publisher_name or '',
-                        book.publish_year or '',
-                        book.isbn or '',
-                        book.barcode or '',
-                        book.price or '',
-                        book.total_quantity or 0,
-                        book.available_quantity or 0,
-                        book.description or ''
+                        book_id or '',
+                        title or '',
+                        author_name or '',
+                        category_name or '',
+                        publisher_name or '',
+                        publish_year or '',
+                        isbn or '',
+                        barcode or '',
+                        price or '',
+                        total or 0,
+                        available or 0,
+                        description or ''
                     ])
+                    count += 1
+                    ExportHelper._report(progress, count)
+                ExportHelper._report(progress, count, done=True)
 
             return True, str(filename)
 
@@ -300,68 +462,40 @@ class ExportHelper:
             return False, f"Lỗi: {str(e)}"
 
     @staticmethod
-    def export_books_to_excel(books, filename: str = None) -> Tuple[bool, str]:
-        """Xuất danh sách sách ra file Excel"""
+    def export_books_to_excel(books, filename: str = None, progress=None) -> Tuple[bool, str]:
+        """Xuất danh sách sách ra file Excel (books: list hoặc iterator)"""
         try:
-            from openpyxl import Workbook
-            from openpyxl.styles import Font, Alignment, PatternFill
-
             if filename is None:
                 timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
                 filename = AppConfig.EXPORT_DIR / f"books_{timestamp}.xlsx"
 
-            wb = Workbook()
-            ws = wb.active
-            ws.title = "Danh sách Sách"
-
-            # Header style
-            header_font = Font(bold=True, color="FFFFFF")
-            header_fill = PatternFill(start_color="4472C4", end_color="4472C4", fill_type="solid")
-            header_alignment = Alignment(horizontal="center", vertical="center")
-
-            # Headers
             headers = [
                 'ID', 'Tựa sách', 'Tác giả', 'Thể loại', 'NXB',
                 'Năm XB', 'ISBN', 'Barcode', 'Giá (VNĐ)',
                 'Tổng SL', 'Còn', 'Trạng thái', 'Mô tả'
             ]
+            rows = (
+                [
+                    book_id or '',
+                    title or '',
+                    author_name or '',
+                    category_name or '',
+                    publisher_name or '',
+                    publish_year or '',
+                    isbn or '',
+                    barcode or '',
+                    price or 0,
+                    total or 0,
+                    available or 0,
+                    Book.stock_status(available),
+                    description or ''
+                ]
+                for (book_id, title, author_name, category_name, publisher_name, publish_year,
+                     isbn, barcode, price, total, available, description)
+                in ExportHelper._field_rows(books, ExportHelper.BOOK_FIELDS)
+            )
 
-            for col, header in enumerate(headers, start=1):
-                cell = ws.cell(row=1, column=col, value=header)
-                cell.font = header_font
-                cell.fill = header_fill
-                cell.alignment = header_alignment
-
-            # Data
-            for row, book in enumerate(books, start=2):
-                ws.cell(row=row, column=1, value=book.book_id or '')
-                ws.cell(row=row, column=2, value=book.title or '')
-                ws.cell(row=row, column=3, value=book.author_name or '')
-                ws.cell(row=row, column=4, value=book.category_name or '')
-                ws.cell(row=row, column=5, value=book.publisher_name or '')
-                ws.cell(row=row, column=6, value=book.publish_year or '')
-                ws.cell(row=row, column=7, value=book.isbn or '')
-                ws.cell(row=row, column=8, value=book.barcode or '')
-                ws.cell(row=row, column=9, value=book.price or 0)
-                ws.cell(row=row, column=10, value=book.total_quantity or 0)
-                ws.cell(row=row, column=11, value=book.available_quantity or 0)
-                ws.cell(row=row, column=12, value=book.get_stock_status())
-                ws.cell(row=row, column=13, value=book.description or '')
-
-            # Auto-adjust column widths
-            for column in ws.columns:
-                max_length = 0
-                column_letter = column[0].column_letter
-                for cell in column:
-                    try:
-                        if len(str(cell.value)) > max_length:
-                            max_length = len(cell.value)
-                    except:
-                        pass
-                adjusted_width = min(max_length + 2, 50)
-                ws.column_dimensions[column_letter].width = adjusted_width
-
-            wb.save(filename)
+            ExportHelper._write_excel_stream(filename, "Danh sách Sách", headers, rows, progress)
             return True, str(filename)
 
         except ImportError:
@@ -370,90 +504,39 @@ class ExportHelper:
             return False, f"Lỗi: {str(e)}"
 
     @staticmethod
-    def export_books_to_pdf(books, filename: str = None) -> Tuple[bool, str]:
-        """Xuất danh sách sách ra file PDF"""
+    def export_books_to_pdf(books, filename: str = None, progress=None, total: int = None) -> Tuple[bool, str]:
+        """Xuất danh sách sách ra file PDF (books: list hoặc iterator)"""
         try:
-            from reportlab.lib import colors
-            from reportlab.lib.pagesizes import A4, landscape
-            from reportlab.platypus import SimpleDocTemplate, Table, TableStyle, Paragraph, Spacer
-            from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
-            from reportlab.lib.units import inch
-
             if filename is None:
                 timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
                 filename = AppConfig.EXPORT_DIR / f"books_{timestamp}.pdf"
 
-            # Create PDF
-            doc = SimpleDocTemplate(
-                str(filename),
-                pagesize=landscape(A4),
-                rightMargin=30,
-                leftMargin=30,
-                topMargin=30,
-                bottomMargin=18
+            if total is None and hasattr(books, '__len__'):
+                total = len(books)
+
+            headers = ['ID', 'Tựa sách', 'Tác giả', 'Thể loại', 'NXB', 'Năm', 'ISBN', 'Giá', 'Tồn kho']
+            col_widths = [35, 170, 110, 90, 110, 40, 90, 60, 55]
+            rows = (
+                [
+                    str(book_id or ''),
+                    (title or '')[:30] + '...' if title and len(title) > 30 else (title or ''),
+                    (author_name or '')[:20],
+                    (category_name or '')[:15],
+                    (publisher_name or '')[:20],
+                    str(publish_year or ''),
+                    (isbn or '')[:15],
+                    f"{price:,.0f}" if price else "0",
+                    f"{available}/{total}"
+                ]
+                for (book_id, title, author_name, category_name, publisher_name, publish_year,
+                     isbn, _, price, total, available, _) in ExportHelper._field_rows(books, ExportHelper.BOOK_FIELDS)
             )
 
-            elements = []
-            styles = getSampleStyleSheet()
-
-            title_style = ParagraphStyle(
-                'CustomTitle',
-                parent=styles['Heading1'],
-                fontSize=16,
-                textColor=colors.HexColor('#1976D2'),
-                spaceAfter=30,
-                alignment=1
+            files = ExportHelper._write_pdf_stream(
+                filename, "DANH SÁCH SÁCH", "sách", headers, col_widths, rows,
+                font_size=7, total=total, progress=progress
             )
-
-            # Title
-            title = Paragraph("DANH SÁCH SÁCH", title_style)
-            elements.append(title)
-            elements.append(Spacer(1, 0.2 * inch))
-
-            # Info
-            info_text = f"Ngày xuất: {datetime.now().strftime('%d/%m/%Y %H:%M:%S')} | Tổng số: {len(books)} sách"
-            info = Paragraph(info_text, styles['Normal'])
-            elements.append(info)
-            elements.append(Spacer(1, 0.3 * inch))
-
-            # Table data
-            data = [['ID', 'Tựa sách', 'Tác giả', 'Thể loại', 'NXB', 'Năm', 'ISBN', 'Giá', 'Tồn kho']]
-
-            for book in books:
-                price_str = f"{book.price:,.0f}" if book.price else "0"
-                data.append([
-                    str(book.book_id or ''),
-                    (book.title or '')[:30] + '...' if book.title and len(book.title) > 30 else (book.title or ''),
-                    (book.author_name or '')[:20],
-                    (book.category_name or '')[:15],
-                    (book.publisher_name or '')[:20],
-                    str(book.publish_year or ''),
-                    (book.isbn or '')[:15],
-                    price_str,
-                    f"{book.available_quantity}/{book.total_quantity}"
-                ])
-
-            # Create table
-            table = Table(data)
-            table.setStyle(TableStyle([
-                ('BACKGROUND', (0, 0), (-1, 0), colors.HexColor('#1976D2')),
-                ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
-                ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
-                ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
-                ('FONTSIZE', (0, 0), (-1, 0), 9),
-                ('BOTTOMPADDING', (0, 0), (-1, 0), 12),
-                ('BACKGROUND', (0, 1), (-1, -1), colors.beige),
-                ('TEXTCOLOR', (0, 1), (-1, -1), colors.black),
-                ('FONTNAME', (0, 1), (-1, -1), 'Helvetica'),
-                ('FONTSIZE', (0, 1), (-1, -1), 7),
-                ('GRID', (0, 0), (-1, -1), 1, colors.black),
-                ('VALIGN', (0, 0), (-1, -1), 'MIDDLE'),
-            ]))
-
-            elements.append(table)
-            doc.build(elements)
-
-            return True, str(filename)
+            return True, ExportHelper._describe_files(files)
 
         except ImportError:
             return False, "Chưa cài đặt thư viện reportlab. Chạy: pip install reportlab"
@@ -0,0 +1,201 @@
+"""
+Import Helper - Đọc file CSV/Excel để nhập dữ liệu hàng loạt
+Dòng tiêu đề nhận cả tên cột của file xuất (ExportHelper) lẫn tên trường
+"""
+import csv
+import time
+from datetime import date, datetime
+from itertools import islice
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+
+
+class ImportReport:
+    """
+    Kết quả 1 lần nhập file: số dòng thành công, lỗi theo dòng, tốc độ
+    Chỉ giữ MAX_ERRORS lỗi đầu tiên (file lớn hỏng cả cột), failed vẫn đếm đủ
+    """
+
+    MAX_ERRORS = 1000
+
+    def __init__(self, progress: Optional[Callable[[int], None]] = None):
+        self.progress = progress
+        self.total = 0
+        self.imported = 0
+        self.failed = 0
+        self.errors: List[Tuple[int, str]] = []
+        self._started = time.perf_counter()
+
+    def add_error(self, line_no: int, message: str):
+        self.failed += 1
+        if len(self.errors) < self.MAX_ERRORS:
+            self.errors.append((line_no, message))
+
+    def batch_done(self, size: int, imported: int):
+        """Cập nhật sau mỗi lô và báo tiến độ (số dòng đã xử lý)"""
+        self.total += size
+        self.imported += imported
+        if self.progress:
+            self.progress(self.total)
+
+    @staticmethod
+    def summarize(result: dict, label: str, max_lines: int = 15) -> str:
+        """Nội dung thông báo kết quả nhập (tối đa max_lines lỗi đầu tiên)"""
+        lines = [
+            f"Đã nhập {result['imported']}/{result['total']} {label} "
+            f"trong {result['elapsed']:.1f}s ({result['rows_per_sec']:.0f} dòng/giây)"
+        ]
+        if result.get('error'):
+            lines.insert(0, result['error'])
+        if result['failed']:
+            lines.append(f"{result['failed']} dòng lỗi:")
+            lines.extend(f"  Dòng {line_no}: {message}" for line_no, message in result['errors'][:max_lines])
+            if result['failed'] > max_lines:
+                lines.append(f"  ... và {result['failed'] - max_lines} dòng khác")
+        return "\n".join(lines)
+
+    def to_dict(self) -> dict:
+        elapsed = time.perf_counter() - self._started
+        return {
+            'total': self.total,
+            'imported': self.imported,
+            'failed': self.failed,
+            'errors': self.errors,
+            'elapsed': elapsed,
+            'rows_per_sec': self.total / elapsed if elapsed > 0 else 0.0,
+        }
+
+
+class ImportHelper:
+    """Helper class đọc file nhập dữ liệu thành các bản ghi (số dòng, {trường: giá trị})"""
+
+    # Tên cột (viết thường) -> trường của Book
+    BOOK_COLUMNS = {
+        'tựa sách': 'title', 'title': 'title',
+        'tác giả': 'author_name', 'author': 'author_name', 'author_name': 'author_name',
+        'thể loại': 'category_name', 'category': 'category_name', 'category_name': 'category_name',
+        'nxb': 'publisher_name', 'nhà xuất bản': 'publisher_name',
+        'publisher': 'publisher_name', 'publisher_name': 'publisher_name',
+        'năm xb': 'publish_year', 'năm': 'publish_year', 'publish_year': 'publish_year',
+        'isbn': 'isbn',
+        'barcode': 'barcode', 'mã vạch': 'barcode',
+        'giá': 'price', 'giá (vnđ)': 'price', 'price': 'price',
+        'tổng sl': 'total_quantity', 'số lượng': 'total_quantity', 'total_quantity': 'total_quantity',
+        'còn': 'available_quantity', 'available_quantity': 'available_quantity',
+        'mô tả': 'description', 'description': 'description',
+    }
+
+    # Tên cột (viết thường) -> trường của Reader
+    READER_COLUMNS = {
+        'họ tên': 'full_name', 'full_name': 'full_name',
+        'địa chỉ': 'address', 'address': 'address',
+        'điện thoại': 'phone', 'phone': 'phone',
+        'email': 'email',
+        'ngày cấp thẻ': 'card_start', 'ngày cấp': 'card_start', 'card_start': 'card_start',
+        'ngày hết hạn': 'card_end', 'ngày hh': 'card_end', 'card_end': 'card_end',
+        'trạng thái': 'status', 'status': 'status',
+        'điểm uy tín': 'reputation_score', 'điểm': 'reputation_score', 'reputation_score': 'reputation_score',
+    }
+
+    @staticmethod
+    def read_records(filename, columns: Dict[str, str]) -> Iterator[Tuple[int, dict]]:
+        """
+        Đọc dần file .csv/.xlsx (không nạp cả file vào bộ nhớ)
+        Cột không có trong columns (vd: ID) bị bỏ qua, dòng trống bị bỏ qua
+        Yields: (số dòng trong file, {trường: giá trị đã làm sạch})
+        """
+        suffix = Path(filename).suffix.lower()
+        if suffix == '.csv':
+            rows = ImportHelper._read_csv_rows(filename)
+        elif suffix in ('.xlsx', '.xlsm'):
+            rows = ImportHelper._read_excel_rows(filename)
+        else:
+            raise ValueError(f"Không hỗ trợ định dạng file '{suffix}' (chỉ nhận .csv, .xlsx)")
+
+        header = next(rows, None)
+        if header is None:
+            raise ValueError("File không có dữ liệu")
+
+        fields = [columns.get(str(name or '').strip().lower()) for name in header]
+        if not any(fields):
+            raise ValueError("Không nhận ra cột nào trong dòng tiêu đề")
+
+        for line_no, row in enumerate(rows, start=2):
+            record = {
+                field: ImportHelper._clean(value)
+                for field, value in zip(fields, row)
+                if field
+            }
+            if any(value is not None for value in record.values()):
+                yield line_no, record
+
+    @staticmethod
+    def batched(records: Iterable, size: int) -> Iterator[list]:
+        """Chia bản ghi thành từng lô size phần tử"""
+        iterator = iter(records)
+        while True:
+            batch = list(islice(iterator, size))
+            if not batch:
+                return
+            yield batch
+
+    @staticmethod
+    def _read_csv_rows(filename) -> Iterator[list]:
+        with open(filename, 'r', encoding='utf-8-sig', newline='') as f:
+            yield from csv.reader(f)
+
+    @staticmethod
+    def _read_excel_rows(filename) -> Iterator[tuple]:
+        from openpyxl import load_workbook
+
+        # read_only: đọc dần từng dòng thay vì dựng toàn bộ workbook
+        wb = load_workbook(filename, read_only=True, data_only=True)
+        try:
+            yield from wb.worksheets[0].iter_rows(values_only=True)
+        finally:
+            wb.close()
+
+    @staticmethod
+    def _clean(value: Any) -> Any:
+        """Chuỗi rỗng -> None, bỏ khoảng trắng, ngày Excel -> 'YYYY-MM-DD'"""
+        if value is None:
+            return None
+        if isinstance(value, datetime):
+            return value.strftime('%Y-%m-%d')
+        if isinstance(value, date):
+            return value.isoformat()
+        if isinstance(value, str):
+            return value.strip() or None
+        return value
+
+    @staticmethod
+    def to_text(value: Any) -> Optional[str]:
+        """Giá trị -> chuỗi (số nguyên Excel như ISBN 9786041234567.0 -> '9786041234567')"""
+        if value is None:
+            return None
+        if isinstance(value, float) and value.is_integer():
+            return str(int(value))
+        return str(value)
+
+    @staticmethod
+    def to_int(value: Any, label: str) -> Optional[int]:
+        """Chuyển sang số nguyên (nhận cả '2020', 2020.0), lỗi thì raise ValueError kèm tên cột"""
+        if value is None:
+            return None
+        try:
+            number = float(str(value).replace(',', ''))
+        except ValueError:
+            raise ValueError(f"{label} không hợp lệ: '{value}'")
+        if not number.is_integer():
+            raise ValueError(f"{label} phải là số nguyên: '{value}'")
+        return int(number)
+
+    @staticmethod
+    def to_float(value: Any, label: str) -> Optional[float]:
+        """Chuyển sang số thực (bỏ dấu phân cách hàng nghìn), lỗi thì raise ValueError"""
+        if value is None:
+            return None
+        try:
+            return float(str(value).replace(',', ''))
+        except ValueError:
+            raise ValueError(f"{label} không hợp lệ: '{value}'")
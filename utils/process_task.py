@@ -0,0 +1,76 @@
+"""
+Process Task - Chạy công việc nặng CPU (vd: dựng PDF) trong tiến trình con
+
+Luồng nền vẫn tranh GIL với Tkinter nên giao diện bị giật; tiến trình con thì không.
+Tiến trình con dùng 'spawn' để tự mở connection database riêng
+(không dùng chung socket của pool với tiến trình chính).
+"""
+import logging
+import multiprocessing
+import queue
+from typing import Any, Callable, List, Tuple
+
+logger = logging.getLogger(__name__)
+
+
+def _run(target: Callable, args: tuple, messages):
+    """Chạy trong tiến trình con: target(*args, progress=...) rồi gửi kết quả về"""
+    try:
+        result = target(*args, progress=lambda count: messages.put(('progress', count)))
+        messages.put(('done', result))
+    except Exception as e:
+        messages.put(('error', str(e)))
+
+
+class ProcessTask:
+    """
+    1 công việc chạy trong tiến trình con, giao tiếp qua Queue
+
+    target phải là hàm cấp module (pickle được) và nhận tham số progress.
+    Nơi gọi (luồng Tk) định kỳ gọi poll() để lấy tiến độ và kết quả.
+    """
+
+    def __init__(self, target: Callable, args: tuple = ()):
+        context = multiprocessing.get_context('spawn')
+        self._messages = context.Queue()
+        self._process = context.Process(target=_run, args=(target, args, self._messages), daemon=True)
+        self.finished = False
+
+    def start(self) -> 'ProcessTask':
+        self._process.start()
+        return self
+
+    def poll(self) -> List[Tuple[str, Any]]:
+        """
+        Lấy các thông điệp mới: ('progress', số dòng) / ('done', kết quả) / ('error', lỗi)
+        Tiến trình con chết bất thường cũng trả về 'error'
+        """
+        messages = []
+        while True:
+            try:
+                message = self._messages.get_nowait()
+            except queue.Empty:
+                break
+            messages.append(message)
+            if message[0] in ('done', 'error'):
+                self.finished = True
+
+        if not self.finished and not self._process.is_alive():
+            # Kết quả cuối có thể còn trên đường ống khi tiến trình vừa thoát
+            try:
+                messages.append(self._messages.get(timeout=0.5))
+                self.finished = messages[-1][0] in ('done', 'error')
+            except queue.Empty:
+                self.finished = True
+                messages.append(('error', f"Tiến trình xuất dữ liệu dừng bất thường (mã {self._process.exitcode})"))
+
+        if self.finished:
+            self._process.join(timeout=0)
+        return messages
+
+    def cancel(self):
+        """Dừng tiến trình con"""
+        if self._process.is_alive():
+            self._process.terminate()
+            logger.info("🛑 Đã dừng tiến trình xuất dữ liệu")
+        self.finished = True
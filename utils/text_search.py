@@ -0,0 +1,197 @@
+"""
+Text Search - Chuẩn hóa tiếng Việt (bỏ dấu) và index tên tìm gần đúng
+"""
+import bisect
+import re
+import threading
+import unicodedata
+from array import array
+from typing import Dict, List, Set, Tuple
+
+# Ngưỡng độ tương đồng trigram để coi 2 từ là gần giống (gõ sai chính tả)
+FUZZY_THRESHOLD = 0.4
+
+# Trọng số điểm theo kiểu khớp
+EXACT_SCORE = 1.0
+PREFIX_SCORE = 0.8
+FUZZY_WEIGHT = 0.9
+
+
+def fold_text(text: str) -> str:
+    """Bỏ dấu tiếng Việt, chuyển chữ thường: 'Nguyễn Văn Đức' -> 'nguyen van duc'"""
+    if not text:
+        return ''
+    text = text.replace('đ', 'd').replace('Đ', 'D')
+    text = unicodedata.normalize('NFD', text)
+    text = ''.join(ch for ch in text if unicodedata.category(ch) != 'Mn')
+    return ' '.join(text.lower().split())
+
+
+def tokenize(text: str) -> List[str]:
+    """Tách từ sau khi bỏ dấu"""
+    return re.findall(r'\w+', fold_text(text))
+
+
+def trigrams(word: str) -> Set[str]:
+    """Tập trigram của 1 từ (đệm 2 khoảng trắng đầu, 1 khoảng trắng cuối)"""
+    padded = f"  {word} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+class NameIndex:
+    """
+    Index tên trong bộ nhớ, không dấu - không phân biệt hoa thường
+
+    - Từ -> danh sách id (postings)
+    - Trigram -> các từ trong từ vựng (tìm gần đúng khi gõ sai)
+    - Từ cuối cùng của truy vấn được khớp theo tiền tố (đang gõ dở)
+    """
+
+    def __init__(self):
+        self._lock = threading.RLock()
+        self.clear()
+
+    def clear(self):
+        """Xóa toàn bộ index"""
+        with self._lock:
+            self._word_ids: Dict[str, int] = {}
+            self._words: List[str] = []
+            self._sorted_words: List[str] = []
+            self._word_trigram_count: List[int] = []
+            self._postings: List[array] = []
+            self._trigram_words: Dict[str, Set[int]] = {}
+            self._docs: Dict[int, Tuple[int, ...]] = {}
+            self._stale = 0
+            self.max_id = 0
+
+    def __len__(self) -> int:
+        return len(self._docs)
+
+    def add(self, doc_id: int, text: str):
+        """Thêm hoặc cập nhật 1 tên"""
+        with self._lock:
+            if doc_id in self._docs:
+                self.remove(doc_id)
+
+            word_ids = tuple(dict.fromkeys(self._get_word_id(w) for w in tokenize(text)))
+            self._docs[doc_id] = word_ids
+            for word_id in word_ids:
+                self._postings[word_id].append(doc_id)
+
+            self.max_id = max(self.max_id, doc_id)
+
+    def remove(self, doc_id: int):
+        """Xóa 1 tên (postings cũ được dọn dần khi compact)"""
+        with self._lock:
+            if self._docs.pop(doc_id, None) is not None:
+                self._stale += 1
+                if self._stale > 1000 and self._stale > len(self._docs) // 4:
+                    self._compact()
+
+    def search(self, query: str, limit: int = 100) -> List[Tuple[int, float]]:
+        """
+        Tìm tên gần đúng
+        Returns: [(doc_id, score)] sắp xếp theo score giảm dần, id giảm dần
+        """
+        words = tokenize(query)
+        if not words:
+            return []
+
+        with self._lock:
+            matches = [
+                self._match_word(word, prefix=(i == len(words) - 1))
+                for i, word in enumerate(words)
+            ]
+            if not all(matches):
+                return []
+
+            # Sinh ứng viên từ từ hiếm nhất, kiểm tra các từ còn lại trên từng ứng viên
+            rarest = min(matches, key=lambda m: sum(len(self._postings[w]) for w in m))
+            candidates = set()
+            for word_id in rarest:
+                candidates.update(self._postings[word_id])
+
+            # Duyệt id giảm dần: đủ `limit` kết quả khớp tuyệt đối thì dừng,
+            # vì các ứng viên còn lại không thể xếp trên
+            results = []
+            perfect = 0
+            for doc_id in sorted(candidates, reverse=True):
+                doc_words = self._docs.get(doc_id)
+                if doc_words is None:
+                    continue
+
+                total = 0.0
+                for match in matches:
+                    best = max((match.get(w, 0.0) for w in doc_words), default=0.0)
+                    if best == 0.0:
+                        break
+                    total += best
+                else:
+                    score = total / len(matches)
+                    results.append((doc_id, score))
+                    if score >= EXACT_SCORE:
+                        perfect += 1
+                        if perfect >= limit:
+                            break
+
+        results.sort(key=lambda r: (-r[1], -r[0]))
+        return results[:limit]
+
+    def _get_word_id(self, word: str) -> int:
+        """Lấy id của từ, thêm vào từ vựng nếu chưa có"""
+        word_id = self._word_ids.get(word)
+        if word_id is None:
+            word_id = len(self._words)
+            self._word_ids[word] = word_id
+            self._words.append(word)
+            bisect.insort(self._sorted_words, word)
+            self._postings.append(array('i'))
+
+            word_trigrams = trigrams(word)
+            self._word_trigram_count.append(len(word_trigrams))
+            for trigram in word_trigrams:
+                self._trigram_words.setdefault(trigram, set()).add(word_id)
+
+        return word_id
+
+    def _match_word(self, word: str, prefix: bool) -> Dict[int, float]:
+        """Các từ trong từ vựng khớp với 1 từ truy vấn: {word_id: điểm}"""
+        matched: Dict[int, float] = {}
+
+        word_id = self._word_ids.get(word)
+        if word_id is not None:
+            matched[word_id] = EXACT_SCORE
+
+        if prefix:
+            start = bisect.bisect_left(self._sorted_words, word)
+            for i in range(start, len(self._sorted_words)):
+                vocab_word = self._sorted_words[i]
+                if not vocab_word.startswith(word):
+                    break
+                matched.setdefault(self._word_ids[vocab_word], PREFIX_SCORE)
+
+        if len(word) >= 3:
+            query_trigrams = trigrams(word)
+            counts: Dict[int, int] = {}
+            for trigram in query_trigrams:
+                for candidate in self._trigram_words.get(trigram, ()):
+                    counts[candidate] = counts.get(candidate, 0) + 1
+
+            for candidate, common in counts.items():
+                union = len(query_trigrams) + self._word_trigram_count[candidate] - common
+                similarity = common / union
+                if similarity >= FUZZY_THRESHOLD:
+                    score = similarity * FUZZY_WEIGHT
+                    if score > matched.get(candidate, 0.0):
+                        matched[candidate] = score
+
+        return matched
+
+    def _compact(self):
+        """Dựng lại postings, bỏ các id đã xóa/cập nhật"""
+        postings = [array('i') for _ in self._words]
+        for doc_id, word_ids in self._docs.items():
+            for word_id in word_ids:
+                postings[word_id].append(doc_id)
+        self._postings = postings
+        self._stale = 0
@@ -0,0 +1,53 @@
+"""
+Timing - Đo và lưu thời gian thực thi các thao tác để theo dõi hiệu năng
+"""
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict
+
+_lock = threading.Lock()
+_timings: Dict[str, dict] = {}
+
+
+def record(name: str, elapsed_ms: float):
+    """Ghi nhận 1 lần đo"""
+    with _lock:
+        entry = _timings.setdefault(name, {
+            'count': 0, 'total_ms': 0.0, 'last_ms': 0.0, 'max_ms': 0.0
+        })
+        entry['count'] += 1
+        entry['total_ms'] += elapsed_ms
+        entry['last_ms'] = elapsed_ms
+        entry['max_ms'] = max(entry['max_ms'], elapsed_ms)
+
+
+@contextmanager
+def timed(name: str):
+    """Context manager đo thời gian 1 khối lệnh"""
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        record(name, (time.perf_counter() - start) * 1000)
+
+
+def get_timing(name: str) -> dict:
+    """Lấy số liệu của 1 thao tác (kèm avg_ms)"""
+    with _lock:
+        entry = dict(_timings.get(name, {'count': 0, 'total_ms': 0.0, 'last_ms': 0.0, 'max_ms': 0.0}))
+    entry['avg_ms'] = entry['total_ms'] / entry['count'] if entry['count'] else 0.0
+    return entry
+
+
+def get_timings() -> Dict[str, dict]:
+    """Lấy số liệu của tất cả thao tác"""
+    with _lock:
+        names = list(_timings)
+    return {name: get_timing(name) for name in names}
+
+
+def reset_timings():
+    """Xóa toàn bộ số liệu đo"""
+    with _lock:
+        _timings.clear()
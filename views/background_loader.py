@@ -0,0 +1,112 @@
+"""
+Background Loader - Chạy truy vấn ngoài luồng giao diện, trả kết quả về Tk qua after()
+"""
+import logging
+import queue
+import tkinter as tk
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Callable, Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+# Thread pool dùng chung cho mọi view (nhỏ hơn pool connection của database)
+_executor = ThreadPoolExecutor(max_workers=4, thread_name_prefix='ui-loader')
+
+
+class BackgroundLoader:
+    """
+    Gắn vào 1 widget, chạy hàm tải dữ liệu trên thread pool dùng chung
+
+    Mỗi yêu cầu có 1 key (vd: 'readers'). Gửi yêu cầu mới cùng key sẽ
+    thay thế yêu cầu cũ: kết quả cũ về sau bị bỏ qua, không ghi đè dữ liệu mới.
+    Callback luôn được gọi trên luồng Tk (worker chỉ đẩy kết quả vào queue,
+    widget tự lấy ra bằng after()).
+    """
+
+    POLL_MS = 30
+
+    def __init__(self, widget: tk.Misc):
+        self.widget = widget
+        self._results: queue.Queue = queue.Queue()
+        self._generations: Dict[str, int] = {}
+        self._futures: Dict[str, Future] = {}
+        self._pending = 0
+        self._poll_id = None
+
+    def submit(
+            self,
+            key: str,
+            func: Callable[[], Any],
+            on_success: Callable[[Any], None],
+            on_error: Optional[Callable[[Exception], None]] = None
+    ) -> int:
+        """Chạy func() ở nền, gọi on_success(result) / on_error(exc) trên luồng Tk"""
+        generation = self._generations.get(key, 0) + 1
+        self._generations[key] = generation
+
+        # Yêu cầu cũ chưa kịp chạy thì hủy luôn
+        previous = self._futures.get(key)
+        if previous is not None:
+            previous.cancel()
+
+        future = _executor.submit(func)
+        self._futures[key] = future
+        self._pending += 1
+        future.add_done_callback(
+            lambda f: self._results.put((key, generation, f, on_success, on_error))
+        )
+
+        self._ensure_polling()
+        return generation
+
+    def cancel(self, key: str):
+        """Bỏ qua kết quả của yêu cầu đang chạy theo key"""
+        self._generations[key] = self._generations.get(key, 0) + 1
+        previous = self._futures.pop(key, None)
+        if previous is not None:
+            previous.cancel()
+
+    def is_busy(self, key: str) -> bool:
+        """Key có yêu cầu đang chạy không"""
+        future = self._futures.get(key)
+        return future is not None and not future.done()
+
+    def _ensure_polling(self):
+        if self._poll_id is None:
+            try:
+                self._poll_id = self.widget.after(self.POLL_MS, self._poll)
+            except tk.TclError:
+                # Widget đã bị hủy
+                self._poll_id = None
+
+    def _poll(self):
+        """Lấy kết quả đã xong, chỉ phát kết quả của yêu cầu mới nhất mỗi key"""
+        self._poll_id = None
+
+        while True:
+            try:
+                key, generation, future, on_success, on_error = self._results.get_nowait()
+            except queue.Empty:
+                break
+
+            self._pending -= 1
+            if generation != self._generations.get(key) or future.cancelled():
+                continue
+
+            self._futures.pop(key, None)
+            error = future.exception()
+            try:
+                if error is None:
+                    on_success(future.result())
+                elif on_error is not None:
+                    on_error(error)
+                else:
+                    logger.error(f"❌ Lỗi tải dữ liệu nền ({key}): {error}")
+            except tk.TclError:
+                # Widget đã bị hủy trong lúc chờ kết quả
+                return
+            except Exception as e:
+                logger.error(f"❌ Lỗi xử lý kết quả tải nền ({key}): {e}")
+
+        if self._pending > 0:
+            self._ensure_polling()
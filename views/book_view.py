@@ -1,11 +1,15 @@
 import tkinter as tk
-from tkinter import ttk
+from tkinter import ttk, filedialog
 from typing import Optional, List
 import logging
 
+from config.settings import AppConfig
 from models.book import Book
 from controllers.book_controller import BookController
+from views.background_loader import BackgroundLoader
 from views.book_dialog import BookDialog
+from views.lazy_tree import LazyTreeLoader
+from views.tree_sync import KeyedTreeSync
 from utils.messagebox_helper import MessageBoxHelper
 
 logger = logging.getLogger(__name__)
@@ -19,7 +23,16 @@ class BookView(ttk.Frame):
         self.controller = BookController()
         self.msg_helper = MessageBoxHelper()
         self.current_books: List[Book] = []
+        self.total_books = 0
         self.selected_book: Optional[Book] = None
+        self.loader = BackgroundLoader(self)
+        self.data_version: Optional[int] = None  # Con trỏ nhật ký thay đổi của lần tải đầy đủ gần nhất
+        self.showing_search = False
+        self.refresh_pending = False  # Có yêu cầu làm mới trong lúc đang tải trang
+        self.search_books_result: List[Book] = []  # Kết quả tìm kiếm đang hiển thị (để xuất file)
+        self.export_written = 0  # Số dòng đã ghi của lần xuất đang chạy (luồng nền cập nhật)
+        self.export_task = None  # Tiến trình con đang xuất PDF (nếu có)
+        self.import_processed = 0  # Số dòng đã xử lý của lần nhập file đang chạy
 
         self._create_widgets()
         self._load_data()
@@ -82,6 +95,15 @@ class BookView(ttk.Frame):
         right_frame = ttk.Frame(toolbar)
         right_frame.pack(side='right')
 
+        ttk.Button(
+            right_frame,
+            text="📥 Nhập file",
+            command=self._import_file,
+            width=12
+        ).pack(side='left', padx=2, pady=3)
+
+        ttk.Separator(right_frame, orient='vertical').pack(side='left', fill='y', padx=5)
+
         ttk.Label(right_frame, text="Xuất:", font=('Arial', 9)).pack(side='left', padx=5)
 
         ttk.Button(
@@ -189,7 +211,10 @@ class BookView(ttk.Frame):
         # Scrollbars
         vsb = ttk.Scrollbar(table_frame, orient='vertical', command=self.tree.yview)
         hsb = ttk.Scrollbar(table_frame, orient='horizontal', command=self.tree.xview)
-        self.tree.configure(yscrollcommand=vsb.set, xscrollcommand=hsb.set)
+        self.tree.configure(xscrollcommand=hsb.set)
+
+        # Tải thêm trang khi cuộn gần cuối (yscrollcommand do loader quản lý)
+        self.lazy_loader = LazyTreeLoader(self.tree, vsb, self._load_more)
 
         # Grid layout
         self.tree.grid(row=0, column=0, sticky='nsew')
@@ -208,6 +233,14 @@ class BookView(ttk.Frame):
         self.context_menu.add_separator()
         self.context_menu.add_command(label="ℹ️ Chi tiết", command=self._show_detail)
 
+        # Cấu hình màu tag
+        self.tree.tag_configure('out_of_stock', foreground='#F44336')
+        self.tree.tag_configure('low_stock', foreground='#FF9800')
+        self.tree.tag_configure('in_stock', foreground='#4CAF50')
+
+        # Cập nhật dòng theo book_id thay vì xóa hết rồi chèn lại
+        self.tree_sync = KeyedTreeSync(self.tree)
+
         # Bind events
         self.tree.bind('<<TreeviewSelect>>', self._on_select)
         self.tree.bind('<Double-1>', lambda e: self._show_edit_dialog())
@@ -247,69 +280,176 @@ class BookView(ttk.Frame):
         self.count_label.pack(side='right', padx=5)
 
     def _load_data(self):
-        """Load dữ liệu từ database"""
-        try:
-            self.current_books = self.controller.get_all_books()
-            self._populate_tree(self.current_books)
-            self.status_label.config(text="✅ Đã tải dữ liệu thành công")
-            logger.info(f"Loaded {len(self.current_books)} books")
-        except Exception as e:
-            self.msg_helper.show_error("Lỗi", f"Không thể tải dữ liệu: {str(e)}")
-            logger.error(f"Error loading data: {e}")
+        """Load trang đầu tiên từ database ở nền (các trang sau được tải khi cuộn)"""
+        self.lazy_loader.reset()
+        self.status_label.config(text="⏳ Đang tải dữ liệu...")
+
+        def load():
+            # Lấy version trước khi tải: thay đổi xảy ra trong lúc tải sẽ được áp lại sau
+            version = self.controller.get_data_version()
+            return version, self.controller.get_books_page(), self.controller.count_books()
+
+        self.loader.submit('books', load, self._on_data_loaded, self._on_load_error)
+
+    def _on_data_loaded(self, result):
+        self.data_version, self.current_books, self.total_books = result
+        self.showing_search = False
+        self._populate_tree(self.current_books)
+        self._update_count_label()
+        self._finish_loading(len(self.current_books) == AppConfig.ITEMS_PER_PAGE)
+        self.status_label.config(text="✅ Đã tải dữ liệu thành công")
+        logger.info(f"Loaded {len(self.current_books)}/{self.total_books} books")
+
+    def _on_load_error(self, error: Exception):
+        self._finish_loading(False)
+        self.status_label.config(text="❌ Lỗi tải dữ liệu")
+        self.msg_helper.show_error("Lỗi", f"Không thể tải dữ liệu: {str(error)}")
+        logger.error(f"Error loading data: {error}")
+
+    def _load_more(self):
+        """Tải trang tiếp theo ở nền khi cuộn gần cuối danh sách"""
+        if not self.current_books:
+            self._finish_loading(False)
+            return
 
-    def _populate_tree(self, books: List[Book]):
-        """Hiển thị dữ liệu lên Treeview"""
-        # Xóa dữ liệu cũ
-        for item in self.tree.get_children():
-            self.tree.delete(item)
-
-        # Thêm dữ liệu mới
-        for book in books:
-            # Format giá
-            price_str = f"{book.price:,.0f}" if book.price else "0"
-
-            values = (
-                book.book_id,
-                (book.title or '')[:40] + '...' if book.title and len(book.title) > 40 else (book.title or ''),
-                book.author_name or '',
-                book.category_name or '',
-                book.publisher_name or '',
-                book.publish_year or '',
-                book.isbn or '',
-                book.barcode or '',
-                price_str,
-                book.total_quantity,
-                book.available_quantity,
-                book.get_stock_status()
-            )
+        after_id = self.current_books[-1].book_id
 
-            # Thêm tag màu theo trạng thái tồn kho
-            tags = []
-            if book.available_quantity == 0:
-                tags.append('out_of_stock')
-            elif book.available_quantity < 5:
-                tags.append('low_stock')
-            else:
-                tags.append('in_stock')
+        def on_loaded(books: List[Book]):
+            self.current_books.extend(books)
+            self._append_rows(books)
+            self._update_count_label()
+            self._finish_loading(len(books) == AppConfig.ITEMS_PER_PAGE)
 
-            self.tree.insert('', 'end', values=values, tags=tuple(tags))
+        def on_error(error: Exception):
+            logger.error(f"Error loading more books: {error}")
+            self._finish_loading(False)
 
-        # Cấu hình màu tag
-        self.tree.tag_configure('out_of_stock', foreground='#F44336')
-        self.tree.tag_configure('low_stock', foreground='#FF9800')
-        self.tree.tag_configure('in_stock', foreground='#4CAF50')
+        # Cùng key 'books': tìm kiếm/tải lại mới hơn sẽ bỏ qua trang này
+        self.loader.submit('books', lambda: self.controller.get_books_page(after_id=after_id), on_loaded, on_error)
+
+    def _finish_loading(self, has_more: bool):
+        """Đánh dấu tải trang xong, chạy lần làm mới bị hoãn trong lúc tải (nếu có)"""
+        self.lazy_loader.finish(has_more)
+        if self.refresh_pending:
+            self.refresh_pending = False
+            self.after_idle(self._refresh_changes)
+
+    def _refresh_changes(self):
+        """Làm mới: chỉ tải các sách đã thay đổi kể từ lần tải trước"""
+        if self.data_version is None or self.showing_search:
+            self._load_data()
+            return
+        if self.lazy_loader.loading:
+            # Đang tải trang (cùng key 'books'): làm mới ngay khi tải xong (_finish_loading)
+            self.refresh_pending = True
+            return
+        self.refresh_pending = False
+
+        version = self.data_version
+
+        def load():
+            delta = self.controller.get_changes_since(version)
+            if delta and (delta['changed'] or delta['deleted']):
+                delta['total'] = self.controller.count_books()
+            return delta
+
+        self.loader.submit('books', load, self._apply_changes, self._on_load_error)
+
+    def _apply_changes(self, delta: Optional[dict]):
+        """Áp các thay đổi vào danh sách đang hiển thị"""
+        if delta is None:
+            self._load_data()
+            return
+
+        self.data_version = delta['version']
+        if not delta['changed'] and not delta['deleted']:
+            self.status_label.config(text="✅ Dữ liệu không thay đổi")
+            return
+
+        deleted = set(delta['deleted'])
+        changed = {book.book_id: book for book in delta['changed']}
+
+        # Sách ngoài phạm vi đã tải (id nhỏ hơn trang cuối) sẽ được tải khi cuộn tới
+        lowest = self.current_books[-1].book_id if self.current_books and self.lazy_loader.has_more else None
+        books = [changed.pop(book.book_id, book) for book in self.current_books if book.book_id not in deleted]
+        books.extend(book for book in changed.values() if lowest is None or book.book_id > lowest)
+        books.sort(key=lambda book: book.book_id, reverse=True)
+
+        self.current_books = books
+        self.total_books = delta['total']
+        self._populate_tree(books)
+        self._update_count_label()
+        self.status_label.config(
+            text=f"🔄 Đã cập nhật {len(delta['changed']) + len(delta['deleted'])} sách thay đổi"
+        )
+
+    def _update_count_label(self):
+        """Cập nhật nhãn tổng số sách (kèm số đã tải nếu chưa tải hết)"""
+        loaded = len(self.current_books)
+        if self.total_books > loaded:
+            self.count_label.config(text=f"Tổng: {self.total_books} sách (đã tải {loaded})")
+        else:
+            self.count_label.config(text=f"Tổng: {loaded} sách")
+
+    def _populate_tree(self, books: List[Book]):
+        """Hiển thị dữ liệu lên Treeview (chỉ cập nhật các dòng thay đổi)"""
+        self.tree_sync.sync(self._book_row(book) for book in books)
 
         # Cập nhật count
         self.count_label.config(text=f"Tổng: {len(books)} sách")
 
+    def _append_rows(self, books: List[Book]):
+        """Thêm các dòng sách vào cuối Treeview"""
+        self.tree_sync.append(self._book_row(book) for book in books)
+
+    @staticmethod
+    def _book_row(book: Book):
+        """(book_id, values, tags) của 1 dòng sách"""
+        # Format giá
+        price_str = f"{book.price:,.0f}" if book.price else "0"
+
+        values = (
+            book.book_id,
+            (book.title or '')[:40] + '...' if book.title and len(book.title) > 40 else (book.title or ''),
+            book.author_name or '',
+            book.category_name or '',
+            book.publisher_name or '',
+            book.publish_year or '',
+            book.isbn or '',
+            book.barcode or '',
+            price_str,
+            book.total_quantity,
+            book.available_quantity,
+            book.get_stock_status()
+        )
+
+        # Tag màu theo trạng thái tồn kho
+        if book.available_quantity == 0:
+            tags = ('out_of_stock',)
+        elif book.available_quantity < 5:
+            tags = ('low_stock',)
+        else:
+            tags = ('in_stock',)
+
+        return book.book_id, values, tags
+
     def _on_select(self, event):
         """Xử lý khi chọn 1 dòng"""
         selection = self.tree.selection()
         if selection:
             item = self.tree.item(selection[0])
             book_id = item['values'][0]
-            self.selected_book = self.controller.get_book_by_id(book_id)
-            self._update_detail_panel()
+            # Chưa có trong cache thì phải truy vấn: tải ở nền, chọn dòng khác thì bỏ kết quả cũ
+            self.selected_book = None
+
+            def on_loaded(book: Optional[Book]):
+                self.selected_book = book
+                self._update_detail_panel()
+
+            def on_error(error: Exception):
+                logger.error(f"Error loading book {book_id}: {error}")
+
+            self.loader.submit('selection', lambda: self.controller.get_book_by_id(book_id), on_loaded, on_error)
 
     def _update_detail_panel(self):
         """Cập nhật panel chi tiết"""
@@ -347,12 +487,22 @@ class BookView(ttk.Frame):
             self._load_data()
             return
 
-        try:
-            books = self.controller.search_books(keyword, search_by)
+        # Kết quả tìm kiếm đã giới hạn MAX_SEARCH_RESULTS, không phân trang
+        self.lazy_loader.reset()
+        self.status_label.config(text=f"🔍 Đang tìm kiếm '{keyword}'...")
+
+        def on_found(books: List[Book]):
+            self.showing_search = True
+            self.search_books_result = books
             self._populate_tree(books)
+            self._finish_loading(False)
             self.status_label.config(text=f"🔍 Tìm thấy {len(books)} kết quả")
-        except Exception as e:
-            self.msg_helper.show_error("Lỗi tìm kiếm", str(e))
+
+        def on_error(error: Exception):
+            self._finish_loading(False)
+            self.msg_helper.show_error("Lỗi tìm kiếm", str(error))
+
+        self.loader.submit('books', lambda: self.controller.search_books(keyword, search_by), on_found, on_error)
 
     def _reset_search(self):
         """Reset tìm kiếm"""
@@ -367,7 +517,7 @@ class BookView(ttk.Frame):
 
         if dialog.result:
             if self.controller.add_book(dialog.result, parent=self):
-                self._load_data()
+                self._refresh_changes()
 
     def _show_edit_dialog(self):
         """Hiển thị dialog sửa"""
@@ -384,7 +534,7 @@ class BookView(ttk.Frame):
 
         if dialog.result:
             if self.controller.update_book(dialog.result, parent=self):
-                self._load_data()
+                self._refresh_changes()
 
     def _delete_book(self):
         """Xóa sách"""
@@ -398,7 +548,7 @@ class BookView(ttk.Frame):
                 parent=self
         ):
             self.selected_book = None
-            self._load_data()
+            self._refresh_changes()
 
     def _show_inventory_dialog(self):
         """Hiển thị dialog cập nhật tồn kho"""
@@ -490,7 +640,7 @@ class BookView(ttk.Frame):
                     available_var.get(),
                     parent=dialog
             ):
-                self._load_data()
+                self._refresh_changes()
                 dialog.destroy()
 
         btn_frame = ttk.Frame(frame)
@@ -785,6 +935,18 @@ class BookView(ttk.Frame):
             justify='left'
         ).pack(anchor='w')
 
+        # ========== HIỆU NĂNG ==========
+        timing = self.controller.get_statistics_timing()
+        ttk.Label(
+            content_frame,
+            text=(
+                f"⏱️ Truy vấn thống kê: {timing['last_ms']:.1f} ms "
+                f"(TB {timing['avg_ms']:.1f} ms / {timing['count']} lần, 1 truy vấn tổng hợp)"
+            ),
+            font=('Arial', 8),
+            foreground='#666'
+        ).pack(anchor='w')
+
         # ✅ PACK CANVAS VÀ SCROLLBAR
         canvas.pack(side='left', fill='both', expand=True)
         scrollbar.pack(side='right', fill='y')
@@ -816,16 +978,126 @@ class BookView(ttk.Frame):
 
     def _export_json(self):
         """Xuất dữ liệu ra JSON"""
-        self.controller.export_json(self.current_books, parent=self)
+        if not self.showing_search:
+            self._export_all('json')
+            return
+        self.controller.export_json(self._get_export_books(), parent=self)
 
     def _export_csv(self):
         """Xuất dữ liệu ra CSV"""
-        self.controller.export_csv(self.current_books, parent=self)
+        if not self.showing_search:
+            self._export_all('csv')
+            return
+        self.controller.export_csv(self._get_export_books(), parent=self)
 
     def _export_excel(self):
         """Xuất dữ liệu ra Excel"""
-        self.controller.export_excel(self.current_books, parent=self)
+        if not self.showing_search:
+            self._export_all('excel')
+            return
+        self.controller.export_excel(self._get_export_books(), parent=self)
 
     def _export_pdf(self):
         """Xuất dữ liệu ra PDF"""
-        self.controller.export_pdf(self.current_books, parent=self)
+        if not self.showing_search:
+            self._export_all('pdf')
+            return
+        self.controller.export_pdf(self._get_export_books(), parent=self)
+
+    def _export_all(self, fmt: str):
+        """
+        Xuất toàn bộ sách thẳng từ database, tiến độ hiện trên thanh trạng thái
+        JSON/CSV/Excel chạy ở luồng nền, PDF chạy ở tiến trình con (dàn trang nặng CPU)
+        """
+        if self._export_busy():
+            self.msg_helper.show_warning("Đang xuất dữ liệu", "Vui lòng chờ lần xuất trước hoàn tất", parent=self)
+            return
+
+        self.export_written = 0
+
+        def on_progress(count: int):
+            # Chạy ở luồng nền: chỉ ghi nhận, giao diện tự đọc trong _show_export_progress
+            self.export_written = count
+
+        def on_done(result):
+            success, _, count = result
+            self.status_label.config(text=f"✅ Đã xuất {count} sách" if success else "❌ Lỗi xuất dữ liệu")
+            self.controller.show_export_result(fmt, result, parent=self)
+
+        def on_error(error: Exception):
+            self.status_label.config(text="❌ Lỗi xuất dữ liệu")
+            self.msg_helper.show_error("Lỗi xuất dữ liệu", str(error), parent=self)
+
+        if fmt == 'pdf':
+            self.export_task = self.controller.start_export_process(fmt)
+            self._poll_export_task(on_done, on_error)
+        else:
+            self.loader.submit('export', lambda: self.controller.export_all(fmt, on_progress), on_done, on_error)
+        self._show_export_progress()
+
+    def _poll_export_task(self, on_done, on_error):
+        """Đọc tiến độ/kết quả từ tiến trình con xuất PDF"""
+        for kind, value in self.export_task.poll():
+            if kind == 'progress':
+                self.export_written = value
+            elif kind == 'done':
+                on_done(value)
+            else:
+                on_error(value)
+
+        if not self.export_task.finished:
+            self.after(200, lambda: self._poll_export_task(on_done, on_error))
+
+    def _export_busy(self) -> bool:
+        """Đang có lần xuất toàn bộ chưa xong"""
+        return self.loader.is_busy('export') or (self.export_task is not None and not self.export_task.finished)
+
+    def _show_export_progress(self):
+        """Cập nhật tiến độ xuất file tới khi xong"""
+        if not self._export_busy():
+            return
+        self.status_label.config(text=f"⏳ Đang xuất: {self.export_written}/{self.total_books} sách")
+        self.after(200, self._show_export_progress)
+
+    def _import_file(self):
+        """Nhập sách từ file CSV/Excel (chạy nền, tiến độ hiện trên thanh trạng thái)"""
+        if self.loader.is_busy('import'):
+            self.msg_helper.show_warning("Đang nhập dữ liệu", "Vui lòng chờ lần nhập trước hoàn tất", parent=self)
+            return
+
+        filename = filedialog.askopenfilename(
+            parent=self,
+            title="Chọn file nhập sách",
+            filetypes=[("Excel/CSV", "*.xlsx *.csv"), ("Excel", "*.xlsx"), ("CSV", "*.csv")]
+        )
+        if not filename:
+            return
+
+        self.import_processed = 0
+
+        def on_progress(count: int):
+            # Chạy ở luồng nền: chỉ ghi nhận, giao diện tự đọc trong _show_import_progress
+            self.import_processed = count
+
+        def on_done(result: dict):
+            self.status_label.config(text=f"✅ Đã nhập {result['imported']}/{result['total']} sách")
+            if self.controller.show_import_result(result, parent=self):
+                self._load_data()
+
+        def on_error(error: Exception):
+            self.status_label.config(text="❌ Lỗi nhập dữ liệu")
+            self.msg_helper.show_error("Lỗi nhập dữ liệu", str(error), parent=self)
+
+        self.loader.submit('import', lambda: self.controller.import_file(filename, on_progress), on_done, on_error)
+        self._show_import_progress()
+
+    def _show_import_progress(self):
+        """Cập nhật tiến độ nhập file tới khi xong"""
+        if not self.loader.is_busy('import'):
+            return
+        self.status_label.config(text=f"⏳ Đang nhập: {self.import_processed} dòng")
+        self.after(200, self._show_import_progress)
+
+    def _get_export_books(self) -> List[Book]:
+        """Kết quả tìm kiếm đang hiển thị (không tìm kiếm thì _export_all xuất thẳng từ database)"""
+        return self.search_books_result
\ No newline at end of file
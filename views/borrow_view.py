@@ -3,6 +3,8 @@ from tkinter import ttk, messagebox
 from tkcalendar import DateEntry
 from controllers.borrow_controller import BorrowController
 from datetime import datetime
+from views.background_loader import BackgroundLoader
+from views.lazy_tree import LazyTreeLoader
 
 
 class BorrowView(ttk.Frame):
@@ -10,6 +12,10 @@ class BorrowView(ttk.Frame):
         super().__init__(parent)
         self.controller = BorrowController()
         self.selected_slip_id = None  # Lưu slip đang chọn
+        self.filters = {}  # Bộ lọc lịch sử đang áp dụng
+        self.next_cursor = None  # Con trỏ (borrow_date, slip_id) của trang tiếp theo
+        self.loaded_slips = set()
+        self.loader = BackgroundLoader(self)
         self._create_ui()
         self._load_borrows()  # Load dữ liệu ngay khi tạo view
 
@@ -40,23 +46,73 @@ class BorrowView(ttk.Frame):
         self.return_date_entry.set_date(datetime.now())  # Để trống mặc định
         self.return_date_entry.grid(row=1, column=3, padx=5, pady=5)
 
+        ttk.Label(form, text="Mã vạch / #ID (nhiều sách):").grid(row=2, column=0, sticky="w", padx=5, pady=5)
+        self.batch_entry = ttk.Entry(form, width=30)
+        self.batch_entry.grid(row=2, column=1, padx=5, pady=5)
+        ttk.Label(form, text="cách nhau bằng dấu phẩy, vd: 8935235, #12, #12").grid(
+            row=2, column=2, columnspan=2, sticky="w", padx=5, pady=5
+        )
+
         # -----------------------
         # Nút hành động
         # -----------------------
-        ttk.Button(form, text="📥 Tạo phiếu mượn", command=self._create_borrow).grid(row=2, column=0, pady=10)
-        ttk.Button(form, text="💾 Cập nhật", command=self._update_borrow).grid(row=2, column=1, pady=10)
-        ttk.Button(form, text="📤 Trả sách", command=self._return_borrow).grid(row=2, column=2, pady=10)
-        ttk.Button(form, text="🔄 Reset", command=self._reset_form).grid(row=2, column=3, pady=10)
+        ttk.Button(form, text="📥 Tạo phiếu mượn", command=self._create_borrow).grid(row=3, column=0, pady=10)
+        ttk.Button(form, text="💾 Cập nhật", command=self._update_borrow).grid(row=3, column=1, pady=10)
+        ttk.Button(form, text="📤 Trả sách", command=self._return_borrow).grid(row=3, column=2, pady=10)
+        ttk.Button(form, text="🔄 Reset", command=self._reset_form).grid(row=3, column=3, pady=10)
 
         # -----------------------
-        # Treeview hiển thị phiếu mượn/trả
+        # Bộ lọc lịch sử
         # -----------------------
+        filter_frame = ttk.LabelFrame(self, text="🔎 Lọc lịch sử", padding=5)
+        filter_frame.pack(padx=5, fill="x")
+
+        ttk.Label(filter_frame, text="Trạng thái:").pack(side="left", padx=(0, 5))
+        self.status_filter = ttk.Combobox(
+            filter_frame, width=12, state="readonly",
+            values=["Tất cả", "BORROWING", "RETURNED", "LATE", "LOST"]
+        )
+        self.status_filter.set("Tất cả")
+        self.status_filter.pack(side="left", padx=(0, 10))
+
+        ttk.Label(filter_frame, text="Từ ngày:").pack(side="left", padx=(0, 5))
+        self.date_from_filter = ttk.Entry(filter_frame, width=11)
+        self.date_from_filter.pack(side="left", padx=(0, 10))
+
+        ttk.Label(filter_frame, text="Đến ngày:").pack(side="left", padx=(0, 5))
+        self.date_to_filter = ttk.Entry(filter_frame, width=11)
+        self.date_to_filter.pack(side="left", padx=(0, 10))
+
+        ttk.Label(filter_frame, text="Bạn đọc:").pack(side="left", padx=(0, 5))
+        self.reader_filter = ttk.Entry(filter_frame, width=15)
+        self.reader_filter.pack(side="left", padx=(0, 10))
+
+        ttk.Label(filter_frame, text="Sách:").pack(side="left", padx=(0, 5))
+        self.book_filter = ttk.Entry(filter_frame, width=15)
+        self.book_filter.pack(side="left", padx=(0, 10))
+
+        ttk.Button(filter_frame, text="Lọc", command=self._apply_filters).pack(side="left", padx=2)
+        ttk.Button(filter_frame, text="Bỏ lọc", command=self._clear_filters).pack(side="left", padx=2)
+
+        self.count_label = ttk.Label(filter_frame, text="")
+        self.count_label.pack(side="right")
+
+        # -----------------------
+        # Treeview hiển thị phiếu mượn/trả (tải thêm khi cuộn)
+        # -----------------------
+        tree_frame = ttk.Frame(self)
+        tree_frame.pack(pady=10, fill="both", expand=True)
+
         columns = ("slip_id", "reader_name", "book_name", "borrow_date", "return_due", "return_date", "status")
-        self.tree = ttk.Treeview(self, columns=columns, show="headings")
+        self.tree = ttk.Treeview(tree_frame, columns=columns, show="headings")
         for col in columns:
             self.tree.heading(col, text=col.replace("_", " ").title())
             self.tree.column(col, width=100)
-        self.tree.pack(pady=20, fill="x")
+
+        vsb = ttk.Scrollbar(tree_frame, orient="vertical", command=self.tree.yview)
+        self.lazy_loader = LazyTreeLoader(self.tree, vsb, self._load_more)
+        self.tree.pack(side="left", fill="both", expand=True)
+        vsb.pack(side="right", fill="y")
 
         self.tree.bind("<Double-1>", self._on_row_click)
 
@@ -64,21 +120,94 @@ class BorrowView(ttk.Frame):
     # Load dữ liệu phiếu mượn/trả
     # -----------------------
     def _load_borrows(self):
-        for row in self.tree.get_children():
-            self.tree.delete(row)
+        """Tải trang đầu theo bộ lọc hiện tại ở nền (các trang sau tải khi cuộn)"""
+        self.lazy_loader.reset()
+        self.count_label.config(text="⏳ Đang tải...")
+        self._request_page(after=None)
+
+    def _load_more(self):
+        """Tải trang tiếp theo khi cuộn gần cuối"""
+        self._request_page(after=self.next_cursor)
+
+    def _request_page(self, after):
+        filters = dict(self.filters)
 
-        borrows = self.controller.get_all_borrows()
+        def on_loaded(result):
+            borrows, next_cursor = result
+            if after is None:
+                for row in self.tree.get_children():
+                    self.tree.delete(row)
+                self.loaded_slips.clear()
+            self._append_page(borrows, next_cursor)
+
+        def on_error(error: Exception):
+            self.lazy_loader.finish(False)
+            self.count_label.config(text="")
+            if after is None:
+                messagebox.showerror("Lỗi", f"Không thể tải lịch sử mượn/trả: {error}")
+
+        # Cùng key: lọc/tải lại mới hơn sẽ bỏ qua trang đang tải dở
+        self.loader.submit(
+            'borrows',
+            lambda: self.controller.get_borrows_page(after=after, **filters),
+            on_loaded,
+            on_error
+        )
+
+    def _append_page(self, borrows, next_cursor):
+        self.next_cursor = next_cursor
         for b in borrows:
+            self.loaded_slips.add(b["slip_id"])
             self.tree.insert("", "end", values=(
                 b["slip_id"],
                 b["full_name"],
-                b["book_name"],
+                b["book_name"] or "",
                 b["borrow_date"],
                 b["return_due"],
                 b["return_date"] if b["return_date"] else "",
                 b["status"]
             ))
 
+        suffix = "" if self.next_cursor is None else " (cuộn để tải thêm)"
+        self.count_label.config(text=f"Đã tải {len(self.loaded_slips)} phiếu{suffix}")
+        self.lazy_loader.finish(self.next_cursor is not None)
+
+    # -----------------------
+    # Lọc lịch sử
+    # -----------------------
+    def _apply_filters(self):
+        filters = {}
+        status = self.status_filter.get()
+        if status and status != "Tất cả":
+            filters["status"] = status
+
+        for key, entry in (("date_from", self.date_from_filter), ("date_to", self.date_to_filter)):
+            value = entry.get().strip()
+            if not value:
+                continue
+            try:
+                filters[key] = datetime.strptime(value, "%Y-%m-%d").date()
+            except ValueError:
+                messagebox.showwarning("Ngày không hợp lệ", f"'{value}' không đúng định dạng YYYY-MM-DD")
+                return
+
+        reader = self.reader_filter.get().strip()
+        if reader:
+            filters["reader"] = int(reader[1:]) if reader.startswith("#") and reader[1:].isdigit() else reader
+        book = self.book_filter.get().strip()
+        if book:
+            filters["book"] = int(book[1:]) if book.startswith("#") and book[1:].isdigit() else book
+
+        self.filters = filters
+        self._load_borrows()
+
+    def _clear_filters(self):
+        self.status_filter.set("Tất cả")
+        for entry in (self.date_from_filter, self.date_to_filter, self.reader_filter, self.book_filter):
+            entry.delete(0, tk.END)
+        self.filters = {}
+        self._load_borrows()
+
     # -----------------------
     # Reset form
     # -----------------------
@@ -86,6 +215,7 @@ class BorrowView(ttk.Frame):
         self.selected_slip_id = None
         self.reader_entry.delete(0, tk.END)
         self.book_entry.delete(0, tk.END)
+        self.batch_entry.delete(0, tk.END)
         self.borrow_date_entry.set_date("")
         self.return_date_entry.set_date("")
 
@@ -95,20 +225,37 @@ class BorrowView(ttk.Frame):
     def _create_borrow(self):
         reader_name = self.reader_entry.get().strip()
         book_name = self.book_entry.get().strip()
+        book_refs = self._parse_book_refs(self.batch_entry.get())
 
-        if not reader_name or not book_name:
+        if not reader_name or not (book_name or book_refs):
             messagebox.showwarning("Thiếu dữ liệu", "Vui lòng nhập đầy đủ tên bạn đọc và sách")
             return
 
-        success, msg = self.controller.create_borrow_by_name(
-            reader_name=reader_name,
-            book_name=book_name,
-        )
+        if book_refs:
+            # Nhiều sách trên 1 phiếu
+            success, msg = self.controller.create_borrow_batch(reader_name, book_refs)
+        else:
+            success, msg = self.controller.create_borrow_by_name(
+                reader_name=reader_name,
+                book_name=book_name,
+            )
         messagebox.showinfo("Kết quả", msg)
         if success:
             self._reset_form()
             self._load_borrows()
 
+    @staticmethod
+    def _parse_book_refs(text):
+        """'8935235, #12' -> ['8935235', 12] (#số = ID sách, còn lại = mã vạch)"""
+        refs = []
+        for token in text.split(","):
+            token = token.strip()
+            if token.startswith("#") and token[1:].isdigit():
+                refs.append(int(token[1:]))
+            elif token:
+                refs.append(token)
+        return refs
+
     # -----------------------
     # Cập nhật phiếu mượn
     # -----------------------
@@ -138,6 +285,20 @@ class BorrowView(ttk.Frame):
     # Trả sách
     # -----------------------
     def _return_borrow(self):
+        # Chọn nhiều dòng (Ctrl/Shift + click) thì trả tất cả phiếu 1 lần
+        selected_ids = list(dict.fromkeys(
+            self.tree.item(item)["values"][0] for item in self.tree.selection()
+        ))
+        if len(selected_ids) > 1:
+            if not messagebox.askyesno("Xác nhận", f"Trả sách cho {len(selected_ids)} phiếu đã chọn?"):
+                return
+            success, msg = self.controller.return_books_batch(selected_ids)
+            messagebox.showinfo("Kết quả", msg)
+            if success:
+                self._reset_form()
+                self._load_borrows()
+            return
+
         if not self.selected_slip_id:
             messagebox.showwarning("Chưa chọn", "Vui lòng chọn phiếu để trả sách")
             return
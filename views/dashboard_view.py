@@ -5,9 +5,11 @@ import tkinter as tk
 from tkinter import ttk
 from datetime import datetime
 import logging
+import time
 
 from controllers.reader_controller import ReaderController
 from controllers.book_controller import BookController
+from views.background_loader import BackgroundLoader
 
 logger = logging.getLogger(__name__)
 
@@ -15,6 +17,9 @@ logger = logging.getLogger(__name__)
 class DashboardView(ttk.Frame):
     """View trang chủ Dashboard"""
 
+    # Tính lại thống kê dù không có thay đổi sau mỗi khoảng này (giây)
+    FORCE_REFRESH_SECONDS = 600
+
     def __init__(self, parent, navigate_callback):
         super().__init__(parent)
         self.navigate_callback = navigate_callback
@@ -23,6 +28,9 @@ class DashboardView(ttk.Frame):
 
         # Statistics variables
         self.stats_labels = {}
+        self.loader = BackgroundLoader(self)
+        self.data_version = None  # Version nhật ký thay đổi của lần thống kê gần nhất
+        self.stats_loaded_at = 0.0
 
         self._create_widgets()
         self._load_statistics()
@@ -316,54 +324,73 @@ class DashboardView(ttk.Frame):
         )
         refresh_btn.pack(pady=(15, 0))
 
-    def _load_statistics(self):
-        """Load dữ liệu thống kê từ database"""
-        try:
-            # ✅ Lấy thống kê bạn đọc
-            reader_stats = self.reader_controller.get_statistics()
-
-            total_readers = reader_stats.get('total', 0)
-            active_readers = reader_stats.get('active', 0)
-            expiring_soon = reader_stats.get('expiring_soon', 0)
-
-            # Update readers card
-            if 'readers_value' in self.stats_labels:
-                self.stats_labels['readers_value'].config(text=str(total_readers))
-            if 'readers_subtext' in self.stats_labels:
-                self.stats_labels['readers_subtext'].config(
-                    text=f"{active_readers} đang hoạt động"
-                )
-
-            # Update expired card
-            if 'expired_value' in self.stats_labels:
-                self.stats_labels['expired_value'].config(text=str(expiring_soon))
-
-            # ✅ Lấy thống kê sách
-            book_stats = self.book_controller.get_statistics()
-
-            total_books = book_stats.get('total_books', 0)
-            borrowed_qty = book_stats.get('borrowed_quantity', 0)
-
-            # Update books card
-            if 'books_value' in self.stats_labels:
-                self.stats_labels['books_value'].config(text=str(total_books))
-            if 'books_subtext' in self.stats_labels:
-                self.stats_labels['books_subtext'].config(
-                    text=f"{total_books} đầu sách"
-                )
-
-            # Update borrowing card
-            if 'borrowing_value' in self.stats_labels:
-                self.stats_labels['borrowing_value'].config(text=str(borrowed_qty))
-            if 'borrowing_subtext' in self.stats_labels:
-                self.stats_labels['borrowing_subtext'].config(
-                    text=f"{borrowed_qty} cuốn đang mượn"
-                )
-
-            logger.info("✅ Đã cập nhật thống kê Dashboard")
-
-        except Exception as e:
-            logger.error(f"❌ Lỗi load thống kê Dashboard: {e}")
+    def _load_statistics(self, force: bool = True):
+        """
+        Load dữ liệu thống kê từ database (chạy nền, không làm đứng giao diện)
+        force=False: bỏ qua nếu nhật ký thay đổi không có gì mới
+        """
+        last_version = None if force else self.data_version
+
+        def load():
+            version = self.book_controller.get_data_version()
+            if version is not None and version == last_version:
+                return None
+            return version, self.reader_controller.get_statistics(), self.book_controller.get_statistics()
+
+        self.loader.submit(
+            'statistics',
+            load,
+            self._show_statistics,
+            lambda e: logger.error(f"❌ Lỗi load thống kê Dashboard: {e}")
+        )
+
+    def _show_statistics(self, result):
+        """Hiển thị thống kê lên các thẻ"""
+        if result is None:
+            # Không có thay đổi kể từ lần trước
+            return
+
+        self.data_version, reader_stats, book_stats = result
+        self.stats_loaded_at = time.monotonic()
+
+        # ✅ Thống kê bạn đọc
+        total_readers = reader_stats.get('total', 0)
+        active_readers = reader_stats.get('active', 0)
+        expiring_soon = reader_stats.get('expiring_soon', 0)
+
+        # Update readers card
+        if 'readers_value' in self.stats_labels:
+            self.stats_labels['readers_value'].config(text=str(total_readers))
+        if 'readers_subtext' in self.stats_labels:
+            self.stats_labels['readers_subtext'].config(
+                text=f"{active_readers} đang hoạt động"
+            )
+
+        # Update expired card
+        if 'expired_value' in self.stats_labels:
+            self.stats_labels['expired_value'].config(text=str(expiring_soon))
+
+        # ✅ Thống kê sách
+        total_books = book_stats.get('total_books', 0)
+        borrowed_qty = book_stats.get('borrowed_quantity', 0)
+
+        # Update books card
+        if 'books_value' in self.stats_labels:
+            self.stats_labels['books_value'].config(text=str(total_books))
+        if 'books_subtext' in self.stats_labels:
+            self.stats_labels['books_subtext'].config(
+                text=f"{total_books} đầu sách"
+            )
+
+        # Update borrowing card
+        if 'borrowing_value' in self.stats_labels:
+            self.stats_labels['borrowing_value'].config(text=str(borrowed_qty))
+        if 'borrowing_subtext' in self.stats_labels:
+            self.stats_labels['borrowing_subtext'].config(
+                text=f"{borrowed_qty} cuốn đang mượn"
+            )
+
+        logger.info("✅ Đã cập nhật thống kê Dashboard")
 
     def _update_clock(self):
         """Cập nhật đồng hồ"""
@@ -384,9 +411,14 @@ class DashboardView(ttk.Frame):
 
     def _schedule_refresh(self):
         """Lên lịch tự động refresh thống kê"""
-        self._load_statistics()
-        # Refresh mỗi 30 giây
-        self.after(30000, self._schedule_refresh)
+        # Refresh mỗi 30 giây, chỉ khi dữ liệu có thay đổi
+        self.after(30000, self._auto_refresh)
+
+    def _auto_refresh(self):
+        # Số liệu theo ngày (thẻ sắp hết hạn) vẫn được tính lại định kỳ
+        force = time.monotonic() - self.stats_loaded_at > self.FORCE_REFRESH_SECONDS
+        self._load_statistics(force=force)
+        self._schedule_refresh()
 
     def _darken_color(self, hex_color, factor=0.8):
         """Làm tối màu"""
@@ -0,0 +1,48 @@
+"""
+Lazy Treeview - Tự động tải trang tiếp theo khi cuộn gần cuối danh sách
+"""
+from tkinter import ttk
+from typing import Callable
+
+
+class LazyTreeLoader:
+    """
+    Gắn vào Treeview + Scrollbar dọc, gọi load_more khi cuộn gần cuối
+
+    View phải gọi finish(has_more) sau mỗi lần tải xong một trang
+    để mở khóa lần tải tiếp theo.
+    """
+
+    def __init__(
+            self,
+            tree: ttk.Treeview,
+            scrollbar: ttk.Scrollbar,
+            load_more: Callable[[], None],
+            threshold: float = 0.9
+    ):
+        self.tree = tree
+        self.scrollbar = scrollbar
+        self.load_more = load_more
+        self.threshold = threshold
+        self.has_more = False
+        self.loading = False
+
+        self.tree.configure(yscrollcommand=self._on_scroll)
+
+    def _on_scroll(self, first, last):
+        """Cập nhật scrollbar và kiểm tra có cần tải thêm không"""
+        self.scrollbar.set(first, last)
+
+        if self.has_more and not self.loading and float(last) >= self.threshold:
+            self.loading = True
+            self.tree.after_idle(self.load_more)
+
+    def reset(self):
+        """Bắt đầu tải lại từ trang đầu"""
+        self.loading = True
+        self.has_more = False
+
+    def finish(self, has_more: bool):
+        """Đánh dấu đã tải xong một trang"""
+        self.loading = False
+        self.has_more = has_more
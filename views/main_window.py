@@ -3,7 +3,8 @@ from tkinter import ttk, messagebox
 import sys
 import logging
 
-from config.database import db
+from config import schema
+from config.database import PoolExhausted, db
 from config.settings import AppConfig
 from views.borrow_view import BorrowView
 from views.dashboard_view import DashboardView
@@ -41,6 +42,11 @@ class MainWindow(tk.Tk):
             self.destroy()
             sys.exit(1)
 
+        # Chỉ kiểm tra bảng phụ / index (nhật ký thay đổi, FULLTEXT...): thiếu thì dùng
+        # truy vấn dự phòng. Tạo bằng lệnh riêng: python -m tools.migrate
+        schema.check_tables()
+        schema.check_indexes()
+
         # Configure style
         self._configure_style()
 
@@ -54,6 +60,14 @@ class MainWindow(tk.Tk):
         # Bind close event
         self.protocol("WM_DELETE_WINDOW", self._on_closing)
 
+    def report_callback_exception(self, exc, value, traceback):
+        """Lỗi trong callback Tk: báo database đang bận thay vì chỉ in traceback"""
+        if isinstance(value, PoolExhausted):
+            logger.error(f"❌ {value}")
+            messagebox.showwarning("⏳ Database đang bận", f"{value}\n\nVui lòng thử lại sau giây lát.", parent=self)
+            return
+        super().report_callback_exception(exc, value, traceback)
+
     def _test_database(self) -> bool:
         """Test kết nối database"""
         try:
@@ -251,7 +265,11 @@ class MainWindow(tk.Tk):
             current_tab = self.notebook.select()
             current_widget = self.notebook.nametowidget(current_tab)
 
-            if hasattr(current_widget, '_load_data'):
+            if hasattr(current_widget, '_refresh_changes'):
+                # Chỉ tải phần đã thay đổi (theo nhật ký thay đổi)
+                current_widget._refresh_changes()
+                self.status_label.config(text="✅ Đã làm mới dữ liệu")
+            elif hasattr(current_widget, '_load_data'):
                 current_widget._load_data()
                 self.status_label.config(text="✅ Đã làm mới dữ liệu")
             elif hasattr(current_widget, '_load_statistics'):
@@ -1,11 +1,16 @@
 import tkinter as tk
-from tkinter import ttk, messagebox
+from tkinter import ttk, messagebox, filedialog
+from operator import attrgetter
 from typing import Optional, List
 import logging
 
+from models.columnar import ColumnarResult
+from models.fields import to_date_str
 from models.reader import Reader, get_all_statuses, get_status_display_map
 from controllers.reader_controller import ReaderController
+from views.background_loader import BackgroundLoader
 from views.reader_dialog import ReaderDialog
+from views.tree_sync import KeyedTreeSync
 from utils.messagebox_helper import MessageBoxHelper
 
 logger = logging.getLogger(__name__)
@@ -14,13 +19,33 @@ logger = logging.getLogger(__name__)
 class ReaderView(ttk.Frame):
     """Giao diện quản lý bạn đọc - Enhanced Version"""
 
+    # Trường của từng cột Treeview (theo thứ tự _reader_row) và trường dùng khi sắp xếp theo cột
+    TREE_FIELDS = (
+        'reader_id', 'full_name', 'phone', 'email', 'address',
+        'card_start', 'card_end', 'status', 'reputation_score'
+    )
+    SORT_FIELDS = {
+        'ID': 'reader_id', 'Họ tên': 'full_name', 'Điện thoại': 'phone', 'Email': 'email',
+        'Địa chỉ': 'address', 'Ngày cấp thẻ': 'card_start', 'Ngày hết hạn': 'card_end',
+        'Còn lại': 'card_end', 'Trạng thái': 'status', 'Điểm UT': 'reputation_score'
+    }
+    DATE_FIELDS = ('card_start', 'card_end')
+
     def __init__(self, parent):
         super().__init__(parent)
         self.controller = ReaderController()
         self.msg_helper = MessageBoxHelper()
-        self.current_readers: List[Reader] = []
+        self.current_readers = ColumnarResult({}, Reader.from_dict)  # Lần tải đầy đủ gần nhất (dạng cột)
+        self.displayed_readers = self.current_readers  # Danh sách đang hiển thị (tải/tìm/lọc)
+        self.sort_state = None  # (cột Treeview, giảm dần) đang sắp xếp
         self.selected_reader: Optional[Reader] = None
         self.search_after_id = None  # For debouncing
+        self.loader = BackgroundLoader(self)  # Tải/tìm/lọc dùng chung key 'readers'
+        self.data_version: Optional[int] = None  # Con trỏ nhật ký thay đổi của lần tải đầy đủ gần nhất
+        self.showing_all = False  # False khi đang hiển thị kết quả tìm kiếm/lọc
+        self.export_written = 0  # Số dòng đã ghi của lần xuất đang chạy (luồng nền cập nhật)
+        self.export_task = None  # Tiến trình con đang xuất PDF (nếu có)
+        self.import_processed = 0  # Số dòng đã xử lý của lần nhập file đang chạy
 
         self._create_widgets()
         self._load_data()
@@ -99,6 +124,15 @@ class ReaderView(ttk.Frame):
         right_frame = ttk.Frame(toolbar)
         right_frame.pack(side='right')
 
+        ttk.Button(
+            right_frame,
+            text="📥 Nhập file",
+            command=self._import_file,
+            width=12
+        ).pack(side='left', padx=2, pady=3)
+
+        ttk.Separator(right_frame, orient='vertical').pack(side='left', fill='y', padx=5)
+
         ttk.Label(right_frame, text="📤 Xuất:", font=('Arial', 9, 'bold')).pack(side='left', padx=5)
 
         ttk.Button(
@@ -340,6 +374,17 @@ class ReaderView(ttk.Frame):
         self.context_menu.add_separator()
         self.context_menu.add_command(label="🔄 Làm mới", command=self._load_data)
 
+        # Cấu hình màu tag
+        self.tree.tag_configure('active', foreground='#4CAF50')
+        self.tree.tag_configure('expired', foreground='#F44336')
+        self.tree.tag_configure('locked', foreground='#FF9800')
+        self.tree.tag_configure('high_rep', background='#E8F5E9')
+        self.tree.tag_configure('low_rep', background='#FFEBEE')
+        self.tree.tag_configure('expiring_soon', background='#FFF9C4')
+
+        # Cập nhật dòng theo reader_id thay vì xóa hết rồi chèn lại
+        self.tree_sync = KeyedTreeSync(self.tree)
+
         # Bind events
         self.tree.bind('<<TreeviewSelect>>', self._on_select)
         self.tree.bind('<Double-1>', lambda e: self._show_edit_dialog())
@@ -392,83 +437,133 @@ class ReaderView(ttk.Frame):
 
         # Keyboard shortcuts
         self.bind_all('<Control-n>', lambda e: self._show_add_dialog())
-        self.bind_all('<F5>', lambda e: self._load_data())
+        self.bind_all('<F5>', lambda e: self._refresh_changes())
         self.bind_all('<Control-f>', lambda e: self.search_entry.focus())
 
     def _load_data(self):
-        """Load dữ liệu từ database"""
-        try:
-            self.status_label.config(text="⏳ Đang tải dữ liệu...")
-            self.update_idletasks()
-
-            self.current_readers = self.controller.get_all_readers()
-            self._populate_tree(self.current_readers)
-
-            self.status_label.config(text=f"✅ Đã tải {len(self.current_readers)} bạn đọc")
-            self.search_result_label.config(text="")
-
-            logger.info(f"Loaded {len(self.current_readers)} readers")
-        except Exception as e:
-            self.status_label.config(text="❌ Lỗi tải dữ liệu")
-            self.msg_helper.show_error("Lỗi", f"Không thể tải dữ liệu: {str(e)}", parent=self)
-            logger.error(f"Error loading data: {e}")
-
-    def _populate_tree(self, readers: List[Reader]):
-        """Hiển thị dữ liệu lên Treeview"""
-        # Xóa dữ liệu cũ
-        for item in self.tree.get_children():
-            self.tree.delete(item)
-
-        # Thêm dữ liệu mới
-        for reader in readers:
-            days_left = reader.get_days_until_expiry()
-            days_display = str(days_left) if days_left is not None else "N/A"
-
-            values = (
-                reader.reader_id,
-                reader.full_name or '',
-                reader.phone or 'N/A',
-                reader.email or 'N/A',
-                (reader.address or 'N/A')[:50] + '...' if reader.address and len(reader.address) > 50 else (
-                            reader.address or 'N/A'),
-                reader.card_start or 'N/A',
-                reader.card_end or 'N/A',
-                days_display,
-                get_status_display_map().get(reader.status, reader.status),
-                reader.reputation_score
-            )
+        """Load dữ liệu từ database (chạy nền)"""
+        self.status_label.config(text="⏳ Đang tải dữ liệu...")
+        def load():
+            # Lấy version trước khi tải: thay đổi xảy ra trong lúc tải sẽ được áp lại sau
+            return self.controller.get_data_version(), self.controller.get_all_readers()
 
-            # Tags cho màu sắc
-            tags = []
-            if reader.status == 'ACTIVE':
-                tags.append('active')
-            elif reader.status == 'EXPIRED':
-                tags.append('expired')
-            elif reader.status == 'LOCKED':
-                tags.append('locked')
+        self.loader.submit('readers', load, self._on_data_loaded, self._on_load_error)
 
-            if reader.reputation_score >= 90:
-                tags.append('high_rep')
-            elif reader.reputation_score < 50:
-                tags.append('low_rep')
+    def _on_data_loaded(self, result):
+        self.data_version, self.current_readers = result
+        self.showing_all = True
+        self._populate_tree(self.current_readers)
 
-            if days_left is not None and 0 <= days_left <= 7:
-                tags.append('expiring_soon')
+        self.status_label.config(text=f"✅ Đã tải {len(self.current_readers)} bạn đọc")
+        self.search_result_label.config(text="")
 
-            self.tree.insert('', 'end', values=values, tags=tuple(tags))
+        logger.info(f"Loaded {len(self.current_readers)} readers")
 
-        # Cấu hình màu tag
-        self.tree.tag_configure('active', foreground='#4CAF50')
-        self.tree.tag_configure('expired', foreground='#F44336')
-        self.tree.tag_configure('locked', foreground='#FF9800')
-        self.tree.tag_configure('high_rep', background='#E8F5E9')
-        self.tree.tag_configure('low_rep', background='#FFEBEE')
-        self.tree.tag_configure('expiring_soon', background='#FFF9C4')
+    def _refresh_changes(self):
+        """Làm mới: chỉ tải các bạn đọc đã thay đổi kể từ lần tải trước"""
+        if self.data_version is None or not self.showing_all:
+            self._load_data()
+            return
+
+        version = self.data_version
+        self.loader.submit(
+            'readers',
+            lambda: self.controller.get_changes_since(version),
+            self._apply_changes,
+            self._on_load_error
+        )
+
+    def _apply_changes(self, delta: Optional[dict]):
+        """Áp các thay đổi vào danh sách đang hiển thị"""
+        if delta is None:
+            self._load_data()
+            return
+
+        self.data_version = delta['version']
+        if not delta['changed'] and not delta['deleted']:
+            self.status_label.config(text="✅ Dữ liệu không thay đổi")
+            return
+
+        # Làm trên cột: bỏ dòng đã xóa/đã đổi, nối các dòng mới, sắp lại theo id
+        deleted = set(delta['deleted'])
+        changed = {reader.reader_id: reader for reader in delta['changed']}
+        current = self.current_readers
+        kept = current.filter([
+            reader_id not in deleted and reader_id not in changed
+            for reader_id in current.values('reader_id')
+        ])
+        updated = ColumnarResult.from_models(
+            changed.values(), Reader.COLUMNS, Reader.from_dict, Reader.NUMERIC_COLUMNS
+        )
+        readers = kept.concat(updated).sort_by('reader_id', reverse=True)
+
+        self.current_readers = readers
+        self._populate_tree(readers)
+        self.status_label.config(
+            text=f"🔄 Đã cập nhật {len(delta['changed']) + len(delta['deleted'])} bạn đọc thay đổi"
+        )
+
+    def _on_load_error(self, error: Exception):
+        self.status_label.config(text="❌ Lỗi tải dữ liệu")
+        self.msg_helper.show_error("Lỗi", f"Không thể tải dữ liệu: {str(error)}", parent=self)
+        logger.error(f"Error loading data: {error}")
+
+    def _populate_tree(self, readers):
+        """
+        Hiển thị dữ liệu lên Treeview (chỉ cập nhật các dòng thay đổi)
+        readers: ColumnarResult (đọc thẳng từ cột) hoặc list Reader
+        """
+        self.displayed_readers = readers
+        self.sort_state = None
+        if isinstance(readers, ColumnarResult):
+            records = readers.records(self.TREE_FIELDS)
+        else:
+            getter = attrgetter(*self.TREE_FIELDS)
+            records = (getter(reader) for reader in readers)
+        self.tree_sync.sync(self._reader_row(*values) for values in records)
 
         # Cập nhật count
         self.count_label.config(text=f"Tổng: {len(readers)} bạn đọc")
         self._update_button_states()
 
+    @staticmethod
+    def _reader_row(reader_id, full_name, phone, email, address, card_start, card_end, status, reputation_score):
+        """(reader_id, values, tags) của 1 dòng bạn đọc (tham số theo TREE_FIELDS)"""
+        days_left = Reader.days_until(card_end)
+        days_display = str(days_left) if days_left is not None else "N/A"
+
+        values = (
+            reader_id,
+            full_name or '',
+            phone or 'N/A',
+            email or 'N/A',
+            (address or 'N/A')[:50] + '...' if address and len(address) > 50 else (address or 'N/A'),
+            to_date_str(card_start) or 'N/A',
+            to_date_str(card_end) or 'N/A',
+            days_display,
+            get_status_display_map().get(status, status),
+            reputation_score
+        )
+
+        # Tags cho màu sắc
+        tags = []
+        if status == 'ACTIVE':
+            tags.append('active')
+        elif status == 'EXPIRED':
+            tags.append('expired')
+        elif status == 'LOCKED':
+            tags.append('locked')
+
+        if reputation_score >= 90:
+            tags.append('high_rep')
+        elif reputation_score < 50:
+            tags.append('low_rep')
+
+        if days_left is not None and 0 <= days_left <= 7:
+            tags.append('expiring_soon')
+
+        return reader_id, values, tags
+
     def _on_select(self, event):
         """Xử lý khi chọn 1 dòng"""
         selection = self.tree.selection()
@@ -544,11 +639,10 @@ class ReaderView(ttk.Frame):
             self._load_data()
             return
 
-        try:
-            self.status_label.config(text=f"🔍 Đang tìm kiếm '{keyword}'...")
-            self.update_idletasks()
+        self.status_label.config(text=f"🔍 Đang tìm kiếm '{keyword}'...")
 
-            readers = self.controller.search_readers(keyword, search_by)
+        def on_found(readers: List[Reader]):
+            self.showing_all = False
             self._populate_tree(readers)
 
             if readers:
@@ -563,9 +657,13 @@ class ReaderView(ttk.Frame):
                     text="❌ Không có kết quả",
                     foreground='#F44336'
                 )
-        except Exception as e:
+
+        def on_error(error: Exception):
             self.status_label.config(text="❌ Lỗi tìm kiếm")
-            self.msg_helper.show_error("Lỗi tìm kiếm", str(e), parent=self)
+            self.msg_helper.show_error("Lỗi tìm kiếm", str(error), parent=self)
+
+        # Gõ phím mới hơn sẽ thay thế lần tìm đang chạy
+        self.loader.submit('readers', lambda: self.controller.search_readers(keyword, search_by), on_found, on_error)
 
     def _reset_search(self):
         """Reset tìm kiếm"""
@@ -575,34 +673,38 @@ class ReaderView(ttk.Frame):
         self._load_data()
 
     def _filter(self):
-        """Lọc dữ liệu"""
-        try:
-            self.status_label.config(text="🔎 Đang lọc dữ liệu...")
-            self.update_idletasks()
+        """Lọc dữ liệu (chạy nền)"""
+        self.status_label.config(text="🔎 Đang lọc dữ liệu...")
 
-            status = self.filter_status_var.get()
-            status = None if status == "Tất cả" else status
+        status = self.filter_status_var.get()
+        status = None if status == "Tất cả" else status
 
-            min_rep = self.filter_min_rep_var.get()
-            max_rep = self.filter_max_rep_var.get()
-            expiring = self.filter_expiring_var.get()
+        min_rep = self.filter_min_rep_var.get()
+        max_rep = self.filter_max_rep_var.get()
+        expiring = self.filter_expiring_var.get()
 
-            readers = self.controller.filter_readers(
+        def load():
+            return self.controller.filter_readers(
                 status=status,
                 min_reputation=min_rep,
                 max_reputation=max_rep,
                 expiring_soon=expiring
             )
 
+        def on_filtered(readers: List[Reader]):
+            self.showing_all = False
             self._populate_tree(readers)
             self.status_label.config(text=f"✅ Đã lọc: {len(readers)} kết quả")
             self.search_result_label.config(
                 text=f"📊 {len(readers)} bạn đọc phù hợp",
                 foreground='#1976D2'
             )
-        except Exception as e:
+
+        def on_error(error: Exception):
             self.status_label.config(text="❌ Lỗi lọc")
-            self.msg_helper.show_error("Lỗi lọc", str(e), parent=self)
+            self.msg_helper.show_error("Lỗi lọc", str(error), parent=self)
+
+        self.loader.submit('readers', load, on_filtered, on_error)
 
     def _reset_filter(self):
         """Reset bộ lọc"""
@@ -638,9 +740,20 @@ class ReaderView(ttk.Frame):
         self._filter()
 
     def _sort_column(self, col):
-        """Sắp xếp theo cột"""
-        # TODO: Implement sorting
-        pass
+        """Sắp xếp danh sách đang hiển thị theo cột (bấm lần nữa để đảo chiều)"""
+        field = self.SORT_FIELDS.get(col)
+        if field is None:
+            return
+
+        readers = self.displayed_readers
+        if not isinstance(readers, ColumnarResult):
+            readers = ColumnarResult.from_models(readers, Reader.COLUMNS, Reader.from_dict, Reader.NUMERIC_COLUMNS)
+
+        reverse = self.sort_state == (col, False)
+        key = to_date_str if field in self.DATE_FIELDS else None
+        self._populate_tree(readers.sort_by(field, reverse, key))
+        self.sort_state = (col, reverse)
+        self.status_label.config(text=f"↕ Sắp xếp theo {col} ({'giảm' if reverse else 'tăng'} dần)")
 
     def _show_add_dialog(self):
         """Hiển thị dialog thêm mới"""
@@ -649,7 +762,7 @@ class ReaderView(ttk.Frame):
 
         if dialog.result:
             if self.controller.add_reader(dialog.result, parent=self):
-                self._load_data()
+                self._refresh_changes()
 
     def _show_edit_dialog(self):
         """Hiển thị dialog sửa"""
@@ -666,7 +779,7 @@ class ReaderView(ttk.Frame):
 
         if dialog.result:
             if self.controller.update_reader(dialog.result, parent=self):
-                self._load_data()
+                self._refresh_changes()
 
     def _delete_reader(self):
         """Xóa bạn đọc"""
@@ -680,7 +793,7 @@ class ReaderView(ttk.Frame):
                 parent=self
         ):
             self.selected_reader = None
-            self._load_data()
+            self._refresh_changes()
 
     def _lock_reader(self):
         """Khóa bạn đọc"""
@@ -689,7 +802,7 @@ class ReaderView(ttk.Frame):
             return
 
         if self.controller.lock_reader(self.selected_reader.reader_id, parent=self):
-            self._load_data()
+            self._refresh_changes()
 
     def _unlock_reader(self):
         """Mở khóa bạn đọc"""
@@ -698,7 +811,7 @@ class ReaderView(ttk.Frame):
             return
 
         if self.controller.unlock_reader(self.selected_reader.reader_id, parent=self):
-            self._load_data()
+            self._refresh_changes()
 
     def _extend_card(self):
         """Gia hạn thẻ"""
@@ -764,7 +877,7 @@ class ReaderView(ttk.Frame):
 
         def do_extend():
             if self.controller.extend_card(self.selected_reader.reader_id, days_var.get(), parent=self):
-                self._load_data()
+                self._refresh_changes()
                 dialog.destroy()
 
         ttk.Button(
@@ -1061,7 +1174,7 @@ class ReaderView(ttk.Frame):
         """Tự động cập nhật thẻ hết hạn"""
         if self.controller.auto_update_expired(parent=dialog):
             dialog.destroy()
-            self._load_data()
+            self._refresh_changes()
             self._show_statistics()
 
     def _export_statistics_report(self):
@@ -1074,25 +1187,137 @@ class ReaderView(ttk.Frame):
 
     def _export_json(self):
         """Xuất dữ liệu ra JSON"""
-        if self.controller.export_json(self.current_readers, parent=self):
+        if self.showing_all:
+            self._export_all('json')
+            return
+        if self.controller.export_json(self.displayed_readers, parent=self):
             self.status_label.config(text="✅ Đã xuất JSON thành công")
 
     def _export_csv(self):
         """Xuất dữ liệu ra CSV"""
-        if self.controller.export_csv(self.current_readers, parent=self):
+        if self.showing_all:
+            self._export_all('csv')
+            return
+        if self.controller.export_csv(self.displayed_readers, parent=self):
             self.status_label.config(text="✅ Đã xuất CSV thành công")
 
     def _export_excel(self):
         """Xuất dữ liệu ra Excel"""
-        if self.controller.export_excel(self.current_readers, parent=self):
+        if self.showing_all:
+            self._export_all('excel')
+            return
+        if self.controller.export_excel(self.displayed_readers, parent=self):
             self.status_label.config(text="✅ Đã xuất Excel thành công")
 
     def _export_pdf(self):
         """Xuất dữ liệu ra PDF"""
-        if self.controller.export_pdf(self.current_readers, parent=self):
+        if self.showing_all:
+            self._export_all('pdf')
+            return
+        if self.controller.export_pdf(self.displayed_readers, parent=self):
             self.status_label.config(text="✅ Đã xuất PDF thành công")
 
+    def _export_all(self, fmt: str):
+        """
+        Xuất toàn bộ bạn đọc thẳng từ database, tiến độ hiện trên thanh trạng thái
+        JSON/CSV/Excel chạy ở luồng nền, PDF chạy ở tiến trình con (dàn trang nặng CPU)
+        """
+        if self._export_busy():
+            self.msg_helper.show_warning("Đang xuất dữ liệu", "Vui lòng chờ lần xuất trước hoàn tất", parent=self)
+            return
+
+        self.export_written = 0
+
+        def on_progress(count: int):
+            # Chạy ở luồng nền: chỉ ghi nhận, giao diện tự đọc trong _show_export_progress
+            self.export_written = count
+
+        def on_done(result):
+            if self.controller.show_export_result(fmt, result, parent=self):
+                self.status_label.config(text=f"✅ Đã xuất {self.controller.STREAM_EXPORT_FORMATS[fmt]} thành công")
+            else:
+                self.status_label.config(text="❌ Lỗi xuất dữ liệu")
+
+        def on_error(error: Exception):
+            self.status_label.config(text="❌ Lỗi xuất dữ liệu")
+            self.msg_helper.show_error("Lỗi xuất dữ liệu", str(error), parent=self)
+
+        if fmt == 'pdf':
+            self.export_task = self.controller.start_export_process(fmt)
+            self._poll_export_task(on_done, on_error)
+        else:
+            self.loader.submit('export', lambda: self.controller.export_all(fmt, on_progress), on_done, on_error)
+        self._show_export_progress()
+
+    def _poll_export_task(self, on_done, on_error):
+        """Đọc tiến độ/kết quả từ tiến trình con xuất PDF"""
+        for kind, value in self.export_task.poll():
+            if kind == 'progress':
+                self.export_written = value
+            elif kind == 'done':
+                on_done(value)
+            else:
+                on_error(value)
+
+        if not self.export_task.finished:
+            self.after(200, lambda: self._poll_export_task(on_done, on_error))
+
+    def _export_busy(self) -> bool:
+        """Đang có lần xuất toàn bộ chưa xong"""
+        return self.loader.is_busy('export') or (self.export_task is not None and not self.export_task.finished)
+
+    def _show_export_progress(self):
+        """Cập nhật tiến độ xuất file tới khi xong"""
+        if not self._export_busy():
+            return
+        self.status_label.config(
+            text=f"⏳ Đang xuất: {self.export_written}/{len(self.current_readers)} bạn đọc"
+        )
+        self.after(200, self._show_export_progress)
+
+    def _import_file(self):
+        """Nhập bạn đọc từ file CSV/Excel (chạy nền, tiến độ hiện trên thanh trạng thái)"""
+        if self.loader.is_busy('import'):
+            self.msg_helper.show_warning("Đang nhập dữ liệu", "Vui lòng chờ lần nhập trước hoàn tất", parent=self)
+            return
+
+        filename = filedialog.askopenfilename(
+            parent=self,
+            title="Chọn file nhập bạn đọc",
+            filetypes=[("Excel/CSV", "*.xlsx *.csv"), ("Excel", "*.xlsx"), ("CSV", "*.csv")]
+        )
+        if not filename:
+            return
+
+        self.import_processed = 0
+
+        def on_progress(count: int):
+            # Chạy ở luồng nền: chỉ ghi nhận, giao diện tự đọc trong _show_import_progress
+            self.import_processed = count
+
+        def on_done(result: dict):
+            self.status_label.config(text=f"✅ Đã nhập {result['imported']}/{result['total']} bạn đọc")
+            if self.controller.show_import_result(result, parent=self):
+                self._load_data()
+
+        def on_error(error: Exception):
+            self.status_label.config(text="❌ Lỗi nhập dữ liệu")
+            self.msg_helper.show_error("Lỗi nhập dữ liệu", str(error), parent=self)
+
+        self.loader.submit('import', lambda: self.controller.import_file(filename, on_progress), on_done, on_error)
+        self._show_import_progress()
+
+    def _show_import_progress(self):
+        """Cập nhật tiến độ nhập file tới khi xong"""
+        if not self.loader.is_busy('import'):
+            return
+        self.status_label.config(text=f"⏳ Đang nhập: {self.import_processed} dòng")
+        self.after(200, self._show_import_progress)
+
     def _schedule_auto_refresh(self):
-        """Lên lịch auto-refresh mỗi 5 phút"""
-        self._load_data()
-        self.after(300000, self._schedule_auto_refresh)  # 5 minutes
\ No newline at end of file
+        """Lên lịch auto-refresh mỗi 5 phút (chỉ tải phần thay đổi)"""
+        self.after(300000, self._auto_refresh)  # 5 minutes
+
+    def _auto_refresh(self):
+        self._refresh_changes()
+        self._schedule_auto_refresh()
\ No newline at end of file
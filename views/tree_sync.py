@@ -0,0 +1,77 @@
+"""
+Tree Sync - Cập nhật Treeview theo khóa, chỉ động tới các dòng thay đổi
+"""
+from tkinter import ttk
+from typing import Dict, Hashable, Iterable, List, Tuple
+
+# (khóa, values, tags) của 1 dòng
+Row = Tuple[Hashable, tuple, tuple]
+
+
+class KeyedTreeSync:
+    """
+    Đồng bộ Treeview với danh sách dòng có khóa (book_id, reader_id...)
+
+    iid của dòng = khóa, view giữ bản sao values/tags đã hiển thị nên
+    tải lại 50k dòng mà chỉ 3 dòng đổi thì chỉ tốn vài lệnh Tk.
+    Dòng đang chọn vẫn được giữ nếu còn trong kết quả mới.
+    """
+
+    def __init__(self, tree: ttk.Treeview):
+        self.tree = tree
+        self._rows: Dict[str, Tuple[tuple, tuple]] = {}
+        self._order: List[str] = []
+
+    def __len__(self) -> int:
+        return len(self._order)
+
+    def sync(self, rows: Iterable[Row]):
+        """Hiển thị đúng danh sách rows (thêm/sửa/xóa/sắp xếp lại khi cần)"""
+        new_rows: Dict[str, Tuple[tuple, tuple]] = {}
+        order: List[str] = []
+        for key, values, tags in rows:
+            iid = str(key)
+            if iid not in new_rows:
+                order.append(iid)
+            new_rows[iid] = (tuple(values), tuple(tags))
+
+        removed = [iid for iid in self._order if iid not in new_rows]
+        if removed:
+            self.tree.delete(*removed)
+
+        # Thứ tự hiện tại sau khi xóa + chèn cuối, để biết có cần sắp lại không
+        current = [iid for iid in self._order if iid in new_rows]
+        for iid in order:
+            row = new_rows[iid]
+            old = self._rows.get(iid)
+            if old is None:
+                self.tree.insert('', 'end', iid=iid, values=row[0], tags=row[1])
+                current.append(iid)
+            elif old != row:
+                self.tree.item(iid, values=row[0], tags=row[1])
+
+        if current != order:
+            self.tree.set_children('', *order)
+
+        self._rows = new_rows
+        self._order = order
+
+    def append(self, rows: Iterable[Row]):
+        """Thêm dòng vào cuối (trang tiếp theo), dòng đã có thì cập nhật tại chỗ"""
+        for key, values, tags in rows:
+            iid = str(key)
+            row = (tuple(values), tuple(tags))
+            old = self._rows.get(iid)
+            if old is None:
+                self.tree.insert('', 'end', iid=iid, values=row[0], tags=row[1])
+                self._order.append(iid)
+            elif old != row:
+                self.tree.item(iid, values=row[0], tags=row[1])
+            self._rows[iid] = row
+
+    def clear(self):
+        """Xóa toàn bộ dòng"""
+        if self._order:
+            self.tree.delete(*self._order)
+        self._rows.clear()
+        self._order.clear()